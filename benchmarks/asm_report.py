@@ -0,0 +1,62 @@
+# benchmarks/asm_report.py
+# Code quality report (compiler.codegen.report) of the 32-bit code for the
+# whole corpus at one optimization level, one unit per program and function.
+# Save a report from a known-good compiler and compare later builds against
+# it; the exit status is 1 when a metric got worse, so a CI job can run:
+#
+#   python -m benchmarks.asm_report -O2 --save base.json      (on the base)
+#   python -m benchmarks.asm_report -O2 --compare base.json   (on the change)
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.report import diff_reports, format_diff, sum_reports
+from compiler.passes import PIPELINES
+from benchmarks.corpus import array_programs, call_programs, corpus
+
+
+def corpus_report(level):
+    units = {}
+    for name, src in corpus(20, 60) + call_programs(5) + array_programs(5):
+        report = compile_source(src, name=name, parser='rd', optimize=level).report
+        if report is None:
+            continue
+        units.update((f"{name}:{unit}", r) for unit, r in report['units'].items())
+    return {'units': units, 'total': sum_reports(units.values())}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="corpus code quality report")
+    ap.add_argument("-O", dest="level", type=int, default=0, choices=sorted(PIPELINES))
+    ap.add_argument("--save", metavar="PATH", help="write the report as JSON")
+    ap.add_argument("--compare", metavar="PATH", help="diff against a saved report")
+    ap.add_argument("--threshold", type=float, default=0.0,
+                    help="relative rise allowed before a metric counts as a regression")
+    args = ap.parse_args(argv)
+
+    report = corpus_report(args.level)
+    total = report['total']
+    print(f"-O{args.level}: {len(report['units'])} units, {total['instructions']} instructions, "
+          f"{total['cycles']} cycles ({total['weighted_cycles']} loop-weighted), "
+          f"{total['spill_operands']} spill operands, {total['loop_branches']} of "
+          f"{total['branches']} branches in loops")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            diff = diff_reports(json.load(f), report, args.threshold)
+        # Unit lines only for regressions; the corpus has hundreds of units
+        diff['units'] = {name: rows for name, rows in diff['units'].items()
+                         if any(bad for *_, bad in rows)}
+        print(format_diff(diff))
+        return 1 if diff['regressions'] else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
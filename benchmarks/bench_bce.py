@@ -0,0 +1,53 @@
+# benchmarks/bench_bce.py
+# Bounds checks on array loops (corpus.array_programs): static and dynamic
+# 'check' instructions, dynamic TAC instructions and the static cost of the
+# 32-bit code, for unoptimized TAC, -O without bounds-check elimination and
+# -O, with an output check of each.
+#
+#   python -m benchmarks.bench_bce
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.opt import optimize
+from benchmarks.corpus import array_programs
+
+MODES = ('plain', '-O no bce', '-O')
+WITHOUT_BCE = ('inline', 'sccp', 'copyprop')
+
+
+def main():
+    totals = {m: [0, 0, 0, 0] for m in MODES}
+    for name, src in array_programs(10):
+        tac = compile_source(src, name=name, parser='rd').tac
+        if tac is None:
+            continue
+        expected = run_tac(tac).output
+        for mode, code in zip(MODES, (tac, optimize(tac, pipeline=WITHOUT_BCE), optimize(tac))):
+            res = run_tac(code)
+            if res.output != expected:
+                print(f"OUTPUT MISMATCH: {name} ({mode})")
+                return 1
+            gen = X86StyleGenerator()
+            gen.generate(code)
+            row = (sum(1 for instr in code if instr[0] == 'check'),
+                   res.dynamic_count(('check',)), res.steps, gen.cost()['cycles'])
+            for k, c in enumerate(row):
+                totals[mode][k] += c
+    print(f"{'':>10} {'checks':>7} {'dyn checks':>10} {'dynamic':>9} {'static cost':>11}")
+    for mode in MODES:
+        row = totals[mode]
+        print(f"{mode:>10} " + " ".join(f"{c:>{w}}" for c, w in zip(row, (7, 10, 9, 11))))
+    before, after = totals[MODES[1]], totals[MODES[2]]
+    print(f"bce vs -O without it: checks -{(before[0] - after[0]) / before[0]:.1%}, "
+          f"dynamic checks -{(before[1] - after[1]) / before[1]:.1%}, "
+          f"dynamic -{(before[2] - after[2]) / before[2]:.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# benchmarks/bench_calls.py
+# Call overhead on call-heavy programs (corpus.call_programs): dynamic TAC
+# instructions, calls and call sequence instructions (param/arg/call/return)
+# and the static cost of the 32-bit code (which grows with inlining), for
+# unoptimized TAC, -O without inlining and -O, with an output check of each.
+#
+#   python -m benchmarks.bench_calls
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.opt import optimize
+from benchmarks.corpus import call_programs
+
+MODES = ('plain', '-O no inline', '-O')
+CALL_SEQUENCE = ('param', 'arg', 'call', 'return')
+
+
+def main():
+    totals = {m: [0, 0, 0, 0] for m in MODES}
+    for name, src in call_programs(10):
+        tac = compile_source(src, name=name, parser='rd').tac
+        if tac is None:
+            continue
+        expected = run_tac(tac).output
+        # An empty inline table turns inlining off
+        for mode, code in zip(MODES, (tac, optimize(tac, {}), optimize(tac))):
+            res = run_tac(code)
+            if res.output != expected:
+                print(f"OUTPUT MISMATCH: {name} ({mode})")
+                return 1
+            gen = X86StyleGenerator()
+            gen.generate(code)
+            row = (res.steps, res.dynamic_count(('call',)), res.dynamic_count(CALL_SEQUENCE),
+                   gen.cost()['cycles'])
+            for k, c in enumerate(row):
+                totals[mode][k] += c
+    print(f"{'':>13} {'dynamic':>9} {'calls':>7} {'call seq':>9} {'static cost':>11}")
+    for mode in MODES:
+        row = totals[mode]
+        print(f"{mode:>13} " + " ".join(f"{c:>{w}}" for c, w in zip(row, (9, 7, 9, 11))))
+    no_inline, inlined = totals[MODES[1]], totals[MODES[2]]
+    print(f"inlining vs -O without it: dynamic -{(no_inline[0] - inlined[0]) / no_inline[0]:.1%}, "
+          f"calls -{(no_inline[1] - inlined[1]) / no_inline[1]:.1%}, "
+          f"call sequence -{(no_inline[2] - inlined[2]) / no_inline[2]:.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# benchmarks/bench_copies.py
+# Temps, TAC copies and 32-bit movs over the corpus for assignments lowered
+# through a temp plus a copy, targeted straight at the variable, and targeted
+# followed by the optimizer (SCCP and global copy propagation), with an
+# output check of each against the first.
+#
+#   python -m benchmarks.bench_copies
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.intermediate import IRGenerator
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.opt import optimize
+from benchmarks.corpus import corpus
+
+TEMP = re.compile(r'(^|\.)t\d+$')
+MODES = ('temp + copy', 'targeted', 'targeted -O')
+
+
+def counts(tac):
+    temps = {i[3] for i in tac if isinstance(i[3], str) and TEMP.search(i[3])}
+    copies = sum(1 for i in tac if i[0] == '=')
+    asm = X86StyleGenerator().generate(tac)
+    movs = sum(1 for line in asm.splitlines() if line.lstrip().startswith('mov '))
+    return [len(temps), copies, run_tac(tac).dynamic_count(('=',)), movs]
+
+
+def main():
+    totals = {m: [0, 0, 0, 0] for m in MODES}
+    for name, src in corpus(40, 60):
+        result = compile_source(src, name=name, parser='rd')
+        if result.semantic_errors is None or result.semantic_errors:
+            continue
+        plain = IRGenerator(target_assignments=False).visit(result.ast)
+        targeted = IRGenerator().visit(result.ast)
+        expected = run_tac(plain).output
+        for mode, tac in zip(MODES, (plain, targeted, optimize(targeted))):
+            if run_tac(tac).output != expected:
+                print(f"OUTPUT MISMATCH: {name} ({mode})")
+                return 1
+            for k, c in enumerate(counts(tac)):
+                totals[mode][k] += c
+    print(f"{'':>12} {'temps':>8} {'copies':>8} {'dyn copies':>11} {'movs':>8}")
+    base = totals[MODES[0]]
+    for mode in MODES:
+        row = totals[mode]
+        print(f"{mode:>12} " + " ".join(f"{c:>{w}}" for c, w in zip(row, (8, 8, 11, 8))))
+    for mode in MODES[1:]:
+        row = totals[mode]
+        print(f"{mode}: " + ", ".join(f"{label} -{(b - c) / b:.1%}" for label, b, c in
+                                      zip(('temps', 'copies', 'dynamic copies', 'movs'), base, row)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# benchmarks/bench_direct.py
+# End-to-end compile latency (source text to assembly, parsing included) of
+# the samples and the synthetic corpus on the 32-bit target: -O0 straight
+# from the AST (compiler.codegen.direct), -O0 through TAC and -O2, with the
+# static cost of the code each route produces.
+#
+#   python -m benchmarks.bench_direct [--count N] [--statements N] [--repeat N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source, get_parser
+from benchmarks.corpus import array_programs, call_programs, sample_programs, synthetic_programs
+
+ROUTES = (
+    ('-O0 direct', {'optimize': 0}),
+    ('-O0 via TAC', {'optimize': 0, 'direct': False}),
+    ('-O2', {'optimize': 2}),
+)
+
+
+def measure(programs, options, parser, repeat):
+    # (best total seconds over repeat rounds, static cycles)
+    best, cycles = None, 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        results = [compile_source(src, name=name, parser=parser, **options) for name, src in programs]
+        for r in results:
+            r.asm
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    for r in results:
+        if r.report is not None:
+            cycles += r.report['total']['cycles']
+    return best, cycles
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=20)
+    ap.add_argument('--statements', type=int, default=200)
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--parser', choices=('ply', 'rd'), default='rd')
+    args = ap.parse_args()
+
+    get_parser(args.parser)
+    sets = (('samples', sample_programs()),
+            ('corpus', synthetic_programs(args.count, args.statements) + call_programs(5)
+             + array_programs(5)))
+    print(f"{'':<8} {'route':<12} {'total ms':>9} {'ms/program':>10} {'speedup':>8} {'cycles':>9}")
+    for set_name, programs in sets:
+        base = None
+        for route, options in ROUTES:
+            seconds, cycles = measure(programs, options, args.parser, args.repeat)
+            if base is None:
+                base = seconds
+            print(f"{set_name:<8} {route:<12} {seconds * 1000:>9.1f} "
+                  f"{seconds * 1000 / len(programs):>10.2f} {base / seconds:>7.2f}x {cycles:>9}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# benchmarks/bench_div.py
+# Division by constants: static cost of the 32-bit code for loops dividing
+# by literals (shifts and magic-number multiplies, compiler.codegen.divide)
+# against the same programs reading each divisor from a variable (idiv with
+# its zero and -1 checks), both at -O0 through TAC. A negative divisor is
+# written 0 - k, which stays an idiv until -O1 folds it; at -O2 constant
+# propagation turns the variables back into literals too. Both versions must
+# print the same as the interpreter.
+#
+#   python -m benchmarks.bench_div [--count N] [--loops N]
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.tac_interp import run_tac
+from benchmarks.corpus import division_programs
+
+ROUTES = (
+    ('literal -O0', True, 0),
+    ('variable -O0', False, 0),
+    ('variable -O2', False, 2),
+)
+METRICS = ('instructions', 'bytes', 'cycles', 'weighted_cycles')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=10)
+    ap.add_argument('--loops', type=int, default=8)
+    args = ap.parse_args()
+
+    totals = {route: dict.fromkeys(METRICS, 0) for route, _, _ in ROUTES}
+    idivs = dict.fromkeys(totals, 0)
+    for route, constant, level in ROUTES:
+        for name, src in division_programs(args.count, args.loops, constant=constant):
+            r = compile_source(src, name=name, parser='rd', optimize=level, direct=False)
+            expected = run_tac(compile_source(src, name=name, parser='rd').tac).stdout
+            if run_tac(r.tac).stdout != expected:
+                print(f"{name}: {route} output differs")
+                return 1
+            for m in METRICS:
+                totals[route][m] += r.report['total'][m]
+            idivs[route] += r.asm.count('  idiv ')
+    base = totals[ROUTES[1][0]]
+    print(f"{'route':<14} {'instrs':>7} {'bytes':>7} {'cycles':>7} {'weighted':>9} {'idiv':>5} {'vs idiv':>8}")
+    for route, _, _ in ROUTES:
+        t = totals[route]
+        print(f"{route:<14} {t['instructions']:>7} {t['bytes']:>7} {t['cycles']:>7} "
+              f"{t['weighted_cycles']:>9} {idivs[route]:>5} "
+              f"{(t['weighted_cycles'] - base['weighted_cycles']) / base['weighted_cycles']:>+8.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# benchmarks/bench_interp.py
+# TAC interpreter throughput and dynamic instruction counts over the corpus.
+#
+#   python -m benchmarks.bench_interp [--count N] [--statements N] [--profile NAME]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.tac_interp import TACInterpreter
+from benchmarks.corpus import corpus
+
+
+def compiled_corpus(count, statements):
+    # (name, tac) for every corpus program that compiles
+    out = []
+    for name, src in corpus(count, statements):
+        tac = compile_source(src, name=name, parser='rd').tac
+        if tac is not None:
+            out.append((name, tac))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=20)
+    ap.add_argument('--statements', type=int, default=100)
+    ap.add_argument('--profile', metavar='NAME', help='print the block profile of one program')
+    args = ap.parse_args()
+
+    total_steps = 0
+    t_compile = t_run = 0.0
+    for name, tac in compiled_corpus(args.count, args.statements):
+        t0 = time.perf_counter()
+        interp = TACInterpreter(tac)
+        t1 = time.perf_counter()
+        res = interp.run()
+        t2 = time.perf_counter()
+        t_compile += t1 - t0
+        t_run += t2 - t1
+        total_steps += res.steps
+        print(f"{name:>14}: {res.steps:>9} instrs  {len(res.output):>6} lines printed")
+        if args.profile == name:
+            print(res.format_profile())
+    print(f"compile {t_compile * 1000:.1f} ms, run {t_run * 1000:.1f} ms, "
+          f"{total_steps / max(t_run, 1e-9) / 1e6:.2f} M TAC instrs/s")
+
+
+if __name__ == '__main__':
+    main()
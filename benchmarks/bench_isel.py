@@ -0,0 +1,36 @@
+# benchmarks/bench_isel.py
+# Static size and latency of the 32-bit target with the original one-pattern
+# lowering versus the pattern-based instruction selector.
+#
+#   python -m benchmarks.bench_isel
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.codegen.x86 import X86StyleGenerator
+from benchmarks.bench_interp import compiled_corpus
+
+METRICS = ('instructions', 'bytes', 'cycles')
+
+
+def main():
+    totals = {False: dict.fromkeys(METRICS, 0), True: dict.fromkeys(METRICS, 0)}
+    print(f"{'program':>14} {'instrs':>7} {'select':>7} {'bytes':>7} {'select':>7} {'cycles':>7} {'select':>7}")
+    for name, tac in compiled_corpus(20, 100):
+        costs = {}
+        for select in (False, True):
+            gen = X86StyleGenerator(select=select)
+            gen.generate(tac)
+            costs[select] = gen.cost()
+            for m in METRICS:
+                totals[select][m] += costs[select][m]
+        cells = " ".join(f"{costs[False][m]:>7} {costs[True][m]:>7}" for m in METRICS)
+        print(f"{name:>14} {cells}")
+    cells = " ".join(f"{totals[False][m]:>7} {totals[True][m]:>7}" for m in METRICS)
+    print(f"{'total':>14} {cells}")
+    print(", ".join(f"{m} {(totals[True][m] - totals[False][m]) / totals[False][m]:+.1%}" for m in METRICS))
+
+
+if __name__ == '__main__':
+    main()
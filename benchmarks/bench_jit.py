@@ -0,0 +1,84 @@
+# benchmarks/bench_jit.py
+# Compile-and-run latency of the in-process JIT (--run, compiler.codegen.jit)
+# for a test suite of corpus programs: each is compiled for x86-64 and run
+# inside this process, and must print exactly what the TAC interpreter
+# prints. For comparison, the same programs through the interpreter and,
+# when nasm and gcc are installed, through nasm + gcc + a child process
+# (benchmarks.run_native).
+#
+#   python -m benchmarks.bench_jit [--count N] [--statements N] [-O LEVEL]
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.jit import supported
+from compiler.codegen.tac_interp import run_tac
+from benchmarks.corpus import array_programs, call_programs, corpus, division_programs
+from benchmarks.run_native import build, run
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=10)
+    ap.add_argument('--statements', type=int, default=80)
+    ap.add_argument('-O', '--optimize', type=int, default=2)
+    args = ap.parse_args()
+
+    if not supported():
+        print("skipped: in-process execution needs Linux on x86-64")
+        return 0
+    native = shutil.which('nasm') is not None and shutil.which('gcc') is not None
+    programs = (corpus(args.count, args.statements) + call_programs(args.count)
+                + array_programs(args.count) + division_programs(args.count))
+    # Milliseconds per program: compile only, then each way of running
+    times = {'compile': [], 'jit': [], 'tac': [], 'native': []}
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, src in programs:
+            t0 = time.perf_counter()
+            result = compile_source(src, name=name, parser='rd', target='x86_64',
+                                    optimize=args.optimize)
+            units = result.code_units
+            t1 = time.perf_counter()
+            if units is None:
+                continue
+            got = result.run()
+            t2 = time.perf_counter()
+            expected = run_tac(result.tac).stdout
+            t3 = time.perf_counter()
+            times['compile'].append((t1 - t0) * 1000)
+            times['jit'].append((t2 - t1) * 1000)
+            times['tac'].append((t3 - t2) * 1000)
+            if got.status != 0 or got.stdout != expected:
+                failures += 1
+                print(f"{name}: JIT output differs from the interpreter")
+                continue
+            if native:
+                t0 = time.perf_counter()
+                out, _ = run(build(result.asm, tmp, name))
+                times['native'].append((time.perf_counter() - t0) * 1000)
+                if out != expected:
+                    failures += 1
+                    print(f"{name}: native output differs from the interpreter")
+
+    print(f"{len(times['jit'])} programs, -O{args.optimize}, {failures} failures")
+    print(f"{'per program':<24} {'total ms':>9} {'median ms':>10}")
+    rows = (('compile (x86-64 code)', 'compile'), ('JIT encode + run', 'jit'),
+            ('TAC interpreter', 'tac'), ('nasm + gcc + exec', 'native'))
+    for label, key in rows:
+        if times[key]:
+            print(f"{label:<24} {sum(times[key]):>9.1f} {statistics.median(times[key]):>10.2f}")
+        else:
+            print(f"{label:<24} {'skipped: nasm or gcc not found':>20}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
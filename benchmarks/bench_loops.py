@@ -0,0 +1,47 @@
+# benchmarks/bench_loops.py
+# Dynamic instruction and branch counts of while loops lowered in the
+# original (test at top + goto) and rotated (guard + test at bottom) forms.
+#
+#   python -m benchmarks.bench_loops
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.intermediate import IRGenerator
+from compiler.codegen.tac_interp import run_tac
+from benchmarks.corpus import corpus
+
+BRANCH_OPS = ('goto', 'if_false', 'if_true')
+
+
+def main():
+    totals = {False: [0, 0], True: [0, 0]}
+    print(f"{'program':>14} {'instrs':>9} {'rotated':>9} {'branches':>9} {'rotated':>9}")
+    for name, src in corpus(20, 100):
+        result = compile_source(src, name=name, parser='rd')
+        if result.semantic_errors is None or result.semantic_errors:
+            continue
+        row = []
+        outputs = []
+        for rotate in (False, True):
+            res = run_tac(IRGenerator(rotate_loops=rotate).visit(result.ast))
+            branches = res.dynamic_count(BRANCH_OPS)
+            totals[rotate][0] += res.steps
+            totals[rotate][1] += branches
+            row.append((res.steps, branches))
+            outputs.append(res.output)
+        if outputs[0] != outputs[1]:
+            print(f"OUTPUT MISMATCH: {name}")
+            return 1
+        (s0, b0), (s1, b1) = row
+        print(f"{name:>14} {s0:>9} {s1:>9} {b0:>9} {b1:>9}")
+    (s0, b0), (s1, b1) = totals[False], totals[True]
+    print(f"{'total':>14} {s0:>9} {s1:>9} {b0:>9} {b1:>9}")
+    print(f"dynamic instructions -{(s0 - s1) / s0:.1%}, branches -{(b0 - b1) / b0:.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
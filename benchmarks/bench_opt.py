@@ -0,0 +1,55 @@
+# benchmarks/bench_opt.py
+# Static TAC size and dynamic instruction/branch counts of every corpus
+# program before and after the SSA optimizer (compiler.opt), plus an output
+# check of the optimized TAC against the unoptimized one.
+#
+#   python -m benchmarks.bench_opt
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.tac_interp import run_tac
+from compiler.opt import optimize
+from benchmarks.corpus import corpus
+
+BRANCH_OPS = ('goto', 'if_false', 'if_true')
+
+
+def main():
+    totals = [[0, 0, 0], [0, 0, 0]]
+    elapsed = 0.0
+    print(f"{'program':>14} {'static':>7} {'opt':>7} {'dynamic':>9} {'opt':>9} "
+          f"{'branches':>9} {'opt':>9}")
+    for name, src in corpus(40, 60):
+        tac = compile_source(src, name=name, parser='rd').tac
+        if tac is None:
+            continue
+        t0 = time.perf_counter()
+        opt = optimize(tac)
+        elapsed += time.perf_counter() - t0
+        row = []
+        outputs = []
+        for i, code in enumerate((tac, opt)):
+            res = run_tac(code)
+            counts = (len(code), res.steps, res.dynamic_count(BRANCH_OPS))
+            for k, c in enumerate(counts):
+                totals[i][k] += c
+            row.append(counts)
+            outputs.append(res.output)
+        if outputs[0] != outputs[1]:
+            print(f"OUTPUT MISMATCH: {name}")
+            return 1
+        (n0, s0, b0), (n1, s1, b1) = row
+        print(f"{name:>14} {n0:>7} {n1:>7} {s0:>9} {s1:>9} {b0:>9} {b1:>9}")
+    (n0, s0, b0), (n1, s1, b1) = totals
+    print(f"{'total':>14} {n0:>7} {n1:>7} {s0:>9} {s1:>9} {b0:>9} {b1:>9}")
+    print(f"static -{(n0 - n1) / n0:.1%}, dynamic -{(s0 - s1) / s0:.1%}, "
+          f"branches -{(b0 - b1) / b0:.1%}; optimizer time {elapsed * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
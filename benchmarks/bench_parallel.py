@@ -0,0 +1,64 @@
+# benchmarks/bench_parallel.py
+# Method-granular parallel compilation of large multi-class programs:
+# wall time of the serial pipeline against compiler.parallel with 1, 2, 4 ...
+# worker processes (up to the CPU count), plus an output identity check.
+#
+#   python -m benchmarks.bench_parallel [--classes N] [--methods N] [--statements N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.parallel import compile_parallel, make_executor
+from benchmarks.corpus import multi_class_programs
+
+
+def worker_counts(limit):
+    n, out = 1, []
+    while n < limit:
+        out.append(n)
+        n *= 2
+    return out + [limit]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--classes', type=int, default=16)
+    ap.add_argument('--methods', type=int, default=8)
+    ap.add_argument('--statements', type=int, default=40)
+    ap.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = ap.parse_args()
+
+    name, src = multi_class_programs(1, args.classes, args.methods, args.statements)[0]
+    print(f"{name}: {args.classes} classes x {args.methods} methods, "
+          f"{len(src) / 1e6:.2f} MB, {os.cpu_count()} CPUs")
+
+    t0 = time.perf_counter()
+    serial = compile_source(src, name=name, parser='rd')
+    serial.asm
+    base = time.perf_counter() - t0
+    print(f"{'serial':>10}: {base * 1000:8.1f} ms")
+
+    for workers in worker_counts(args.max_workers):
+        executor = make_executor(workers) if workers > 1 else None
+        if executor is not None:
+            # Start the workers before timing
+            list(executor.map(abs, range(workers)))
+        t0 = time.perf_counter()
+        built = compile_parallel(src, workers=workers, executor=executor)
+        elapsed = time.perf_counter() - t0
+        if executor is not None:
+            executor.shutdown()
+        same = built['tac'] == serial.tac and built['asm'] == serial.asm
+        print(f"{workers:>3} worker{'s' if workers > 1 else ' '}: {elapsed * 1000:8.1f} ms  "
+              f"speedup {base / elapsed:4.2f}x  {'identical' if same else 'OUTPUT DIFFERS'}")
+        if not same:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
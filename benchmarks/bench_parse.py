@@ -0,0 +1,73 @@
+# benchmarks/bench_parse.py
+# Differential check of the PLY and recursive-descent parsers plus a
+# parse-throughput comparison.
+#
+#   python -m benchmarks.bench_parse [--count N] [--statements N] [--repeat N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.parser import build_parser
+from compiler.rd_parser import build_rd_parser
+from compiler.utils.errors import CompilerError
+from benchmarks.corpus import corpus
+
+
+def ast_key(node):
+    # Structural identity of an AST: node class, label and children
+    if node is None:
+        return None
+    if isinstance(node, list):
+        return [ast_key(c) for c in node]
+    return (node.__class__.__name__, node.name,
+            [ast_key(c) for c in getattr(node, 'children', [])])
+
+
+def try_parse(parser, lexer, source):
+    try:
+        return parser.parse(source, lexer=lexer)
+    except CompilerError:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=20)
+    ap.add_argument('--statements', type=int, default=200)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    programs = corpus(args.count, args.statements)
+    ply_parser, ply_lexer = build_parser()
+    rd_parser, rd_lexer = build_rd_parser()
+
+    # Differential check
+    mismatches = 0
+    for name, src in programs:
+        a = try_parse(ply_parser, ply_lexer, src)
+        b = try_parse(rd_parser, rd_lexer, src)
+        if ast_key(a) != ast_key(b):
+            mismatches += 1
+            print(f"MISMATCH: {name}")
+    print(f"{len(programs)} programs, {mismatches} AST mismatches")
+
+    # Throughput (only programs both backends accept)
+    ok = [src for _, src in programs if try_parse(rd_parser, rd_lexer, src) is not None]
+    n_bytes = sum(len(s) for s in ok)
+    for label, parser, lexer in (('ply', ply_parser, ply_lexer), ('rd', rd_parser, rd_lexer)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for src in ok:
+                parser.parse(src, lexer=lexer)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        print(f"{label:>4}: {best * 1000:8.2f} ms  {n_bytes / best / 1e6:6.2f} MB/s")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# benchmarks/bench_passes.py
+# Optimization levels over the whole corpus (samples, synthetic, call and
+# array programs): per level, the statistics of every pass (runs, time, IR
+# size before and after, changes) as reported through a PassStats hook, then
+# static TAC size, dynamic TAC instructions and static cost of the 32-bit
+# code, with an output check of each level.
+#
+#   python -m benchmarks.bench_passes
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.passes import PIPELINES, PassManager, PassStats
+from benchmarks.corpus import array_programs, call_programs, corpus
+
+
+def main():
+    programs = corpus(20, 60) + call_programs(5) + array_programs(5)
+    stats = {level: PassStats() for level in PIPELINES}
+    totals = {level: [0, 0, 0] for level in PIPELINES}
+    for name, src in programs:
+        tac = compile_source(src, name=name, parser='rd').tac
+        if tac is None:
+            continue
+        expected = run_tac(tac).output
+        for level in PIPELINES:
+            passes = PassManager(level, [stats[level]])
+            code = passes.run_tac(tac)
+            res = run_tac(code)
+            if res.output != expected:
+                print(f"OUTPUT MISMATCH: {name} (-O{level})")
+                return 1
+            gen = X86StyleGenerator(passes=passes)
+            gen.generate(code)
+            for k, c in enumerate((len(code), res.steps, gen.cost()['cycles'])):
+                totals[level][k] += c
+    for level, names in PIPELINES.items():
+        if names:
+            print(f"-O{level}: {', '.join(names)}")
+            print(stats[level].format())
+            print()
+    print(f"{'':>4} {'static':>8} {'dynamic':>9} {'static cost':>11} {'pass time ms':>12}")
+    for level in PIPELINES:
+        ms = sum(t['ms'] for t in stats[level].totals.values())
+        row = totals[level]
+        print(f"-O{level:<2} {row[0]:>8} {row[1]:>9} {row[2]:>11} {ms:>12.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmarks/bench_peval.py
+# Partial evaluation (compiler.opt.peval, the first pass of -O3) against -O2
+# on the corpus: how many programs were evaluated completely, paused at a
+# label of main or left alone, their dynamic TAC instructions, the static
+# size of the 32-bit code and the optimization time, with an output check
+# of each. --fuel sets the step budget.
+#
+#   python -m benchmarks.bench_peval [--count N] [--fuel N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.cfg import JUMP_OPS
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.opt import optimize, peval
+from compiler.opt.peval import FUEL
+from benchmarks.corpus import array_programs, call_programs, corpus, division_programs
+
+MODES = ('-O2', '-O3')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=10)
+    ap.add_argument('--fuel', type=int, default=FUEL)
+    args = ap.parse_args()
+
+    programs = (corpus(args.count, 80) + call_programs(args.count)
+                + array_programs(args.count) + division_programs(args.count))
+    totals = {mode: {'dynamic': 0, 'static': 0, 'ms': 0.0} for mode in MODES}
+    kinds = {'evaluated': 0, 'paused': 0, 'unchanged': 0}
+    for name, src in programs:
+        tac = compile_source(src, name=name, parser='rd').tac
+        if tac is None:
+            continue
+        expected = run_tac(tac).output
+        for mode in MODES:
+            t0 = time.perf_counter()
+            code, changes = peval(tac, args.fuel) if mode == '-O3' else (tac, 0)
+            code = optimize(code, pipeline=2)
+            gen = X86StyleGenerator()
+            gen.generate(code)
+            totals[mode]['ms'] += (time.perf_counter() - t0) * 1000
+            res = run_tac(code)
+            if res.output != expected:
+                print(f"OUTPUT MISMATCH: {name} ({mode})")
+                return 1
+            totals[mode]['dynamic'] += res.steps
+            totals[mode]['static'] += gen.cost()['instructions']
+            if mode == '-O3':
+                kinds['unchanged' if not changes else
+                      'paused' if any(instr[0] in JUMP_OPS for instr in code) else 'evaluated'] += 1
+    print(f"fuel {args.fuel}: " + ", ".join(f"{n} {kind}" for kind, n in kinds.items()))
+    print(f"{'':>4} {'dynamic TAC':>12} {'static x86':>11} {'ms':>8}")
+    for mode in MODES:
+        t = totals[mode]
+        print(f"{mode} {t['dynamic']:>12} {t['static']:>11} {t['ms']:>8.1f}")
+    before, after = totals['-O2'], totals['-O3']
+    print(f"-O3 vs -O2: dynamic {(after['dynamic'] - before['dynamic']) / before['dynamic']:+.1%}, "
+          f"static {(after['static'] - before['static']) / before['static']:+.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
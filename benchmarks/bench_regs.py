@@ -0,0 +1,89 @@
+# benchmarks/bench_regs.py
+# Register pressure of the 32-bit target with binary operands evaluated left
+# to right versus the operand needing more registers first (Sethi-Ullman
+# labels): spill slots, spill operands, pushes and pops, and loop-weighted
+# cycles of compiler.codegen.report, on deep expressions and on the corpus.
+# Two routes: the TAC route at -O LEVEL (IRGenerator.reorder_operands, each
+# output checked against the interpreter) and, at -O0, the direct route
+# (DirectGenerator.reorder_operands; run compiler/tests to check outputs).
+#
+#   python -m benchmarks.bench_regs [--count N] [--depth N] [-O LEVEL]
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import compile_source
+from compiler.codegen.direct import DirectGenerator
+from compiler.codegen.intermediate import IRGenerator
+from compiler.codegen.report import program_report
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.opt import optimize
+from benchmarks.corpus import corpus, expression_programs
+
+METRICS = ('spill_slots', 'spill_operands', 'stack', 'instructions', 'weighted_cycles')
+MODES = ('left first', 'need first')
+
+
+def units_of(result, reorder, level):
+    # The 32-bit units of a checked program, or None after an output mismatch;
+    # level None is the direct route
+    if level is None:
+        return DirectGenerator(reorder_operands=reorder).generate_units(result.ast)
+    tac = IRGenerator(reorder_operands=reorder).visit(result.ast)
+    if level:
+        tac = optimize(tac, pipeline=level)
+    if run_tac(tac).output != run_tac(result.tac).output:
+        return None
+    return X86StyleGenerator().generate_units(tac)
+
+
+def measure(programs, level):
+    # {mode: {metric: total}}, or None after an output mismatch
+    totals = {mode: dict.fromkeys(METRICS, 0) for mode in MODES}
+    for name, src in programs:
+        result = compile_source(src, name=name, parser='rd')
+        if result.semantic_errors is None or result.semantic_errors:
+            continue
+        for mode in MODES:
+            units = units_of(result, mode == 'need first', level)
+            if units is None:
+                print(f"OUTPUT MISMATCH: {name} ({mode})")
+                return None
+            total = program_report(units)['total']
+            for m in METRICS:
+                totals[mode][m] += total['classes'][m] if m == 'stack' else total[m]
+    return totals
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=10)
+    ap.add_argument('--depth', type=int, default=8)
+    ap.add_argument('-O', '--optimize', type=int, default=2)
+    args = ap.parse_args()
+
+    suites = (('deep expressions', expression_programs(args.count, depth=args.depth)),
+              ('corpus', corpus(args.count, 80)))
+    routes = ((f"TAC route, -O{args.optimize}", args.optimize), ("direct route, -O0", None))
+    for title, level in routes:
+        print(title)
+        print(f"{'':>28} " + " ".join(f"{m:>15}" for m in METRICS))
+        for label, programs in suites:
+            totals = measure(programs, level)
+            if totals is None:
+                return 1
+            for mode in MODES:
+                print(f"{label + ', ' + mode:>28} "
+                      + " ".join(f"{totals[mode][m]:>15}" for m in METRICS))
+            before, after = totals['left first'], totals['need first']
+            print(f"{'':>28} " + " ".join(
+                f"{(after[m] - before[m]) / before[m]:>+15.1%}" if before[m] else f"{'-':>15}"
+                for m in METRICS))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
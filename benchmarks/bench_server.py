@@ -0,0 +1,70 @@
+# benchmarks/bench_server.py
+# Per-file process spawn (python main.py file.java) versus requests to a warm
+# compile server on a Unix socket.
+#
+#   python -m benchmarks.bench_server [--files N] [--workers N]
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from compiler.server import request
+from benchmarks.corpus import synthetic_programs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--files', type=int, default=20)
+    ap.add_argument('--statements', type=int, default=50)
+    ap.add_argument('--workers', type=int, default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, src in synthetic_programs(args.files, args.statements):
+            path = os.path.join(tmp, name + '.java')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(src)
+            paths.append(path)
+
+        # One process per file, as the build system does today
+        t0 = time.perf_counter()
+        for path in paths:
+            subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), path],
+                           cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        spawn = time.perf_counter() - t0
+
+        sock = os.path.join(tmp, 'mjc.sock')
+        cmd = [sys.executable, os.path.join(ROOT, 'main.py'), '--serve', '--socket', sock]
+        if args.workers:
+            cmd += ['--workers', str(args.workers)]
+        server = subprocess.Popen(cmd, cwd=tmp, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(sock):
+                time.sleep(0.05)
+            # Warm-up request: worker start-up is a one-off cost
+            request(sock, [{'id': 'warm', 'path': paths[0]}])
+
+            t0 = time.perf_counter()
+            resps = request(sock, [{'id': i, 'path': p, 'output_dir': os.path.join(tmp, 'out')}
+                                   for i, p in enumerate(paths)])
+            served = time.perf_counter() - t0
+            failed = [i for i, r in resps.items() if not r['ok']]
+            request(sock, [{'id': 'bye', 'op': 'shutdown'}])
+        finally:
+            server.wait(timeout=30)
+
+    n = len(paths)
+    print(f"{n} files, {len(failed)} failed via server")
+    print(f"  spawn : {spawn * 1000:9.1f} ms  ({spawn / n * 1000:7.2f} ms/file)")
+    print(f"  server: {served * 1000:9.1f} ms  ({served / n * 1000:7.2f} ms/file)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
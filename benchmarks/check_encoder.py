@@ -0,0 +1,170 @@
+# benchmarks/check_encoder.py
+# Checks the in-process encoder (compiler.codegen.encoder, --emit=obj)
+# against objdump: the 32-bit object of every corpus program, on each route
+# and print runtime, is disassembled again, and every instruction must
+# decode at the offset the encoder gave it with the same mnemonic, operands,
+# branch target and relocated symbols. Also times encoding an object
+# against rendering the assembly text. Skipped when objdump is missing.
+#
+#   python -m benchmarks.check_encoder [--count N] [--statements N]
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import RUNTIMES, compile_source, get_backend
+from compiler.codegen.encoder import (CONDITIONS, assemble, branch_cc, operand_size,
+                                      parse_address, parse_operand)
+from benchmarks.corpus import array_programs, call_programs, corpus, division_programs
+
+ROUTES = (
+    ('-O0 direct', {'optimize': 0}),
+    ('-O0 via TAC', {'optimize': 0, 'direct': False}),
+    ('-O2', {'optimize': 2}),
+)
+INSTR = re.compile(r'^\s*([0-9a-f]+):\t[0-9a-f ]+\t(.*)$')
+RELOC = re.compile(r'^\s*([0-9a-f]+): R_386_\w+\s+(\S+)$')
+
+
+def canonical(mnemonic, operands, size, target=None):
+    # Comparable form of one instruction: condition codes instead of
+    # mnemonic aliases, addresses as (base, index, scale, disp) without the
+    # symbol, values modulo the operand size
+    mask = (1 << (8 * size)) - 1
+    cc = branch_cc(mnemonic)
+    if cc is not None:
+        return ('j', cc), (target,)
+    if mnemonic.startswith('set') and mnemonic[3:] in CONDITIONS:
+        mnemonic = ('set', CONDITIONS[mnemonic[3:]])
+    out = []
+    for op in operands:
+        if op[0] == 'reg':
+            out.append(op[:3])
+        elif op[0] == 'mem':
+            base, index, scale, disp = op[1:5]
+            out.append(('mem', base, index, scale if index is not None else 1, disp & 0xffffffff))
+        else:
+            out.append(('imm', op[1] & mask))
+    if mnemonic == 'imul' and len(out) == 2 and out[1][0] == 'imm':
+        out.insert(1, out[0])
+    if mnemonic in ('jmp', 'call'):
+        out = [target]
+    return mnemonic, tuple(out)
+
+
+def ours(instr, labels):
+    # (canonical instruction, relocated symbols) of an encoder listing entry
+    _, mnemonic, operands = instr
+    if mnemonic in ('jmp', 'call') or branch_cc(mnemonic) is not None:
+        target = labels.get(operands[0])
+        return canonical(mnemonic, (), 4, target), [] if target is not None else [operands[0]]
+    ops = [parse_operand(o) for o in operands]
+    if mnemonic == 'rep':
+        return ('rep movsb', ()), []
+    symbols = [op[5] if op[0] == 'mem' else op[2] for op in ops
+               if op[0] in ('mem', 'imm') and (op[5] if op[0] == 'mem' else op[2])]
+    return canonical(mnemonic, ops, operand_size(ops)), symbols
+
+
+def objdump_operand(text):
+    text = re.sub(r'^(BYTE|WORD|DWORD) PTR ', '', text.strip())
+    if text.startswith('ds:'):
+        return ('mem', None, None, 1, int(text[3:], 0), None, None)
+    if text.startswith('['):
+        return ('mem', *parse_address(text[1:-1]), None)
+    return parse_operand(text)
+
+
+def theirs(text, extern):
+    # Canonical form of an objdump -M intel instruction
+    if text.startswith('rep movs BYTE'):
+        return ('rep movsb', ())
+    mnemonic, _, rest = text.partition(' ')
+    rest = rest.strip()
+    if mnemonic in ('jmp', 'call') or branch_cc(mnemonic) is not None:
+        return canonical(mnemonic, (), 4, None if extern else int(rest.split()[0], 16))
+    ops = [objdump_operand(o) for o in rest.split(',')] if rest else []
+    return canonical(mnemonic, ops, operand_size(ops))
+
+
+def disassemble(obj, workdir):
+    # [(offset, text, [relocated symbols])] of the .text section
+    path = os.path.join(workdir, 'check.o')
+    with open(path, 'wb') as f:
+        f.write(obj)
+    listing = subprocess.run(['objdump', '-d', '-r', '-M', 'intel', '--insn-width=16', path],
+                             capture_output=True, text=True, check=True).stdout
+    out = []
+    for line in listing.splitlines():
+        m = RELOC.match(line)
+        if m:
+            out[-1][2].append(m.group(2))
+            continue
+        m = INSTR.match(line)
+        if m:
+            out.append((int(m.group(1), 16), m.group(2).strip(), []))
+    return out
+
+
+def check(units, backend, workdir):
+    # Mismatch messages for one program
+    text = assemble(backend.sections(units)['text'])
+    decoded = disassemble(backend.object_file(units), workdir)
+    if len(decoded) != len(text['listing']):
+        return [f"{len(text['listing'])} instructions encoded, {len(decoded)} decoded"]
+    problems = []
+    for instr, (offset, dis, symbols) in zip(text['listing'], decoded):
+        expected, expected_symbols = ours(instr, text['labels'])
+        got = theirs(dis, bool(symbols) and expected[0] == 'call')
+        if offset != instr[0] or got != expected or sorted(symbols) != sorted(expected_symbols):
+            problems.append(f"{instr[0]:x}: {instr[1]} {', '.join(instr[2])}  decodes as  "
+                            f"{offset:x}: {dis} {symbols}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=10)
+    ap.add_argument('--statements', type=int, default=80)
+    args = ap.parse_args()
+
+    if shutil.which('objdump') is None:
+        print("skipped: objdump not found")
+        return 0
+    programs = (corpus(args.count, args.statements) + call_programs(5) + array_programs(5)
+                + division_programs(5) + division_programs(5, constant=False))
+    failures = checked = 0
+    seconds = {'asm': 0.0, 'obj': 0.0}
+    with tempfile.TemporaryDirectory() as tmp:
+        for runtime in RUNTIMES:
+            backend = get_backend('x86', runtime)
+            for route, options in ROUTES:
+                for name, src in programs:
+                    units = compile_source(src, name=name, parser='rd', runtime=runtime,
+                                           **options).code_units
+                    if units is None:
+                        continue
+                    for kind, emit in (('asm', backend.assemble), ('obj', backend.object_file)):
+                        t0 = time.perf_counter()
+                        emit(units)
+                        seconds[kind] += time.perf_counter() - t0
+                    problems = check(units, backend, tmp)
+                    checked += 1
+                    if problems:
+                        failures += 1
+                        print(f"{name} ({route}, {runtime}): {len(problems)} mismatches")
+                        for p in problems[:5]:
+                            print(f"  {p}")
+    print(f"{checked} objects checked, {failures} with mismatches")
+    print(f"assembly text {seconds['asm'] * 1000:.1f} ms, object file {seconds['obj'] * 1000:.1f} ms")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
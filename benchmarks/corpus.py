@@ -0,0 +1,342 @@
+# benchmarks/corpus.py
+# Deterministic synthetic MiniJava programs for benchmarks and differential
+# checks. Every generated program is well-typed and terminates.
+import glob
+import os
+import random
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), '..', 'compiler', 'tests', 'samples')
+
+
+def sample_programs():
+    # (name, source) for every sample program shipped with the compiler
+    out = []
+    for path in sorted(glob.glob(os.path.join(SAMPLES_DIR, '*.java'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            out.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return out
+
+
+class ProgramGenerator:
+    def __init__(self, seed=0, n_vars=8, max_depth=3):
+        self.rng = random.Random(seed)
+        self.vars = [f"v{i}" for i in range(n_vars)]
+        self.max_depth = max_depth
+        self.loop_count = 0
+        self.counters = []
+        # (object, method) pairs expressions may call (call_program)
+        self.calls = []
+
+    def expr(self, depth=0):
+        rng = self.rng
+        if depth >= 3 or rng.random() < 0.3:
+            if self.calls and rng.random() < 0.3:
+                return self.call()
+            if rng.random() < 0.5:
+                return str(rng.randint(0, 9))
+            return rng.choice(self.vars)
+        op = rng.choice(['+', '-', '*'])
+        left = self.expr(depth + 1)
+        right = self.expr(depth + 1)
+        if rng.random() < 0.3:
+            return f"({left} {op} {right})"
+        return f"{left} {op} {right}"
+
+    def call(self):
+        rng = self.rng
+        obj, method = rng.choice(self.calls)
+
+        def leaf():
+            return str(rng.randint(0, 9)) if rng.random() < 0.5 else rng.choice(self.vars)
+        if method == 'sum':
+            # recursion depth stays small
+            args = [str(rng.randint(0, 9))]
+        else:
+            args = [leaf() for _ in range(CALL_ARITY[method])]
+        return f"{obj}.{method}({', '.join(args)})"
+
+    def cond(self):
+        return f"{self.expr(1)} < {self.expr(1)}"
+
+    def statement(self, depth, indent):
+        rng = self.rng
+        pad = "    " * indent
+        kind = rng.random()
+        if depth < self.max_depth and kind < 0.15:
+            then_s = self.block(depth + 1, indent)
+            else_s = self.block(depth + 1, indent)
+            return f"{pad}if ({self.cond()}) {then_s} else {else_s}\n"
+        if depth < self.max_depth and kind < 0.25:
+            # Bounded counting loop on a dedicated counter
+            self.loop_count += 1
+            ctr = f"k{self.loop_count}"
+            self.counters.append(ctr)
+            body = self.block(depth + 1, indent, tail=f"{ctr} = {ctr} + 1;")
+            return (f"{pad}{ctr} = 0;\n"
+                    f"{pad}while ({ctr} < {rng.randint(1, 4)}) {body}\n")
+        if kind < 0.4:
+            return f"{pad}System.out.println({self.expr()});\n"
+        return f"{pad}{rng.choice(self.vars)} = {self.expr()};\n"
+
+    def block(self, depth, indent, tail=None):
+        pad = "    " * (indent + 1)
+        body = "".join(self.statement(depth, indent + 1)
+                       for _ in range(self.rng.randint(1, 3)))
+        if tail:
+            body += f"{pad}{tail}\n"
+        return "{\n" + body + "    " * indent + "}"
+
+    def body(self, n_statements, indent=2):
+        # (declarations, initialisations, statements) over self.vars
+        self.counters = []
+        self.loop_count = 0
+        pad = "    " * indent
+        stmts = "".join(self.statement(0, indent) for _ in range(n_statements))
+        decls = "".join(f"{pad}int {v};\n" for v in self.vars + self.counters)
+        inits = "".join(f"{pad}{v} = {i};\n" for i, v in enumerate(self.vars))
+        return decls, inits, stmts
+
+    def program(self, name="Synth", n_statements=50):
+        decls, inits, body = self.body(n_statements)
+        return (f"public class {name} {{\n"
+                f"    public static void main(String[] args) {{\n"
+                f"{decls}{inits}{body}"
+                f"    }}\n"
+                f"}}\n")
+
+    def method(self, name, n_statements):
+        decls, inits, body = self.body(n_statements)
+        return (f"    public int {name}(int p0, int p1) {{\n"
+                f"{decls}{inits}{body}"
+                f"        return {self.expr()} + p0 * p1;\n"
+                f"    }}\n")
+
+    def class_program(self, name="Multi", n_classes=10, n_methods=10, n_statements=50):
+        # A main class plus n_classes classes of n_methods independent methods
+        out = [self.program(name, n_statements)]
+        for c in range(n_classes):
+            fields = "".join(f"    int f{i};\n" for i in range(2))
+            methods = "".join(self.method(f"m{m}", n_statements) for m in range(n_methods))
+            out.append(f"class C{c} {{\n{fields}{methods}}}\n")
+        return "".join(out)
+
+    def call_class(self, name):
+        k1, k2 = self.rng.randint(2, 9), self.rng.randint(2, 9)
+        return (f"class {name} {{\n"
+                f"    int f0;\n"
+                f"    int f1;\n"
+                f"    public int get() {{ return f0; }}\n"
+                f"    public int set(int v) {{ f0 = v; return v; }}\n"
+                f"    public int add(int a, int b) {{ f1 = f1 + a; return a * {k1} + b; }}\n"
+                f"    public int mix(int a, int b, int c) {{\n"
+                f"        int t;\n"
+                f"        t = this.add(a, b) * {k2};\n"
+                f"        if (c < t) t = t - c; else t = c + this.get();\n"
+                f"        return t + f1;\n"
+                f"    }}\n"
+                f"    public int sum(int n) {{\n"
+                f"        int r;\n"
+                f"        if (n < 1) r = 0; else r = n + this.sum(n - 1);\n"
+                f"        return r;\n"
+                f"    }}\n"
+                f"}}\n")
+
+    def call_program(self, name="Calls", n_classes=3, n_statements=40):
+        # main calls small accessors, a medium method and a recursive one on
+        # objects of n_classes classes, from inside its expressions
+        objs = [f"o{c}" for c in range(n_classes)]
+        self.calls = [(o, m) for o in objs for m in CALL_ARITY]
+        decls, inits, body = self.body(n_statements)
+        self.calls = []
+        pad = "        "
+        decls += "".join(f"{pad}C{c} o{c};\n" for c in range(n_classes))
+        inits += "".join(f"{pad}o{c} = new C{c}();\n" for c in range(n_classes))
+        out = [f"public class {name} {{\n"
+               f"    public static void main(String[] args) {{\n"
+               f"{decls}{inits}{body}"
+               f"    }}\n"
+               f"}}\n"]
+        out.extend(self.call_class(f"C{c}") for c in range(n_classes))
+        return "".join(out)
+
+    def array_loop(self, arrays, ctr):
+        # One loop over an int[]: the shapes bounds-check elimination is for
+        # (counted up to .length, possibly by a stride, across two arrays
+        # under a guard) and one it cannot prove (indexing from the end)
+        rng = self.rng
+        a, b = rng.sample(arrays, 2)
+        v = rng.choice(self.vars)
+        kind = rng.randrange(5)
+        step = rng.randint(2, 3) if kind == 1 else 1
+        if kind == 0:
+            body = f"{a}[{ctr}] = {self.expr(1)};"
+        elif kind == 1:
+            body = f"{v} = {v} + {a}[{ctr}];"
+        elif kind == 2:
+            body = (f"if ({ctr} < {b}.length) {b}[{ctr}] = {a}[{ctr}] + {v};"
+                    f" else {v} = {v} + 1;")
+        elif kind == 3:
+            body = f"{a}[{ctr}] = {a}[{ctr}] * 3 + {ctr};"
+        else:
+            body = f"{v} = {v} - {a}[{a}.length - 1 - {ctr}];"
+        return (f"        {ctr} = 0;\n"
+                f"        while ({ctr} < {a}.length) {{\n"
+                f"            {body}\n"
+                f"            {ctr} = {ctr} + {step};\n"
+                f"        }}\n")
+
+    def array_program(self, name="Arrays", n_arrays=3, n_loops=12):
+        # main over n_arrays arrays of different lengths, all loops
+        arrays = [f"a{i}" for i in range(n_arrays)]
+        ctrs = [f"k{i}" for i in range(n_loops)]
+        pad = "        "
+        decls = "".join(f"{pad}int[] {a};\n" for a in arrays)
+        decls += "".join(f"{pad}int {v};\n" for v in self.vars + ctrs)
+        inits = "".join(f"{pad}{a} = new int[{self.rng.randint(20, 60)}];\n" for a in arrays)
+        inits += "".join(f"{pad}{v} = {i};\n" for i, v in enumerate(self.vars))
+        loops = "".join(self.array_loop(arrays, ctr) for ctr in ctrs)
+        prints = "".join(f"{pad}System.out.println({v});\n" for v in self.vars)
+        prints += "".join(f"{pad}System.out.println({a}[0] + {a}[{a}.length - 1]);\n"
+                          for a in arrays)
+        return (f"public class {name} {{\n"
+                f"    public static void main(String[] args) {{\n"
+                f"{decls}{inits}{loops}{prints}"
+                f"    }}\n"
+                f"}}\n")
+
+    def division_loop(self, ctr, divisor):
+        # One loop over negative and positive values dividing by divisor,
+        # a literal or a variable holding one
+        rng = self.rng
+        v, w = rng.sample(self.vars, 2)
+        lo, step = rng.randint(100, 5000), rng.randint(1, 37)
+        kind = rng.randrange(3)
+        if kind == 0:
+            body = f"{v} = {v} + {ctr} / {divisor};"
+        elif kind == 1:
+            body = f"{v} = {v} + {ctr} % {divisor} * {w} / {divisor};"
+        else:
+            body = f"{v} = {v} - ({ctr} * 7 + {w}) % {divisor};"
+        return (f"        {ctr} = 0 - {lo};\n"
+                f"        while ({ctr} < {lo}) {{\n"
+                f"            {body}\n"
+                f"            {ctr} = {ctr} + {step};\n"
+                f"        }}\n")
+
+    def division_program(self, name="Divide", n_loops=8, constant=True):
+        # Loops dividing by small constants (powers of two, their negations
+        # and others). constant=False reads every divisor from a variable
+        # instead, so the program is the same but no divisor is known at -O0.
+        rng = self.rng
+        values = [rng.choice(DIVISORS) for _ in range(n_loops)]
+        ctrs = [f"k{i}" for i in range(n_loops)]
+        divs = [f"d{i}" for i in range(n_loops)]
+        pad = "        "
+        decls = "".join(f"{pad}int {v};\n" for v in self.vars + ctrs + divs)
+        inits = "".join(f"{pad}{v} = {i + 1};\n" for i, v in enumerate(self.vars))
+        inits += "".join(f"{pad}{d} = {k if k > 0 else f'0 - {-k}'};\n"
+                         for d, k in zip(divs, values))
+        divisors = [str(k) if k > 0 else f"(0 - {-k})" for k in values] if constant else divs
+        loops = "".join(self.division_loop(ctr, d) for ctr, d in zip(ctrs, divisors))
+        prints = "".join(f"{pad}System.out.println({v});\n" for v in self.vars)
+        return (f"public class {name} {{\n"
+                f"    public static void main(String[] args) {{\n"
+                f"{decls}{inits}{loops}{prints}"
+                f"    }}\n"
+                f"}}\n")
+
+    def deep_expr(self, depth):
+        # Nested sums of products that lean one way or the other, so one
+        # operand of each node is a leaf pair and the other the deep rest
+        rng = self.rng
+        v = self.vars
+
+        def pair():
+            return f"{rng.choice(v)} {rng.choice(['*', '+', '-'])} {rng.choice(v + ['3', '7'])}"
+        if depth == 0:
+            return pair()
+        rest = f"({self.deep_expr(depth - 1)})"
+        op = rng.choice(['+', '-'])
+        if rng.random() < 0.5:
+            return f"{pair()} {op} {rest}"
+        return f"{rest} {op} ({pair()})"
+
+    def expression_program(self, name="Deep", n_loops=6, depth=8):
+        # Loops whose bodies assign expressions nested depth levels deep over
+        # a few variables and one counter: register pressure comes from the
+        # temps alone
+        pad = "        "
+        decls = "".join(f"{pad}int {v};\n" for v in self.vars + ['k'])
+        inits = "".join(f"{pad}{v} = {i + 1};\n" for i, v in enumerate(self.vars))
+        loops = "".join(f"{pad}k = 0;\n"
+                        f"{pad}while (k < {self.rng.randint(20, 50)}) {{\n"
+                        f"{pad}    {self.rng.choice(self.vars)} = {self.deep_expr(depth)};\n"
+                        f"{pad}    k = k + 1;\n"
+                        f"{pad}}}\n" for _ in range(n_loops))
+        prints = "".join(f"{pad}System.out.println({v});\n" for v in self.vars)
+        return (f"public class {name} {{\n"
+                f"    public static void main(String[] args) {{\n"
+                f"{decls}{inits}{loops}{prints}"
+                f"    }}\n"
+                f"}}\n")
+
+# Divisors of division_program
+DIVISORS = (2, 3, 4, 5, 7, 10, 16, 60, 100, 1000, -2, -3, -8, -10)
+
+# Methods of call_class and their number of arguments
+CALL_ARITY = {'get': 0, 'set': 1, 'add': 2, 'mix': 3, 'sum': 1}
+
+
+def synthetic_programs(count=20, n_statements=50, seed=0):
+    out = []
+    for i in range(count):
+        gen = ProgramGenerator(seed=seed + i)
+        name = f"Synth{i}"
+        out.append((name, gen.program(name, n_statements)))
+    return out
+
+
+def multi_class_programs(count=4, n_classes=10, n_methods=10, n_statements=50, seed=0):
+    out = []
+    for i in range(count):
+        gen = ProgramGenerator(seed=seed + i)
+        name = f"Multi{i}"
+        out.append((name, gen.class_program(name, n_classes, n_methods, n_statements)))
+    return out
+
+
+def call_programs(count=10, n_classes=3, n_statements=40, seed=0):
+    out = []
+    for i in range(count):
+        gen = ProgramGenerator(seed=seed + i)
+        name = f"Calls{i}"
+        out.append((name, gen.call_program(name, n_classes, n_statements)))
+    return out
+
+
+def array_programs(count=10, n_arrays=3, n_loops=12, seed=0):
+    out = []
+    for i in range(count):
+        gen = ProgramGenerator(seed=seed + i)
+        name = f"Arrays{i}"
+        out.append((name, gen.array_program(name, n_arrays, n_loops)))
+    return out
+
+def division_programs(count=10, n_loops=8, seed=0, constant=True):
+    out = []
+    for i in range(count):
+        gen = ProgramGenerator(seed=seed + i)
+        name = f"Divide{i}"
+        out.append((name, gen.division_program(name, n_loops, constant)))
+    return out
+
+def expression_programs(count=10, n_loops=6, depth=8, seed=0):
+    out = []
+    for i in range(count):
+        gen = ProgramGenerator(seed=seed + i, n_vars=2)
+        name = f"Deep{i}"
+        out.append((name, gen.expression_program(name, n_loops, depth)))
+    return out
+
+def corpus(count=20, n_statements=50):
+    return sample_programs() + synthetic_programs(count, n_statements)
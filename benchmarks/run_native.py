@@ -0,0 +1,107 @@
+# benchmarks/run_native.py
+# Assemble, link and run the native output for every corpus program and
+# compare what it prints with the TAC interpreter. Needs nasm and gcc (with
+# 32-bit multilib for --target=x86); the check is skipped when either is
+# missing. --time reports the wall time of each native run, e.g. to compare
+# the buffered println runtime with printf. --emit=obj links the object
+# files the compiler encodes itself (x86 only) instead of assembling the
+# text, so only gcc is needed.
+#
+#   python -m benchmarks.run_native [--count N] [--statements N]
+#       [--target x86_64|x86] [--print-runtime buffered|printf] [--time]
+#       [--emit asm|obj]
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compiler.driver import RUNTIMES, compile_source
+from compiler.codegen.tac_interp import run_tac
+from benchmarks.corpus import corpus
+
+# (nasm output format, extra gcc flags) per target
+TOOLCHAIN = {
+    'x86_64': ('elf64', []),
+    'x86': ('elf32', ['-m32', '-no-pie']),
+}
+
+
+def build(asm, workdir, name, target='x86_64', obj=None):
+    # obj: the object file's bytes, linked as they are instead of asm
+    fmt, cflags = TOOLCHAIN[target]
+    asm_path = os.path.join(workdir, name + '.asm')
+    obj_path = os.path.join(workdir, name + '.o')
+    exe_path = os.path.join(workdir, name)
+    if obj is not None:
+        with open(obj_path, 'wb') as f:
+            f.write(obj)
+    else:
+        with open(asm_path, 'w', encoding='utf-8') as f:
+            f.write(asm)
+        subprocess.run(['nasm', '-f', fmt, '-o', obj_path, asm_path], check=True)
+    subprocess.run(['gcc', *cflags, '-o', exe_path, obj_path], check=True)
+    return exe_path
+
+
+def run(exe_path):
+    # (stdout, seconds); output goes through a pipe, as in a shell pipeline
+    t0 = time.perf_counter()
+    out = subprocess.run([exe_path], capture_output=True, text=True, timeout=30).stdout
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=20)
+    ap.add_argument('--statements', type=int, default=80)
+    ap.add_argument('--target', choices=sorted(TOOLCHAIN), default='x86_64')
+    ap.add_argument('--print-runtime', choices=RUNTIMES, default='buffered')
+    ap.add_argument('--time', action='store_true', help='report native run times')
+    ap.add_argument('--emit', choices=('asm', 'obj'), default='asm')
+    args = ap.parse_args()
+    if args.emit == 'obj' and args.target != 'x86':
+        ap.error("--emit=obj needs --target=x86")
+
+    tools = ('gcc',) if args.emit == 'obj' else ('nasm', 'gcc')
+    missing = [tool for tool in tools if shutil.which(tool) is None]
+    if missing:
+        print(f"skipped: {', '.join(missing)} not found")
+        return 0
+
+    failures = 0
+    total = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, src in corpus(args.count, args.statements):
+            result = compile_source(src, name=name, parser='rd', target=args.target,
+                                    runtime=args.print_runtime)
+            if result.tac is None:
+                continue
+            expected = run_tac(result.tac).stdout
+            try:
+                if args.emit == 'obj':
+                    exe_path = build(None, tmp, name, args.target, obj=result.obj)
+                else:
+                    exe_path = build(result.asm, tmp, name, args.target)
+                got, elapsed = run(exe_path)
+            except subprocess.CalledProcessError as e:
+                print(f"{name}: build failed ({e})")
+                failures += 1
+                continue
+            total += elapsed
+            status = 'ok' if got == expected else 'MISMATCH'
+            failures += status != 'ok'
+            timing = f"  {elapsed * 1000:8.2f} ms" if args.time else ""
+            print(f"{name:>14}: {status}{timing}")
+    if args.time:
+        print(f"total native run time {total * 1000:.1f} ms")
+    print(f"{failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
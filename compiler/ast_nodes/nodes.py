@@ -3,6 +3,12 @@ from typing import List, Any
 
 # FIX: Removed the duplicate ASTNode definition. This is the single source of truth.
 class ASTNode:
+    # Source span [start, end), token index range [first, end) and first
+    # line, set by parsers that track them
+    span = None
+    token_span = None
+    lineno = None
+
     def __init__(self, name, children=None):
         self.name = name
         self.children = children if children is not None else []
@@ -20,6 +26,9 @@ class ProgramNode(ASTNode):
         self.classes = classes
 
 class MainClassNode(ASTNode):
+    # locals: variable names by slot, set by the semantic analyzer
+    locals = None
+
     def __init__(self, name, argname, body):
         super().__init__(f'MainClass:{name}', body)
         self.name = name
@@ -43,10 +52,15 @@ class VarDeclNode(ASTNode):
         self.name = name
 
 class MethodDeclNode(ASTNode):
+    # locals: names by slot ('this', the parameters, then the locals), set
+    # by the semantic analyzer
+    locals = None
+
     # FIX: Updated constructor to take a single 'body' list.
     def __init__(self, name, rtype, params, body, return_expr):
         children = [rtype]
-        children.extend(params or [])
+        # params stay (type, name) pairs; show them as declarations
+        children.extend(VarDeclNode(p_type, p_name) for p_type, p_name in params or [])
         children.extend(body or [])
         if return_expr:
             children.append(return_expr)
@@ -105,12 +119,22 @@ class PrintNode(ASTNode):
         self.expr = expr
 
 class AssignNode(ASTNode):
+    # field: slot of the field of 'this' assigned, or None for a local;
+    # slot: the local's slot in its method (see MethodDeclNode.locals), or
+    # None for a field (both set by the semantic analyzer)
+    field = None
+    slot = None
+
     def __init__(self, name, expr):
         super().__init__(f'Assign:{name}', [expr])
         self.name = name
         self.expr = expr
 
 class ArrayAssignNode(ASTNode):
+    # field, slot: as for AssignNode, for the array variable
+    field = None
+    slot = None
+
     def __init__(self, name, index, expr):
         super().__init__(f'ArrayAssign:{name}', [index, expr])
         self.name = name
@@ -142,24 +166,56 @@ class BoolLiteralNode(ASTNode):
         self.value = value
 
 class VarNode(ASTNode):
+    # field, slot: as for AssignNode
+    field = None
+    slot = None
+
     def __init__(self, name):
         super().__init__(f'Var:{name}', [])
         self.name = name
 
 class ArrayAccessNode(ASTNode):
+    # field, slot: as for AssignNode
+    field = None
+    slot = None
+
     def __init__(self, name, index):
         super().__init__(f'ArrayAccess:{name}', [index])
         self.name = name
         self.index = index
 
 class ArrayLengthNode(ASTNode):
+    # field, slot: as for AssignNode
+    field = None
+    slot = None
+
     def __init__(self, name):
         super().__init__(f'Len:{name}', [])
         self.name = name
 
 class MethodCallNode(ASTNode):
+    # class_name: static class of obj, set by the semantic analyzer
+    class_name = None
+
     def __init__(self, obj, method, args):
-        super().__init__(f'MCall:{obj}.{method}', args or [])
+        super().__init__(f'MCall:{obj}.{method}', [obj] + (args or []))
         self.obj = obj
         self.method = method
-        self.args = args or []
\ No newline at end of file
+        self.args = args or []
+
+class ThisNode(ASTNode):
+    def __init__(self):
+        super().__init__('this', [])
+
+class NewObjectNode(ASTNode):
+    # size: number of fields, set by the semantic analyzer
+    size = None
+
+    def __init__(self, class_name):
+        super().__init__(f'New:{class_name}', [])
+        self.class_name = class_name
+
+class NewArrayNode(ASTNode):
+    def __init__(self, size):
+        super().__init__('NewArray:int', [size])
+        self.size = size
\ No newline at end of file
@@ -1,11 +1,12 @@
 # compiler/ast/visitor.py
 class Visitor:
-    def visit(self, node):
+    def visit(self, node, *args):
+        # Extra args are passed on to the visit_ method
         if node is None:
             return None
         method_name = 'visit_' + node.__class__.__name__
         visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        return visitor(node, *args)
 
     def generic_visit(self, node):
         # default: traverse children and return None
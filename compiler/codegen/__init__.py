@@ -1,2 +1,3 @@
 from .intermediate import IRGenerator
 from .x86 import X86StyleGenerator
+from .tac_interp import TACInterpreter, run_tac
@@ -0,0 +1,186 @@
+# compiler/codegen/cfg.py
+# Basic blocks and control-flow graph over the flat TAC list produced by
+# IRGenerator. Shared by the TAC interpreter and the optimization passes.
+
+# Ops that end a basic block
+JUMP_OPS = ('goto', 'if_false', 'if_true')
+EXIT_OPS = ('end_main', 'return')
+TERMINATORS = JUMP_OPS + EXIT_OPS
+
+
+def jump_target(instr):
+    # Label a jump transfers control to, or None
+    op = instr[0]
+    if op == 'goto':
+        return instr[1]
+    if op in ('if_false', 'if_true'):
+        return instr[2]
+    return None
+
+
+def falls_through(instr):
+    # Whether control can continue with the next instruction
+    return instr[0] not in ('goto',) + EXIT_OPS
+
+
+class BasicBlock:
+    def __init__(self, index, start, instrs):
+        self.index = index
+        self.start = start          # position of the first instruction in the TAC list
+        self.instrs = instrs
+        self.label = instrs[0][1] if instrs and instrs[0][0] == 'label' else None
+        self.succs = []
+        self.preds = []
+
+    @property
+    def last(self):
+        return self.instrs[-1] if self.instrs else None
+
+    def __repr__(self):
+        name = self.label or f"B{self.index}"
+        return f"<{name} [{self.start}:{self.start + len(self.instrs)}] -> {[b.index for b in self.succs]}>"
+
+
+class CFG:
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.label_to_block = {b.label: b for b in blocks if b.label is not None}
+
+    @property
+    def entry(self):
+        return self.blocks[0] if self.blocks else None
+
+    def instructions(self):
+        # Flatten back into a TAC list
+        out = []
+        for b in self.blocks:
+            out.extend(b.instrs)
+        return out
+
+    def reverse_postorder(self, start=None):
+        start = start or self.entry
+        seen, order = set(), []
+        stack = [(start, iter(start.succs))] if start else []
+        if start:
+            seen.add(start.index)
+        while stack:
+            block, it = stack[-1]
+            for s in it:
+                if s.index not in seen:
+                    seen.add(s.index)
+                    stack.append((s, iter(s.succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+
+def split_blocks(tac):
+    # Leaders: first instruction, every label, every instruction after a terminator
+    blocks = []
+    current, start = [], 0
+    for i, instr in enumerate(tac):
+        if not instr:
+            continue
+        if instr[0] == 'label' and current:
+            blocks.append(BasicBlock(len(blocks), start, current))
+            current = []
+        if not current:
+            start = i
+        current.append(instr)
+        if instr[0] in TERMINATORS:
+            blocks.append(BasicBlock(len(blocks), start, current))
+            current = []
+    if current:
+        blocks.append(BasicBlock(len(blocks), start, current))
+    return blocks
+
+
+def build_cfg(tac):
+    cfg = CFG(split_blocks(tac))
+    blocks = cfg.blocks
+    for i, b in enumerate(blocks):
+        last = b.last
+        target = jump_target(last)
+        if target is not None and target in cfg.label_to_block:
+            b.succs.append(cfg.label_to_block[target])
+        if falls_through(last) and i + 1 < len(blocks):
+            nxt = blocks[i + 1]
+            if nxt not in b.succs:
+                b.succs.append(nxt)
+        for s in b.succs:
+            s.preds.append(b)
+    return cfg
+
+
+def uses_defs(instr):
+    # (variables read, variable written or None); immediates are ints.
+    # A call's a is the callee label; a store reads all of a (object),
+    # b (field slot) and r (value), an astore a (array), b (index) and r.
+    # A bounds check ('check', index, array) writes nothing.
+    op, a, b, r = instr
+    if op == '=':
+        uses, d = [a], r
+    elif op in ('label', 'goto', 'begin_main', 'end_main'):
+        uses, d = [], None
+    elif op in ('print', 'if_false', 'if_true', 'return', 'param'):
+        uses, d = [a], None
+    elif op == 'call':
+        uses, d = [], r
+    elif op in ('store', 'astore'):
+        uses, d = [a, b, r], None
+    else:
+        uses, d = [a, b], r
+    return [u for u in uses if isinstance(u, str)], d
+
+
+def liveness(cfg):
+    # Backward dataflow: (live_in, live_out) sets indexed by block index
+    n = len(cfg.blocks)
+    use = [set() for _ in range(n)]
+    defs = [set() for _ in range(n)]
+    for b in cfg.blocks:
+        for instr in b.instrs:
+            uses, d = uses_defs(instr)
+            for u in uses:
+                if u not in defs[b.index]:
+                    use[b.index].add(u)
+            if d is not None:
+                defs[b.index].add(d)
+    live_in = [set() for _ in range(n)]
+    live_out = [set() for _ in range(n)]
+    order = list(reversed(cfg.blocks))
+    changed = True
+    while changed:
+        changed = False
+        for b in order:
+            out = set()
+            for s in b.succs:
+                out |= live_in[s.index]
+            inn = use[b.index] | (out - defs[b.index])
+            if out != live_out[b.index] or inn != live_in[b.index]:
+                live_out[b.index], live_in[b.index] = out, inn
+                changed = True
+    return live_in, live_out
+
+
+def split_functions(tac):
+    # Split program TAC into per-function lists: main runs from 'begin_main'
+    # to 'end_main'; every label that directly follows a function exit starts
+    # the next function (IRGenerator.visit_MethodDeclNode output).
+    funcs, current = [], []
+    for instr in tac:
+        if not instr:
+            continue
+        if instr[0] == 'begin_main' and current:
+            funcs.append(current)
+            current = []
+        current.append(instr)
+        if instr[0] in EXIT_OPS:
+            funcs.append(current)
+            current = []
+    if current:
+        funcs.append(current)
+    return funcs
@@ -0,0 +1,116 @@
+# compiler/codegen/cost.py
+# Static cost model for the 32-bit x86 subset X86StyleGenerator emits:
+# approximate encoded size in bytes and latency in cycles per instruction.
+# Good enough to compare two code sequences, not to predict wall time.
+
+REGS32 = ('eax', 'ebx', 'ecx', 'edx', 'esi', 'edi', 'esp', 'ebp')
+REGS8 = ('al', 'bl', 'cl', 'dl', 'ah', 'bh', 'ch', 'dh')
+
+# Latency (cycles) of each mnemonic on a generic modern core
+LATENCY = {
+    'mov': 1, 'movzx': 1, 'lea': 1, 'xor': 1, 'and': 1, 'add': 1, 'sub': 1, 'neg': 1,
+    'inc': 1, 'dec': 1, 'cmp': 1, 'test': 1, 'shl': 1, 'sar': 1, 'shr': 1,
+    'imul': 3, 'cdq': 1, 'idiv': 25,
+    'setl': 1, 'setg': 1, 'setle': 1, 'setge': 1, 'sete': 1, 'setne': 1,
+    'jmp': 1, 'je': 1, 'jne': 1, 'jl': 1, 'jge': 1, 'jg': 1, 'jle': 1,
+    'ja': 1, 'jae': 1, 'jb': 1, 'jbe': 1,
+    'push': 1, 'pop': 1, 'call': 5, 'ret': 1, 'leave': 2,
+}
+# Extra cycles when an operand is in memory (load-to-use)
+MEM_PENALTY = 4
+
+JUMPS = ('jmp', 'je', 'jne', 'jl', 'jge', 'jg', 'jle', 'ja', 'jae', 'jb', 'jbe', 'call')
+
+
+def operand_kind(op):
+    # 'reg', 'reg8', 'imm8', 'imm32', 'mem' or 'sym'
+    op = op.strip()
+    if op in REGS32:
+        return 'reg'
+    if op in REGS8:
+        return 'reg8'
+    if '[' in op:
+        return 'mem'
+    try:
+        v = int(op)
+    except ValueError:
+        return 'sym'
+    return 'imm8' if -128 <= v <= 127 else 'imm32'
+
+
+def _lea_bytes(addr):
+    # [base], [base+disp], [base+index*s], [index*s] (no base needs disp32)
+    inner = addr[addr.index('[') + 1:addr.index(']')]
+    terms = inner.replace('-', '+-').split('+')
+    regs = [t for t in terms if t and not t.lstrip('-').isdigit()]
+    disps = [int(t) for t in terms if t.lstrip('-').isdigit()]
+    scaled_only = len(regs) == 1 and '*' in regs[0]
+    size = 2 + (1 if len(regs) > 1 or '*' in inner else 0)
+    if scaled_only:
+        return 7
+    if disps:
+        size += 1 if -128 <= disps[0] <= 127 else 4
+    return size
+
+
+def instr_bytes(mnemonic, operands):
+    kinds = [operand_kind(o) for o in operands]
+    m = mnemonic
+    if m in ('ret', 'cdq', 'leave'):
+        return 1
+    if m in ('inc', 'dec'):
+        return 1 if kinds[0] == 'reg' else 6
+    if m == 'push':
+        return {'reg': 1, 'imm8': 2, 'imm32': 5, 'mem': 6, 'sym': 5}[kinds[0]]
+    if m == 'pop':
+        return 1 if kinds[0] == 'reg' else 6
+    if m in JUMPS:
+        return 5 if m in ('jmp', 'call') else 6
+    if m == 'lea':
+        return _lea_bytes(operands[1])
+    if m in ('neg', 'idiv') or (m == 'imul' and len(operands) == 1):
+        # imul with one operand: edx:eax = eax * operand
+        return 2 if kinds[0] == 'reg' else 6
+    if m.startswith('set') or m == 'movzx':
+        return 3
+    if m in ('shl', 'sar', 'shr'):
+        base = 2 if kinds[0] == 'reg' else 6
+        return base if operands[1] == '1' else base + 1
+    if m == 'imul':
+        if len(operands) == 3:
+            size = 3 if kinds[1] == 'reg' else 7
+            return size if kinds[2] == 'imm8' else size + 3
+        if kinds[1] in ('imm8', 'imm32'):
+            return 3 if kinds[1] == 'imm8' else 6
+        return 3 if kinds[1] == 'reg' else 7
+    if m == 'test':
+        return 2 if 'mem' not in kinds else 6
+    # mov / add / sub / cmp / xor and friends
+    dst, src = kinds[0], kinds[1]
+    if m == 'mov':
+        if dst == 'reg':
+            return {'reg': 2, 'mem': 6, 'imm8': 5, 'imm32': 5, 'sym': 5}[src]
+        return 6 if src == 'reg' else 10
+    if dst == 'reg':
+        return {'reg': 2, 'mem': 6, 'imm8': 3, 'imm32': 6, 'sym': 6}[src]
+    return {'reg': 6, 'imm8': 7, 'imm32': 10, 'sym': 10}.get(src, 6)
+
+
+def instr_cycles(mnemonic, operands):
+    base = LATENCY.get(mnemonic, 1)
+    if mnemonic != 'lea' and any(operand_kind(o) == 'mem' for o in operands):
+        base += MEM_PENALTY
+    return base
+
+
+def static_cost(code):
+    # code: [(mnemonic, operands)] as produced by X86StyleGenerator.code;
+    # label entries have mnemonic None, comments start with ';'
+    n = size = cycles = 0
+    for mnemonic, operands in code:
+        if mnemonic is None or mnemonic.startswith(';'):
+            continue
+        n += 1
+        size += instr_bytes(mnemonic, operands)
+        cycles += instr_cycles(mnemonic, operands)
+    return {'instructions': n, 'bytes': size, 'cycles': cycles}
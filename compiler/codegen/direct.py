@@ -0,0 +1,385 @@
+# compiler/codegen/direct.py
+# -O0 fast path for the 32-bit target: one walk over the checked AST emits
+# the code of each unit directly, without building TAC first. Expressions
+# are evaluated into eax with a stack for pending operands (an operand that
+# is a literal or a local is used in place instead); conditions become
+# jumping code as in IRGenerator.cond_jump. Every variable lives in memory:
+# main's in static mem_* slots, a method's in its frame at the offset of the
+# slot the semantic analyzer gave it, so no register holds a value across a
+# statement and nothing needs saving around calls.
+#
+# With only eax and ecx to hold values, the Sethi-Ullman order of
+# IRGenerator.reorder_operands comes down to this: when the left operand
+# of a binary operator only needs eax and the right one more, the right
+# one is evaluated first and held in ecx, which saves a push and a pop.
+#
+# Units use the calling convention and runtime of X86StyleGenerator, whose
+# assemble() puts the program together, so the output has the same shape
+# (and works with compiler.codegen.report) as the TAC route.
+from ..ast_nodes.visitor import Visitor
+from ..ast_nodes.nodes import *
+from .divide import divide_by_constant
+from .intermediate import method_label, swappable
+from .x86 import X86StyleGenerator
+
+
+class DirectGenerator(X86StyleGenerator, Visitor):
+    def __init__(self, runtime='buffered', reorder_operands=True):
+        super().__init__(runtime=runtime)
+        self.locals = []
+        self.reorder_operands = reorder_operands
+
+    # -----------------------
+    # Driver
+    # -----------------------
+    def generate_units(self, program):
+        self.units = [self.main_unit(program.main)]
+        for cls in program.classes:
+            self.units.extend(self.method_unit(cls.name, m) for m in cls.method_decls)
+        return self.units
+
+    def begin_unit(self, namespace):
+        self.namespace = namespace
+        self.label_count = 0
+        self.code = []
+        self.spilled = []
+        self.uses_heap = False
+        self.uses_arrays = False
+        self.uses_div = False
+
+    def unit(self):
+        return {'code': self.code, 'spilled': self.spilled, 'heap': self.uses_heap,
+                'arrays': self.uses_arrays, 'divides': self.uses_div}
+
+    def main_unit(self, node):
+        self.begin_unit('')
+        self.in_method = False
+        self.locals = node.locals
+        self.spilled = list(node.locals)
+        self.emit_label('main')
+        for stmt in node.statements:
+            self.visit(stmt)
+        self.emit_main_exit()
+        self.emit('ret')
+        return self.unit()
+
+    def method_unit(self, class_name, node):
+        label = method_label(class_name, node.name)
+        self.begin_unit(label + '.')
+        self.in_method = True
+        self.locals = node.locals
+        self.n_params = len(node.params)
+        # Frame: slot k at [ebp-4(k+1)]. Parameters passed on the stack stay
+        # where the caller put them, leaving their frame slots unused.
+        self.emit_label(label)
+        self.emit('push', 'ebp')
+        self.emit('mov', 'ebp', 'esp')
+        self.emit('sub', 'esp', 4 * len(self.locals))
+        for slot, reg in enumerate(self.ARG_REGS[:self.n_params + 1]):
+            self.emit('mov', self.local(slot), reg)
+        for stmt in node.statements:
+            self.visit(stmt)
+        self.expr(node.return_expr)
+        self.emit('leave')
+        self.emit('ret')
+        return self.unit()
+
+    # -----------------------
+    # Statements
+    # -----------------------
+    def visit_BlockNode(self, node: BlockNode):
+        for stmt in node.statements:
+            self.visit(stmt)
+
+    def visit_AssignNode(self, node: AssignNode):
+        if node.field is None and self.operand(node.expr) is not None:
+            self.move(self.local(node.slot), self.operand(node.expr))
+            return
+        self.expr(node.expr)
+        if node.field is None:
+            self.emit('mov', self.local(node.slot), 'eax')
+        else:
+            self.emit('mov', 'ecx', self.local(0))
+            self.emit('mov', self.field_at('ecx', node.field), 'eax')
+
+    def visit_ArrayAssignNode(self, node: ArrayAssignNode):
+        # Java order: the array, the index and the value, then the check
+        self.array(node)
+        self.emit('push', 'eax')
+        self.expr(node.index)
+        self.emit('push', 'eax')
+        self.expr(node.expr)
+        self.emit('pop', 'ecx')
+        self.emit('pop', 'edx')
+        self.check('ecx', 'edx')
+        self.emit('mov', 'dword [edx+ecx*4+4]', 'eax')
+
+    def visit_PrintNode(self, node: PrintNode):
+        self.expr(node.expr)
+        self.emit('push', 'eax')
+        if self.runtime == 'buffered':
+            self.emit('call', 'rt_print_int')
+        else:
+            self.emit('push', 'dword fmt_int')
+            self.emit('call', 'printf')
+            self.emit('add', 'esp', 8)
+
+    def visit_IfNode(self, node: IfNode):
+        L_else = self.new_label('ELSE')
+        L_end = self.new_label('END_IF')
+        self.cond_jump(node.cond, L_else, False)
+        self.visit(node.then_stmt)
+        self.emit('jmp', L_end)
+        self.emit_label(L_else)
+        self.visit(node.else_stmt)
+        self.emit_label(L_end)
+
+    def visit_WhileNode(self, node: WhileNode):
+        # Rotated, as in IRGenerator: guard on entry, test again at the bottom
+        L_start = self.new_label('LOOP')
+        L_end = self.new_label('ENDL')
+        self.cond_jump(node.cond, L_end, False)
+        self.emit_label(L_start)
+        self.visit(node.body)
+        self.cond_jump(node.cond, L_start, True)
+        self.emit_label(L_end)
+
+    def cond_jump(self, expr, label, jump_if_true):
+        # Branch to label when expr is jump_if_true, fall through otherwise
+        if isinstance(expr, UnaryOpNode) and expr.op == '!':
+            self.cond_jump(expr.expr, label, not jump_if_true)
+        elif isinstance(expr, BinaryOpNode) and expr.op == '&&':
+            if jump_if_true:
+                L_skip = self.new_label('AND')
+                self.cond_jump(expr.left, L_skip, False)
+                self.cond_jump(expr.right, label, True)
+                self.emit_label(L_skip)
+            else:
+                self.cond_jump(expr.left, label, False)
+                self.cond_jump(expr.right, label, False)
+        elif isinstance(expr, BinaryOpNode) and expr.op == '<':
+            self.binary(expr, 'cmp')
+            self.emit('jl' if jump_if_true else 'jge', label)
+        elif isinstance(expr, BoolLiteralNode):
+            if expr.value == jump_if_true:
+                self.emit('jmp', label)
+        else:
+            self.expr(expr)
+            self.emit('test', 'eax', 'eax')
+            self.emit('jne' if jump_if_true else 'je', label)
+
+    # -----------------------
+    # Expressions: the value ends up in eax
+    # -----------------------
+    def expr(self, node):
+        src = self.operand(node)
+        if src is not None:
+            self.move('eax', src)
+        else:
+            self.visit(node)
+
+    def local(self, slot):
+        # Memory operand of the local or parameter in slot
+        if not self.in_method:
+            return f"dword [mem_{self.locals[slot]}]"
+        if len(self.ARG_REGS) <= slot <= self.n_params:
+            return f"dword [ebp+{8 + 4 * (slot - len(self.ARG_REGS))}]"
+        return f"dword [ebp-{4 * (slot + 1)}]"
+
+    def operand(self, node):
+        # Operand of a literal or a local, used in place; None otherwise
+        if isinstance(node, VarNode) and node.field is None:
+            return self.local(node.slot)
+        if isinstance(node, IntLiteralNode):
+            return node.value
+        if isinstance(node, BoolLiteralNode):
+            return 1 if node.value else 0
+        return None
+
+    def in_eax(self, node):
+        # Whether evaluating node writes no register but eax, so a value
+        # held in ecx survives it
+        if self.operand(node) is not None or isinstance(node, (VarNode, ThisNode, ArrayLengthNode)):
+            return True
+        if isinstance(node, UnaryOpNode):
+            return self.in_eax(node.expr)
+        if isinstance(node, BinaryOpNode) and node.op in ('+', '-', '*', '<'):
+            return self.in_eax(node.left) and self.operand(node.right) is not None
+        return False
+
+    def right_in_ecx(self, node):
+        # ecx = right, evaluated first, then eax = left; False (nothing
+        # emitted) unless that order saves the stack and is unobservable
+        if not (self.reorder_operands and self.operand(node.right) is None
+                and self.in_eax(node.left) and swappable(node.left, node.right)):
+            return False
+        self.expr(node.right)
+        self.emit('mov', 'ecx', 'eax')
+        self.expr(node.left)
+        return True
+
+    def binary(self, node, mnemonic):
+        # eax = left, then 'mnemonic eax, right'
+        if self.right_in_ecx(node):
+            self.emit(mnemonic, 'eax', 'ecx')
+            return
+        self.expr(node.left)
+        right = self.operand(node.right)
+        if right is None:
+            self.emit('push', 'eax')
+            self.expr(node.right)
+            self.emit('mov', 'ecx', 'eax')
+            self.emit('pop', 'eax')
+            right = 'ecx'
+        if mnemonic == 'imul' and isinstance(right, int):
+            self.emit('imul', 'eax', 'eax', right)
+        else:
+            self.emit(mnemonic, 'eax', right)
+
+    def visit_BinaryOpNode(self, node: BinaryOpNode):
+        if node.op == '&&':
+            L_false = self.new_label('FALSE')
+            L_end = self.new_label('END_BOOL')
+            self.cond_jump(node, L_false, False)
+            self.emit('mov', 'eax', 1)
+            self.emit('jmp', L_end)
+            self.emit_label(L_false)
+            self.emit('xor', 'eax', 'eax')
+            self.emit_label(L_end)
+        elif node.op == '<':
+            self.binary(node, 'cmp')
+            self.emit('setl', 'al')
+            self.emit('movzx', 'eax', 'al')
+        elif node.op in ('+', '-', '*'):
+            self.binary(node, {'+': 'add', '-': 'sub', '*': 'imul'}[node.op])
+        elif node.op in ('/', '%'):
+            self.divide(node)
+        else:
+            raise NotImplementedError(f"Operator {node.op} not implemented in direct codegen")
+
+    def divide(self, node):
+        # eax = left / right or left % right, with the checks and constant
+        # divisor sequences of X86StyleGenerator.lower_div
+        right = self.operand(node.right)
+        if self.right_in_ecx(node):
+            right = 'ecx'
+        else:
+            self.expr(node.left)
+        if isinstance(right, int) and right not in (-1, 0):
+            if right == 1:
+                if node.op == '%':
+                    self.emit('xor', 'eax', 'eax')
+                return
+            self.emit('mov', 'ecx', 'eax')
+            for mnemonic, operands in divide_by_constant(node.op, 'ecx', right):
+                self.emit(mnemonic, *operands)
+            return
+        if right is None:
+            self.emit('push', 'eax')
+            self.expr(node.right)
+            self.emit('mov', 'ecx', 'eax')
+            self.emit('pop', 'eax')
+        else:
+            self.move('ecx', right)
+        self.uses_div = True
+        L_div = self.new_label('div')
+        L_done = self.new_label('div_done')
+        self.emit('lea', 'edx', '[ecx+1]')
+        self.emit('cmp', 'edx', 1)
+        self.emit('ja', L_div)
+        self.emit('je', 'rt_div_zero')
+        if node.op == '/':
+            self.emit('neg', 'eax')
+        else:
+            self.emit('xor', 'eax', 'eax')
+        self.emit('jmp', L_done)
+        self.emit_label(L_div)
+        self.emit('cdq')
+        self.emit('idiv', 'ecx')
+        if node.op == '%':
+            self.emit('mov', 'eax', 'edx')
+        self.emit_label(L_done)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode):
+        self.expr(node.expr)
+        self.emit('xor', 'eax', 1)
+
+    def visit_VarNode(self, node: VarNode):
+        # A field of 'this' (locals are operands)
+        self.emit('mov', 'eax', self.local(0))
+        self.emit('mov', 'eax', self.field_at('eax', node.field))
+
+    def visit_ThisNode(self, node: ThisNode):
+        self.emit('mov', 'eax', self.local(0))
+
+    def field_at(self, base, slot):
+        return f"dword [{base}+{4 * slot}]" if slot else f"dword [{base}]"
+
+    def array(self, node):
+        # eax = the array an Array* node names: a local, or a field of 'this'
+        if node.field is None:
+            self.emit('mov', 'eax', self.local(node.slot))
+        else:
+            self.emit('mov', 'eax', self.local(0))
+            self.emit('mov', 'eax', self.field_at('eax', node.field))
+
+    def null_check(self, arr):
+        # An int[] never assigned is null (0): trap like a failed bounds check
+        self.uses_arrays = True
+        self.emit('test', arr, arr)
+        self.emit('je', 'rt_bounds')
+
+    def check(self, index, arr):
+        # Trap unless arr is an array and 0 <= index < length (unsigned
+        # compare, see lower_check)
+        self.null_check(arr)
+        self.emit('cmp', index, self.field_at(arr, 0))
+        self.emit('jae', 'rt_bounds')
+
+    def visit_ArrayAccessNode(self, node: ArrayAccessNode):
+        self.array(node)
+        self.emit('push', 'eax')
+        self.expr(node.index)
+        self.emit('pop', 'edx')
+        self.check('eax', 'edx')
+        self.emit('mov', 'eax', 'dword [edx+eax*4+4]')
+
+    def visit_ArrayLengthNode(self, node: ArrayLengthNode):
+        self.array(node)
+        self.null_check('eax')
+        self.emit('mov', 'eax', 'dword [eax]')
+
+    def visit_NewObjectNode(self, node: NewObjectNode):
+        self.uses_heap = True
+        self.emit('push', 4 * node.size)
+        self.emit('call', 'rt_new')
+
+    def visit_NewArrayNode(self, node: NewArrayNode):
+        self.uses_heap = self.uses_arrays = True
+        self.expr(node.size)
+        self.emit('push', 'eax')
+        self.emit('call', 'rt_new_array')
+
+    def visit_MethodCallNode(self, node: MethodCallNode):
+        # Receiver and arguments are pushed left to right as they are
+        # evaluated; then the receiver and first argument go to ecx/edx and
+        # copies of the others are pushed right to left for the callee
+        values = [node.obj] + node.args
+        for v in values:
+            self.expr(v)
+            self.emit('push', 'eax')
+        n, n_regs = len(values), len(self.ARG_REGS)
+        if n <= n_regs:
+            for reg in reversed(self.ARG_REGS[:n]):
+                self.emit('pop', reg)
+            self.emit('call', method_label(node.class_name, node.method))
+            return
+        # Value k sits at [esp+4*(n-1-k)] before the copies; each copy
+        # pushed moves the next one 8 bytes further up
+        extra = n - n_regs
+        for j in range(extra):
+            self.emit('push', f"dword [esp+{8 * j}]")
+        for k, reg in enumerate(self.ARG_REGS):
+            self.emit('mov', reg, f"dword [esp+{4 * (n - 1 - k) + 4 * extra}]")
+        self.emit('call', method_label(node.class_name, node.method))
+        self.emit('add', 'esp', 4 * (n + extra))
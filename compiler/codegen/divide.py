@@ -0,0 +1,78 @@
+# compiler/codegen/divide.py
+# Signed 32-bit division by a constant without idiv, shared by the x86 and
+# x86-64 back ends (Hacker's Delight, chapter 10). A power of two becomes
+# shifts: a negative dividend is first biased by 2**k - 1 so the arithmetic
+# shift truncates toward zero as Java does. Any other divisor becomes a
+# multiply by a "magic" fixed-point reciprocal, keeping the high half of the
+# product, plus a shift and a +1 correction for negative quotients.
+# A remainder is a - q * |d| either way.
+
+
+def power_of_two(d):
+    # k when |d| == 2**k for k >= 1, None otherwise
+    m = abs(d)
+    if m > 1 and m & (m - 1) == 0:
+        return m.bit_length() - 1
+    return None
+
+
+def magic(d):
+    # (multiplier as a signed 32-bit int, shift) for 2 <= d < 2**31
+    two31 = 1 << 31
+    anc = two31 - 1 - two31 % d
+    p = 31
+    q1, r1 = divmod(two31, anc)
+    q2, r2 = divmod(two31, d)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= d:
+            q2, r2 = q2 + 1, r2 - d
+        delta = d - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            break
+    m = q2 + 1
+    return (m - (1 << 32) if m >= two31 else m), p - 32
+
+
+def uses_edx(d):
+    # Whether divide_by_constant(_, _, d) writes edx (the multiply does)
+    return power_of_two(d) is None
+
+
+def divide_by_constant(op, a, d):
+    # [(mnemonic, operands)] leaving a / d or a % d (op) in eax, for a
+    # constant d outside -1..1. a is the dividend: memory or a register
+    # other than eax and edx, read more than once.
+    k = power_of_two(d)
+    if k is not None:
+        code = [('mov', ('eax', a))]
+        if k == 1:
+            code.append(('shr', ('eax', 31)))
+        else:
+            code += [('sar', ('eax', 31)), ('shr', ('eax', 32 - k))]
+        code.append(('add', ('eax', a)))
+        if op == '%':
+            # a - (biased a rounded down to a multiple of 2**k)
+            return code + [('and', ('eax', -(1 << k))), ('neg', ('eax',)), ('add', ('eax', a))]
+        code.append(('sar', ('eax', k)))
+        if d < 0:
+            code.append(('neg', ('eax',)))
+        return code
+    m, s = magic(abs(d))
+    code = [('mov', ('eax', m)), ('imul', (a,))]
+    if m < 0:
+        # The multiplier stands for m + 2**32: add the missing a * 2**32
+        code.append(('add', ('edx', a)))
+    if s:
+        code.append(('sar', ('edx', s)))
+    code += [('mov', ('eax', 'edx')), ('shr', ('eax', 31)), ('add', ('edx', 'eax'))]
+    if op == '%':
+        return code + [('imul', ('edx', 'edx', abs(d))), ('mov', ('eax', a)), ('sub', ('eax', 'edx'))]
+    code.append(('mov', ('eax', 'edx')))
+    if d < 0:
+        code.append(('neg', ('eax',)))
+    return code
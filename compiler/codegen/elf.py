@@ -0,0 +1,112 @@
+# compiler/codegen/elf.py
+# ELF32 relocatable object (i386) of a 32-bit program, written in process
+# from X86StyleGenerator.sections(): .text from compiler.codegen.encoder,
+# .data, .bss and a symbol table with every label. References to .data and
+# .bss and calls into libc are left to the linker as REL relocations, the
+# addend stored in the field as NASM does, so `gcc -m32 -no-pie` links the
+# object exactly like the assembled .asm.
+import struct
+
+from .encoder import ABS, assemble
+
+ET_REL, EM_386, EV_CURRENT = 1, 3, 1
+SHT_PROGBITS, SHT_SYMTAB, SHT_STRTAB, SHT_NOBITS, SHT_REL = 1, 2, 3, 8, 9
+SHF_WRITE, SHF_ALLOC, SHF_EXECINSTR = 1, 2, 4
+STB_LOCAL, STB_GLOBAL = 0, 1
+STT_NOTYPE, STT_SECTION = 0, 3
+R_386_32, R_386_PC32 = 1, 2
+
+EHDR = struct.Struct('<16sHHIIIIIHHHHHH')
+SHDR = struct.Struct('<IIIIIIIIII')
+SYM = struct.Struct('<IIIBBH')
+REL = struct.Struct('<II')
+
+
+class StringTable:
+    def __init__(self):
+        self.data = bytearray(b'\0')
+        self.index = {'': 0}
+
+    def add(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.data)
+            self.data += name.encode() + b'\0'
+        return self.index[name]
+
+
+def _align(data, n):
+    data += b'\0' * (-len(data) % n)
+
+
+def object_file(program):
+    # bytes of the object for {'text': code list, 'data': [(label, bytes)],
+    # 'bss': [(label, size)], 'globals': [label], 'externs': [symbol]}
+    text = assemble(program['text'])
+    data, bss = bytearray(), 0
+    symbols = {label: (1, offset) for label, offset in text['labels'].items()}
+    for label, value in program['data']:
+        symbols[label] = (2, len(data))
+        data += value
+    for label, size in program['bss']:
+        symbols[label] = (3, bss)
+        bss += size
+    externs = list(program['externs'])
+    for _, symbol, _ in text['relocs']:
+        if symbol not in symbols and symbol not in externs:
+            raise ValueError(f"Undefined symbol {symbol}")
+
+    # Symbols: null, the three section symbols, labels, then the globals
+    strtab = StringTable()
+    entries = [SYM.pack(0, 0, 0, 0, 0, 0)]
+    entries += [SYM.pack(0, 0, 0, STB_LOCAL << 4 | STT_SECTION, 0, k) for k in (1, 2, 3)]
+    index = {}
+    globals_ = [label for label in program['globals'] if label in symbols]
+    for label, (section, value) in symbols.items():
+        if label not in globals_:
+            index[label] = len(entries)
+            entries.append(SYM.pack(strtab.add(label), value, 0, STB_LOCAL << 4 | STT_NOTYPE, 0, section))
+    first_global = len(entries)
+    for label in globals_:
+        section, value = symbols[label]
+        index[label] = len(entries)
+        entries.append(SYM.pack(strtab.add(label), value, 0, STB_GLOBAL << 4 | STT_NOTYPE, 0, section))
+    for symbol in externs:
+        index[symbol] = len(entries)
+        entries.append(SYM.pack(strtab.add(symbol), 0, 0, STB_GLOBAL << 4 | STT_NOTYPE, 0, 0))
+    rels = b''.join(REL.pack(offset, index[symbol] << 8 | (R_386_32 if kind == ABS else R_386_PC32))
+                    for offset, symbol, kind in text['relocs'])
+
+    # (name, type, flags, contents or size for .bss, link, info, align, entsize)
+    sections = [
+        ('.text', SHT_PROGBITS, SHF_ALLOC | SHF_EXECINSTR, text['text'], 0, 0, 16, 0),
+        ('.data', SHT_PROGBITS, SHF_WRITE | SHF_ALLOC, bytes(data), 0, 0, 4, 0),
+        ('.bss', SHT_NOBITS, SHF_WRITE | SHF_ALLOC, bss, 0, 0, 4, 0),
+        ('.rel.text', SHT_REL, 0, rels, 5, 1, 4, REL.size),
+        ('.symtab', SHT_SYMTAB, 0, b''.join(entries), 6, first_global, 4, SYM.size),
+        ('.strtab', SHT_STRTAB, 0, bytes(strtab.data), 0, 0, 1, 0),
+        ('.shstrtab', SHT_STRTAB, 0, None, 0, 0, 1, 0),
+        # Not executable stack
+        ('.note.GNU-stack', SHT_PROGBITS, 0, b'', 0, 0, 1, 0),
+    ]
+    shstrtab = StringTable()
+    names = [shstrtab.add(s[0]) for s in sections]
+    out = bytearray(EHDR.size)
+    headers = [SHDR.pack(*[0] * 10)]
+    for name, (_, sh_type, flags, contents, link, info, align, entsize) in zip(names, sections):
+        if contents is None:
+            contents = bytes(shstrtab.data)
+        _align(out, align)
+        if sh_type == SHT_NOBITS:
+            offset, size = len(out), contents
+        else:
+            offset, size = len(out), len(contents)
+            out += contents
+        headers.append(SHDR.pack(name, sh_type, flags, 0, offset, size, link, info, align, entsize))
+    _align(out, 4)
+    shoff = len(out)
+    out += b''.join(headers)
+    ident = b'\x7fELF' + bytes((1, 1, 1)) + b'\0' * 9
+    out[:EHDR.size] = EHDR.pack(ident, ET_REL, EM_386, EV_CURRENT, 0, 0, shoff, 0,
+                                EHDR.size, 0, 0, SHDR.size, len(headers),
+                                1 + [s[0] for s in sections].index('.shstrtab'))
+    return bytes(out)
@@ -0,0 +1,511 @@
+# compiler/codegen/encoder.py
+# Machine code for the x86 subset the back ends and their runtimes emit,
+# straight from [(mnemonic, operands)] code lists, so no assembly text has
+# to go through an external assembler. bits=32 covers X86StyleGenerator
+# (object files, compiler.codegen.elf); bits=64 covers X86_64Generator (the
+# in-process JIT, compiler.codegen.jit) with REX prefixes, r8-r15 and
+# [rel symbol] addresses. Operands are the strings the generators use:
+# registers, immediates, 'dword [base+index*scale+disp]' addresses and
+# symbols. Encodings follow NASM's choices (shortest immediate and
+# displacement, the eax forms). Branches to labels start short and grow to
+# rel32 until every one fits.
+import functools
+import itertools
+import re
+
+REGS32 = {'eax': 0, 'ecx': 1, 'edx': 2, 'ebx': 3, 'esp': 4, 'ebp': 5, 'esi': 6, 'edi': 7}
+REGS8 = {'al': 0, 'cl': 1, 'dl': 2, 'bl': 3, 'ah': 4, 'ch': 5, 'dh': 6, 'bh': 7}
+# 64-bit mode only: the full registers and the low halves of r8-r15
+REGS64 = {'rax': 0, 'rcx': 1, 'rdx': 2, 'rbx': 3, 'rsp': 4, 'rbp': 5, 'rsi': 6, 'rdi': 7,
+          **{f"r{n}": n for n in range(8, 16)}}
+REGS32_HIGH = {f"r{n}d": n for n in range(8, 16)}
+# Base of a [rel symbol] address
+RIP = 16
+SIZES = {'byte': 1, 'dword': 4, 'qword': 8}
+CONDITIONS = {
+    'o': 0, 'no': 1, 'b': 2, 'c': 2, 'nae': 2, 'ae': 3, 'nb': 3, 'nc': 3,
+    'e': 4, 'z': 4, 'ne': 5, 'nz': 5, 'be': 6, 'na': 6, 'a': 7, 'nbe': 7,
+    's': 8, 'ns': 9, 'p': 10, 'np': 11, 'l': 12, 'nge': 12, 'ge': 13, 'nl': 13,
+    'le': 14, 'ng': 14, 'g': 15, 'nle': 15,
+}
+# Group 1 arithmetic: /n of 80/81/83 and the base of its two-operand opcodes
+ALU = {'add': 0, 'or': 1, 'adc': 2, 'sbb': 3, 'and': 4, 'sub': 5, 'xor': 6, 'cmp': 7}
+# F6/F7 /n
+UNARY = {'not': 2, 'neg': 3, 'mul': 4, 'imul': 5, 'div': 6, 'idiv': 7}
+# C0/C1/D0/D1 /n
+SHIFTS = {'shl': 4, 'sal': 4, 'shr': 5, 'sar': 7}
+FIXED = {
+    'ret': b'\xc3', 'leave': b'\xc9', 'cdq': b'\x99', 'cld': b'\xfc', 'nop': b'\x90',
+    'pusha': b'\x60', 'popa': b'\x61', 'movsb': b'\xa4',
+}
+# 64 bits wide in 64-bit mode without REX.W
+DEFAULT64 = ('push', 'pop', 'call', 'jmp')
+
+# Relocation kinds: the 32-bit field holds A and becomes S + A (an address)
+# or S + A - P (relative to the field's own address P: calls outside the
+# code and [rel symbol] addresses, A making up the distance from the field
+# to the end of the instruction)
+ABS, REL = 'abs', 'rel'
+
+
+def branch_cc(mnemonic):
+    # Condition code of a jcc mnemonic, None otherwise
+    if mnemonic.startswith('j') and mnemonic != 'jmp':
+        return CONDITIONS.get(mnemonic[1:])
+    return None
+
+
+def _number(text):
+    try:
+        return int(text, 0)
+    except ValueError:
+        return None
+
+
+def _register(text, bits):
+    # (number, size) of a register of this mode, None for anything else
+    if text in REGS32:
+        return REGS32[text], 4
+    if text in REGS8:
+        return REGS8[text], 1
+    if text in REGS64 or text in REGS32_HIGH:
+        if bits != 64:
+            raise ValueError(f"Register {text} needs 64-bit mode")
+        return (REGS64[text], 8) if text in REGS64 else (REGS32_HIGH[text], 4)
+    return None
+
+
+def parse_operand(text, bits=32):
+    # ('reg', number, size), ('mem', base, index, scale, disp, symbol, size)
+    # or ('imm', value, symbol); size is None when the operand leaves it open
+    text = text.strip()
+    size = None
+    word, _, rest = text.partition(' ')
+    if word in SIZES and rest:
+        size, text = SIZES[word], rest.strip()
+    reg = _register(text, bits)
+    if reg is not None:
+        return ('reg', *reg)
+    if text.startswith('['):
+        return ('mem', *parse_address(text[1:-1], bits), size)
+    value = _number(text)
+    if value is None:
+        return ('imm', 0, text)
+    return ('imm', value, None)
+
+
+def parse_address(inner, bits=32):
+    # (base, index, scale, disp, symbol) of 'base+index*scale+disp'; a
+    # symbol stands for its address, added to disp by the linker. Registers
+    # are 64-bit in 64-bit mode, where 'rel symbol' is relative to rip.
+    base = index = symbol = None
+    scale, disp = 1, 0
+    rip = inner.startswith('rel ')
+    if rip:
+        inner = inner[4:]
+    regs = REGS64 if bits == 64 else REGS32
+    for sign, term in re.findall(r'([+-]?)\s*([^+-]+)', inner):
+        term = term.strip()
+        if '*' in term:
+            reg, factor = term.split('*')
+            index, scale = regs[reg.strip()], int(factor)
+        elif term in regs:
+            if base is None:
+                base = regs[term]
+            else:
+                index = regs[term]
+        elif _number(term) is not None:
+            disp += -_number(term) if sign == '-' else _number(term)
+        elif symbol is None and sign != '-' and _register(term, 64) is None:
+            symbol = term
+        else:
+            raise ValueError(f"Cannot encode address [{inner}]")
+    if index == 4:
+        if scale != 1 or base == 4:
+            raise ValueError(f"Cannot encode address [{inner}]")
+        base, index = index, base
+    if rip:
+        if bits != 64 or base is not None or index is not None or symbol is None:
+            raise ValueError(f"Cannot encode address [rel {inner}]")
+        base = RIP
+    return base, index, scale, disp, symbol
+
+
+def _fits8(value):
+    return -128 <= value <= 127
+
+
+def _int(value, size):
+    if not -(1 << (8 * size - 1)) <= value < (1 << (8 * size)):
+        raise ValueError(f"Immediate {value} does not fit in {size} bytes")
+    return (value & ((1 << (8 * size)) - 1)).to_bytes(size, 'little')
+
+
+class Encoding:
+    # Bytes of one instruction and the relocations in them, as
+    # [(offset within the instruction, symbol, kind)]. In 64-bit mode the
+    # REX bits collect while the rest is built and finish() puts the prefix
+    # in front.
+    def __init__(self, bits=32):
+        self.bits = bits
+        self.data = bytearray()
+        self.relocs = []
+        self.rex = 0
+        # (field offset, disp) of a [rel symbol] address
+        self.rip = None
+
+    def byte(self, *values):
+        self.data.extend(values)
+
+    def imm(self, value, size, symbol=None, kind=ABS):
+        if symbol is not None:
+            self.relocs.append((len(self.data), symbol, kind))
+        self.data += _int(value, size)
+
+    def opreg(self, opcode, reg):
+        # Opcode with a register in its low three bits
+        if reg >= 8:
+            self.rex |= 1
+        self.byte(opcode + (reg & 7))
+
+    def modrm(self, reg, rm):
+        # ModRM (plus SIB and displacement) for a register or memory rm
+        if reg >= 8:
+            self.rex |= 4
+        if rm[0] == 'reg':
+            if rm[1] >= 8:
+                self.rex |= 1
+            self.byte(0xc0 | (reg & 7) << 3 | rm[1] & 7)
+            return
+        _, base, index, scale, disp, symbol, _ = rm
+        if base == RIP:
+            self.byte((reg & 7) << 3 | 5)
+            self.rip = (len(self.data), disp)
+            self.imm(0, 4, symbol, REL)
+            return
+        if base is not None and base >= 8:
+            self.rex |= 1
+        if index is not None and index >= 8:
+            self.rex |= 2
+        if symbol is not None or base is None:
+            mod, size = (0, 4) if base is None else (2, 4)
+        elif disp == 0 and base & 7 != 5:
+            mod, size = 0, 0
+        else:
+            mod, size = (1, 1) if _fits8(disp) else (2, 4)
+        if index is None and base is None and self.bits == 32:
+            self.byte((reg & 7) << 3 | 5)
+        elif index is None and base is not None and base & 7 != 4:
+            self.byte(mod << 6 | (reg & 7) << 3 | base & 7)
+        else:
+            # 64-bit mode reads mod 00 rm 101 as rip-relative, so an
+            # absolute address goes through a SIB with neither base nor index
+            sib_index = 4 if index is None else index & 7
+            sib_base = 5 if base is None else base & 7
+            self.byte(mod << 6 | (reg & 7) << 3 | 4)
+            self.byte({1: 0, 2: 1, 4: 2, 8: 3}[scale] << 6 | sib_index << 3 | sib_base)
+        if size:
+            self.imm(disp, size, symbol)
+
+    def finish(self, high_byte):
+        if self.rex:
+            if high_byte:
+                raise ValueError("ah, ch, dh and bh cannot take a REX prefix")
+            self.data[:0] = bytes((0x40 | self.rex,))
+            self.relocs = [(k + 1, symbol, kind) for k, symbol, kind in self.relocs]
+            if self.rip is not None:
+                self.rip = (self.rip[0] + 1, self.rip[1])
+        if self.rip is not None:
+            # rip is the end of the instruction, past any immediate after the field
+            k, disp = self.rip
+            self.data[k:k + 4] = _int(disp - (len(self.data) - k), 4)
+        return self
+
+
+def operand_size(ops):
+    # Operand size of an instruction: 1 when a byte register or a byte
+    # address takes part, 8 for a 64-bit register or a qword address,
+    # 4 otherwise
+    sizes = {op[2] if op[0] == 'reg' else op[-1] for op in ops if op[0] in ('reg', 'mem')}
+    if 1 in sizes:
+        return 1
+    return 8 if 8 in sizes else 4
+
+
+def _absolute(op):
+    # A memory operand that is a bare address, e.g. [mem_x] or [rt_out_len]
+    return op[0] == 'mem' and op[1] is None and op[2] is None
+
+
+# The same few hundred instructions make up most programs (and all of the
+# runtime), and an Encoding is never changed once built
+@functools.lru_cache(maxsize=8192)
+def encode(mnemonic, operands, bits=32):
+    # Encoding of one instruction other than a branch to a label
+    ops = [parse_operand(o, bits) for o in operands]
+    kinds = tuple(op[0] for op in ops)
+    size = operand_size(ops)
+    wide = 0 if size == 1 else 1
+    m = mnemonic
+    e = Encoding(bits)
+    if m != 'movzx' and any(op[0] == 'reg' and op[2] != size for op in ops):
+        raise ValueError(f"Mixed operand sizes in {m} {', '.join(operands)}")
+    if size == 8 and m not in DEFAULT64:
+        if bits != 64 or m == 'movzx':
+            raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+        e.rex |= 8
+    if m in FIXED and not ops:
+        if bits == 64 and m in ('pusha', 'popa'):
+            raise ValueError(f"{m} does not exist in 64-bit mode")
+        e.byte(*FIXED[m])
+    elif m == 'rep' and operands == ('movsb',):
+        e.byte(0xf3, *FIXED['movsb'])
+    elif m == 'ret' and kinds == ('imm',):
+        e.byte(0xc2)
+        e.imm(ops[0][1], 2)
+    elif m == 'int' and kinds == ('imm',):
+        e.byte(0xcd)
+        e.imm(ops[0][1], 1)
+    elif m == 'mov':
+        dst, src = ops
+        if kinds == ('reg', 'imm') and size != 8:
+            e.opreg(0xb8 if wide else 0xb0, dst[1])
+            e.imm(src[1], size, src[2])
+        elif src[0] == 'imm':
+            # imm32, sign-extended for a qword
+            e.byte(0xc6 + wide)
+            e.modrm(0, dst)
+            e.imm(src[1], min(size, 4), src[2])
+        elif bits == 32 and src[0] == 'reg' and src[1] == 0 and _absolute(dst):
+            e.byte(0xa2 + wide)
+            e.imm(dst[4], 4, dst[5])
+        elif bits == 32 and dst[0] == 'reg' and dst[1] == 0 and _absolute(src):
+            e.byte(0xa0 + wide)
+            e.imm(src[4], 4, src[5])
+        elif src[0] == 'reg':
+            e.byte(0x88 + wide)
+            e.modrm(src[1], dst)
+        elif kinds == ('reg', 'mem'):
+            e.byte(0x8a + wide)
+            e.modrm(dst[1], src)
+        else:
+            raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+    elif m in ALU:
+        n = ALU[m]
+        dst, src = ops
+        if src[0] == 'imm':
+            value, symbol = src[1], src[2]
+            if size == 1:
+                e.byte(0x80)
+                e.modrm(n, dst)
+                e.imm(value, 1)
+            elif symbol is None and _fits8(value):
+                e.byte(0x83)
+                e.modrm(n, dst)
+                e.imm(value, 1)
+            elif dst[0] == 'reg' and dst[1] == 0:
+                e.byte(n << 3 | 5)
+                e.imm(value, 4, symbol)
+            else:
+                e.byte(0x81)
+                e.modrm(n, dst)
+                e.imm(value, 4, symbol)
+        elif src[0] == 'reg':
+            e.byte(n << 3 | wide)
+            e.modrm(src[1], dst)
+        elif kinds == ('reg', 'mem'):
+            e.byte(n << 3 | 2 | wide)
+            e.modrm(dst[1], src)
+        else:
+            raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+    elif m == 'test':
+        dst, src = ops
+        if src[0] == 'reg':
+            e.byte(0x84 + wide)
+            e.modrm(src[1], dst)
+        elif src[0] == 'imm':
+            e.byte(0xf6 + wide)
+            e.modrm(0, dst)
+            e.imm(src[1], min(size, 4), src[2])
+        else:
+            raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+    elif m == 'lea' and kinds == ('reg', 'mem'):
+        e.byte(0x8d)
+        e.modrm(ops[0][1], ops[1])
+    elif m == 'movzx' and kinds[0] == 'reg' and ops[0][2] == 4:
+        e.byte(0x0f, 0xb6)
+        e.modrm(ops[0][1], ops[1])
+    elif m in SHIFTS and len(ops) == 2 and kinds[1] == 'imm':
+        if ops[1][1] == 1:
+            e.byte(0xd0 + wide)
+            e.modrm(SHIFTS[m], ops[0])
+        else:
+            e.byte(0xc0 + wide)
+            e.modrm(SHIFTS[m], ops[0])
+            e.imm(ops[1][1], 1)
+    elif m in ('inc', 'dec') and len(ops) == 1:
+        # 40-4F are the REX prefixes in 64-bit mode
+        if ops[0][0] == 'reg' and wide and bits == 32:
+            e.byte((0x40 if m == 'inc' else 0x48) + ops[0][1])
+        else:
+            e.byte(0xfe + wide)
+            e.modrm(0 if m == 'inc' else 1, ops[0])
+    elif m in UNARY and len(ops) == 1:
+        e.byte(0xf6 + wide)
+        e.modrm(UNARY[m], ops[0])
+    elif m == 'imul' and kinds in (('reg', 'reg'), ('reg', 'mem')):
+        e.byte(0x0f, 0xaf)
+        e.modrm(ops[0][1], ops[1])
+    elif m == 'imul' and kinds[0] == 'reg' and kinds[-1] == 'imm' and len(ops) in (2, 3):
+        # imul r, k is imul r, r, k
+        value = ops[-1][1]
+        e.byte(0x6b if _fits8(value) else 0x69)
+        e.modrm(ops[0][1], ops[1] if len(ops) == 3 else ops[0])
+        e.imm(value, 1 if _fits8(value) else 4)
+    elif m == 'push' and len(ops) == 1:
+        op = ops[0]
+        if op[0] == 'reg' and op[2] == bits // 8:
+            e.opreg(0x50, op[1])
+        elif op[0] == 'imm' and op[2] is None and _fits8(op[1]):
+            e.byte(0x6a)
+            e.imm(op[1], 1)
+        elif op[0] == 'imm':
+            e.byte(0x68)
+            e.imm(op[1], 4, op[2])
+        elif op[0] == 'mem':
+            e.byte(0xff)
+            e.modrm(6, op)
+        else:
+            raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+    elif m == 'pop' and len(ops) == 1:
+        if ops[0][0] == 'reg' and ops[0][2] == bits // 8:
+            e.opreg(0x58, ops[0][1])
+        elif ops[0][0] == 'mem':
+            e.byte(0x8f)
+            e.modrm(0, ops[0])
+        else:
+            raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+    elif m in ('call', 'jmp') and kinds == ('mem',):
+        # Through a pointer in memory
+        e.byte(0xff)
+        e.modrm(2 if m == 'call' else 4, ops[0])
+    elif m.startswith('set') and m[3:] in CONDITIONS and len(ops) == 1:
+        e.byte(0x0f, 0x90 | CONDITIONS[m[3:]])
+        e.modrm(0, ops[0])
+    else:
+        raise ValueError(f"Cannot encode {m} {', '.join(operands)}")
+    return e.finish(any(op[0] == 'reg' and op[2] == 1 and op[1] >= 4 for op in ops))
+
+
+# Sizes of a branch to a label in reach of a rel8, and of one that is not;
+# calls only have the rel32 form
+SHORT, NEAR = 2, {'jmp': 5, 'jcc': 6, 'call': 5}
+
+
+def _branch(kind, cc, disp, near):
+    if kind == 'call':
+        return b'\xe8' + _int(disp, 4)
+    if kind == 'jmp':
+        return b'\xe9' + _int(disp, 4) if near else b'\xeb' + _int(disp, 1)
+    return bytes((0x0f, 0x80 | cc)) + _int(disp, 4) if near else bytes((0x70 | cc,)) + _int(disp, 1)
+
+
+# Plan of a label or comment: no bytes, no relocations
+_NOTHING = (0, b'', ())
+
+
+# The same instructions recur across programs (and make up all of the
+# runtime), so each is planned once
+@functools.lru_cache(maxsize=16384)
+def _plan(instr, bits):
+    # How assemble() places one code list entry: (size, bytes, relocations)
+    # of a fixed encoding, or (None, kind, (), cc, label) of a branch to a
+    # label whose size depends on the layout
+    mnemonic, operands = instr
+    if mnemonic is None or mnemonic.startswith(';'):
+        return _NOTHING
+    cc = branch_cc(mnemonic)
+    if (mnemonic in ('jmp', 'call') or cc is not None) and '[' not in operands[0]:
+        return (None, 'jcc' if cc is not None else mnemonic, (), cc, operands[0].split()[0])
+    enc = encode(mnemonic, operands, bits)
+    return len(enc.data), bytes(enc.data), tuple(enc.relocs)
+
+
+def assemble(code, bits=32):
+    # Machine code of a code list: {'text': bytes, 'labels': {label: offset},
+    # 'relocs': [(offset, symbol, kind)], 'listing': [(offset, mnemonic,
+    # operands)]}. Branches and calls to labels outside the list become
+    # relocations against those symbols ('call printf wrt ..plt' against
+    # printf).
+    code = list(code)
+    plans = list(map(_plan, code, itertools.repeat(bits)))
+    labels = {}
+    for i, (mnemonic, operands) in enumerate(code):
+        if mnemonic is None:
+            if operands[0] in labels:
+                raise ValueError(f"Label {operands[0]} defined twice")
+            labels[operands[0]] = i
+
+    # Every branch starts short where it can; one that does not reach its
+    # target grows, which only moves others further apart, so this settles
+    sizes = [plan[0] for plan in plans]
+    branches = [i for i, size in enumerate(sizes) if size is None]
+    short = []
+    for i in branches:
+        kind, label = plans[i][1], plans[i][4]
+        if kind != 'call' and label in labels:
+            sizes[i] = SHORT
+            short.append(i)
+        else:
+            sizes[i] = NEAR[kind]
+    while True:
+        offsets = [0, *itertools.accumulate(sizes)]
+        target = {label: offsets[i] for label, i in labels.items()}
+        grown = [i for i in short if not _fits8(target[plans[i][4]] - offsets[i + 1])]
+        if not grown:
+            break
+        for i in grown:
+            sizes[i] = NEAR[plans[i][1]]
+        short = [i for i in short if sizes[i] == SHORT]
+
+    parts = [plan[1] for plan in plans]
+    relocs = [(offset + k, symbol, kind)
+              for offset, plan in zip(offsets, plans) for k, symbol, kind in plan[2]]
+    for i in branches:
+        _, kind, _, cc, label = plans[i]
+        if label in target:
+            parts[i] = _branch(kind, cc, target[label] - offsets[i + 1], sizes[i] != SHORT)
+        else:
+            # rel32 from the end of the field, which is the end of the instruction
+            parts[i] = _branch(kind, cc, -4, True)
+            relocs.append((offsets[i + 1] - 4, label, REL))
+    relocs.sort()
+    listing = [(offset, mnemonic, operands)
+               for offset, (mnemonic, operands), plan in zip(offsets, code, plans)
+               if plan is not _NOTHING]
+    return {'text': b''.join(parts), 'labels': target, 'relocs': relocs, 'listing': listing}
+
+
+def parse_code(text):
+    # Code list of assembly text in the form the generators write; the
+    # runtimes parse theirs once, at import
+    code = []
+    for line in text.splitlines():
+        line = line.split(';', 1)[0].strip()
+        if not line:
+            continue
+        if line.endswith(':'):
+            code.append((None, (line[:-1],)))
+            continue
+        mnemonic, _, rest = line.partition(' ')
+        code.append((mnemonic, tuple(o.strip() for o in rest.split(',')) if rest else ()))
+    return code
+
+
+def parse_reserved(lines):
+    # [(label, bytes)] of 'label: resb N' / 'label: resd N' declarations
+    out = []
+    for line in lines:
+        label, directive, count = re.match(r'\s*([\w.]+):\s*(resb|resd)\s+(\d+)', line).groups()
+        out.append((label, int(count) * (4 if directive == 'resd' else 1)))
+    return out
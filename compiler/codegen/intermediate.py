@@ -7,20 +7,92 @@ class IRBuilder:
         self.instructions = []
         self._temp_count = 0
         self._label_count = 0
+        self.namespace = ''
+    def begin_unit(self, namespace):
+        # Temps and labels are numbered per unit (main, or one method) and
+        # prefixed with its namespace, so units lowered separately never
+        # collide and merge back into the same TAC as a serial run.
+        self.namespace = namespace
+        self._temp_count = 0
+        self._label_count = 0
     def add(self, op, a=None, b=None, r=None):
         self.instructions.append((op, a, b, r))
     def new_temp(self):
         self._temp_count += 1
-        return f"t{self._temp_count}"
+        return f"{self.namespace}t{self._temp_count}"
     def new_label(self, prefix='L'):
         self._label_count += 1
-        return f"{prefix}{self._label_count}"
+        return f"{self.namespace}{prefix}{self._label_count}"
     def get_ir(self):
         return self.instructions
 
+def method_label(class_name, method_name):
+    # Entry label of a method; also the namespace of its temps and labels
+    return f"{class_name}.{method_name}"
+
+
+class Local(str):
+    # TAC operand of a local variable or parameter: its name, which every
+    # pass handles and looks up like any other name, plus the slot the
+    # semantic analyzer gave it (MethodDeclNode.locals). The slot is only
+    # used to place a spilled local in its method's frame; registers are
+    # still assigned by name. Names derived from it (SSA versions, inlined
+    # copies) are plain str without a slot, so from -O1 on only the locals
+    # that keep their own name have one; the others spill past the locals
+    # like temps.
+    def __new__(cls, name, slot):
+        self = super().__new__(cls, name)
+        self.slot = slot
+        return self
+
+    def __reduce__(self):
+        return Local, (str(self), self.slot)
+
+
+def pure(node):
+    # None if evaluating the expression has an effect (a call, an
+    # allocation), else whether it can trap (array access, division)
+    if isinstance(node, (IntLiteralNode, BoolLiteralNode, ThisNode, VarNode)):
+        return False
+    if isinstance(node, (ArrayAccessNode, ArrayLengthNode)):
+        index = pure(node.index) if isinstance(node, ArrayAccessNode) else False
+        return None if index is None else True
+    if isinstance(node, UnaryOpNode):
+        return pure(node.expr)
+    if isinstance(node, BinaryOpNode):
+        left, right = pure(node.left), pure(node.right)
+        if left is None or right is None:
+            return None
+        return left or right or node.op in ('/', '%')
+    return None
+
+
+def swappable(a, b):
+    # Whether evaluating b before a is unobservable: neither has an effect
+    # and at most one of them can trap
+    left, right = pure(a), pure(b)
+    return left is not None and right is not None and not (left and right)
+
+
 class IRGenerator(Visitor):
-    def __init__(self):
+    def __init__(self, rotate_loops=True, target_assignments=True, reorder_operands=True):
         self.builder = IRBuilder()
+        self.this = Local('this', 0)
+        self.rotate_loops = rotate_loops
+        # Compute 'x = a op b' straight into x instead of a temp plus a copy
+        self.target_assignments = target_assignments
+        # Evaluate the operand needing more registers first (Sethi-Ullman)
+        # when the order cannot be observed
+        self.reorder_operands = reorder_operands
+        self._needs = {}
+        self.class_name = None
+
+    def lower_unit(self, class_name, node):
+        # TAC for a single unit: the MainClassNode, or one MethodDeclNode
+        # of class_name
+        self.class_name = class_name
+        self.visit(node)
+        return self.builder.get_ir()
 
     def visit_ProgramNode(self, node: ProgramNode):
         self.visit(node.main)
@@ -29,6 +101,7 @@ class IRGenerator(Visitor):
         return self.builder.get_ir()
 
     def visit_MainClassNode(self, node: MainClassNode):
+        self.builder.begin_unit('')
         self.builder.add('begin_main', None, None, None)
         # NOTE: do NOT emit a 'label main' — x86 backend already emits 'main:'
         for stmt in getattr(node, 'statements', []):
@@ -36,12 +109,19 @@ class IRGenerator(Visitor):
         self.builder.add('end_main', None, None, None)
 
     def visit_ClassDeclNode(self, node: ClassDeclNode):
+        self.class_name = node.name
         for m in getattr(node, 'method_decls', []):
             self.visit(m)
 
     def visit_MethodDeclNode(self, node: MethodDeclNode):
-        lbl = f"{node.name}"
+        lbl = method_label(self.class_name, node.name)
+        self.builder.begin_unit(lbl + '.')
         self.builder.add('label', lbl, None, None)
+        # Incoming arguments: the receiver, then the parameters in order
+        # (argument k is the local in slot k)
+        self.builder.add('arg', 0, None, self.this)
+        for k, (_, p_name) in enumerate(node.params, 1):
+            self.builder.add('arg', k, None, Local(p_name, k))
         for stmt in getattr(node, 'statements', []):
             self.visit(stmt)
         if node.return_expr:
@@ -58,14 +138,9 @@ class IRGenerator(Visitor):
             self.visit(s)
 
     def visit_IfNode(self, node: IfNode):
-        cond = self.visit(node.cond)
-        if isinstance(cond, int):
-            t = self.builder.new_temp()
-            self.builder.add('=', cond, None, t)
-            cond = t
         L_else = self.builder.new_label('ELSE')
         L_end = self.builder.new_label('END_IF')
-        self.builder.add('if_false', cond, L_else, None)
+        self.cond_jump(node.cond, L_else, False)
         self.visit(node.then_stmt)
         self.builder.add('goto', L_end, None, None)
         self.builder.add('label', L_else, None, None)
@@ -73,18 +148,69 @@ class IRGenerator(Visitor):
         self.builder.add('label', L_end, None, None)
 
     def visit_WhileNode(self, node: WhileNode):
+        if not self.rotate_loops:
+            L_start = self.builder.new_label('LOOP')
+            L_end = self.builder.new_label('ENDL')
+            self.builder.add('label', L_start, None, None)
+            self.cond_jump(node.cond, L_end, False)
+            self.visit(node.body)
+            self.builder.add('goto', L_start, None, None)
+            self.builder.add('label', L_end, None, None)
+            return
+        # Rotated form: guard once on entry, test again at the bottom and
+        # branch back while true, so each iteration takes a single branch.
         L_start = self.builder.new_label('LOOP')
         L_end = self.builder.new_label('ENDL')
+        self.cond_jump(node.cond, L_end, False)
         self.builder.add('label', L_start, None, None)
-        cond = self.visit(node.cond)
+        self.visit(node.body)
+        self.cond_jump(node.cond, L_start, True)
+        self.builder.add('label', L_end, None, None)
+
+    def cond_jump(self, expr, label, jump_if_true):
+        # Jumping code: branch to label when expr evaluates to jump_if_true
+        # and fall through otherwise. '!' swaps the sense and '&&' becomes a
+        # chain of branches, so neither is materialized as a 0/1 value; a
+        # '<' test ends in 'if_*' right after it, which the backends fuse
+        # into a compare and a conditional jump.
+        if isinstance(expr, UnaryOpNode) and expr.op == '!':
+            self.cond_jump(expr.expr, label, not jump_if_true)
+        elif isinstance(expr, BinaryOpNode) and expr.op == '&&':
+            if jump_if_true:
+                L_skip = self.builder.new_label('AND')
+                self.cond_jump(expr.left, L_skip, False)
+                self.cond_jump(expr.right, label, True)
+                self.builder.add('label', L_skip, None, None)
+            else:
+                self.cond_jump(expr.left, label, False)
+                self.cond_jump(expr.right, label, False)
+        else:
+            cond = self._cond_operand(expr)
+            self.builder.add('if_true' if jump_if_true else 'if_false', cond, label, None)
+
+    def _cond_operand(self, expr):
+        cond = self.visit(expr)
         if isinstance(cond, int):
             t = self.builder.new_temp()
             self.builder.add('=', cond, None, t)
             cond = t
-        self.builder.add('if_false', cond, L_end, None)
-        self.visit(node.body)
-        self.builder.add('goto', L_start, None, None)
+        return cond
+
+    def bool_value(self, expr, dest=None):
+        # A condition used as a value: its jumping code, then 1 or 0
+        # written on each path (after every operand was read, so dest may
+        # be one of them)
+        if dest is None:
+            dest = self.builder.new_temp()
+        L_false = self.builder.new_label('FALSE')
+        L_end = self.builder.new_label('END_BOOL')
+        self.cond_jump(expr, L_false, False)
+        self.builder.add('=', 1, None, dest)
+        self.builder.add('goto', L_end, None, None)
+        self.builder.add('label', L_false, None, None)
+        self.builder.add('=', 0, None, dest)
         self.builder.add('label', L_end, None, None)
+        return dest
 
     def visit_PrintNode(self, node: PrintNode):
         v = self.visit(node.expr)
@@ -95,8 +221,39 @@ class IRGenerator(Visitor):
         self.builder.add('print', v, None, None)
 
     def visit_AssignNode(self, node: AssignNode):
+        if node.field is not None:
+            self.builder.add('store', self.this, node.field, self.visit(node.expr))
+            return
+        if self.target_assignments and isinstance(node.expr, (BinaryOpNode, UnaryOpNode,
+                                                              MethodCallNode, NewObjectNode,
+                                                              NewArrayNode, ArrayAccessNode,
+                                                              ArrayLengthNode)):
+            # Every operand is already evaluated when the result is written,
+            # so this is safe even when they read the variable (x = x + 1)
+            self.visit(node.expr, self.local(node))
+            return
         rhs = self.visit(node.expr)
-        self.builder.add('=', rhs, None, node.name)
+        self.builder.add('=', rhs, None, self.local(node))
+
+    def visit_ArrayAssignNode(self, node: ArrayAssignNode):
+        # Java order: the array, the index and the value, then the check
+        arr = self._array(node)
+        index = self.visit(node.index)
+        value = self.visit(node.expr)
+        self.builder.add('check', index, arr, None)
+        self.builder.add('astore', arr, index, value)
+
+    def _array(self, node):
+        # The array an Array* node names: a local, or a field of 'this'
+        if node.field is not None:
+            t = self.builder.new_temp()
+            self.builder.add('load', self.this, node.field, t)
+            return t
+        return self.local(node)
+
+    def local(self, node):
+        # Operand of the local or parameter a name node refers to
+        return Local(node.name, node.slot)
 
     # --- Expressions ---
     def visit_IntLiteralNode(self, node: IntLiteralNode):
@@ -104,14 +261,102 @@ class IRGenerator(Visitor):
     def visit_BoolLiteralNode(self, node: BoolLiteralNode):
         return 1 if node.value else 0
     def visit_VarNode(self, node: VarNode):
-        return node.name
-    def visit_BinaryOpNode(self, node: BinaryOpNode):
-        left = self.visit(node.left)
-        right = self.visit(node.right)
-        dest = self.builder.new_temp()
-        if node.op in ['+', '-', '*', '<']:
+        if node.field is not None:
+            t = self.builder.new_temp()
+            self.builder.add('load', self.this, node.field, t)
+            return t
+        return self.local(node)
+    def visit_ThisNode(self, node: ThisNode):
+        return self.this
+    def visit_NewObjectNode(self, node: NewObjectNode, dest=None):
+        if dest is None:
+            dest = self.builder.new_temp()
+        self.builder.add('new', node.size, None, dest)
+        return dest
+    def visit_NewArrayNode(self, node: NewArrayNode, dest=None):
+        size = self.visit(node.size)
+        if dest is None:
+            dest = self.builder.new_temp()
+        self.builder.add('newarray', size, None, dest)
+        return dest
+    def visit_ArrayAccessNode(self, node: ArrayAccessNode, dest=None):
+        # 'check' traps unless 0 <= index < length; bounds-check elimination
+        # (compiler/opt/bce.py) drops the ones it proves redundant
+        arr = self._array(node)
+        index = self.visit(node.index)
+        if dest is None:
+            dest = self.builder.new_temp()
+        self.builder.add('check', index, arr, None)
+        self.builder.add('aload', arr, index, dest)
+        return dest
+    def visit_ArrayLengthNode(self, node: ArrayLengthNode, dest=None):
+        arr = self._array(node)
+        if dest is None:
+            dest = self.builder.new_temp()
+        self.builder.add('length', arr, None, dest)
+        return dest
+    def visit_MethodCallNode(self, node: MethodCallNode, dest=None):
+        # Every argument is evaluated before the first param, so the
+        # param/call sequence is never interrupted by a nested call
+        values = [self.visit(node.obj)] + [self.visit(a) for a in node.args]
+        if dest is None:
+            dest = self.builder.new_temp()
+        for v in values:
+            self.builder.add('param', v, None, None)
+        self.builder.add('call', method_label(node.class_name, node.method), len(values), dest)
+        return dest
+    def visit_BinaryOpNode(self, node: BinaryOpNode, dest=None):
+        # dest: write the result there instead of a new temp
+        if node.op == '&&':
+            # Short-circuit: the right operand only runs when the left is true
+            return self.bool_value(node, dest)
+        if self.reorder_operands and self.right_first(node):
+            right = self.visit(node.right)
+            left = self.visit(node.left)
+        else:
+            left = self.visit(node.left)
+            right = self.visit(node.right)
+        if dest is None:
+            dest = self.builder.new_temp()
+        if node.op in ['+', '-', '*', '/', '%', '<']:
             self.builder.add(node.op, left, right, dest)
             return dest
         raise NotImplementedError(f"Operator {node.op} not implemented in IR")
-    def visit_UnaryOpNode(self, node: UnaryOpNode):
-        raise NotImplementedError("Unary '!' not implemented in IR")
+
+    # --- Evaluation order ---
+    def need(self, node):
+        # Sethi-Ullman label: (temps live at once while node is evaluated,
+        # 1 if its value is left in a temp). Locals, 'this' and literals are
+        # operands as they are; anything else is counted as one temp.
+        key = id(node)
+        if key not in self._needs:
+            if isinstance(node, (IntLiteralNode, BoolLiteralNode, ThisNode)) \
+                    or isinstance(node, VarNode) and node.field is None:
+                label = (0, 0)
+            elif isinstance(node, BinaryOpNode) and node.op != '&&':
+                (nl, hl), (nr, hr) = self.need(node.left), self.need(node.right)
+                label = (max(1, min(max(nl, hl + nr), max(nr, hr + nl))), 1)
+            elif isinstance(node, UnaryOpNode):
+                label = (max(1, self.need(node.expr)[0]), 1)
+            else:
+                label = (1, 1)
+            # The node is kept alongside so its id is not reused
+            self._needs[key] = (node, label)
+        return self._needs[key][1]
+
+    def right_first(self, node):
+        # Whether to evaluate node.right before node.left: it needs more
+        # registers and swapping is unobservable
+        (nl, hl), (nr, hr) = self.need(node.left), self.need(node.right)
+        if max(nr, hr + nl) >= max(nl, hl + nr):
+            return False
+        return swappable(node.left, node.right)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode, dest=None):
+        # '!' as a value is 1 - b on 0/1 booleans; as a condition it only
+        # swaps the branch sense (cond_jump)
+        val = self.visit(node.expr)
+        if dest is None:
+            dest = self.builder.new_temp()
+        self.builder.add('-', 1, val, dest)
+        return dest
@@ -0,0 +1,348 @@
+# compiler/codegen/jit.py
+# Runs an x86-64 program inside the compiler process: X86_64Generator's
+# code is encoded (compiler.codegen.encoder, 64-bit mode) into an anonymous
+# mapping together with its .data and .bss and a small runtime, the text
+# is made executable and main is called through ctypes. No assembler,
+# linker or child process is involved.
+#
+# The program calls printf and exit; here those calls are bound to
+# jit_print, which formats the int into a buffer like runtime.TEXT and
+# calls back into Python through jit_flush_hook when the buffer is full,
+# and jit_exit, which unwinds straight to jit_entry with the status. The
+# whole mapping is one block, so every [rel symbol] is in reach of rip.
+#
+# The program runs in a forked child, so a crash or a runaway loop cannot
+# take the compiler down: the child sends its output through a pipe and is
+# killed when it runs past the time limit. main runs on a stack of its own,
+# STACK_SIZE bytes over a guard page, and every function entry compares rsp
+# with jit_stack_limit; a call too deep ends the run with a stack overflow
+# instead of a fault.
+import collections
+import ctypes
+import os
+import platform
+import select
+import signal
+import struct
+import sys
+import time
+
+from ..utils.errors import ExecutionError
+from .encoder import ABS, assemble, parse_code
+from .runtime import MAX_INT_TEXT, OUT_BUF_SIZE
+
+PAGE = 4096
+PROT_READ, PROT_WRITE, PROT_EXEC = 1, 2, 4
+MAP_PRIVATE, MAP_ANONYMOUS = 0x02, 0x20
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+# Stack of a run, like the usual 8 MB limit of a native process. The check
+# at function entry leaves STACK_RESERVE bytes above the guard page for the
+# frame of that function and for jit_print calling back into Python.
+STACK_SIZE = 8 << 20
+STACK_RESERVE = 256 << 10
+
+# Program symbols bound to runtime routines
+BINDINGS = {'printf': 'jit_print', 'exit': 'jit_exit'}
+
+BSS = [
+    ('rt_out_buf', OUT_BUF_SIZE),
+    ('rt_num_buf', MAX_INT_TEXT),
+    ('rt_out_len', 4),
+    ('jit_saved_rsp', 8),
+    ('jit_flush_hook', 8),
+    ('jit_stack_top', 8),
+    ('jit_stack_limit', 8),
+    ('jit_overflowed', 4),
+]
+
+# Inserted at the entry of main and of every method
+STACK_CHECK = parse_code("""\
+  cmp rsp, qword [rel jit_stack_limit]
+  jb jit_overflow
+""")
+
+# What the child sends after the program's output: its status and whether
+# it ran out of stack
+TRAILER = struct.Struct('<ii')
+
+TEXT = f"""\
+; int jit_entry(void) -- calls main, returns the exit status
+jit_entry:
+  push rbx
+  push rbp
+  push r12
+  push r13
+  push r14
+  push r15
+  mov qword [rel jit_saved_rsp], rsp
+  ; main runs on the stack of the run, 16-aligned at the call
+  mov rsp, qword [rel jit_stack_top]
+  call main
+  xor eax, eax
+jit_return:
+  mov rsp, qword [rel jit_saved_rsp]
+  pop r15
+  pop r14
+  pop r13
+  pop r12
+  pop rbp
+  pop rbx
+  ret
+
+; void jit_exit(int status) -- unwinds to jit_entry, from any depth
+jit_exit:
+  mov eax, edi
+  jmp jit_return
+
+; reached from a function entry with rsp below jit_stack_limit
+jit_overflow:
+  mov dword [rel jit_overflowed], 1
+  mov eax, 1
+  jmp jit_return
+
+; int jit_print(const char *fmt, int value) -- printf(fmt_int, value)
+jit_print:
+  cmp dword [rel rt_out_len], {OUT_BUF_SIZE - MAX_INT_TEXT}
+  jbe jit_print.room
+  push rsi
+  call qword [rel jit_flush_hook]
+  pop rsi
+  mov dword [rel rt_out_len], 0
+jit_print.room:
+  ; digits are produced backwards from the end of rt_num_buf
+  lea r8, [rel rt_num_buf+{MAX_INT_TEXT - 1}]
+  mov byte [r8], 10
+  mov eax, esi
+  test eax, eax
+  jns jit_print.digits
+  ; neg leaves INT_MIN as 0x80000000, which div reads as 2147483648
+  neg eax
+jit_print.digits:
+  mov ecx, 10
+jit_print.next:
+  xor edx, edx
+  div ecx
+  add dl, 48
+  sub r8, 1
+  mov byte [r8], dl
+  test eax, eax
+  jnz jit_print.next
+  test esi, esi
+  jns jit_print.copy
+  sub r8, 1
+  mov byte [r8], 45
+jit_print.copy:
+  lea rcx, [rel rt_num_buf+{MAX_INT_TEXT}]
+  sub rcx, r8
+  mov eax, dword [rel rt_out_len]
+  add dword [rel rt_out_len], ecx
+  lea rdi, [rel rt_out_buf]
+  add rdi, rax
+  mov rsi, r8
+  rep movsb
+  mov eax, ecx
+  ret
+"""
+CODE = parse_code(TEXT)
+
+JitResult = collections.namedtuple('JitResult', 'stdout status')
+
+_FLUSH = ctypes.CFUNCTYPE(None)
+_ENTRY = ctypes.CFUNCTYPE(ctypes.c_int)
+
+
+def supported():
+    # The code is x86-64 System V: only a Linux x86-64 host can run it
+    return sys.platform.startswith('linux') and platform.machine() in ('x86_64', 'AMD64')
+
+
+def _libc():
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.mmap.restype = ctypes.c_void_p
+    libc.mmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+                          ctypes.c_int, ctypes.c_long)
+    libc.mprotect.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int)
+    libc.munmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+    return libc
+
+
+def _round(n, align):
+    return n + (-n % align)
+
+
+def checked(code):
+    # code with STACK_CHECK at the entry of main and of every method called
+    entries = {'main'} | {ops[0] for mnemonic, ops in code if mnemonic == 'call'}
+    out = []
+    for instr in code:
+        out.append(instr)
+        if instr[0] is None and instr[1][0] in entries:
+            out.extend(STACK_CHECK)
+    return out
+
+
+def link(program):
+    # Image of a program ({'text', 'data', 'bss', 'externs'} as built by
+    # X86_64Generator.sections) plus the runtime, laid out from address 0:
+    # {'text': bytes, 'data': bytes, 'symbols': {name: offset}, 'relocs',
+    # 'size'}; text, then .data from the next page, then .bss
+    text = assemble(checked(program['text']) + CODE, bits=64)
+    symbols = dict(text['labels'])
+    data = bytearray()
+    data_start = _round(len(text['text']), PAGE)
+    for label, value in program['data']:
+        symbols[label] = data_start + len(data)
+        data += value
+        data += b'\0' * (-len(data) % 8)
+    end = data_start + len(data)
+    for label, size in list(program['bss']) + BSS:
+        end = _round(end, 16)
+        symbols[label] = end
+        end += size
+    for symbol in program['externs']:
+        if symbol not in BINDINGS:
+            raise ValueError(f"No JIT binding for {symbol}")
+        symbols[symbol] = symbols[BINDINGS[symbol]]
+    return {'text': text['text'], 'data': bytes(data), 'data_start': data_start,
+            'symbols': symbols, 'relocs': text['relocs'], 'size': _round(end, PAGE)}
+
+
+def relocate(image):
+    # The text of an image with its relocations applied
+    code = bytearray(image['text'])
+    for offset, symbol, kind in image['relocs']:
+        if symbol not in image['symbols']:
+            raise ValueError(f"Undefined symbol {symbol}")
+        if kind == ABS:
+            raise ValueError(f"Absolute reference to {symbol} in 64-bit code")
+        # S + A - P with A in the field; all three are offsets in one block
+        addend = int.from_bytes(code[offset:offset + 4], 'little', signed=True)
+        value = image['symbols'][symbol] + addend - offset
+        code[offset:offset + 4] = value.to_bytes(4, 'little', signed=True)
+    return bytes(code)
+
+
+def execute(image, code, write):
+    # (status, overflowed) of running a linked image in this process;
+    # write(bytes) gets the output as the buffer fills
+    libc = _libc()
+    size = image['size']
+    base = libc.mmap(None, size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0)
+    stack = libc.mmap(None, STACK_SIZE, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS,
+                      -1, 0)
+    if base in (None, MAP_FAILED) or stack in (None, MAP_FAILED):
+        raise OSError(ctypes.get_errno(), "mmap failed")
+    symbols = image['symbols']
+
+    def flush():
+        n = ctypes.c_int32.from_address(base + symbols['rt_out_len']).value
+        write(ctypes.string_at(base + symbols['rt_out_buf'], n))
+
+    def setq(symbol, value):
+        ctypes.c_uint64.from_address(base + symbols[symbol]).value = value
+
+    hook = _FLUSH(flush)
+    try:
+        ctypes.memmove(base, code, len(code))
+        ctypes.memmove(base + image['data_start'], image['data'], len(image['data']))
+        setq('jit_flush_hook', ctypes.cast(hook, ctypes.c_void_p).value)
+        setq('jit_stack_top', stack + STACK_SIZE)
+        setq('jit_stack_limit', stack + PAGE + STACK_RESERVE)
+        if (libc.mprotect(base, image['data_start'], PROT_READ | PROT_EXEC) != 0
+                or libc.mprotect(stack, PAGE, 0) != 0):
+            raise OSError(ctypes.get_errno(), "mprotect failed")
+        status = _ENTRY(base + symbols['jit_entry'])()
+        flush()
+        return status, ctypes.c_int32.from_address(base + symbols['jit_overflowed']).value
+    finally:
+        libc.munmap(base, size)
+        libc.munmap(stack, STACK_SIZE)
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _child(image, code, fd):
+    # Body of the forked child; never returns
+    failed = 1
+    try:
+        status, overflowed = execute(image, code, lambda data: _write_all(fd, data))
+        _write_all(fd, TRAILER.pack(status, overflowed))
+        failed = 0
+    except BaseException as e:
+        os.write(2, f"JIT child failed: {e!r}\n".encode())
+    finally:
+        os._exit(failed)
+
+
+def run(program, timeout=None):
+    # JitResult of running a program in a forked child; stdout is the text
+    # it printed. A run that overflows its stack, is killed by a signal or
+    # takes more than timeout seconds (None: no limit) raises ExecutionError
+    # with the output so far in its stdout attribute.
+    if not supported():
+        raise RuntimeError(f"In-process execution needs Linux on x86-64, not "
+                           f"{sys.platform} on {platform.machine()}")
+    image = link(program)
+    code = relocate(image)
+
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        _child(image, code, w)
+    os.close(w)
+    try:
+        data, timed_out = _read(r, timeout)
+    except BaseException:
+        # e.g. KeyboardInterrupt: the run is cancelled
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        raise
+    finally:
+        os.close(r)
+    if timed_out:
+        os.kill(pid, signal.SIGKILL)
+    _, wait_status = os.waitpid(pid, 0)
+
+    if timed_out:
+        raise _stopped(f"Time limit of {timeout} s exceeded", data)
+    if os.WIFSIGNALED(wait_status):
+        raise _stopped(f"Program killed by {signal.Signals(os.WTERMSIG(wait_status)).name}",
+                       data)
+    if os.WEXITSTATUS(wait_status) != 0 or len(data) < TRAILER.size:
+        raise RuntimeError("In-process execution failed (see stderr)")
+    status, overflowed = TRAILER.unpack(data[-TRAILER.size:])
+    data = data[:-TRAILER.size]
+    if overflowed:
+        raise _stopped(f"Stack overflow: calls nested deeper than the "
+                       f"{STACK_SIZE >> 20} MB stack allows", data)
+    return JitResult(data.decode(), status)
+
+
+def _read(fd, timeout):
+    # (everything read from fd until end of file, False), or (what was read
+    # so far, True) once timeout seconds have passed
+    chunks = []
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = None if deadline is None else deadline - time.monotonic()
+        if wait is not None and wait <= 0:
+            return b''.join(chunks), True
+        if not select.select([fd], [], [], wait)[0]:
+            continue
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            return b''.join(chunks), False
+        chunks.append(chunk)
+
+
+def _stopped(message, output):
+    # ExecutionError for a run that did not finish, with its output so far
+    e = ExecutionError(message)
+    e.stdout = output.decode(errors='replace')
+    return e
@@ -0,0 +1,22 @@
+# compiler/codegen/moves.py
+# Parallel moves: a set of copies that all read their sources before any
+# destination is written (phi resolution, argument passing).
+
+
+def sequentialize(copies, temp):
+    # Parallel copy [(dst, src)] as an ordered list of copies; a cycle is
+    # broken through temp
+    pending = [(d, s) for d, s in copies if d != s]
+    out = []
+    while pending:
+        sources = {s for _, s in pending}
+        ready = [c for c in pending if c[0] not in sources]
+        if ready:
+            for c in ready:
+                out.append(c)
+                pending.remove(c)
+            continue
+        d, s = pending[0]
+        out.append((temp, s))
+        pending = [(d2, temp if s2 == s else s2) for d2, s2 in pending]
+    return out
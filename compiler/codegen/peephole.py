@@ -0,0 +1,45 @@
+# compiler/codegen/peephole.py
+# Peephole passes over the code of one X86StyleGenerator unit, a list of
+# (mnemonic, operands) with labels as (None, (name,)). Each rewrites the list
+# in place and returns the number of instructions changed or removed.
+
+# Conditional jump -> the jump taken in exactly the other cases
+INVERSE_JUMP = {
+    'je': 'jne', 'jne': 'je', 'jl': 'jge', 'jge': 'jl', 'jg': 'jle', 'jle': 'jg',
+    'ja': 'jbe', 'jbe': 'ja', 'jae': 'jb', 'jb': 'jae',
+}
+
+
+def redundant_moves(code):
+    # 'mov a, b' right after 'mov b, a' (typically a spilled result stored
+    # and loaded straight back): a already holds b. Not when b is addressed
+    # through a, as in 'mov eax, dword [eax]'.
+    out = []
+    for instr in code:
+        if out and instr[0] == 'mov' and out[-1][0] == 'mov' \
+                and instr[1] == tuple(reversed(out[-1][1])) \
+                and out[-1][1][0] not in out[-1][1][1]:
+            continue
+        out.append(instr)
+    removed = len(code) - len(out)
+    code[:] = out
+    return removed
+
+
+def branch_over_jump(code):
+    # 'jcc L1; jmp L2; L1:' -> 'j!cc L2; L1:'
+    out = []
+    changed = 0
+    i = 0
+    while i < len(code):
+        mnemonic, operands = code[i]
+        if mnemonic in INVERSE_JUMP and i + 2 < len(code) and code[i + 1][0] == 'jmp' \
+                and code[i + 2] == (None, operands):
+            out.append((INVERSE_JUMP[mnemonic], code[i + 1][1]))
+            changed += 1
+            i += 2
+            continue
+        out.append(code[i])
+        i += 1
+    code[:] = out
+    return changed
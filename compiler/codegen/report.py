@@ -0,0 +1,191 @@
+# compiler/codegen/report.py
+# Code quality report of X86StyleGenerator output, per unit and in total:
+# instruction counts by class, register / immediate / memory operands (with
+# spill slots and mem_* operands counted apart), branches and branches inside
+# loops, and the cost model of cost.py. A loop is the code between a label
+# and a later jump back to it; 'weighted_cycles' counts an instruction
+# LOOP_WEIGHT times per enclosing loop, a rough stand-in for a profile.
+#
+# Reports are plain dicts (JSON). diff_reports() compares two of them metric
+# by metric; a rise in any metric of LOWER_IS_BETTER beyond the threshold is
+# a regression.
+from .cost import REGS32, REGS8, instr_bytes, instr_cycles, operand_kind
+
+LOOP_WEIGHT = 10
+
+CLASSES = {
+    'move': ('mov', 'movzx', 'lea', 'xor'),
+    'arith': ('add', 'sub', 'and', 'imul', 'idiv', 'cdq', 'neg', 'inc', 'dec', 'shl', 'sar', 'shr'),
+    'compare': ('cmp', 'test', 'setl', 'setg', 'setle', 'setge', 'sete', 'setne'),
+    'branch': ('jmp', 'je', 'jne', 'jl', 'jge', 'jg', 'jle', 'ja', 'jae', 'jb', 'jbe'),
+    'stack': ('push', 'pop'),
+    'call': ('call', 'ret', 'leave'),
+}
+CLASS_OF = {m: c for c, ms in CLASSES.items() for m in ms}
+
+# Scalar metrics, in report order
+METRICS = ('instructions', 'bytes', 'cycles', 'weighted_cycles', 'branches', 'loop_branches',
+           'loops', 'reg_operands', 'spill_operands', 'mem_operands', 'memory_operands',
+           'spill_slots')
+# Metrics where a larger value means worse code
+LOWER_IS_BETTER = ('instructions', 'bytes', 'cycles', 'weighted_cycles', 'branches',
+                   'loop_branches', 'spill_operands', 'mem_operands', 'memory_operands',
+                   'spill_slots')
+
+
+def operand_class(op):
+    # 'reg', 'imm', 'spill' (mem_* or frame slot), 'memory' or 'symbol'
+    if op.startswith('dword ') and '[' not in op:
+        op = op[len('dword '):]         # 'push dword edx'
+    kind = operand_kind(op)
+    if kind in ('reg', 'reg8'):
+        return 'reg'
+    if kind in ('imm8', 'imm32'):
+        return 'imm'
+    if kind == 'mem':
+        return 'spill' if '[mem_' in op or '[ebp-' in op else 'memory'
+    return 'symbol'
+
+
+def loop_depths(code):
+    # (loop nesting depth of every position in code, number of loops)
+    labels = {ops[0]: i for i, (m, ops) in enumerate(code) if m is None}
+    depth = [0] * len(code)
+    heads = set()
+    for i, (m, ops) in enumerate(code):
+        if CLASS_OF.get(m) == 'branch' and labels.get(ops[0], i + 1) <= i:
+            heads.add(ops[0])
+            for k in range(labels[ops[0]], i + 1):
+                depth[k] += 1
+    return depth, len(heads)
+
+
+def unit_report(code):
+    # Report of one unit's code: [(mnemonic, operands)], labels as (None, (name,))
+    r = dict.fromkeys(METRICS, 0)
+    classes = dict.fromkeys(list(CLASSES) + ['other'], 0)
+    regs, slots = set(), set()
+    depth, r['loops'] = loop_depths(code)
+    for i, (m, ops) in enumerate(code):
+        if m is None or m.startswith(';'):
+            continue
+        cls = CLASS_OF.get(m, 'other')
+        classes[cls] += 1
+        cycles = instr_cycles(m, ops)
+        r['instructions'] += 1
+        r['bytes'] += instr_bytes(m, ops)
+        r['cycles'] += cycles
+        r['weighted_cycles'] += cycles * LOOP_WEIGHT ** depth[i]
+        if cls == 'branch':
+            r['branches'] += 1
+            r['loop_branches'] += 1 if depth[i] else 0
+        for op in ops:
+            kind = operand_class(op)
+            if kind == 'reg':
+                r['reg_operands'] += 1
+                regs.add(op.split()[-1])
+            elif kind == 'spill':
+                r['spill_operands'] += 1
+                slots.add(op)
+                r['mem_operands'] += 1 if '[mem_' in op else 0
+            elif kind == 'memory':
+                r['memory_operands'] += 1
+    r['spill_slots'] = len(slots)
+    r['classes'] = classes
+    r['registers'] = sorted(regs, key=(REGS32 + REGS8).index)
+    return r
+
+
+def unit_name(code):
+    return next((ops[0] for m, ops in code if m is None), 'main')
+
+
+def program_report(units):
+    # Report of generate_unit results (X86StyleGenerator.units): per unit
+    # and summed over the program
+    per_unit = {unit_name(u['code']): unit_report(u['code']) for u in units}
+    return {'units': per_unit, 'total': sum_reports(per_unit.values())}
+
+
+def sum_reports(reports):
+    total = dict.fromkeys(METRICS, 0)
+    total['classes'] = dict.fromkeys(list(CLASSES) + ['other'], 0)
+    regs = set()
+    for r in reports:
+        for key in METRICS:
+            total[key] += r[key]
+        for cls, n in r['classes'].items():
+            total['classes'][cls] += n
+        regs.update(r['registers'])
+    total['registers'] = sorted(regs, key=(REGS32 + REGS8).index)
+    return total
+
+
+def format_report(report):
+    t = report['total']
+    lines = [f"{'unit':<28} {'instrs':>7} {'cycles':>7} {'weighted':>9} {'branches':>8} "
+             f"{'in loops':>8} {'spills':>7} {'mem_*':>6}"]
+    rows = list(report['units'].items()) + [('total', t)]
+    for name, r in rows:
+        lines.append(f"{name[:28]:<28} {r['instructions']:>7} {r['cycles']:>7} "
+                     f"{r['weighted_cycles']:>9} {r['branches']:>8} {r['loop_branches']:>8} "
+                     f"{r['spill_operands']:>7} {r['mem_operands']:>6}")
+    lines.append("classes: " + ", ".join(f"{c} {n}" for c, n in t['classes'].items()))
+    lines.append(f"operands: {t['reg_operands']} register, {t['spill_operands']} spill "
+                 f"({t['spill_slots']} slots, {t['mem_operands']} mem_*), "
+                 f"{t['memory_operands']} other memory; registers {' '.join(t['registers'])}")
+    return "\n".join(lines)
+
+
+# -----------------------
+# Diffs
+# -----------------------
+def diff_metrics(old, new, threshold=0.0):
+    # [(metric, old, new, regressed)] over the scalar metrics of two reports
+    out = []
+    for key in METRICS:
+        a, b = old.get(key, 0), new.get(key, 0)
+        regressed = key in LOWER_IS_BETTER and b > a * (1 + threshold)
+        out.append((key, a, b, regressed))
+    return out
+
+
+def diff_reports(old, new, threshold=0.0):
+    # {'total': diff_metrics rows, 'units': {name: rows of changed units},
+    #  'added', 'removed', 'regressions': ['unit metric', ...]}. Per-unit
+    # rises only count as regressions when the total rises as well.
+    total = diff_metrics(old['total'], new['total'], threshold)
+    units = {}
+    for name in new['units']:
+        if name in old['units']:
+            rows = diff_metrics(old['units'][name], new['units'][name], threshold)
+            if any(a != b for _, a, b, _ in rows):
+                units[name] = rows
+    regressions = [f"total {key}" for key, _, _, bad in total if bad]
+    bad_keys = {key for key, _, _, bad in total if bad}
+    regressions += [f"{name} {key}" for name, rows in units.items()
+                    for key, _, _, bad in rows if bad and key in bad_keys]
+    return {'total': total, 'units': units,
+            'added': sorted(set(new['units']) - set(old['units'])),
+            'removed': sorted(set(old['units']) - set(new['units'])),
+            'regressions': regressions}
+
+
+def format_diff(diff):
+    def change(a, b):
+        if a == b:
+            return ""
+        return f"{b - a:+d}" + (f" ({(b - a) / a:+.1%})" if a else "")
+
+    lines = [f"{'metric':<16} {'old':>9} {'new':>9}  change"]
+    for key, a, b, bad in diff['total']:
+        lines.append(f"{key:<16} {a:>9} {b:>9}  {change(a, b)}{'  REGRESSION' if bad else ''}")
+    for name, rows in diff['units'].items():
+        changed = ", ".join(f"{key} {change(a, b)}" for key, a, b, _ in rows if a != b)
+        lines.append(f"  {name}: {changed}")
+    if diff['added']:
+        lines.append("  new units: " + ", ".join(diff['added']))
+    if diff['removed']:
+        lines.append("  removed units: " + ", ".join(diff['removed']))
+    lines.append(f"{len(diff['regressions'])} regression(s)")
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+# compiler/codegen/runtime.py
+# Output runtime emitted into 32-bit programs instead of calling printf.
+# rt_print_int formats one int plus a newline into a static buffer;
+# rt_flush hands the buffer to the kernel with write(2). The buffer is
+# flushed when it cannot take another number and once at program exit.
+# Both routines preserve every general-purpose register.
+
+OUT_BUF_SIZE = 65536
+# Longest line rt_print_int produces: "-2147483648\n"
+MAX_INT_TEXT = 12
+
+BSS = [
+    f"  rt_out_buf: resb {OUT_BUF_SIZE}",
+    "  rt_out_len: resd 1",
+    f"  rt_num_buf: resb {MAX_INT_TEXT}",
+]
+
+TEXT = f"""\
+; void rt_print_int(int value) -- stdcall, the callee pops the argument
+rt_print_int:
+  pusha
+  mov eax, [esp+36]
+  cmp dword [rt_out_len], {OUT_BUF_SIZE - MAX_INT_TEXT}
+  jbe rt_print_room
+  call rt_flush
+rt_print_room:
+  ; digits are produced backwards from the end of rt_num_buf
+  lea esi, [rt_num_buf+{MAX_INT_TEXT - 1}]
+  mov byte [esi], 10
+  mov ecx, eax
+  test eax, eax
+  jns rt_print_digits
+  ; neg leaves INT_MIN as 0x80000000, which div reads as 2147483648
+  neg eax
+rt_print_digits:
+  mov ebx, 10
+rt_print_next:
+  xor edx, edx
+  div ebx
+  add dl, 48
+  dec esi
+  mov [esi], dl
+  test eax, eax
+  jnz rt_print_next
+  test ecx, ecx
+  jns rt_print_copy
+  dec esi
+  mov byte [esi], 45
+rt_print_copy:
+  lea ecx, [rt_num_buf+{MAX_INT_TEXT}]
+  sub ecx, esi
+  mov edi, [rt_out_len]
+  add [rt_out_len], ecx
+  lea edi, [rt_out_buf+edi]
+  cld
+  rep movsb
+  popa
+  ret 4
+
+; void rt_flush(void) -- write(1, rt_out_buf, rt_out_len), retrying short writes
+rt_flush:
+  pusha
+  lea esi, [rt_out_buf]
+  mov edi, [rt_out_len]
+rt_flush_loop:
+  test edi, edi
+  jle rt_flush_done
+  mov eax, 4
+  mov ebx, 1
+  mov ecx, esi
+  mov edx, edi
+  int 0x80
+  ; an error drops the rest of the buffer
+  test eax, eax
+  jle rt_flush_done
+  add esi, eax
+  sub edi, eax
+  jmp rt_flush_loop
+rt_flush_done:
+  mov dword [rt_out_len], 0
+  popa
+  ret"""
+
+
+# Objects: a bump allocator over a static arena, emitted when a program
+# uses 'new'. The arena is .bss, so new objects start zeroed (null refs and
+# 0 ints); running out of it jumps to rt_new_full, one of the traps below.
+HEAP_SIZE = 1 << 22
+# Longest int array: its length word and elements fill the arena
+MAX_ARRAY_LENGTH = HEAP_SIZE // 4 - 1
+
+HEAP_BSS = [
+    f"  rt_heap: resb {HEAP_SIZE}",
+    "  rt_heap_used: resd 1",
+]
+
+HEAP_TEXT = f"""\
+; void *rt_new(int bytes) -- stdcall; preserves every register but eax
+rt_new:
+  push edx
+  mov eax, [rt_heap_used]
+  mov edx, eax
+  add edx, [esp+8]
+  cmp edx, {HEAP_SIZE}
+  ja rt_new_full
+  mov [rt_heap_used], edx
+  pop edx
+  lea eax, [rt_heap+eax]
+  ret 4"""
+
+
+# Arrays: rt_new_array allocates the length word plus the elements through
+# rt_new. A failed bounds check and an impossible array size both jump to
+# rt_bounds, which ends the program with exit status 1 once everything
+# printed so far is out; a full heap (rt_new_full) and a division by zero
+# (rt_div_zero) do the same.
+ARRAY_TEXT = f"""\
+; int *rt_new_array(int length) -- stdcall; preserves every register but eax
+rt_new_array:
+  mov eax, [esp+4]
+  cmp eax, {MAX_ARRAY_LENGTH}
+  ja rt_bounds
+  lea eax, [eax*4+4]
+  push eax
+  call rt_new
+  push edx
+  mov edx, [esp+8]
+  mov [eax], edx
+  pop edx
+  ret 4"""
+
+BOUNDS_TEXT = """\
+rt_new_full:
+rt_bounds:
+rt_div_zero:
+  call rt_flush
+  mov eax, 1
+  mov ebx, 1
+  int 0x80"""
+
+# With the printf runtime, libc's exit flushes stdout
+BOUNDS_TEXT_LIBC = """\
+rt_new_full:
+rt_bounds:
+rt_div_zero:
+  push 1
+  call exit"""
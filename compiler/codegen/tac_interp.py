@@ -0,0 +1,405 @@
+# compiler/codegen/tac_interp.py
+# Interpreter for IRGenerator output. The TAC list is compiled once into a
+# compact form (dense variable slots, one closure per instruction, integer
+# block successors) and then run without re-inspecting the tuples. Block
+# execution counts are recorded on every run; per-instruction counts follow
+# from them because every instruction of a block runs once per block entry.
+# Method calls run on an explicit stack of activations, so deep recursion in
+# the interpreted program does not recurse in Python.
+from ..utils.errors import ExecutionError
+from .cfg import EXIT_OPS, TERMINATORS, build_cfg
+from .runtime import HEAP_SIZE, MAX_ARRAY_LENGTH
+
+# Pseudo-ops that generate no code
+NO_CODE_OPS = ('label', 'begin_main')
+
+_MASK = 0xFFFFFFFF
+_SIGN = 0x80000000
+
+
+def wrap32(x):
+    # Two's-complement 32-bit wraparound, as on the target machine
+    return ((x + _SIGN) & _MASK) - _SIGN
+
+
+def _lt(a, b):
+    return 1 if a < b else 0
+
+
+def java_div(a, b):
+    # Java int division: truncates toward zero; MIN_INT / -1 wraps to MIN_INT
+    if b == 0:
+        raise ExecutionError("Division by zero")
+    q = abs(a) // abs(b)
+    return wrap32(q if (a < 0) == (b < 0) else -q)
+
+
+def java_mod(a, b):
+    # The remainder takes the sign of the dividend: a == (a / b) * b + a % b
+    if b == 0:
+        raise ExecutionError("Division by zero")
+    r = abs(a) % abs(b)
+    return -r if a < 0 else r
+
+
+BINARY_OPS = {
+    '+': lambda a, b: wrap32(a + b),
+    '-': lambda a, b: wrap32(a - b),
+    '*': lambda a, b: wrap32(a * b),
+    '/': java_div,
+    '%': java_mod,
+    '<': _lt,
+}
+
+# Terminator kinds
+_FALL, _GOTO, _IF_FALSE, _IF_TRUE, _EXIT, _CALL = range(6)
+
+# Words of objects and arrays a run may allocate, as in the native arena
+# (heap[0] stands for the null offset the arena never hands out)
+HEAP_WORDS = HEAP_SIZE // 4
+
+# Deepest call nesting before a run is abandoned (runaway recursion)
+MAX_CALL_DEPTH = 100000
+
+
+class ExecResult:
+    def __init__(self, output, cfg, block_counts, instr_counts, steps, paused=None):
+        self.output = output                # list of printed ints
+        self.cfg = cfg
+        self.block_counts = block_counts    # per block index
+        self.instr_counts = instr_counts    # per TAC position
+        self.steps = steps                  # dynamic instruction count
+        self.paused = paused                # (block index, env) of a paused run, else None
+
+    @property
+    def stdout(self):
+        # Same text printf("%d\n") would produce
+        return "".join(f"{v}\n" for v in self.output)
+
+    def dynamic_count(self, ops):
+        # How many times instructions with one of the given ops executed
+        tac = self.cfg.instructions()
+        return sum(c for instr, c in zip(tac, self.instr_counts) if instr[0] in ops)
+
+    def block_profile(self):
+        # [(block, count)] hottest first
+        pairs = [(b, self.block_counts[b.index]) for b in self.cfg.blocks]
+        return sorted(pairs, key=lambda p: -p[1])
+
+    def format_profile(self, top=10):
+        lines = [f"dynamic instructions: {self.steps}"]
+        for block, count in self.block_profile()[:top]:
+            if count == 0:
+                break
+            name = block.label or f"B{block.index}"
+            lines.append(f"{count:>10}  {name}")
+            for instr in block.instrs:
+                if instr[0] not in NO_CODE_OPS:
+                    lines.append(f"{'':>12}{instr}")
+        return "\n".join(lines)
+
+
+class TACInterpreter:
+    # Blocks are split after every call into pieces; a call ends its piece
+    # and the callee's return resumes the caller at the next one. Each
+    # function has its own variable slots, and every activation gets a
+    # fresh copy of them. Objects live in one heap list; a reference is the
+    # index of the object's first field, so 0 is never a valid object. An
+    # array is its length followed by the elements, referenced by the length.
+    def __init__(self, tac):
+        self.tac = [instr for instr in tac if instr]
+        self.cfg = build_cfg(self.tac)
+        self.slots = {}                     # operand -> env index (current function)
+        self.init_env = []                  # initial env: constants preloaded, vars 0
+        self.functions = {}                 # label -> (entry piece, initial env)
+        self.function_slots = {}            # label -> its operand -> env index map
+        self.heap = [0]
+        self._out = []
+        self._args = []                     # values passed by 'param', innermost call last
+        self._incoming = []                 # arguments of the activation being entered
+        self._block_ends = []
+        self._compile()
+
+    # -----------------------
+    # Compilation
+    # -----------------------
+    def slot(self, x):
+        if x not in self.slots:
+            self.slots[x] = len(self.init_env)
+            # ints are immediates and get a constant slot
+            self.init_env.append(x if isinstance(x, int) else 0)
+        return self.slots[x]
+
+    def _compile_instr(self, instr):
+        op, a, b, r = instr
+        out = self._out
+        if op in NO_CODE_OPS:
+            return None
+        if op == '=':
+            sa, sr = self.slot(a), self.slot(r)
+
+            def copy(env):
+                env[sr] = env[sa]
+            return copy
+        if op in BINARY_OPS:
+            fn = BINARY_OPS[op]
+            sa, sb, sr = self.slot(a), self.slot(b), self.slot(r)
+
+            def binop(env):
+                env[sr] = fn(env[sa], env[sb])
+            return binop
+        if op == 'print':
+            sa = self.slot(a)
+
+            def prnt(env):
+                out.append(env[sa])
+            return prnt
+        if op == 'param':
+            sa, args = self.slot(a), self._args
+
+            def param(env):
+                args.append(env[sa])
+            return param
+        if op == 'arg':
+            sr, incoming = self.slot(r), self._incoming
+
+            def arg(env):
+                env[sr] = incoming[a]
+            return arg
+        heap = self.heap
+        if op == 'new':
+            sr = self.slot(r)
+
+            def new(env):
+                if len(heap) + a > HEAP_WORDS:
+                    raise ExecutionError("Out of heap memory")
+                env[sr] = len(heap)
+                heap.extend([0] * a)
+            return new
+        if op == 'load':
+            sa, sr = self.slot(a), self.slot(r)
+
+            def load(env):
+                base = env[sa]
+                if not base:
+                    raise ExecutionError("Field access through an uninitialized object")
+                env[sr] = heap[base + b]
+            return load
+        if op == 'store':
+            sa, sv = self.slot(a), self.slot(r)
+
+            def store(env):
+                base = env[sa]
+                if not base:
+                    raise ExecutionError("Field access through an uninitialized object")
+                heap[base + b] = env[sv]
+            return store
+        if op == 'newarray':
+            sa, sr = self.slot(a), self.slot(r)
+
+            def newarray(env):
+                n = env[sa]
+                if not 0 <= n <= MAX_ARRAY_LENGTH:
+                    raise ExecutionError(f"Bad array size {n}")
+                if len(heap) + 1 + n > HEAP_WORDS:
+                    raise ExecutionError("Out of heap memory")
+                env[sr] = len(heap)
+                heap.append(n)
+                heap.extend([0] * n)
+            return newarray
+        if op == 'length':
+            sa, sr = self.slot(a), self.slot(r)
+
+            def length(env):
+                base = env[sa]
+                if not base:
+                    raise ExecutionError("Length of an uninitialized array")
+                env[sr] = heap[base]
+            return length
+        if op == 'check':
+            sa, sb = self.slot(a), self.slot(b)
+
+            def check(env):
+                base = env[sb]
+                if not base:
+                    raise ExecutionError("Access through an uninitialized array")
+                if not 0 <= env[sa] < heap[base]:
+                    raise ExecutionError(f"Array index {env[sa]} out of bounds for length {heap[base]}")
+            return check
+        # Accesses rely on the 'check' before them (or on its proof)
+        if op == 'aload':
+            sa, sb, sr = self.slot(a), self.slot(b), self.slot(r)
+
+            def aload(env):
+                env[sr] = heap[env[sa] + 1 + env[sb]]
+            return aload
+        if op == 'astore':
+            sa, sb, sv = self.slot(a), self.slot(b), self.slot(r)
+
+            def astore(env):
+                heap[env[sa] + 1 + env[sb]] = env[sv]
+            return astore
+        raise ExecutionError(f"Cannot interpret TAC instruction {instr}")
+
+    def _piece(self, label):
+        block = self.cfg.label_to_block.get(label)
+        if block is None:
+            raise ExecutionError(f"Jump to undefined label '{label}'")
+        return self.first_piece[block.index]
+
+    def _compile(self):
+        blocks = self.cfg.blocks
+        self.bodies = []
+        self.terms = []
+        self.sizes = []
+        self.first_piece = []               # block index -> its first piece
+        for i, block in enumerate(blocks):
+            instrs = block.instrs
+            head = instrs[0]
+            # Functions as in cfg.split_functions; each gets fresh slots
+            if i == 0 or head[0] == 'begin_main' or blocks[i - 1].last[0] in EXIT_OPS:
+                self.slots, self.init_env = {}, []
+                name = 'main' if head[0] == 'begin_main' else head[1]
+                self.functions[name] = (len(self.bodies), self.init_env)
+                self.function_slots[name] = self.slots
+            self.first_piece.append(len(self.bodies))
+            last = instrs[-1]
+            op = last[0]
+            body_instrs = instrs[:-1] if op in TERMINATORS else instrs
+            body, size = [], 0
+            for instr in body_instrs:
+                if instr[0] not in NO_CODE_OPS:
+                    size += 1
+                if instr[0] == 'call':
+                    # the callee is resolved once every function is known
+                    self._add_piece(body, size, [_CALL, instr[1], instr[2],
+                                                 self.slot(instr[3]), len(self.bodies) + 1])
+                    body, size = [], 0
+                    continue
+                f = self._compile_instr(instr)
+                if f is not None:
+                    body.append(f)
+            if op in TERMINATORS:
+                size += 1
+            nxt = i + 1 if i + 1 < len(blocks) else None
+            if op == 'goto':
+                term = [_GOTO, last[1]]
+            elif op == 'if_false':
+                term = [_IF_FALSE, self.slot(last[1]), last[2], nxt]
+            elif op == 'if_true':
+                term = [_IF_TRUE, self.slot(last[1]), last[2], nxt]
+            elif op == 'return':
+                term = [_EXIT, self.slot(last[1])]
+            elif op == 'end_main':
+                term = [_EXIT, None]
+            else:
+                term = [_FALL, nxt]
+            self._add_piece(body, size, term)
+            self._block_ends.append(term)
+        # Block indices and labels -> piece indices
+        for term in self._block_ends:
+            kind = term[0]
+            if kind == _GOTO:
+                term[1] = self._piece(term[1])
+            elif kind in (_IF_FALSE, _IF_TRUE):
+                term[2] = self._piece(term[2])
+                term[3] = -1 if term[3] is None else self.first_piece[term[3]]
+            elif kind == _FALL:
+                term[1] = -1 if term[1] is None else self.first_piece[term[1]]
+        for term in self.terms:
+            if term[0] == _CALL:
+                if term[1] not in self.functions:
+                    raise ExecutionError(f"Call to undefined method '{term[1]}'")
+                term[1] = self.functions[term[1]]
+        self.terms = [tuple(t) for t in self.terms]
+        # Execution starts in main (or the first function of a lone unit)
+        self.entry = self.functions.get('main') or (0, self.init_env)
+
+    def _add_piece(self, body, size, term):
+        self.bodies.append(body)
+        self.sizes.append(size)
+        self.terms.append(term)
+
+    # -----------------------
+    # Execution
+    # -----------------------
+    def run(self, max_steps=None, pause_after=None, pause_at=()):
+        # ExecResult of a run; an ExecutionError carries what the program
+        # printed before it stopped in its stdout attribute
+        try:
+            return self._execute(max_steps, pause_after, pause_at)
+        except ExecutionError as e:
+            e.stdout = "".join(f"{v}\n" for v in self._out)
+            raise
+
+    def _execute(self, max_steps, pause_after, pause_at):
+        # After pause_after steps, the run stops when it next enters one of
+        # the blocks pause_at (indices) outside any call; result.paused then
+        # holds that block and the variables, self.heap the objects.
+        # max_steps is a hard limit either way.
+        b, env = self.entry
+        env = list(env)
+        out = self._out
+        del out[:]
+        del self.heap[1:]
+        del self._args[:]
+        args, incoming = self._args, self._incoming
+        bodies, terms, sizes = self.bodies, self.terms, self.sizes
+        counts = [0] * len(bodies)
+        stack = []                          # (caller env, result slot, resume piece)
+        steps = 0
+        limit = max_steps if pause_after is None else pause_after
+        pause = {self.first_piece[i]: i for i in pause_at}
+        paused = None
+        if not bodies:
+            b = -1
+        while b >= 0:
+            counts[b] += 1
+            steps += sizes[b]
+            if limit is not None and steps > limit:
+                if b in pause and not stack and pause_after is not None:
+                    counts[b] -= 1
+                    steps -= sizes[b]
+                    paused = (pause[b], env)
+                    break
+                if max_steps is not None and steps > max_steps:
+                    raise ExecutionError(f"Step limit of {max_steps} exceeded")
+            for f in bodies[b]:
+                f(env)
+            term = terms[b]
+            kind = term[0]
+            if kind == _FALL:
+                b = term[1]
+            elif kind == _GOTO:
+                b = term[1]
+            elif kind == _IF_FALSE:
+                b = term[2] if env[term[1]] == 0 else term[3]
+            elif kind == _IF_TRUE:
+                b = term[2] if env[term[1]] != 0 else term[3]
+            elif kind == _CALL:
+                if len(stack) >= MAX_CALL_DEPTH:
+                    raise ExecutionError(f"Call depth limit of {MAX_CALL_DEPTH} exceeded")
+                (entry, init), nargs = term[1], term[2]
+                stack.append((env, term[3], term[4]))
+                incoming[:] = args[len(args) - nargs:]
+                del args[len(args) - nargs:]
+                env = list(init)
+                b = entry
+            elif stack:
+                value = env[term[1]]
+                env, dest, b = stack.pop()
+                env[dest] = value
+            else:
+                break
+        # A call splits its block; only the first piece counts block entries
+        block_counts = [counts[p] for p in self.first_piece]
+        instr_counts = [0] * len(self.tac)
+        for block in self.cfg.blocks:
+            c = block_counts[block.index]
+            for k in range(len(block.instrs)):
+                instr_counts[block.start + k] = c
+        return ExecResult(list(out), self.cfg, block_counts, instr_counts, steps, paused)
+
+
+def run_tac(tac, max_steps=None):
+    return TACInterpreter(tac).run(max_steps=max_steps)
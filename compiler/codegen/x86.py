@@ -1,25 +1,97 @@
 # compiler/codegen/x86.py
+from .cost import static_cost
+from .tac_interp import BINARY_OPS
+from . import runtime
+from .cfg import EXIT_OPS, build_cfg, liveness, split_functions, uses_defs
+from .divide import divide_by_constant, uses_edx
+from .elf import object_file
+from .encoder import parse_code, parse_reserved
+from .moves import sequentialize
+
+# Ops that clobber registers the allocator hands out: live values in them
+# are saved around the instruction (see live_across)
+CLOBBER_OPS = ('call', 'new', 'newarray', '/', '%')
+
+# Runtime routines as code lists for sections(), parsed once
+RUNTIME_CODE = parse_code(runtime.TEXT)
+HEAP_CODE = parse_code(runtime.HEAP_TEXT)
+ARRAY_CODE = parse_code(runtime.ARRAY_TEXT)
+BOUNDS_CODE = parse_code(runtime.BOUNDS_TEXT)
+BOUNDS_CODE_LIBC = parse_code(runtime.BOUNDS_TEXT_LIBC)
+
+
+def _is_imm(x):
+    return isinstance(x, int)
+
+
 class X86StyleGenerator:
     REG_ORDER = ['eax', 'ebx', 'ecx', 'edx', 'esi', 'edi']
+    # Registers with an addressable low byte (al, bl, cl, dl) for setcc
+    BYTE_REGS = {'eax': 'al', 'ebx': 'bl', 'ecx': 'cl', 'edx': 'dl'}
+    # The selector keeps eax out of allocation as its scratch register
+    # (it is also the return register and clobbered by setl/printf)
+    SCRATCH = 'eax'
+    # Registers printf may clobber (cdecl caller-saved)
+    CALLER_SAVED = ('eax', 'ecx', 'edx')
+    # Method calls: the receiver in ecx, the first argument in edx, the rest
+    # pushed right to left and popped by the caller; the result in eax. The
+    # callee preserves ebx, esi and edi, the caller whatever else is live.
+    ARG_REGS = ('ecx', 'edx')
+    CALLEE_SAVED = ('ebx', 'esi', 'edi')
+    RUNTIMES = ('buffered', 'printf')
 
-    def __init__(self):
+    def __init__(self, select=True, runtime='buffered', passes=None):
         self.register_map = {}
         self.next_reg = 0
+        self.free_regs = []
         self.label_count = 0
+        self.namespace = ''
+        # select=False keeps the original one-pattern-per-op lowering
+        self.select = select
+        self.regs = [r for r in self.REG_ORDER if r != self.SCRATCH] if select else self.REG_ORDER
+        # 'buffered': emitted rt_print_int/rt_flush; 'printf': call into libc
+        if runtime not in self.RUNTIMES:
+            raise ValueError(f"Unknown print runtime '{runtime}'")
+        self.runtime = runtime
+        # compiler.passes.PassManager whose 'asm' passes finish each unit
+        self.passes = passes
+        self.code = []          # [(mnemonic, operands)]; labels have mnemonic None
+        self.spilled = []
+        self.units = []
+        self.in_method = False
+        self.frame_slots = 0
+        self.n_locals = 0
+        self.frame_temps = 0
+        self.params = []
 
     def alloc_reg(self, name):
         # Map temps/vars to registers; immediates should never come here
         if name not in self.register_map:
-            if self.next_reg < len(self.REG_ORDER):
-                self.register_map[name] = self.REG_ORDER[self.next_reg]
+            if self.free_regs:
+                self.register_map[name] = self.free_regs.pop(0)
+            elif self.next_reg < len(self.regs):
+                self.register_map[name] = self.regs[self.next_reg]
                 self.next_reg += 1
+            elif self.in_method:
+                # Methods may recurse, so their spills live in the frame: a
+                # Local at its slot, anything else (temps, SSA versions,
+                # inlined copies) past the locals
+                slot = getattr(name, 'slot', None)
+                if slot is None:
+                    slot = self.n_locals + self.frame_temps
+                    self.frame_temps += 1
+                self.frame_slots = max(self.frame_slots, slot + 1)
+                self.register_map[name] = f"dword [ebp-{4 * (slot + 1)}]"
             else:
-                self.register_map[name] = f"mem_{name}"
+                self.register_map[name] = f"dword [mem_{name}]"
+                self.spilled.append(name)
         return self.register_map[name]
 
     def new_label(self, prefix='L'):
+        # Numbered per unit and prefixed with its namespace, so labels of
+        # units generated separately never clash
         self.label_count += 1
-        return f"{prefix}{self.label_count}"
+        return f"{self.namespace}{prefix}{self.label_count}"
 
     def _opnd(self, x):
         # helper: produce operand text for reg/imm
@@ -27,114 +99,863 @@ class X86StyleGenerator:
             return str(x)
         return self.alloc_reg(x)
 
-    def generate(self, tac):
+    # -----------------------
+    # Emission
+    # -----------------------
+    def emit(self, mnemonic, *operands):
+        self.code.append((mnemonic, tuple(map(str, operands))))
+
+    def emit_label(self, name):
+        self.code.append((None, (name,)))
+
+    def render(self, code):
         lines = []
-        lines.append("section .data")
-        lines.append("  fmt_int: db \"%d\", 10, 0")
-        lines.append("")
-        lines.append("section .text")
-        lines.append("  global main")
-        lines.append("  extern printf")
-        lines.append("")
-        lines.append("main:")
+        for mnemonic, operands in code:
+            if mnemonic is None:
+                lines.append(f"{operands[0]}:")
+            elif operands:
+                lines.append(f"  {mnemonic} {', '.join(operands)}")
+            else:
+                lines.append(f"  {mnemonic}")
+        return lines
+
+    def cost(self):
+        # Static cost of everything the last generate() call produced
+        return static_cost([instr for unit in self.units for instr in unit['code']])
+
+    @staticmethod
+    def is_mem(opnd):
+        return isinstance(opnd, str) and opnd.startswith('dword [')
+
+    def is_reg(self, opnd):
+        return opnd in self.REG_ORDER
+
+    # -----------------------
+    # Pattern-based instruction selection
+    # -----------------------
+    def move(self, d, src):
+        if d == str(src):
+            return
+        if _is_imm(src):
+            if src == 0 and self.is_reg(d):
+                self.emit('xor', d, d)
+            else:
+                self.emit('mov', d, src)
+        elif self.is_mem(d) and self.is_mem(src):
+            self.emit('mov', self.SCRATCH, src)
+            self.emit('mov', d, self.SCRATCH)
+        else:
+            self.emit('mov', d, src)
+
+    def via_scratch(self, d, build):
+        # Compute into the scratch register when d cannot be the destination
+        build(self.SCRATCH)
+        self.emit('mov', d, self.SCRATCH)
+
+    def add_imm(self, d, k):
+        if k == 1:
+            self.emit('inc', d)
+        elif k == -1:
+            self.emit('dec', d)
+        elif k > 0:
+            self.emit('add', d, k)
+        elif k < 0:
+            self.emit('sub', d, -k)
+
+    def sel_add(self, d, a, b):
+        if _is_imm(a):
+            a, b = b, a
+        if _is_imm(b):
+            if b == 0:
+                self.move(d, a)
+            elif d == a:
+                self.add_imm(d, b)
+            elif self.is_reg(d) and self.is_reg(a):
+                self.emit('lea', d, f"[{a}{b:+d}]")
+            elif self.is_reg(d) or self.is_mem(d) and not self.is_mem(a):
+                self.move(d, a)
+                self.add_imm(d, b)
+            else:
+                self.via_scratch(d, lambda s: (self.move(s, a), self.add_imm(s, b)))
+            return
+        if d == b:
+            a, b = b, a
+        if d == a and not (self.is_mem(d) and self.is_mem(b)):
+            self.emit('add', d, b)
+        elif self.is_reg(d) and self.is_reg(a) and self.is_reg(b):
+            self.emit('lea', d, f"[{a}+{b}]")
+        elif self.is_reg(d):
+            self.move(d, a)
+            self.emit('add', d, b)
+        else:
+            self.via_scratch(d, lambda s: (self.move(s, a), self.emit('add', s, b)))
+
+    def sel_sub(self, d, a, b):
+        if _is_imm(b):
+            return self.sel_add(d, a, -b)
+        if d == a and not (self.is_mem(d) and self.is_mem(b)):
+            self.emit('sub', d, b)
+        elif d == b and not (self.is_mem(d) and self.is_mem(a)):
+            # d = a - d  ==>  d = -d + a
+            self.emit('neg', d)
+            if _is_imm(a):
+                self.add_imm(d, a)
+            else:
+                self.emit('add', d, a)
+        elif self.is_reg(d):
+            self.move(d, a)
+            self.emit('sub', d, b)
+        else:
+            self.via_scratch(d, lambda s: (self.move(s, a), self.emit('sub', s, b)))
+
+    def sel_mul(self, d, a, b):
+        if _is_imm(a):
+            a, b = b, a
+        if _is_imm(b):
+            k = b
+            if k == 0:
+                self.move(d, 0)
+            elif k == 1:
+                self.move(d, a)
+            elif k == -1:
+                self.move(d, a)
+                self.emit('neg', d)
+            elif k > 0 and k & (k - 1) == 0:
+                shift = k.bit_length() - 1
+                if shift == 1 and self.is_reg(d) and self.is_reg(a):
+                    self.emit('lea', d, f"[{a}+{a}]")
+                elif d == a or not (self.is_mem(d) and self.is_mem(a)):
+                    self.move(d, a)
+                    self.emit('shl', d, shift)
+                else:
+                    self.via_scratch(d, lambda s: (self.move(s, a), self.emit('shl', s, shift)))
+            elif k in (3, 5, 9) and self.is_reg(d) and self.is_reg(a):
+                self.emit('lea', d, f"[{a}+{a}*{k - 1}]")
+            elif self.is_reg(d):
+                self.emit('imul', d, a, k)
+            else:
+                self.via_scratch(d, lambda s: self.emit('imul', s, a, k))
+            return
+        if d == b:
+            a, b = b, a
+        if self.is_reg(d) and d == a:
+            self.emit('imul', d, b)
+        elif self.is_reg(d):
+            self.move(d, a)
+            self.emit('imul', d, b)
+        else:
+            self.via_scratch(d, lambda s: (self.move(s, a), self.emit('imul', s, b)))
+
+    def sel_cmp(self, a, b):
+        # Emit cmp for a < b; returns the condition code that means "less"
+        if _is_imm(a):
+            # imm < b  <=>  b > imm
+            self.emit('cmp', b, a)
+            return 'g'
+        if self.is_mem(a) and self.is_mem(b):
+            self.emit('mov', self.SCRATCH, b)
+            b = self.SCRATCH
+        self.emit('cmp', a, b)
+        return 'l'
+
+    def sel_lt(self, d, a, b):
+        if _is_imm(a) and _is_imm(b):
+            return self.move(d, 1 if a < b else 0)
+        byte = self.BYTE_REGS.get(d)
+        if byte and d not in (a, b):
+            # Zero first (xor would clobber the flags after the cmp)
+            self.emit('xor', d, d)
+            cc = self.sel_cmp(a, b)
+            self.emit(f'set{cc}', byte)
+            return
+        cc = self.sel_cmp(a, b)
+        scratch8 = self.BYTE_REGS[self.SCRATCH]
+        self.emit(f'set{cc}', scratch8)
+        if self.is_mem(d):
+            self.via_scratch(d, lambda s: self.emit('movzx', s, scratch8))
+        else:
+            self.emit('movzx', d, scratch8)
+
+    def sel_branch(self, a, label, jump_if_true):
+        opnd = self._opnd(a)
+        if _is_imm(a):
+            if (a != 0) == jump_if_true:
+                self.emit('jmp', label)
+            return
+        if self.is_reg(opnd):
+            self.emit('test', opnd, opnd)
+        else:
+            self.emit('cmp', opnd, 0)
+        self.emit('jne' if jump_if_true else 'je', label)
+
+    def fused_compare(self, instr, nxt, uses):
+        # t = a < b ; if_false/if_true t, L  ==>  cmp a, b ; jge/jl L
+        # when nothing else ever reads t
+        op, a, b, r = instr
+        if op != '<' or nxt is None or nxt[0] not in ('if_false', 'if_true'):
+            return False
+        if nxt[1] != r or uses.get(r, 0) != 1:
+            return False
+        A = a if _is_imm(a) else self._opnd(a)
+        B = b if _is_imm(b) else self._opnd(b)
+        if _is_imm(A) and _is_imm(B):
+            taken = (A < B) == (nxt[0] == 'if_true')
+            if taken:
+                self.emit('jmp', nxt[2])
+            return True
+        cc = self.sel_cmp(A, B)
+        negate = {'l': 'ge', 'g': 'le'}
+        self.emit('j' + (cc if nxt[0] == 'if_true' else negate[cc]), nxt[2])
+        return True
+
+    def select_instr(self, instr):
+        op, a, b, r = instr
+        if op == '=':
+            self.move(self._opnd(r), a if _is_imm(a) else self._opnd(a))
+            return True
+        if op in ('+', '-', '*', '<'):
+            d = self._opnd(r)
+            A = a if _is_imm(a) else self._opnd(a)
+            B = b if _is_imm(b) else self._opnd(b)
+            if op != '<' and _is_imm(A) and _is_imm(B):
+                self.move(d, BINARY_OPS[op](A, B))
+            elif op == '+':
+                self.sel_add(d, A, B)
+            elif op == '-':
+                self.sel_sub(d, A, B)
+            elif op == '*':
+                self.sel_mul(d, A, B)
+            else:
+                self.sel_lt(d, A, B)
+            return True
+        if op in ('if_false', 'if_true'):
+            self.sel_branch(a, b, jump_if_true=(op == 'if_true'))
+            return True
+        return False
+
+    # -----------------------
+    # Original lowering (select=False)
+    # -----------------------
+    def lower_naive(self, instr):
+        op, a, b, r = instr
+        if op == '=':
+            self.emit('mov', self._opnd(r), self._opnd(a))
+            return True
+        if op in ('+', '-', '*', '<'):
+            dest = self._opnd(r)
+            if dest == self._opnd(b) and dest != self._opnd(a):
+                # x = a op x: loading a first would overwrite the right operand
+                if op in ('+', '*'):
+                    a, b = b, a
+                elif op == '-':
+                    self.emit('neg', dest)
+                    self.emit('add', dest, self._opnd(a))
+                    return True
+                else:
+                    self.emit('cmp', dest, self._opnd(a))
+                    self.emit('setg', 'al')
+                    self.emit('movzx', dest, 'al')
+                    return True
+            # Load left into dest (immediate or reg)
+            self.emit('mov', dest, self._opnd(a))
+            # Apply op with RHS (handle immediates properly)
+            if op == '<':
+                self.emit('cmp', dest, self._opnd(b))
+                self.emit('setl', 'al')
+                self.emit('movzx', dest, 'al')
+            else:
+                self.emit({'+': 'add', '-': 'sub', '*': 'imul'}[op], dest, self._opnd(b))
+            return True
+        if op in ('if_false', 'if_true'):
+            # a = cond temp, b = label
+            self.emit('cmp', self._opnd(a), 0)
+            self.emit('je' if op == 'if_false' else 'jne', b)
+            return True
+        return False
+
+    def stack_arg(self, val):
+        # Operand of a push passing val
+        if isinstance(val, int):
+            return val
+        opnd = self._opnd(val)
+        return opnd if self.is_mem(opnd) else f"dword {opnd}"
+
+    def lower_print(self, val):
+        arg = self.stack_arg(val)
+        if self.runtime == 'buffered':
+            # rt_print_int preserves every register and pops its argument
+            self.emit('push', arg)
+            self.emit('call', 'rt_print_int')
+            return
+        saved = [r for r in self.CALLER_SAVED if r in self.regs]
+        for reg in saved:
+            self.emit('push', reg)
+        self.emit('push', arg)
+        self.emit('push', 'dword fmt_int')
+        self.emit('call', 'printf')
+        self.emit('add', 'esp', 8)
+        for reg in reversed(saved):
+            self.emit('pop', reg)
+
+    # -----------------------
+    # Calls and objects
+    # -----------------------
+    def parallel_move(self, moves):
+        # [(dest operand, source operand)], all sources read before any write
+        temp = self.SCRATCH if self.select else '<stack>'
+        for d, src in sequentialize(moves, temp):
+            if d == '<stack>':
+                self.emit('push', src)
+            elif src == '<stack>':
+                self.emit('pop', d)
+            else:
+                self.move(d, src)
+
+    def lower_args(self, args):
+        # Consecutive 'arg' instrs at a method entry: one parallel move from
+        # the argument registers and the caller's stack into their homes
+        moves = []
+        for _, k, _, name in args:
+            if k < len(self.ARG_REGS):
+                src = self.ARG_REGS[k]
+            else:
+                self.stack_args = True
+                src = f"dword [ebp+{8 + 4 * (k - len(self.ARG_REGS))}]"
+            moves.append((self._opnd(name), src))
+        self.parallel_move(moves)
+
+    def lower_call(self, label, dest, live):
+        args = [a if _is_imm(a) else self._opnd(a) for a in self.params]
+        self.params = []
+        # Live caller-saved registers are only known once the unit is done
+        self.code.append(('<save>', (live, self.CALLER_SAVED)))
+        n_regs = len(self.ARG_REGS)
+        for arg in reversed(args[n_regs:]):
+            self.emit('push', arg)
+        self.parallel_move(list(zip(self.ARG_REGS, args[:n_regs])))
+        self.emit('call', label)
+        if len(args) > n_regs:
+            self.emit('add', 'esp', 4 * (len(args) - n_regs))
+        self.move(self._opnd(dest), 'eax')
+        self.code.append(('<restore>', (live, self.CALLER_SAVED)))
+
+    def lower_new(self, size, dest, live):
+        # rt_new preserves everything but eax
+        self.uses_heap = True
+        self.code.append(('<save>', (live, ('eax',))))
+        self.emit('push', 4 * size)
+        self.emit('call', 'rt_new')
+        self.move(self._opnd(dest), 'eax')
+        self.code.append(('<restore>', (live, ('eax',))))
+
+    def lower_new_array(self, length, dest, live):
+        # rt_new_array checks the length and preserves everything but eax
+        self.uses_heap = self.uses_arrays = True
+        self.code.append(('<save>', (live, ('eax',))))
+        self.emit('push', self.stack_arg(length))
+        self.emit('call', 'rt_new_array')
+        self.move(self._opnd(dest), 'eax')
+        self.code.append(('<restore>', (live, ('eax',))))
+
+    def lower_div(self, op, a, b, r, live):
+        # Java semantics: the quotient truncates toward zero, the remainder
+        # has the dividend's sign, MIN_INT / -1 wraps to MIN_INT and a zero
+        # divisor ends the program (rt_div_zero). Constant divisors avoid
+        # idiv (compiler.codegen.divide). The result is built in eax; edx
+        # (and eax when it is allocatable) is saved if it holds a live value.
+        d = self._opnd(r)
+        A = a if _is_imm(a) else self._opnd(a)
+        B = b if _is_imm(b) else self._opnd(b)
+        if B == 0:
+            self.uses_div = True
+            self.emit('jmp', 'rt_div_zero')
+            return
+        if _is_imm(A) and _is_imm(B):
+            self.move(d, BINARY_OPS[op](A, B))
+            return
+        if B in (1, -1):
+            if op == '%':
+                self.move(d, 0)
+            else:
+                self.move(d, A)
+                if B == -1:
+                    self.emit('neg', d)
+            return
+        saved = ('edx',) if self.select else ('eax', 'edx')
+        if _is_imm(B) and not uses_edx(B):
+            saved = saved[:-1]
+        self.code.append(('<save>', (live, saved)))
+        # The sequences below read one operand after writing eax and edx
+        copy = A if _is_imm(B) else B
+        if copy in ('eax', 'edx'):
+            self.emit('push', copy)
+            if _is_imm(B):
+                A = 'dword [esp]'
+            else:
+                B = 'dword [esp]'
+        if _is_imm(B):
+            for mnemonic, operands in divide_by_constant(op, A, B):
+                self.emit(mnemonic, *operands)
+        else:
+            # idiv faults on a zero divisor and on MIN_INT / -1: b + 1
+            # (unsigned) above 1 rules out both
+            self.uses_div = True
+            L_div = self.new_label('div')
+            L_done = self.new_label('div_done')
+            self.move('eax', A)
+            if self.is_reg(B):
+                self.emit('lea', 'edx', f"[{B}+1]")
+            else:
+                self.emit('mov', 'edx', B)
+                self.emit('inc', 'edx')
+            self.emit('cmp', 'edx', 1)
+            self.emit('ja', L_div)
+            self.emit('je', 'rt_div_zero')
+            # b == -1
+            if op == '/':
+                self.emit('neg', 'eax')
+            else:
+                self.emit('xor', 'eax', 'eax')
+            self.emit('jmp', L_done)
+            self.emit_label(L_div)
+            self.emit('cdq')
+            self.emit('idiv', B)
+            if op == '%':
+                self.emit('mov', 'eax', 'edx')
+            self.emit_label(L_done)
+        if copy in ('eax', 'edx'):
+            self.emit('add', 'esp', 4)
+        self.move(d, 'eax')
+        self.code.append(('<restore>', (live, saved)))
+
+    def field(self, base, slot):
+        # Memory operand of a field; a base not in a register goes via scratch
+        b = self._opnd(base)
+        if not self.is_reg(b):
+            self.emit('mov', self.SCRATCH, b)
+            b = self.SCRATCH
+        return f"dword [{b}+{4 * slot}]" if slot else f"dword [{b}]"
+
+    def element(self, arr, index):
+        # Memory operand of arr[index]; the elements follow the length word
+        if _is_imm(index):
+            return self.field(arr, index + 1)
+        b, i = self._opnd(arr), self._opnd(index)
+        s = self.SCRATCH
+        if self.is_reg(b) and self.is_reg(i):
+            return f"dword [{b}+{i}*4+4]"
+        if self.is_reg(b):
+            self.emit('mov', s, i)
+            return f"dword [{b}+{s}*4+4]"
+        if self.is_reg(i):
+            self.emit('mov', s, b)
+            return f"dword [{s}+{i}*4+4]"
+        self.emit('mov', s, i)
+        self.emit('shl', s, 2)
+        self.emit('add', s, b)
+        return f"dword [{s}+4]"
+
+    def load(self, addr, dest):
+        d = self._opnd(dest)
+        if self.is_reg(d):
+            self.emit('mov', d, addr)
+        else:
+            self.via_scratch(d, lambda s: self.emit('mov', s, addr))
+
+    def store(self, addr, value):
+        v = value if _is_imm(value) else self._opnd(value)
+        if self.is_mem(v):
+            s = self.SCRATCH
+            if addr.startswith(f"dword [{s}") or f"+{s}*" in addr:
+                self.emit('push', v)
+                self.emit('pop', addr)
+                return
+            self.emit('mov', s, v)
+            v = s
+        self.emit('mov', addr, v)
+
+    def lower_load(self, base, slot, dest):
+        self.load(self.field(base, slot), dest)
+
+    def lower_store(self, base, slot, value):
+        self.store(self.field(base, slot), value)
+
+    def null_check(self, arr):
+        # An int[] never assigned is null (0): trap like a failed bounds check
+        self.uses_arrays = True
+        if _is_imm(arr):
+            if arr == 0:
+                self.emit('jmp', 'rt_bounds')
+            return
+        a = self._opnd(arr)
+        if self.is_reg(a):
+            self.emit('test', a, a)
+        else:
+            self.emit('cmp', a, 0)
+        self.emit('je', 'rt_bounds')
 
-        saw_end = False
+    def lower_length(self, arr, dest):
+        self.null_check(arr)
+        self.lower_load(arr, 0, dest)
 
+    def lower_check(self, index, arr):
+        # Trap unless arr is an array and 0 <= index < length; compared
+        # unsigned, a negative index is above every length
+        self.null_check(arr)
+        length = self.field(arr, 0)
+        if _is_imm(index):
+            if index < 0:
+                self.emit('jmp', 'rt_bounds')
+            else:
+                self.emit('cmp', length, index)
+                self.emit('jbe', 'rt_bounds')
+            return
+        i = self._opnd(index)
+        if not self.is_reg(i):
+            self.emit('mov', self.SCRATCH, length)
+            length = self.SCRATCH
+        self.emit('cmp', i, length)
+        self.emit('jae', 'rt_bounds')
+
+    def saved_regs(self, live, regs):
+        homes = {self.register_map.get(name) for name in live}
+        return [r for r in regs if r in homes]
+
+    def finish_unit(self, code):
+        # Expand the save/restore and frame markers now that the register
+        # map of the whole unit is known
+        saved = [r for r in self.CALLEE_SAVED if r in self.register_map.values()]
+        frame = self.frame_slots or self.stack_args
+        out = []
+        for mnemonic, operands in code:
+            if mnemonic == '<save>':
+                out.extend(('push', (r,)) for r in self.saved_regs(*operands))
+            elif mnemonic == '<restore>':
+                out.extend(('pop', (r,)) for r in reversed(self.saved_regs(*operands)))
+            elif mnemonic == '<prologue>':
+                if frame:
+                    out.append(('push', ('ebp',)))
+                    out.append(('mov', ('ebp', 'esp')))
+                    if self.frame_slots:
+                        out.append(('sub', ('esp', str(4 * self.frame_slots))))
+                out.extend(('push', (r,)) for r in saved)
+            elif mnemonic == '<epilogue>':
+                out.extend(('pop', (r,)) for r in reversed(saved))
+                if frame:
+                    out.append(('leave', ()))
+                out.append(('ret', ()))
+            else:
+                out.append((mnemonic, operands))
+        return out
+
+    def live_across(self, tac):
+        # Position of each call/new/division -> names live after it (other than its
+        # result), i.e. the values that must survive the call
+        cfg = build_cfg(tac)
+        _, live_out = liveness(cfg)
+        across = {}
+        for block in cfg.blocks:
+            live = set(live_out[block.index])
+            for k in range(len(block.instrs) - 1, -1, -1):
+                instr = block.instrs[k]
+                uses, d = uses_defs(instr)
+                if instr[0] in CLOBBER_OPS:
+                    across[block.start + k] = frozenset(live - {d})
+                live.discard(d)
+                live.update(uses)
+        return across
+
+    def block_temps(self, tac):
+        # Position -> temps last read there (or, if never read, the next one),
+        # for the temps written once and only used after that in the same
+        # block: straight-line code, so their registers are free from there
+        # on. A 'param' is read by its call.
+        cfg = build_cfg(tac)
+        seen = {}
+        for block in cfg.blocks:
+            call = None
+            for k in range(len(block.instrs) - 1, -1, -1):
+                pos = block.start + k
+                instr = block.instrs[k]
+                if instr[0] == 'call':
+                    call = pos
+                uses, d = uses_defs(instr)
+                end = call if instr[0] == 'param' and call is not None else pos
+                for name in uses + ([d] if d is not None else []):
+                    info = seen.setdefault(name, {'block': block.index, 'defs': [], 'uses': []})
+                    if info['block'] != block.index:
+                        info['block'] = None
+                for name in uses:
+                    seen[name]['uses'].append((pos, end))
+                if d is not None:
+                    seen[d]['defs'].append(pos)
+        dies = {}
+        for name, info in seen.items():
+            if info['block'] is None or len(info['defs']) != 1 or hasattr(name, 'slot'):
+                continue
+            if any(pos <= info['defs'][0] for pos, _ in info['uses']):
+                continue
+            last = max((end for _, end in info['uses']), default=info['defs'][0] + 1)
+            dies.setdefault(last, []).append(name)
+        return dies
+
+    def release(self, names):
+        # The registers of temps that are dead from here on
+        for name in names:
+            reg = self.register_map.get(name)
+            if reg in self.regs and reg not in self.free_regs:
+                self.free_regs.append(reg)
+        self.free_regs.sort(key=self.regs.index)
+
+    def emit_main_exit(self):
+        # Anything still buffered must reach the kernel before main returns
+        if self.runtime == 'buffered':
+            self.emit('call', 'rt_flush')
+        self.emit_exit_code()
+
+    def emit_exit_code(self):
+        if self.select:
+            self.emit('xor', 'eax', 'eax')
+        else:
+            self.emit('mov', 'eax', 0)
+
+    # -----------------------
+    # Driver
+    # -----------------------
+    def generate(self, tac):
+        return self.assemble(self.generate_units(tac))
+
+    def generate_units(self, tac):
+        self.units = [self.generate_unit(func) for func in split_functions(tac)]
+        return self.units
+
+    def generate_unit(self, tac):
+        # Code for one function (main, or one method) with its own register
+        # assignment; independent of every other unit, so units can be
+        # generated in separate processes and assembled afterwards.
+        self.register_map = {}
+        self.next_reg = 0
+        self.free_regs = []
+        self.code = []
+        self.spilled = []
+        tac = [instr for instr in tac if instr]
+        self.in_method = bool(tac) and tac[0][0] == 'label'
+        self.frame_slots = 0
+        self.n_locals = 1 + max((x.slot for instr in tac for x in instr[1:]
+                                 if getattr(x, 'slot', None) is not None), default=-1)
+        self.frame_temps = 0
+        self.stack_args = False
+        self.uses_heap = False
+        self.uses_arrays = False
+        self.uses_div = False
+        self.params = []
+        self.namespace = f"{tac[0][1]}." if self.in_method else 'main.'
+        self.label_count = 0
+        across = self.live_across(tac) if any(i[0] in CLOBBER_OPS for i in tac) else {}
+        uses = {}
         for instr in tac:
-            if not instr:
+            for x in uses_defs(instr)[0]:
+                uses[x] = uses.get(x, 0) + 1
+
+        dies = self.block_temps(tac)
+        skip = 0
+
+        for i, instr in enumerate(tac):
+            # Every lowering reads its operands before it writes the result
+            # (as for x = x + y), so the result may take a dying operand's
+            # register
+            self.release(dies.get(i, ()))
+            if skip:
+                skip -= 1
                 continue
             op, a, b, r = instr
 
             if op == 'begin_main':
+                self.emit_label('main')
                 continue
 
             if op == 'label':
                 # Avoid duplicating main: header (we don't expect 'main' now, but be safe)
                 if str(a) != 'main':
-                    lines.append(f"{a}:")
+                    self.emit_label(a)
+                if i == 0 and self.in_method:
+                    self.code.append(('<prologue>', ()))
                 continue
 
-            if op == '=':
-                dest = self._opnd(r)
-                if isinstance(a, int):
-                    lines.append(f"  mov {dest}, {a}")
-                else:
-                    lines.append(f"  mov {dest}, {self._opnd(a)}")
+            if op == 'arg':
+                args = [instr]
+                while i + len(args) < len(tac) and tac[i + len(args)][0] == 'arg':
+                    args.append(tac[i + len(args)])
+                self.lower_args(args)
+                skip = len(args) - 1
                 continue
 
-            if op in ('+', '-', '*', '<'):
-                dest = self._opnd(r)
-
-                # Load left into dest (immediate or reg)
-                if isinstance(a, int):
-                    lines.append(f"  mov {dest}, {a}")
-                else:
-                    lines.append(f"  mov {dest}, {self._opnd(a)}")
-
-                # Apply op with RHS (handle immediates properly)
-                if op == '+':
-                    if isinstance(b, int):
-                        lines.append(f"  add {dest}, {b}")
-                    else:
-                        lines.append(f"  add {dest}, {self._opnd(b)}")
-                elif op == '-':
-                    if isinstance(b, int):
-                        lines.append(f"  sub {dest}, {b}")
-                    else:
-                        lines.append(f"  sub {dest}, {self._opnd(b)}")
-                elif op == '*':
-                    if isinstance(b, int):
-                        lines.append(f"  imul {dest}, {b}")
-                    else:
-                        lines.append(f"  imul {dest}, {self._opnd(b)}")
-                elif op == '<':
-                    if isinstance(b, int):
-                        lines.append(f"  cmp {dest}, {b}")
-                    else:
-                        lines.append(f"  cmp {dest}, {self._opnd(b)}")
-                    lines.append(f"  setl al")
-                    lines.append(f"  movzx {dest}, al")
-                continue
-
-            if op == 'if_false':
-                # a = cond temp, b = label
-                lines.append(f"  cmp {self._opnd(a)}, 0")
-                lines.append(f"  je {b}")
+            if self.select:
+                nxt = tac[i + 1] if i + 1 < len(tac) else None
+                if self.fused_compare(instr, nxt, uses):
+                    skip = 1
+                    continue
+                if self.select_instr(instr):
+                    continue
+            elif self.lower_naive(instr):
                 continue
 
             if op == 'goto':
-                lines.append(f"  jmp {a}")
+                self.emit('jmp', a)
                 continue
 
             if op == 'print':
-                val = a
-                if isinstance(val, int):
-                    lines.append(f"  push {val}")
-                else:
-                    lines.append(f"  push dword {self._opnd(val)}")
-                lines.append(f"  push dword fmt_int")
-                lines.append(f"  call printf")
-                lines.append(f"  add esp, 8")
+                self.lower_print(a)
+                continue
+
+            if op == 'param':
+                self.params.append(a)
+                continue
+
+            if op == 'call':
+                self.lower_call(a, r, across[i])
+                continue
+
+            if op == 'new':
+                self.lower_new(a, r, across[i])
+                continue
+
+            if op in ('/', '%'):
+                self.lower_div(op, a, b, r, across[i])
+                continue
+
+            if op == 'load':
+                self.lower_load(a, b, r)
+                continue
+
+            if op == 'store':
+                self.lower_store(a, b, r)
+                continue
+
+            if op == 'newarray':
+                self.lower_new_array(a, r, across[i])
+                continue
+
+            if op == 'length':
+                self.lower_length(a, r)
+                continue
+
+            if op == 'check':
+                self.lower_check(a, b)
+                continue
+
+            if op == 'aload':
+                self.load(self.element(a, b), r)
+                continue
+
+            if op == 'astore':
+                self.store(self.element(a, b), r)
                 continue
 
             if op == 'end_main':
-                lines.append("  mov eax, 0")
-                lines.append("  ret")
-                saw_end = True
+                self.emit_main_exit()
+                self.emit('ret')
                 continue
 
             if op == 'return':
                 if isinstance(a, int):
-                    lines.append(f"  mov eax, {a}")
+                    self.emit('mov', 'eax', a)
+                else:
+                    self.emit('mov', 'eax', self._opnd(a))
+                if self.in_method:
+                    self.code.append(('<epilogue>', ()))
                 else:
-                    lines.append(f"  mov eax, {self._opnd(a)}")
-                lines.append("  ret")
+                    self.emit('ret')
                 continue
 
-            lines.append(f"  ; unsupported: {instr}")
+            self.code.append((f"; unsupported: {instr}", ()))
+
+        if not tac or tac[-1][0] not in EXIT_OPS:
+            self.emit_main_exit()
+            self.emit('ret')
 
-        if not saw_end:
-            lines.append("  mov eax, 0")
-            lines.append("  ret")
+        self.code = self.finish_unit(self.code)
+        if self.passes is not None:
+            self.passes.run_asm(self.code, tac[0][1] if self.in_method else 'main')
+        return {'code': self.code, 'spilled': self.spilled, 'heap': self.uses_heap,
+                'arrays': self.uses_arrays, 'divides': self.uses_div}
 
+    def layout(self, units):
+        # (spilled, heap, arrays, traps): what a program of these units needs
+        # besides their code. Spill slots are static, so a name spilled in
+        # several units shares one.
+        spilled = list(dict.fromkeys(name for unit in units for name in unit['spilled']))
+        arrays = any(unit.get('arrays') for unit in units)
+        heap = arrays or any(unit.get('heap') for unit in units)
+        # rt_new jumps to the traps when the heap is full
+        traps = heap or any(unit.get('divides') for unit in units)
+        return spilled, heap, arrays, traps
+
+    def assemble(self, units):
+        # Whole program from generate_unit results, in order
+        buffered = self.runtime == 'buffered'
+        spilled, heap, arrays, traps = self.layout(units)
+        lines = []
+        if not buffered:
+            lines.append("section .data")
+            lines.append("  fmt_int: db \"%d\", 10, 0")
+            lines.append("")
+        if spilled or buffered or heap:
+            lines.append("section .bss")
+            for name in spilled:
+                lines.append(f"  mem_{name}: resd 1")
+            if buffered:
+                lines.extend(runtime.BSS)
+            if heap:
+                lines.extend(runtime.HEAP_BSS)
+            lines.append("")
+        lines.append("section .text")
+        lines.append("  global main")
+        if not buffered:
+            lines.append("  extern printf")
+            if traps:
+                lines.append("  extern exit")
+        lines.append("")
+        for unit in units:
+            lines.extend(self.render(unit['code']))
+        if buffered:
+            lines.append("")
+            lines.append(runtime.TEXT)
+        if heap:
+            lines.append("")
+            lines.append(runtime.HEAP_TEXT)
+        if arrays:
+            lines.append("")
+            lines.append(runtime.ARRAY_TEXT)
+        if traps:
+            if not arrays:
+                lines.append("")
+            lines.append(runtime.BOUNDS_TEXT if buffered else runtime.BOUNDS_TEXT_LIBC)
         return "\n".join(lines)
+
+    def sections(self, units):
+        # The program assemble() writes, as the input of elf.object_file:
+        # the code of the units and runtime routines, .data and .bss labels
+        # with their contents or sizes, and the libc functions it calls
+        buffered = self.runtime == 'buffered'
+        spilled, heap, arrays, traps = self.layout(units)
+        text = [instr for unit in units for instr in unit['code']]
+        bss = [(f"mem_{name}", 4) for name in spilled]
+        if buffered:
+            text += RUNTIME_CODE
+            bss += parse_reserved(runtime.BSS)
+        if heap:
+            text += HEAP_CODE
+            bss += parse_reserved(runtime.HEAP_BSS)
+        if arrays:
+            text += ARRAY_CODE
+        if traps:
+            text += BOUNDS_CODE if buffered else BOUNDS_CODE_LIBC
+        externs = [] if buffered else ['printf'] + (['exit'] if traps else [])
+        return {'text': text, 'data': [] if buffered else [('fmt_int', b"%d\n\0")],
+                'bss': bss, 'globals': ['main'], 'externs': externs}
+
+    def object_file(self, units):
+        # ELF32 relocatable object of the program, encoded in process
+        # without rendering assembly text
+        return object_file(self.sections(units))
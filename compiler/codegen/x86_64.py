@@ -0,0 +1,664 @@
+# compiler/codegen/x86_64.py
+# x86-64 NASM backend following the System V ABI. Shares the TAC front half
+# with X86StyleGenerator, but allocates the full general-purpose register
+# file with a liveness-based linear scan, spills to real stack slots, passes
+# printf arguments in registers and keeps rsp 16-byte aligned at calls.
+#
+# MiniJava int is 32 bits, so values live in the low halves of the 64-bit
+# registers (ebx, r12d, ...) and wrap exactly like the 32-bit target.
+# Methods use the same convention as C: the receiver and the first five
+# arguments in edi, esi, edx, ecx, r8d, r9d, the rest on the stack. Object
+# references are 32-bit byte offsets into the rt_heap arena; an int array is
+# its length word followed by the elements.
+from .cfg import build_cfg, liveness, uses_defs, split_functions
+from .divide import divide_by_constant, uses_edx
+from .moves import sequentialize
+from .tac_interp import BINARY_OPS
+
+REG32 = {
+    'rax': 'eax', 'rbx': 'ebx', 'rcx': 'ecx', 'rdx': 'edx',
+    'rsi': 'esi', 'rdi': 'edi', 'rbp': 'ebp', 'rsp': 'esp',
+    'r8': 'r8d', 'r9': 'r9d', 'r10': 'r10d', 'r11': 'r11d',
+    'r12': 'r12d', 'r13': 'r13d', 'r14': 'r14d', 'r15': 'r15d',
+}
+REG64 = {r32: r64 for r64, r32 in REG32.items()}
+
+# Ops that call out and clobber caller-saved registers
+CALL_OPS = ('print', 'call')
+
+# Bytes in the object arena; offset 0 is never handed out (null)
+HEAP_SIZE = 1 << 22
+# Longest int array: its length word and elements fill the arena
+MAX_ARRAY_LENGTH = HEAP_SIZE // 4 - 1
+
+# A full arena, a failed bounds check, an impossible array size and a
+# division by zero all end the program with exit status 1
+TRAP_CODE = (
+    (None, ('rt_heap_full',)),
+    (None, ('rt_bounds',)),
+    (None, ('rt_div_zero',)),
+    ('mov', ('edi', '1')),
+    ('call', ('exit wrt ..plt',)),
+)
+
+
+class Interval:
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.crosses_call = False
+        self.reg = None
+        self.slot = None
+
+    def __repr__(self):
+        return f"{self.name}[{self.start},{self.end}]->{self.reg or self.slot}"
+
+
+class X86_64Generator:
+    # rsp/rbp hold the frame; rax and r11 are scratch for every lowering
+    CALLEE_SAVED = ['rbx', 'r12', 'r13', 'r14', 'r15']
+    CALLER_SAVED = ['rcx', 'rdx', 'rsi', 'rdi', 'r8', 'r9', 'r10']
+    ARG_REGS = ['rdi', 'rsi', 'rdx', 'rcx', 'r8', 'r9']
+
+    def __init__(self):
+        self.code = []
+        self.locations = {}
+        self.used_callee_saved = []
+        self.n_slots = 0
+        self.params = []
+        self.uses_heap = False
+        self.uses_div = False
+        self.function = None
+        self.label_count = 0
+
+    # -----------------------
+    # Register allocation
+    # -----------------------
+    def live_intervals(self, tac):
+        cfg = build_cfg(tac)
+        _, live_out = liveness(cfg)
+        intervals = {}
+
+        def touch(name, pos):
+            iv = intervals.get(name)
+            if iv is None:
+                intervals[name] = Interval(name, pos)
+            else:
+                iv.start = min(iv.start, pos)
+                iv.end = max(iv.end, pos)
+
+        for block in cfg.blocks:
+            live = set(live_out[block.index])
+            end = block.start + len(block.instrs) - 1
+            for name in live:
+                touch(name, end)
+            for k in range(len(block.instrs) - 1, -1, -1):
+                pos = block.start + k
+                instr = block.instrs[k]
+                uses, d = uses_defs(instr)
+                if instr[0] in CALL_OPS:
+                    for name in live:
+                        if name != d:
+                            touch(name, pos)
+                            intervals[name].crosses_call = True
+                if d is not None:
+                    touch(d, pos)
+                    live.discard(d)
+                for u in uses:
+                    touch(u, pos)
+                    live.add(u)
+            for name in live:
+                touch(name, block.start)
+        return sorted(intervals.values(), key=lambda iv: (iv.start, iv.end))
+
+    def allocate(self, tac):
+        # Linear scan. Values live across a call only get callee-saved
+        # registers, so no caller-side saving is ever needed.
+        free_callee = list(self.CALLEE_SAVED)
+        free_caller = list(self.CALLER_SAVED)
+        active = []
+        self.n_slots = 0
+        used_callee = set()
+        # Spill slots: a local's is its own slot, anything else's follows them
+        n_locals = 1 + max((x.slot for instr in tac for x in instr[1:]
+                            if getattr(x, 'slot', None) is not None), default=-1)
+        temps = []
+
+        def release(iv):
+            if iv.reg in self.CALLEE_SAVED:
+                free_callee.append(iv.reg)
+            else:
+                free_caller.append(iv.reg)
+
+        def spill(iv):
+            slot = getattr(iv.name, 'slot', None)
+            if slot is None:
+                slot = n_locals + len(temps)
+                temps.append(iv)
+            iv.slot = slot + 1
+            self.n_slots = max(self.n_slots, iv.slot)
+
+        intervals = self.live_intervals(tac)
+        for iv in intervals:
+            for old in [a for a in active if a.end < iv.start]:
+                active.remove(old)
+                release(old)
+            pools = [free_callee] if iv.crosses_call else [free_caller, free_callee]
+            pool = next((p for p in pools if p), None)
+            if pool is not None:
+                iv.reg = pool.pop(0)
+            else:
+                # Spill whichever compatible interval ends last
+                candidates = [a for a in active
+                              if not iv.crosses_call or a.reg in self.CALLEE_SAVED]
+                victim = max(candidates, key=lambda a: a.end, default=None)
+                if victim is not None and victim.end > iv.end:
+                    iv.reg, victim.reg = victim.reg, None
+                    spill(victim)
+                    active.remove(victim)
+                else:
+                    spill(iv)
+            if iv.reg is not None:
+                active.append(iv)
+                if iv.reg in self.CALLEE_SAVED:
+                    used_callee.add(iv.reg)
+        self.used_callee_saved = [r for r in self.CALLEE_SAVED if r in used_callee]
+        self.locations = {iv.name: iv for iv in intervals}
+        return intervals
+
+    # -----------------------
+    # Operands
+    # -----------------------
+    def frame_offset(self, slot):
+        # Spill slots sit below the saved callee-saved registers
+        return 8 * len(self.used_callee_saved) + 4 * slot
+
+    def _opnd(self, x):
+        if isinstance(x, int):
+            return str(x)
+        iv = self.locations.get(x)
+        if iv is None:
+            # Never written and never live: any scratch value will do
+            return '0'
+        if iv.reg is not None:
+            return REG32[iv.reg]
+        return f"dword [rbp-{self.frame_offset(iv.slot)}]"
+
+    @staticmethod
+    def is_mem(opnd):
+        return opnd.startswith('dword [')
+
+    @staticmethod
+    def is_imm(opnd):
+        return opnd.lstrip('-').isdigit()
+
+    def emit(self, mnemonic, *operands):
+        self.code.append((mnemonic, tuple(map(str, operands))))
+
+    def emit_label(self, name):
+        self.code.append((None, (name,)))
+
+    def render(self, code):
+        # Assembly lines of a code list, as X86StyleGenerator.render
+        lines = []
+        for mnemonic, operands in code:
+            if mnemonic is None:
+                lines.append(f"{operands[0]}:")
+            elif operands:
+                lines.append(f"  {mnemonic} {', '.join(operands)}")
+            else:
+                lines.append(f"  {mnemonic}")
+        return lines
+
+    def new_label(self, prefix):
+        # Prefixed with the function's label, like the TAC labels inside it
+        self.label_count += 1
+        return f"{self.function}.{prefix}{self.label_count}"
+
+    def mov(self, dst, src):
+        if dst == src:
+            return
+        if self.is_mem(dst) and self.is_mem(src):
+            self.emit('mov', 'eax', src)
+            src = 'eax'
+        if src == '0' and not self.is_mem(dst):
+            self.emit('xor', dst, dst)
+        else:
+            self.emit('mov', dst, src)
+
+    # -----------------------
+    # Lowering
+    # -----------------------
+    def lower_binop(self, op, a, b, r):
+        mnemonic = {'+': 'add', '-': 'sub', '*': 'imul'}[op]
+        dst, sa, sb = self._opnd(r), self._opnd(a), self._opnd(b)
+        if self.is_mem(dst) or (dst == sb and op == '-'):
+            self.emit('mov', 'eax', sa)
+            self.emit(mnemonic, 'eax', sb)
+            self.mov(dst, 'eax')
+        elif dst == sb:
+            # Commutative and the destination already holds b
+            self.emit(mnemonic, dst, sa)
+        else:
+            self.mov(dst, sa)
+            self.emit(mnemonic, dst, sb)
+
+    def lower_div(self, op, a, b, r, pos):
+        # Java semantics, as in X86StyleGenerator.lower_div. The divisor (or
+        # a dividend read more than once) goes through r11d; rdx is saved
+        # when another value lives in it past this instruction.
+        dst, sa, sb = self._opnd(r), self._opnd(a), self._opnd(b)
+        if sb == '0':
+            self.uses_div = True
+            self.emit('jmp', 'rt_div_zero')
+            return
+        if self.is_imm(sa) and self.is_imm(sb):
+            self.mov(dst, str(BINARY_OPS[op](int(sa), int(sb))))
+            return
+        if sb in ('1', '-1'):
+            if op == '%':
+                self.mov(dst, '0')
+            else:
+                self.mov(dst, sa)
+                if sb == '-1':
+                    self.emit('neg', dst)
+            return
+        k = int(sb) if self.is_imm(sb) else None
+        save = (k is None or uses_edx(k)) and any(
+            iv.reg == 'rdx' and iv.name != r and iv.start <= pos < iv.end
+            for iv in self.locations.values())
+        if save:
+            self.emit('push', 'rdx')
+        if k is not None:
+            self.emit('mov', 'r11d', sa)
+            for mnemonic, operands in divide_by_constant(op, 'r11d', k):
+                self.emit(mnemonic, *operands)
+        else:
+            # b + 1 (unsigned) above 1: neither 0 nor -1, so idiv cannot fault
+            self.uses_div = True
+            L_div, L_done = self.new_label('div'), self.new_label('div_done')
+            self.emit('mov', 'r11d', sb)
+            self.mov('eax', sa)
+            self.emit('lea', 'edx', '[r11+1]')
+            self.emit('cmp', 'edx', '1')
+            self.emit('ja', L_div)
+            self.emit('je', 'rt_div_zero')
+            if op == '/':
+                self.emit('neg', 'eax')
+            else:
+                self.emit('xor', 'eax', 'eax')
+            self.emit('jmp', L_done)
+            self.emit_label(L_div)
+            self.emit('cdq')
+            self.emit('idiv', 'r11d')
+            if op == '%':
+                self.emit('mov', 'eax', 'edx')
+            self.emit_label(L_done)
+        if save:
+            self.emit('pop', 'rdx')
+        self.mov(dst, 'eax')
+
+    def lower_lt(self, a, b, r):
+        dst, sa, sb = self._opnd(r), self._opnd(a), self._opnd(b)
+        if self.is_imm(sa) or (self.is_mem(sa) and self.is_mem(sb)):
+            self.emit('mov', 'eax', sa)
+            sa = 'eax'
+        self.emit('cmp', sa, sb)
+        self.emit('setl', 'al')
+        if self.is_mem(dst):
+            self.emit('movzx', 'eax', 'al')
+            self.emit('mov', dst, 'eax')
+        else:
+            self.emit('movzx', dst, 'al')
+
+    def lower_branch(self, a, label, jump_if_true):
+        opnd = self._opnd(a)
+        if self.is_imm(opnd):
+            if (int(opnd) != 0) == jump_if_true:
+                self.emit('jmp', label)
+            return
+        if self.is_mem(opnd):
+            self.emit('cmp', opnd, '0')
+        else:
+            self.emit('test', opnd, opnd)
+        self.emit('jne' if jump_if_true else 'je', label)
+
+    def lower_print(self, a):
+        # printf(fmt_int, value): rdi = format, esi = value, al = 0 vector args
+        self.mov('esi', self._opnd(a))
+        self.emit('lea', 'rdi', '[rel fmt_int]')
+        self.emit('xor', 'eax', 'eax')
+        self.emit('call', 'printf wrt ..plt')
+
+    def lower_args(self, args):
+        # Incoming arguments into their allocated homes as one parallel move
+        moves = []
+        for _, k, _, name in args:
+            if name not in self.locations:
+                continue
+            if k < len(self.ARG_REGS):
+                src = REG32[self.ARG_REGS[k]]
+            else:
+                src = f"dword [rbp+{16 + 8 * (k - len(self.ARG_REGS))}]"
+            moves.append((self._opnd(name), src))
+        for dst, src in sequentialize(moves, 'eax'):
+            self.mov(dst, src)
+
+    def lower_call(self, label, r):
+        args, self.params = self.params, []
+        n_regs = len(self.ARG_REGS)
+        stack = args[n_regs:]
+        # Every pushed argument takes 8 bytes; pad to keep rsp 16-aligned
+        pad = 8 * (len(stack) % 2)
+        if pad:
+            self.emit('sub', 'rsp', pad)
+        for arg in reversed(stack):
+            if self.is_mem(arg):
+                self.emit('mov', 'eax', arg)
+                arg = 'eax'
+            self.emit('push', REG64.get(arg, arg))
+        moves = [(REG32[reg], arg) for reg, arg in zip(self.ARG_REGS, args)]
+        for dst, src in sequentialize(moves, 'eax'):
+            self.mov(dst, src)
+        self.emit('call', label)
+        if stack or pad:
+            self.emit('add', 'rsp', 8 * len(stack) + pad)
+        self.mov(self._opnd(r), 'eax')
+
+    def lower_new(self, size, r):
+        # Bump allocation; the arena is .bss, so fields start out 0
+        self.uses_heap = True
+        self.emit('mov', 'eax', 'dword [rel rt_heap_used]')
+        self.emit('lea', 'r11d', f"[rax+{4 * size}]")
+        self.emit('cmp', 'r11d', HEAP_SIZE)
+        self.emit('ja', 'rt_heap_full')
+        self.emit('mov', 'dword [rel rt_heap_used]', 'r11d')
+        self.mov(self._opnd(r), 'eax')
+
+    def lower_new_array(self, length, r):
+        # As lower_new, after checking the length; an impossible one fails
+        # like a bad index
+        self.uses_heap = True
+        n = self._opnd(length)
+        if self.is_imm(n):
+            if not 0 <= int(n) <= MAX_ARRAY_LENGTH:
+                self.emit('jmp', 'rt_bounds')
+                return
+            self.emit('mov', 'eax', 'dword [rel rt_heap_used]')
+            self.emit('lea', 'r11d', f"[rax+{4 * int(n) + 4}]")
+        else:
+            self.emit('cmp', n, MAX_ARRAY_LENGTH)
+            self.emit('ja', 'rt_bounds')
+            if self.is_mem(n):
+                self.emit('mov', 'r11d', n)
+                self.emit('mov', 'eax', 'dword [rel rt_heap_used]')
+                self.emit('lea', 'r11d', '[rax+r11*4+4]')
+            else:
+                self.emit('mov', 'eax', 'dword [rel rt_heap_used]')
+                self.emit('lea', 'r11d', f"[rax+{REG64[n]}*4+4]")
+        self.emit('cmp', 'r11d', HEAP_SIZE)
+        self.emit('ja', 'rt_heap_full')
+        self.emit('mov', 'dword [rel rt_heap_used]', 'r11d')
+        self.emit('lea', 'r11', '[rel rt_heap]')
+        if self.is_mem(n):
+            # Both scratch registers are taken: keep the new array's offset
+            # on the stack while the length goes through eax
+            self.emit('add', 'r11', 'rax')
+            self.emit('push', 'rax')
+            self.emit('mov', 'eax', n)
+            self.emit('mov', 'dword [r11]', 'eax')
+            self.emit('pop', 'rax')
+        else:
+            self.emit('mov', 'dword [r11+rax]', n)
+        self.mov(self._opnd(r), 'eax')
+
+    def field(self, base, slot):
+        # Address of a field: r11 = arena, plus the object's offset
+        self.uses_heap = True
+        b = self._opnd(base)
+        if self.is_mem(b) or self.is_imm(b):
+            self.emit('mov', 'eax', b)
+            b = 'eax'
+        self.emit('lea', 'r11', '[rel rt_heap]')
+        return f"dword [r11+{REG64[b]}+{4 * slot}]"
+
+    def element(self, arr, index):
+        # Address of arr[index]: r11 = the array, plus 4 * index past its
+        # length word. A checked index is non-negative, so its 64-bit
+        # register (zero-extended by every 32-bit write) is the same value.
+        i = self._opnd(index)
+        if self.is_imm(i):
+            return self.field(arr, int(i) + 1)
+        self.uses_heap = True
+        b = self._opnd(arr)
+        if self.is_mem(b) or self.is_imm(b):
+            self.emit('mov', 'eax', b)
+            b = 'eax'
+        self.emit('lea', 'r11', '[rel rt_heap]')
+        self.emit('add', 'r11', REG64[b])
+        if self.is_mem(i):
+            self.emit('mov', 'eax', i)
+            i = 'eax'
+        return f"dword [r11+{REG64[i]}*4+4]"
+
+    def load(self, addr, r):
+        dst = self._opnd(r)
+        if self.is_mem(dst):
+            self.emit('mov', 'eax', addr)
+            self.emit('mov', dst, 'eax')
+        else:
+            self.emit('mov', dst, addr)
+
+    def store(self, addr, value):
+        v = self._opnd(value)
+        if self.is_mem(v):
+            if '+rax' in addr:
+                # eax is part of the address: fold it into r11 first
+                self.emit('lea', 'r11', addr[len('dword '):])
+                addr = "dword [r11]"
+            self.emit('mov', 'eax', v)
+            v = 'eax'
+        self.emit('mov', addr, v)
+
+    def lower_load(self, base, slot, r):
+        self.load(self.field(base, slot), r)
+
+    def lower_store(self, base, slot, value):
+        self.store(self.field(base, slot), value)
+
+    def null_check(self, arr):
+        # An int[] never assigned is null (offset 0, never allocated): trap
+        # like a failed bounds check
+        a = self._opnd(arr)
+        if self.is_imm(a):
+            if int(a) == 0:
+                self.emit('jmp', 'rt_bounds')
+            return
+        if self.is_mem(a):
+            self.emit('cmp', a, '0')
+        else:
+            self.emit('test', a, a)
+        self.emit('je', 'rt_bounds')
+
+    def lower_length(self, arr, r):
+        self.null_check(arr)
+        self.lower_load(arr, 0, r)
+
+    def lower_check(self, index, arr):
+        # Trap unless arr is an array and 0 <= index < length; compared
+        # unsigned, a negative index is above every length
+        self.null_check(arr)
+        i = self._opnd(index)
+        length = self.field(arr, 0)
+        if self.is_imm(i):
+            if int(i) < 0:
+                self.emit('jmp', 'rt_bounds')
+            else:
+                self.emit('cmp', length, i)
+                self.emit('jbe', 'rt_bounds')
+            return
+        if self.is_mem(i):
+            if '+rax' in length:
+                self.emit('lea', 'r11', length[len('dword '):])
+                length = "dword [r11]"
+            self.emit('mov', 'eax', i)
+            i = 'eax'
+        self.emit('cmp', i, length)
+        self.emit('jae', 'rt_bounds')
+
+    def prologue(self, name):
+        self.emit_label(name)
+        self.emit('push', 'rbp')
+        self.emit('mov', 'rbp', 'rsp')
+        for reg in self.used_callee_saved:
+            self.emit('push', reg)
+        # rsp is 16-aligned after 'push rbp'; keep it so at every call
+        frame = 8 * len(self.used_callee_saved) + 4 * self.n_slots
+        pad = (-frame) % 16
+        extra = 4 * self.n_slots + pad
+        if extra:
+            self.emit('sub', 'rsp', extra)
+
+    def epilogue(self):
+        if self.used_callee_saved:
+            self.emit('lea', 'rsp', f"[rbp-{8 * len(self.used_callee_saved)}]")
+        else:
+            self.emit('mov', 'rsp', 'rbp')
+        for reg in reversed(self.used_callee_saved):
+            self.emit('pop', reg)
+        self.emit('pop', 'rbp')
+        self.emit('ret')
+
+    def generate_function(self, tac):
+        self.allocate(tac)
+        first = tac[0]
+        if first[0] == 'begin_main':
+            name = 'main'
+        else:
+            name = first[1]
+        self.function = name
+        self.label_count = 0
+        self.prologue(name)
+        self.params = []
+        args = [instr for instr in tac if instr[0] == 'arg']
+        if args:
+            self.lower_args(args)
+        for pos, instr in enumerate(tac):
+            op, a, b, r = instr
+            if op in ('begin_main', 'arg'):
+                continue
+            if op == 'label':
+                if instr is not first:
+                    self.emit_label(a)
+                continue
+            if op == '=':
+                self.mov(self._opnd(r), self._opnd(a))
+            elif op in ('+', '-', '*'):
+                self.lower_binop(op, a, b, r)
+            elif op in ('/', '%'):
+                self.lower_div(op, a, b, r, pos)
+            elif op == '<':
+                self.lower_lt(a, b, r)
+            elif op == 'if_false':
+                self.lower_branch(a, b, jump_if_true=False)
+            elif op == 'if_true':
+                self.lower_branch(a, b, jump_if_true=True)
+            elif op == 'goto':
+                self.emit('jmp', a)
+            elif op == 'print':
+                self.lower_print(a)
+            elif op == 'param':
+                self.params.append(self._opnd(a))
+            elif op == 'call':
+                self.lower_call(a, r)
+            elif op == 'new':
+                self.lower_new(a, r)
+            elif op == 'load':
+                self.lower_load(a, b, r)
+            elif op == 'store':
+                self.lower_store(a, b, r)
+            elif op == 'newarray':
+                self.lower_new_array(a, r)
+            elif op == 'length':
+                self.lower_length(a, r)
+            elif op == 'check':
+                self.lower_check(a, b)
+            elif op == 'aload':
+                self.load(self.element(a, b), r)
+            elif op == 'astore':
+                self.store(self.element(a, b), r)
+            elif op == 'end_main':
+                self.emit('xor', 'eax', 'eax')
+                self.epilogue()
+            elif op == 'return':
+                self.mov('eax', self._opnd(a))
+                self.epilogue()
+            else:
+                self.code.append((f"; unsupported: {instr}", ()))
+        if tac[-1][0] not in ('end_main', 'return'):
+            self.emit('xor', 'eax', 'eax')
+            self.epilogue()
+
+    def generate(self, tac):
+        return self.assemble(self.generate_units(tac))
+
+    def generate_units(self, tac):
+        return [self.generate_unit(func) for func in split_functions(tac)]
+
+    def generate_unit(self, tac):
+        # Code for one function; units are independent (see X86StyleGenerator)
+        self.code = []
+        self.uses_heap = False
+        self.uses_div = False
+        self.generate_function(tac)
+        return {'code': self.code, 'heap': self.uses_heap, 'divides': self.uses_div}
+
+    def assemble(self, units):
+        lines = [
+            "default rel",
+            "",
+            "section .data",
+            "  fmt_int: db \"%d\", 10, 0",
+            "",
+            "section .text",
+            "  global main",
+            "  extern printf",
+            "  extern exit",
+            "",
+        ]
+        for unit in units:
+            lines.extend(self.render(unit['code']))
+            lines.append("")
+        heap = any(unit.get('heap') for unit in units)
+        if heap or any(unit.get('divides') for unit in units):
+            lines.extend(self.render(TRAP_CODE))
+            lines.append("")
+        if heap:
+            lines.extend([
+                "section .data",
+                "  rt_heap_used: dd 4",
+                "",
+                "section .bss",
+                f"  rt_heap: resb {HEAP_SIZE}",
+                "",
+            ])
+        lines.append("section .note.GNU-stack noalloc noexec nowrite progbits")
+        return "\n".join(lines)
+
+    def sections(self, units):
+        # The program assemble() writes, for the 64-bit encoder (see
+        # X86StyleGenerator.sections): code, .data and .bss labels with their
+        # contents or sizes, and the libc functions it calls
+        heap = any(unit.get('heap') for unit in units)
+        traps = heap or any(unit.get('divides') for unit in units)
+        text = [instr for unit in units for instr in unit['code']]
+        data = [('fmt_int', b"%d\n\0")]
+        bss = []
+        if traps:
+            text += TRAP_CODE
+        if heap:
+            data.append(('rt_heap_used', (4).to_bytes(4, 'little')))
+            bss.append(('rt_heap', HEAP_SIZE))
+        return {'text': text, 'data': data, 'bss': bss, 'globals': ['main'],
+                'externs': ['printf'] + (['exit'] if traps else [])}
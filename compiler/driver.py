@@ -0,0 +1,329 @@
+# compiler/driver.py
+# In-memory compile API. compile_source() takes source text and returns a
+# CompileResult whose phases (tokens, AST, semantic errors, TAC, asm) run
+# lazily on first access. Nothing is printed and nothing touches the disk;
+# progress is reported only through an optional logging.Logger.
+import contextlib
+import io
+import logging
+import time
+
+from compiler.utils.errors import CompilerError, error_message
+
+# Parser backends are expensive to build (PLY table construction), so each
+# one is built once per process and reused by every compile.
+_PARSER_CACHE = {}
+
+
+def _parser_factories():
+    from compiler.parser import build_parser
+    from compiler.rd_parser import build_rd_parser
+    return {'ply': build_parser, 'rd': build_rd_parser}
+
+
+PARSER_BACKENDS = ('ply', 'rd')
+TARGETS = ('x86', 'x86_64')
+# How the 32-bit target implements println; x86_64 always calls printf
+RUNTIMES = ('buffered', 'printf')
+# Seconds CompileResult.run lets a program run by default
+RUN_TIMEOUT = 10.0
+
+
+def get_backend(target='x86', runtime='buffered', passes=None):
+    # Assembly generator instance for a target name; passes (a PassManager)
+    # runs its 'asm' passes over each unit on the 32-bit target
+    if target == 'x86':
+        from compiler.codegen.x86 import X86StyleGenerator
+        return X86StyleGenerator(runtime=runtime, passes=passes)
+    if target == 'x86_64':
+        from compiler.codegen.x86_64 import X86_64Generator
+        return X86_64Generator()
+    raise ValueError(f"Unknown target '{target}'")
+
+
+def get_parser(backend='ply'):
+    # (parser, lexer) for a backend, built on first use
+    if backend not in _PARSER_CACHE:
+        factories = _parser_factories()
+        if backend not in factories:
+            raise ValueError(f"Unknown parser backend '{backend}'")
+        with contextlib.redirect_stdout(io.StringIO()):
+            _PARSER_CACHE[backend] = factories[backend]()
+    return _PARSER_CACHE[backend]
+
+
+def diagnostic(phase, message, severity='error'):
+    return {'phase': phase, 'severity': severity, 'message': message}
+
+
+class CompileResult:
+    def __init__(self, source, name='Main', parser='ply', target='x86', logger=None,
+                 runtime='buffered', jobs=1, unit_cache=None, optimize=False, hooks=(),
+                 direct=True):
+        from compiler.passes import LoggingHook, PassManager, resolve
+        self.source = source
+        self.name = name
+        self.parser_backend = parser
+        self.target = target
+        self.runtime = runtime
+        # jobs != 1: semantic checks, TAC and asm run per method in a
+        # process pool (None = one worker per CPU)
+        self.jobs = jobs
+        # compiler.incremental.UnitCache: reuse unchanged methods from the
+        # previous build of the same program
+        self.unit_cache = unit_cache
+        # Names of the optimization passes to run (compiler/passes.py); -O
+        # (True) and levels are resolved to their pipelines here
+        self.optimize = resolve(optimize)
+        self.logger = logger
+        hooks = list(hooks)
+        if logger is not None:
+            hooks.append(LoggingHook(logger, name))
+        self.passes = PassManager(self.optimize, hooks)
+        # Unoptimized 32-bit builds go straight from the AST to assembly
+        # (compiler.codegen.direct); TAC is then only built when asked for
+        self.direct = direct and not self.optimize and target == 'x86' and not self.by_unit
+        self.diagnostics = []
+        self._cache = {}
+
+    # -----------------------
+    # Helpers
+    # -----------------------
+    def _log(self, phase, elapsed, **fields):
+        if self.logger is None:
+            return
+        fields.update(phase=phase, unit=self.name, elapsed_ms=round(elapsed * 1000, 3))
+        self.logger.info("%s %s done in %.3f ms", self.name, phase, elapsed * 1000,
+                         extra={'compile': fields})
+
+    def _phase(self, key, fn):
+        # Run a phase once; stdout chatter from PLY becomes diagnostics
+        if key in self._cache:
+            return self._cache[key]
+        buf = io.StringIO()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(buf):
+            value = fn()
+        elapsed = time.perf_counter() - t0
+        for line in buf.getvalue().splitlines():
+            if line.strip():
+                self.diagnostics.append(diagnostic(key, line))
+        self._cache[key] = value
+        self._log(key, elapsed)
+        return value
+
+    # -----------------------
+    # Phases
+    # -----------------------
+    @property
+    def tokens(self):
+        def run():
+            _, lexer = get_parser(self.parser_backend)
+            lexer.lineno = 1
+            lexer.input(self.source)
+            return list(lexer)
+        return self._phase('lex', run)
+
+    @property
+    def ast(self):
+        def run():
+            parser, lexer = get_parser(self.parser_backend)
+            lexer.lineno = 1
+            try:
+                ast = parser.parse(self.source, lexer=lexer)
+            except CompilerError as e:
+                self.diagnostics.append(diagnostic('parse', error_message(e)))
+                return None
+            return ast
+        ast = self._phase('parse', run)
+        if ast is None and not any(d['phase'] == 'parse' for d in self.diagnostics):
+            self.diagnostics.append(diagnostic('parse', 'Parser returned None (no AST).'))
+        return ast
+
+    @property
+    def by_unit(self):
+        return self.jobs != 1 or self.unit_cache is not None
+
+    @property
+    def units(self):
+        # Method-granular build used when jobs != 1 or with a cache
+        # (compiler.parallel); it parses method by method, which only the
+        # recursive-descent parser can (compile_source checks parser='rd')
+        def run():
+            if self.unit_cache is not None:
+                built = self.unit_cache.compile(self.source, workers=self.jobs, target=self.target,
+                                                runtime=self.runtime, optimize=self.optimize)
+            else:
+                from compiler.parallel import compile_parallel
+                built = compile_parallel(self.source, workers=self.jobs, target=self.target,
+                                         runtime=self.runtime, optimize=self.optimize)
+            self.diagnostics.extend(diagnostic('parse', err) for err in built['parse_errors'])
+            self.diagnostics.extend(diagnostic('semantic', err) for err in built['errors'] or [])
+            # The passes ran in worker processes: report them now
+            self.passes.replay(built['passes'])
+            return built
+        return self._phase('units', run)
+
+    @property
+    def semantic_errors(self):
+        if self.by_unit:
+            return self.units['errors']
+        ast = self.ast
+
+        def run():
+            from compiler.semantic.analyzer import SemanticAnalyzer
+            if ast is None:
+                return None
+            errors = SemanticAnalyzer().analyze(ast)
+            self.diagnostics.extend(diagnostic('semantic', err) for err in errors)
+            return errors
+        return self._phase('semantic', run)
+
+    @property
+    def tac(self):
+        if self.by_unit:
+            return self.units['tac']
+        errors = self.semantic_errors
+
+        def run():
+            from compiler.codegen.intermediate import IRGenerator
+            if errors is None or errors:
+                return None
+            tac = IRGenerator().visit(self.passes.run_ast(self.ast))
+            if self.optimize:
+                tac = self.passes.run_tac(tac)
+            return tac
+        return self._phase('ir', run)
+
+    @property
+    def asm(self):
+        if self.by_unit:
+            return self.units['asm']
+        units = self.code_units
+
+        def assemble():
+            if units is None:
+                return None
+            return get_backend(self.target, self.runtime).assemble(units)
+        return self._phase('assemble', assemble)
+
+    @property
+    def code_units(self):
+        # generate_unit results, in program order, which assemble() turns
+        # into text, obj into an object file and run() into a running
+        # program; 32-bit -O0 builds them straight from the AST
+        # (compiler.codegen.direct)
+        if self.by_unit:
+            units = self.units
+            return None if units['asm'] is None else [r['asm'] for r in units['units']]
+        if self.direct:
+            errors = self.semantic_errors
+
+            def run():
+                from compiler.codegen.direct import DirectGenerator
+                if errors is None or errors:
+                    return None
+                return DirectGenerator(self.runtime).generate_units(self.ast)
+            return self._phase(self.target, run)
+        tac = self.tac
+
+        def run():
+            if tac is None:
+                return None
+            return get_backend(self.target, self.runtime, self.passes).generate_units(tac)
+        return self._phase(self.target, run)
+
+    @property
+    def obj(self):
+        # ELF32 relocatable object of the 32-bit program, encoded in process
+        # (compiler.codegen.elf) without producing the assembly text
+        if self.target != 'x86':
+            raise ValueError(f"Object output is not supported for target '{self.target}'")
+        units = self.code_units
+
+        def run():
+            if units is None:
+                return None
+            return get_backend(self.target, self.runtime).object_file(units)
+        return self._phase('obj', run)
+
+    def run(self, timeout=RUN_TIMEOUT):
+        # Runs the x86-64 program without an assembler (compiler.codegen.jit):
+        # a JitResult with its output and exit status, None for programs
+        # with errors. ExecutionError when it overflows its stack, crashes
+        # or runs longer than timeout seconds (None: no limit).
+        if self.target != 'x86_64':
+            raise ValueError(f"In-process execution is not supported for target '{self.target}'")
+        units = self.code_units
+
+        def run():
+            from compiler.codegen.jit import run
+            if units is None:
+                return None
+            return run(get_backend(self.target, self.runtime).sections(units), timeout)
+        return self._phase('run', run)
+
+    @property
+    def report(self):
+        # Code quality report of the 32-bit output (compiler.codegen.report);
+        # None for other targets and programs with errors
+        if self.target != 'x86':
+            return None
+        units = self.code_units
+
+        def run():
+            from compiler.codegen.report import program_report
+            if units is None:
+                return None
+            return program_report(units)
+        return self._phase('report', run)
+
+    @property
+    def pass_records(self):
+        # One record per pass run so far (see passes.PassHook)
+        return self.passes.records
+
+    @property
+    def ok(self):
+        # Forces the front end only: a program is ok when it parsed and
+        # checked without errors, after which every later phase succeeds
+        return self.semantic_errors == []
+
+    # -----------------------
+    # Text renderings (as written by the CLI)
+    # -----------------------
+    def tokens_text(self):
+        return "\n".join(str(tok) for tok in self.tokens)
+
+    def tac_text(self):
+        tac = self.tac
+        if tac is None:
+            return None
+        return "".join(str(instr) + "\n" for instr in tac)
+
+
+def compile_source(source, name='Main', parser='ply', target='x86', logger=None,
+                   runtime='buffered', jobs=1, unit_cache=None, optimize=False, hooks=(),
+                   direct=True):
+    # optimize: False, True (-O), a level (0-3) or a list of pass names;
+    # hooks: passes.PassHook instances that observe every pass run;
+    # direct=False keeps unoptimized 32-bit builds on the TAC route
+    if parser not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{parser}'")
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target '{target}'")
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown print runtime '{runtime}'")
+    if (jobs != 1 or unit_cache is not None) and parser != 'rd':
+        raise ValueError(f"Per-method builds (jobs, unit_cache) need parser 'rd', not '{parser}'")
+    return CompileResult(source, name=name, parser=parser, target=target, logger=logger,
+                         runtime=runtime, jobs=jobs, unit_cache=unit_cache, optimize=optimize,
+                         hooks=hooks, direct=direct)
+
+
+def get_logger():
+    # Library logger; silent unless the embedding application configures it
+    logger = logging.getLogger('compiler')
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
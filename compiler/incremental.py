@@ -0,0 +1,127 @@
+# compiler/incremental.py
+# Method-granular incremental recompilation on top of compiler/parallel.py.
+# Each unit (main or one method) is fingerprinted by its token stream, and its
+# cached result records the class table entries its semantic check looked up.
+# A rebuild reuses a unit when its tokens and each of those entries are
+# unchanged; only the other units are checked, lowered and assembled again,
+# and the cached results are spliced back in program order.
+#
+# Invalidation: editing a body invalidates that unit only. Changing a field or
+# a method signature changes its class entry, which invalidates every unit that
+# looked that class up (today: all methods of the class). Adding or removing a
+# class changes the lookups that missed it. Whitespace and comments are not
+# tokens, so they never invalidate, but units with diagnostics are rebuilt
+# when they move to another line because the messages carry line numbers.
+#
+# Under optimization the cached unit result is the lowered TAC. The second
+# round (inlining, optimization, asm) is cached per unit by a digest of that
+# TAC and of the inline table entries it uses, so editing a small method
+# rebuilds the units that inlined it as well.
+import hashlib
+
+from compiler.parallel import (declare, finish_batch, merge, program_units, run_batched,
+                               run_units, unit_inline_tables)
+
+
+def token_digest(tokens):
+    text = "\n".join([f"{tok.type} {tok.value}" for tok in tokens])
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def unit_fingerprints(skeleton):
+    # Token digest per unit, in program_units order
+    toks = skeleton.tokens
+    nodes = [skeleton.main] + [m for cls in skeleton.classes for m in cls.method_decls]
+    return [token_digest(toks[n.token_span[0]:n.token_span[1]]) for n in nodes]
+
+
+class ClassDigests(dict):
+    # Digest of each class table entry (None for a class that does not
+    # exist), all taken before any unit is checked: the table is shared with
+    # the checks, and a digest must not depend on what they do to it
+    def __init__(self, signatures):
+        super().__init__((name, hashlib.sha1(repr(entry).encode()).hexdigest())
+                         for name, entry in signatures.items())
+
+    def __missing__(self, name):
+        return None
+
+
+class UnitCache:
+    # Per-unit results of the previous build of one program. Entries are
+    # kept per (target, runtime, optimize) and pruned to the units of the
+    # latest build.
+    def __init__(self):
+        self.entries = {}
+        self.finished = {}      # config -> {second-round digest: (tac, asm)}
+        self.stats = {'reused': 0, 'compiled': 0}
+
+    def valid(self, entry, fingerprint, lineno, digests):
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return False
+        result = entry['result']
+        if (result['parse_errors'] or result['errors']) and entry['lineno'] != lineno:
+            return False
+        return all(digests[name] == d for name, d in entry['deps'].items())
+
+    def compile(self, source, workers=1, target='x86', runtime='buffered', executor=None,
+                optimize=()):
+        # Same result shape as compile_parallel, plus 'reused' and 'compiled'
+        # unit keys
+        skeleton, signatures, parse_errors, errors = declare(source)
+        if parse_errors or errors:
+            return {'parse_errors': parse_errors, 'errors': errors, 'tac': None,
+                    'asm': None, 'units': [], 'passes': [], 'reused': [], 'compiled': []}
+        units = program_units(skeleton, source)
+        fingerprints = unit_fingerprints(skeleton)
+        digests = ClassDigests(signatures)
+        config = (target, runtime, optimize)
+        old = self.entries.get(config, {})
+
+        results = [None] * len(units)
+        stale = []
+        for i, (unit, fingerprint) in enumerate(zip(units, fingerprints)):
+            entry = old.get(unit[0])
+            if self.valid(entry, fingerprint, unit[4], digests):
+                # No pass runs again for a reused unit
+                results[i] = dict(entry['result'], passes=[])
+            else:
+                stale.append(i)
+        fresh = run_units([units[i] for i in stale], signatures, target, runtime,
+                          workers, executor, optimize)
+        for i, result in zip(stale, fresh):
+            results[i] = result
+
+        self.entries[config] = {
+            unit[0]: {'fingerprint': fingerprint, 'lineno': unit[4], 'result': result,
+                      'deps': {name: digests[name] for name in result['deps']}}
+            for unit, fingerprint, result in zip(units, fingerprints, results)
+        }
+        self.stats['reused'] += len(units) - len(stale)
+        self.stats['compiled'] += len(stale)
+
+        if optimize and not any(r['parse_errors'] or r['errors'] for r in results):
+            results = self.finish(results, config, workers, executor)
+        built = merge(results, target, runtime)
+        built['compiled'] = [units[i][0] for i in stale]
+        stale = set(stale)
+        built['reused'] = [u[0] for i, u in enumerate(units) if i not in stale]
+        return built
+
+    def finish(self, results, config, workers, executor):
+        # Second round of an optimized build, reusing unchanged units
+        target, runtime, optimize = config
+        tacs = [r['tac'] for r in results]
+        jobs = list(zip(tacs, unit_inline_tables(tacs)))
+        keys = [hashlib.sha1(repr(job).encode()).hexdigest() for job in jobs]
+        old = self.finished.get(config, {})
+        stale = [i for i, key in enumerate(keys) if key not in old]
+        fresh = run_batched(finish_batch, [jobs[i] for i in stale], (target, runtime, optimize),
+                            workers, executor)
+        records = dict(zip(stale, (out[2] for out in fresh)))
+        done = {key: old[key] for key in keys if key in old}
+        done.update((keys[i], out[:2]) for i, out in zip(stale, fresh))
+        self.finished[config] = done
+        return [dict(r, tac=done[key][0], asm=done[key][1],
+                     passes=r['passes'] + records.get(i, []))
+                for i, (r, key) in enumerate(zip(results, keys))]
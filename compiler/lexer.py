@@ -20,6 +20,9 @@ reserved = {
     'println': 'PRINTLN',
     'true': 'TRUE',
     'false': 'FALSE',
+    'this': 'THIS',
+    'new': 'NEW',
+    'length': 'LENGTH',
 }
 
 # All tokens
@@ -28,11 +31,11 @@ tokens = [
     'LBRACE', 'RBRACE',
     'LPAREN', 'RPAREN',
     'LBRACK', 'RBRACK',
-    'SEMICOLON',
+    'SEMICOLON', 'COMMA',
     'ASSIGN',
     'DOT',
-    'PLUS', 'MINUS', 'TIMES',
-    'LT', 'NOT',
+    'PLUS', 'MINUS', 'TIMES', 'DIVIDE', 'MOD',
+    'LT', 'NOT', 'AND',
 ] + list(reserved.values())
 
 # Regex rules
@@ -43,13 +46,17 @@ t_RPAREN    = r'\)'
 t_LBRACK    = r'\['
 t_RBRACK    = r'\]'
 t_SEMICOLON = r';'
+t_COMMA     = r','
 t_ASSIGN    = r'='
 t_DOT       = r'\.'
 t_PLUS      = r'\+'
 t_MINUS     = r'-'
 t_TIMES     = r'\*'
+t_DIVIDE    = r'/'
+t_MOD       = r'%'
 t_LT        = r'<'
 t_NOT       = r'!'
+t_AND       = r'&&'
 
 # Identifiers and keywords
 def t_ID(t):
@@ -0,0 +1,7 @@
+from .ssa import to_ssa, from_ssa
+from .sccp import sccp
+from .copyprop import copyprop
+from .bce import bce
+from .inline import inline, inline_table
+from .pipeline import optimize
+from .peval import peval
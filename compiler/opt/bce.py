@@ -0,0 +1,164 @@
+# compiler/opt/bce.py
+# Bounds-check elimination over an SSA Function. A 'check i, a' is dropped
+# when range facts prove 0 <= i < a.length wherever it runs.
+#
+# Upper bounds are facts 'x < n' that hold on entry to a block: the true
+# edge of a branch on 'x < n' into a block with no other predecessor, a phi
+# whose incoming value is below n on each of its edges, and an earlier check
+# of the same index. In SSA form such a fact stays true in every block the
+# edge dominates, because neither name can be redefined without passing
+# through the edge again. n proves i < a.length when it is 'length a' or the
+# size a was allocated with.
+#
+# i >= 0 is a property of the SSA name: constants >= 0, lengths, phis of
+# such values and 'x + c' for a constant 0 <= c <= MAX_STEP when x is below
+# some array length there (so the sum cannot wrap). Loop counters depend on
+# themselves, so it is solved optimistically: every candidate starts
+# non-negative until one of its operands is shown not to be.
+#
+# Needs the current dominator tree, {block index: immediate dominator} as
+# ssa.dominator_tree returns it; the pass manager recomputes it after a pass
+# that changes the CFG (compiler/passes.py).
+from .sccp import branch_succs
+from .ssa import COND_OPS, operands
+
+# Largest constant step kept non-negative; array lengths are far below
+# 2**31 - MAX_STEP, so an index below one plus the step cannot wrap
+MAX_STEP = 1 << 30
+
+
+def bce(fn, idom):
+    # Rewrites fn in place; returns the number of checks removed
+    where = {}              # name -> (block, position); phis at -1
+    instr_of = {}
+    phi_of = {}
+    bounds = {}             # array -> names and constants equal to its length
+    for b in fn.blocks:
+        for phi in b.phis:
+            where[phi.dest] = (b, -1)
+            phi_of[phi.dest] = phi
+        for k, instr in enumerate(b.body):
+            d = operands(instr)[1]
+            if d is not None:
+                where[d] = (b, k)
+                instr_of[d] = instr
+            if instr[0] == 'length':
+                bounds.setdefault(instr[1], set()).add(d)
+            elif instr[0] == 'newarray':
+                bounds.setdefault(d, set()).add(instr[1])
+    arrays = list(bounds)
+
+    def dominates(a, b):
+        while b is not None:
+            if b is a:
+                return True
+            b = idom[b.index]
+        return False
+
+    def defined(x, block, pos):
+        # Whether x's definition comes before position pos of block
+        if x not in where:
+            return True     # value on entry
+        b, k = where[x]
+        return k < pos if b is block else dominates(b, block)
+
+    def edge_fact(pred, block):
+        # (x, n) when the edge pred -> block is only taken with x < n
+        term = pred.term
+        if term is None or term[0] not in COND_OPS:
+            return None
+        jump, fall = branch_succs(pred)
+        if block is not (jump if term[0] == 'if_true' else fall):
+            return None
+        cond = instr_of.get(term[1])
+        if cond is None or cond[0] != '<':
+            return None
+        return cond[1], cond[2]
+
+    def checked(x, arr, block, pos):
+        # A check of x against arr runs before position pos of block
+        d = block
+        while d is not None:
+            body = d.body[:pos] if d is block else d.body
+            if any(i[0] == 'check' and i[1] == x and i[2] == arr for i in body):
+                return True
+            d = idom[d.index]
+        return False
+
+    def below(x, arr, block, pos, seen):
+        # x < arr.length holds before position pos of block
+        ns = bounds.get(arr, set())
+        if isinstance(x, int) and any(isinstance(n, int) and x < n for n in ns):
+            return True
+        if checked(x, arr, block, pos):
+            return True
+        d = block
+        while d is not None:
+            if len(d.preds) == 1:
+                fact = edge_fact(d.preds[0], d)
+                if fact is not None and fact[0] == x and fact[1] in ns:
+                    return True
+            phi = phi_of.get(x)
+            if phi is not None and where[x][0] is d and (x, arr) not in seen \
+                    and defined(arr, d, -1):
+                seen = seen | {(x, arr)}
+                if all(below_on_edge(phi.args[p.index], arr, p, d, seen) for p in d.preds):
+                    return True
+            if x in where and where[x][0] is d:
+                break       # nothing above its definition mentions x
+            d = idom[d.index]
+        return False
+
+    def below_on_edge(x, arr, pred, block, seen):
+        fact = edge_fact(pred, block)
+        if fact is not None and fact[0] == x and fact[1] in bounds.get(arr, ()):
+            return True
+        return below(x, arr, pred, len(pred.body), seen)
+
+    def bounded(x, block, pos):
+        # x is below the length of some array that exists there
+        return any(defined(arr, block, pos) and below(x, arr, block, pos, frozenset())
+                   for arr in arrays)
+
+    # Non-negative names, optimistically
+    rules = {}
+    for name, phi in phi_of.items():
+        rules[name] = list(phi.args.values())
+    for name, instr in instr_of.items():
+        op, a, b, _ = instr
+        if op == 'length':
+            rules[name] = []
+        elif op == '=':
+            rules[name] = [a]
+        elif op == '+':
+            if isinstance(a, int):
+                a, b = b, a
+            if isinstance(b, int) and 0 <= b <= MAX_STEP and isinstance(a, str):
+                block, pos = where[name]
+                if bounded(a, block, pos):
+                    rules[name] = [a]
+    nonneg = set(rules)
+
+    def is_nonneg(x):
+        return x >= 0 if isinstance(x, int) else x in nonneg
+
+    changed = True
+    while changed:
+        changed = False
+        for name in list(nonneg):
+            if not all(is_nonneg(x) for x in rules[name]):
+                nonneg.discard(name)
+                changed = True
+
+    # Decide first, then drop: later proofs may lean on earlier checks
+    redundant = set()
+    for b in fn.blocks:
+        for k, instr in enumerate(b.body):
+            if instr[0] != 'check':
+                continue
+            _, x, arr, _ = instr
+            if checked(x, arr, b, k) or is_nonneg(x) and below(x, arr, b, k, frozenset()):
+                redundant.add((b.index, k))
+    for b in fn.blocks:
+        b.body = [instr for k, instr in enumerate(b.body) if (b.index, k) not in redundant]
+    return len(redundant)
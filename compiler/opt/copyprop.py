@@ -0,0 +1,43 @@
+# compiler/opt/copyprop.py
+# Global copy propagation over an SSA Function. In SSA form the source of a
+# copy 'x.2 = y.1' dominates every use of x.2, so those uses can read y.1
+# directly and the copy goes away; chains collapse to their root. A phi whose
+# incoming values are all the same name (ignoring itself, as in a loop that
+# never changes the variable) is a copy as well.
+from .ssa import rename_instr
+
+
+def copyprop(fn):
+    # Rewrites fn in place; returns the number of copies and phis removed
+    alias = {}
+
+    def find(x):
+        while isinstance(x, str) and x in alias:
+            x = alias[x]
+        return x
+
+    changed = True
+    while changed:
+        changed = False
+        for b in fn.blocks:
+            for phi in b.phis:
+                if phi.dest in alias:
+                    continue
+                values = {find(a) for a in phi.args.values()} - {phi.dest}
+                if len(values) == 1:
+                    alias[phi.dest] = values.pop()
+                    changed = True
+            for op, a, _, r in b.body:
+                if op == '=' and r not in alias:
+                    alias[r] = find(a)
+                    changed = True
+
+    for b in fn.blocks:
+        b.phis = [p for p in b.phis if p.dest not in alias]
+        for phi in b.phis:
+            phi.args = {i: find(a) for i, a in phi.args.items()}
+        b.body = [rename_instr(instr, find) for instr in b.body
+                  if not (instr[0] == '=' and instr[3] in alias)]
+        if b.term:
+            b.term = rename_instr(b.term, find)
+    return len(alias)
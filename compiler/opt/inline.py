@@ -0,0 +1,125 @@
+# compiler/opt/inline.py
+# Inlining of small methods. A call to a method whose body (after its own
+# calls were inlined) has at most INLINE_LIMIT instructions and that is not
+# part of a call-graph cycle is replaced by that body: copies of the argument
+# values, the callee's instructions with every name and label made unique to
+# the call site, and a copy of the returned value into the call's result.
+# SCCP and copy propagation then remove most of the copies.
+from ..codegen.cfg import build_cfg, liveness, split_functions
+
+# Largest callee body (TAC instructions, labels and args not counted) inlined
+INLINE_LIMIT = 30
+
+
+def function_label(func):
+    return 'main' if func[0][0] == 'begin_main' else func[0][1]
+
+
+def callees(func):
+    return [instr[1] for instr in func if instr[0] == 'call']
+
+
+def body_size(func):
+    return sum(1 for instr in func if instr[0] not in ('label', 'arg'))
+
+
+def recursive_methods(calls):
+    # Labels that can reach themselves through the call graph
+    found = set()
+    for label in calls:
+        seen, work = set(), list(calls[label])
+        while work:
+            c = work.pop()
+            if c == label:
+                found.add(label)
+                break
+            if c not in seen and c in calls:
+                seen.add(c)
+                work.extend(calls[c])
+    return found
+
+
+def inline_table(funcs, limit=INLINE_LIMIT):
+    # {label: TAC} of every method worth inlining, its own inlinable calls
+    # already expanded. funcs is split_functions output.
+    by_label = {function_label(f): f for f in funcs}
+    calls = {label: [c for c in callees(f) if c in by_label] for label, f in by_label.items()}
+    cyclic = recursive_methods(calls)
+    table = {}
+    done = set()
+    # Callees before callers (iterative post-order), so each body is
+    # expanded from already expanded callees
+    for root in by_label:
+        if root in done:
+            continue
+        done.add(root)
+        stack = [(root, iter(calls[root]))]
+        while stack:
+            label, it = stack[-1]
+            c = next(it, None)
+            if c is not None:
+                if c not in done:
+                    done.add(c)
+                    stack.append((c, iter(calls[c])))
+                continue
+            stack.pop()
+            func = by_label[label]
+            if label == 'main' or label in cyclic:
+                continue
+            if any(instr[0] == 'return' for instr in func[:-1]):
+                continue
+            body = inline_calls(func, table)
+            if body_size(body) <= limit:
+                table[label] = body
+    return table
+
+
+def expand(body, args, dest, prefix):
+    # TAC for one inlined call of body: args are the caller's param values
+    def rename(x):
+        return prefix + x if isinstance(x, str) else x
+
+    code = []
+    for op, a, b, r in body[1:]:
+        if op == 'arg':
+            code.append(('=', args[a], None, rename(r)))
+        elif op == 'return':
+            code.append(('=', rename(a), None, dest))
+        elif op == 'call':
+            code.append((op, a, b, rename(r)))
+        else:
+            code.append((op, rename(a), rename(b), rename(r)))
+    # A fresh activation starts its locals at 0; the inlined copy may run
+    # many times, so reset whatever the body reads before writing
+    cfg = build_cfg(body)
+    live_in, _ = liveness(cfg)
+    n_args = sum(1 for instr in body if instr[0] == 'arg')
+    zeros = [('=', 0, None, rename(x)) for x in sorted(live_in[0])]
+    return code[:n_args] + zeros + code[n_args:]
+
+
+def inline_calls(func, table):
+    # func with every call to a method in table replaced by its body
+    label = function_label(func)
+    prefix = '' if label == 'main' else label + '.'
+    out = []
+    site = 0
+    for instr in func:
+        if instr[0] == 'call' and instr[1] in table:
+            n = instr[2]
+            args = [p[1] for p in out[len(out) - n:]]
+            del out[len(out) - n:]
+            site += 1
+            out.extend(expand(table[instr[1]], args, instr[3], f"{prefix}inl{site}."))
+        else:
+            out.append(instr)
+    return out
+
+
+def inline(tac, table=None):
+    # Whole program (or unit) TAC with small methods inlined. table defaults
+    # to the one built from tac itself.
+    funcs = split_functions(tac)
+    if table is None:
+        table = inline_table(funcs)
+    return [instr for func in funcs for instr in inline_calls(func, table)]
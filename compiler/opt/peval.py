@@ -0,0 +1,118 @@
+# compiler/opt/peval.py
+# Partial evaluation of a whole program at compile time. MiniJava programs
+# read no input, so running the TAC interpreter on them is the program's
+# own run; within a budget of FUEL interpreter steps this pass does that
+# and keeps only the effects.
+#
+# A program that finishes becomes main printing its output as constants.
+# A program without objects (everything happens in main) whose fuel runs out
+# is paused at the next label of main instead: the output so far, the
+# arrays rebuilt with their contents and the variables live there set to
+# their values, then a jump to the label, where the rest of main runs
+# as before. Anything else keeps its code: a trap (bad index, division by
+# zero, ...) is left to happen at run time, and a run that cannot pause
+# or would leave more than MAX_RESIDUAL instructions falls back unchanged.
+from ..codegen.cfg import build_cfg, liveness, split_functions
+from ..codegen.tac_interp import TACInterpreter
+from ..utils.errors import ExecutionError
+
+# Interpreter steps spent at compile time; a paused run may take as many
+# again to reach a label of main
+FUEL = 100000
+# Most instructions the evaluated part may become (prints and rebuilt state)
+MAX_RESIDUAL = 2000
+
+
+def arrays_of(heap):
+    # Offsets of the arrays in an interpreter heap that holds nothing else,
+    # in allocation order: each is its length followed by the elements
+    out, k = [], 1
+    while k < len(heap):
+        out.append(k)
+        k += heap[k] + 1
+    return out
+
+
+def array_names(main):
+    # Variables of main that hold arrays: newarray results and their copies
+    names = {instr[3] for instr in main if instr[0] == 'newarray'}
+    changed = True
+    while changed:
+        changed = False
+        for op, a, _, r in main:
+            if op == '=' and a in names and r not in names:
+                names.add(r)
+                changed = True
+    return names
+
+
+def reachable(func):
+    # func without the blocks control cannot reach from its entry
+    cfg = build_cfg(func)
+    seen = {b.index for b in cfg.reverse_postorder()}
+    return [instr for b in cfg.blocks if b.index in seen for instr in b.instrs]
+
+
+def resume(main, interp, result):
+    # main rewritten to start where the paused run stopped, or None
+    index, env = result.paused
+    block = interp.cfg.blocks[index]
+    heap = interp.heap
+    code = [main[0]] + [('print', v, None, None) for v in result.output]
+    arrays = {}
+    for n, base in enumerate(arrays_of(heap)):
+        t = f"peval.a{n}"
+        arrays[base] = t
+        code.append(('newarray', heap[base], None, t))
+        code.extend(('astore', t, i, v)
+                    for i, v in enumerate(heap[base + 1:base + 1 + heap[base]]) if v)
+    slots = interp.function_slots['main']
+    refs = array_names(main)
+    live_in, _ = liveness(interp.cfg)
+    for name in sorted(live_in[index]):
+        value = env[slots[name]] if name in slots else 0
+        if name in refs and value:
+            if value not in arrays:
+                return None
+            value = arrays[value]
+        code.append(('=', value, None, name))
+    code.append(('goto', block.label, None, None))
+    if len(code) > MAX_RESIDUAL:
+        return None
+    return reachable(code + main[1:])
+
+
+def peval(tac, fuel=None):
+    # (TAC, number of instructions evaluated at compile time); the TAC is
+    # unchanged when the program is not evaluated. fuel defaults to FUEL.
+    fuel = FUEL if fuel is None else fuel
+    tac = [instr for instr in tac if instr]
+    funcs = split_functions(tac)
+    if not funcs or funcs[0][0][0] != 'begin_main':
+        return tac, 0
+    main = funcs[0]
+    methods = {func[0][1] for func in funcs[1:]}
+    if any(instr[0] == 'call' and instr[1] not in methods for instr in tac):
+        # One unit of a program compiled by parts (compiler.parallel)
+        return tac, 0
+    try:
+        interp = TACInterpreter(tac)
+        pause_at = []
+        if not any(instr[0] == 'new' for instr in tac):
+            pause_at = [b.index for b in interp.cfg.blocks
+                        if b.start < len(main) and b.label is not None]
+        if pause_at:
+            result = interp.run(max_steps=2 * fuel, pause_after=fuel, pause_at=pause_at)
+        else:
+            result = interp.run(max_steps=fuel)
+    except ExecutionError:
+        return tac, 0
+    if result.paused is not None:
+        out = resume(main, interp, result)
+        if out is None:
+            return tac, 0
+        return out + [instr for func in funcs[1:] for instr in func], result.steps
+    if len(result.output) + 2 > MAX_RESIDUAL:
+        return tac, 0
+    out = [main[0]] + [('print', v, None, None) for v in result.output]
+    return out + [('end_main', None, None, None)], result.steps
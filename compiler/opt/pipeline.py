@@ -0,0 +1,12 @@
+# compiler/opt/pipeline.py
+# Optimization of IRGenerator output through the pass manager
+# (compiler/passes.py).
+
+
+def optimize(tac, inline_table=None, pipeline=True, hooks=()):
+    # Optimized TAC for a whole program (or a single unit) under a level or
+    # pass list (see passes.resolve; True is -O). Small methods are inlined
+    # first; a unit compiled on its own gets the program's inline_table (see
+    # inline.inline_table).
+    from compiler.passes import PassManager
+    return PassManager(pipeline, hooks).run_tac(tac, inline_table)
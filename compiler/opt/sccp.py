@@ -0,0 +1,219 @@
+# compiler/opt/sccp.py
+# Sparse conditional constant propagation (Wegman and Zadeck) over an SSA
+# Function. Values start undefined and are lowered to a constant or to
+# "varies"; only blocks reached through edges that can execute under those
+# values are evaluated, so constants flow through if/while and branches that
+# can never be taken disappear. Afterwards constant names are replaced by
+# immediates, never-executed blocks are dropped and dead definitions removed.
+from ..codegen.tac_interp import BINARY_OPS
+from .ssa import COND_OPS, operands, rename_instr
+
+TOP = 'top'           # no value seen yet
+BOTTOM = 'bottom'     # not a constant
+
+# Ops without side effects: removable once their result is unused. An
+# array access stays guarded by its own 'check'; 'newarray' can fail on a
+# bad size, so it stays. Division traps on a zero divisor, so it is only
+# pure by a nonzero immediate (see pure).
+DIVIDE_OPS = ('/', '%')
+PURE_OPS = ('=', 'load', 'new', 'length', 'aload') + tuple(
+    op for op in BINARY_OPS if op not in DIVIDE_OPS)
+
+
+def pure(instr):
+    if instr[0] in DIVIDE_OPS:
+        return isinstance(instr[2], int) and instr[2] != 0
+    return instr[0] in PURE_OPS
+
+
+def meet(x, y):
+    if x == TOP:
+        return y
+    if y == TOP or x == y:
+        return x
+    return BOTTOM
+
+
+def fold(op, x, y):
+    if op == '*' and (x == 0 or y == 0):
+        return 0
+    if x == BOTTOM or y == BOTTOM:
+        return BOTTOM
+    if x == TOP or y == TOP:
+        return TOP
+    if op in DIVIDE_OPS and y == 0:
+        # Traps at run time: leave it to the program
+        return BOTTOM
+    return BINARY_OPS[op](x, y)
+
+
+def branch_succs(block):
+    # (jump successor, fall-through successor) of a conditional terminator
+    jump = fall = None
+    for s in block.succs:
+        if s.label is not None and s.label == block.term[2]:
+            jump = s
+        else:
+            fall = s
+    return jump, fall
+
+
+def sccp(fn):
+    # Rewrites fn in place; returns the number of names found constant
+    value = {}
+    defs, uses = {}, {}
+    for b in fn.blocks:
+        for phi in b.phis:
+            defs[phi.dest] = (b, phi)
+            for a in phi.args.values():
+                if isinstance(a, str):
+                    uses.setdefault(a, []).append(b)
+        for instr in b.body + ([b.term] if b.term else []):
+            reads, written = operands(instr)
+            for x in reads:
+                uses.setdefault(x, []).append(b)
+            if written is not None:
+                defs[written] = (b, instr)
+
+    def get(x):
+        if isinstance(x, int):
+            return x
+        if fn.origin.get(x, x) == x:
+            return BOTTOM        # value on entry
+        return value.get(x, TOP)
+
+    executable, edges = set(), set()
+    flow = [(None, fn.entry)]
+    ssa = []
+
+    def lower(name, v):
+        if v != get(name):
+            value[name] = v
+            ssa.append(name)
+
+    def visit_phi(b, phi):
+        v = TOP
+        for p_index, a in phi.args.items():
+            if (p_index, b.index) in edges:
+                v = meet(v, get(a))
+        lower(phi.dest, v)
+
+    def visit_instr(instr):
+        op, a, c, r = instr
+        if op == '=':
+            lower(r, get(a))
+        elif op in BINARY_OPS:
+            lower(r, fold(op, get(a), get(c)))
+        elif operands(instr)[1] is not None:
+            # Incoming arguments, call results, loads and new objects
+            lower(r, BOTTOM)
+
+    def visit_term(b):
+        term = b.term
+        if term is None or term[0] == 'goto':
+            targets = b.succs
+        elif term[0] in COND_OPS:
+            v = get(term[1])
+            jump, fall = branch_succs(b)
+            if v == TOP:
+                targets = []
+            elif v == BOTTOM:
+                targets = b.succs
+            else:
+                taken = (v == 0) if term[0] == 'if_false' else (v != 0)
+                targets = [jump if taken else fall]
+        else:
+            targets = []
+        for s in targets:
+            if (b.index, s.index) not in edges:
+                flow.append((b, s))
+
+    while flow or ssa:
+        while flow:
+            p, b = flow.pop()
+            if p is not None:
+                edges.add((p.index, b.index))
+            for phi in b.phis:
+                visit_phi(b, phi)
+            if b.index in executable:
+                continue
+            executable.add(b.index)
+            for instr in b.body:
+                visit_instr(instr)
+            visit_term(b)
+        while ssa:
+            name = ssa.pop()
+            for b in uses.get(name, ()):
+                if b.index not in executable:
+                    continue
+                for phi in b.phis:
+                    if name in phi.args.values():
+                        visit_phi(b, phi)
+                for instr in b.body:
+                    if name in operands(instr)[0]:
+                        visit_instr(instr)
+                if b.term and name in operands(b.term)[0]:
+                    visit_term(b)
+
+    constants = {n: v for n, v in value.items() if v not in (TOP, BOTTOM)}
+    rewrite(fn, constants, executable, edges)
+    remove_dead(fn)
+    return len(constants)
+
+
+def rewrite(fn, constants, executable, edges):
+    def use(x):
+        return constants.get(x, x)
+
+    fn.blocks = [b for b in fn.blocks if b.index in executable]
+    for b in fn.blocks:
+        live_succs = [s for s in b.succs if (b.index, s.index) in edges]
+        if b.term and b.term[0] in COND_OPS and len(live_succs) < len(b.succs):
+            jump, _ = branch_succs(b)
+            b.term = ('goto', jump.label, None, None) if live_succs == [jump] else None
+        b.succs = live_succs
+        b.phis = [p for p in b.phis if p.dest not in constants]
+        for phi in b.phis:
+            phi.args = {i: use(a) for i, a in phi.args.items() if (i, b.index) in edges}
+        b.body = [rename_instr(instr, use) for instr in b.body
+                  if operands(instr)[1] not in constants]
+        if b.term:
+            b.term = rename_instr(b.term, use)
+    fn.link()
+
+
+def remove_dead(fn):
+    # Drop pure definitions and phis whose result is never read
+    count = {}
+    for b in fn.blocks:
+        for phi in b.phis:
+            for a in phi.args.values():
+                if isinstance(a, str):
+                    count[a] = count.get(a, 0) + 1
+        for instr in b.body + ([b.term] if b.term else []):
+            for x in operands(instr)[0]:
+                count[x] = count.get(x, 0) + 1
+    changed = True
+    while changed:
+        changed = False
+        for b in fn.blocks:
+            keep = []
+            for phi in b.phis:
+                if count.get(phi.dest, 0):
+                    keep.append(phi)
+                    continue
+                changed = True
+                for a in phi.args.values():
+                    if isinstance(a, str):
+                        count[a] -= 1
+            b.phis = keep
+            body = []
+            for instr in b.body:
+                reads, written = operands(instr)
+                if pure(instr) and not count.get(written, 0):
+                    changed = True
+                    for x in reads:
+                        count[x] -= 1
+                    continue
+                body.append(instr)
+            b.body = body
@@ -0,0 +1,511 @@
+# compiler/opt/ssa.py
+# SSA form for one function of IRGenerator output (see cfg.split_functions).
+# to_ssa() builds blocks with dominators, places pruned phi nodes on the
+# iterated dominance frontier and renames every definition to a version
+# 'x.N'; the entry value of a variable keeps its plain name 'x'. from_ssa()
+# coalesces phi webs and copies whose live ranges do not interfere, turns the
+# remaining phis into parallel copies on their incoming edges (splitting
+# critical edges) and writes TAC again.
+from ..codegen.cfg import EXIT_OPS, TERMINATORS, falls_through, jump_target, split_blocks, uses_defs
+from ..codegen.moves import sequentialize
+
+COND_OPS = ('if_false', 'if_true')
+
+
+class Phi:
+    def __init__(self, var, dest):
+        self.var = var
+        self.dest = dest
+        self.args = {}          # predecessor block index -> operand
+
+    def __repr__(self):
+        return f"{self.dest} = phi({self.args})"
+
+
+class Block:
+    def __init__(self, index, head, body, term):
+        self.index = index
+        self.head = head        # leading 'label' / 'begin_main', kept verbatim
+        self.label = next((i[1] for i in head if i[0] == 'label'), None)
+        self.phis = []
+        self.body = body        # straight-line instructions
+        self.term = term        # terminator, or None when control falls through
+        self.succs = []
+        self.preds = []
+        self.idom = None
+        self.children = []      # dominator tree
+
+    def __repr__(self):
+        return f"<B{self.index} {self.label or ''} -> {[s.index for s in self.succs]}>"
+
+
+class Function:
+    def __init__(self, blocks, exit_instr, prefix):
+        self.blocks = blocks            # layout order, entry first, reachable only
+        self.exit_instr = exit_instr    # final end_main / return of the input
+        self.prefix = prefix            # namespace for new labels and temps
+        self.origin = {}                # SSA name -> source variable
+        self.next_index = max((b.index for b in blocks), default=-1) + 1
+        self.next_label = 0
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def new_label(self, kind='SSA'):
+        taken = {b.label for b in self.blocks}
+        while True:
+            self.next_label += 1
+            label = f"{self.prefix}{kind}{self.next_label}"
+            if label not in taken:
+                return label
+
+    def link(self):
+        # Rebuild preds from succs
+        for b in self.blocks:
+            b.preds = []
+        for b in self.blocks:
+            for s in b.succs:
+                s.preds.append(b)
+
+
+# (variables read, variable written or None)
+operands = uses_defs
+
+
+def rename_instr(instr, use, define=None):
+    # instr with every variable read passed through use() and the variable
+    # written through define()
+    op, a, b, r = instr
+    if op in ('label', 'goto', 'begin_main', 'end_main'):
+        return instr
+    if isinstance(a, str) and op != 'call':
+        a = use(a)
+    if op not in ('print', 'return', 'param') + COND_OPS and isinstance(b, str):
+        b = use(b)
+    if op in ('store', 'astore'):
+        if isinstance(r, str):
+            r = use(r)
+    elif r is not None and define is not None:
+        r = define(r)
+    return (op, a, b, r)
+
+
+# -----------------------
+# Construction
+# -----------------------
+def build_function(tac):
+    tac = [instr for instr in tac if instr]
+    raw = split_blocks(tac)
+    blocks = []
+    for bb in raw:
+        instrs = bb.instrs
+        n = 0
+        while n < len(instrs) and instrs[n][0] in ('label', 'begin_main'):
+            n += 1
+        head, rest = instrs[:n], instrs[n:]
+        term = rest[-1] if rest and rest[-1][0] in TERMINATORS else None
+        body = rest[:-1] if term else rest
+        blocks.append(Block(bb.index, head, body, term))
+
+    by_label = {b.label: b for b in blocks if b.label is not None}
+    for i, b in enumerate(blocks):
+        target = jump_target(b.term) if b.term else None
+        if target is not None:
+            b.succs.append(by_label[target])
+        if (b.term is None or falls_through(b.term)) and i + 1 < len(blocks):
+            if blocks[i + 1] in b.succs:
+                # Conditional branch to the next block: both edges coincide
+                b.term = None
+            else:
+                b.succs.append(blocks[i + 1])
+
+    # Only blocks reachable from the entry take part
+    seen, stack = {blocks[0].index}, [blocks[0]]
+    while stack:
+        for s in stack.pop().succs:
+            if s.index not in seen:
+                seen.add(s.index)
+                stack.append(s)
+    exit_instr = tac[-1] if tac[-1][0] in EXIT_OPS else None
+    first = tac[0]
+    prefix = f"{first[1]}." if first[0] == 'label' else ''
+    fn = Function([b for b in blocks if b.index in seen], exit_instr, prefix)
+    fn.link()
+    return fn
+
+
+def reverse_postorder(fn):
+    seen, order = {fn.entry.index}, []
+    stack = [(fn.entry, iter(fn.entry.succs))]
+    while stack:
+        block, it = stack[-1]
+        for s in it:
+            if s.index not in seen:
+                seen.add(s.index)
+                stack.append((s, iter(s.succs)))
+                break
+        else:
+            stack.pop()
+            order.append(block)
+    order.reverse()
+    return order
+
+
+def compute_dominators(fn):
+    # Cooper, Harvey and Kennedy's iterative algorithm over reverse postorder
+    order = reverse_postorder(fn)
+    number = {b.index: i for i, b in enumerate(order)}
+    entry = fn.entry
+    idom = {entry.index: entry}
+
+    def intersect(a, b):
+        while a is not b:
+            while number[a.index] > number[b.index]:
+                a = idom[a.index]
+            while number[b.index] > number[a.index]:
+                b = idom[b.index]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for b in order[1:]:
+            new = None
+            for p in b.preds:
+                if p.index in idom:
+                    new = p if new is None else intersect(p, new)
+            if idom.get(b.index) is not new:
+                idom[b.index] = new
+                changed = True
+    for b in fn.blocks:
+        b.idom = None if b is entry else idom[b.index]
+        b.children = []
+    for b in order[1:]:
+        b.idom.children.append(b)
+    return order
+
+
+def immediate_dominators(fn):
+    # {block index: immediate dominator, None for the entry} as the last
+    # compute_dominators left them
+    return {b.index: b.idom for b in fn.blocks}
+
+
+def dominator_tree(fn):
+    # immediate_dominators of fn's current CFG
+    compute_dominators(fn)
+    return immediate_dominators(fn)
+
+
+def dominance_frontiers(fn):
+    df = {b.index: set() for b in fn.blocks}
+    for b in fn.blocks:
+        if len(b.preds) < 2:
+            continue
+        for p in b.preds:
+            runner = p
+            while runner is not b.idom:
+                df[runner.index].add(b)
+                runner = runner.idom
+    return df
+
+
+def block_liveness(fn, phi_aware=False):
+    # (live_in, live_out) by block index; live_in is taken below the phis.
+    # With phi_aware, a phi argument is live out of its own predecessor only.
+    use, defs = {}, {}
+    for b in fn.blocks:
+        u, d = set(), set()
+        for instr in b.body + ([b.term] if b.term else []):
+            reads, written = operands(instr)
+            u.update(x for x in reads if x not in d)
+            if written is not None:
+                d.add(written)
+        use[b.index], defs[b.index] = u, d
+    live_in = {b.index: set() for b in fn.blocks}
+    live_out = {b.index: set() for b in fn.blocks}
+    order = list(reversed(reverse_postorder(fn)))
+    changed = True
+    while changed:
+        changed = False
+        for b in order:
+            out = set()
+            for s in b.succs:
+                if phi_aware:
+                    out |= live_in[s.index] - {p.dest for p in s.phis}
+                    out.update(p.args[b.index] for p in s.phis
+                               if isinstance(p.args.get(b.index), str))
+                else:
+                    out |= live_in[s.index]
+            inn = use[b.index] | (out - defs[b.index])
+            if out != live_out[b.index] or inn != live_in[b.index]:
+                live_out[b.index], live_in[b.index] = out, inn
+                changed = True
+    return live_in, live_out
+
+
+def to_ssa(tac):
+    # Function in pruned SSA form for one function's TAC
+    fn = build_function(tac)
+    compute_dominators(fn)
+    df = dominance_frontiers(fn)
+    live_in, _ = block_liveness(fn)
+
+    def_blocks = {}
+    for b in fn.blocks:
+        for instr in b.body:
+            d = operands(instr)[1]
+            if d is not None:
+                def_blocks.setdefault(d, set()).add(b.index)
+    by_index = {b.index: b for b in fn.blocks}
+    for var in sorted(def_blocks):
+        placed, work = set(), [by_index[i] for i in def_blocks[var]]
+        while work:
+            b = work.pop()
+            for f in df[b.index]:
+                if f.index in placed or var not in live_in[f.index]:
+                    continue
+                placed.add(f.index)
+                f.phis.append(Phi(var, var))
+                work.append(f)
+
+    counters = {}
+    stacks = {}
+
+    def current(var):
+        s = stacks.get(var)
+        if s:
+            return s[-1]
+        fn.origin[var] = var
+        return var
+
+    def fresh(var):
+        counters[var] = counters.get(var, 0) + 1
+        name = f"{var}.{counters[var]}"
+        fn.origin[name] = var
+        stacks.setdefault(var, []).append(name)
+        pushed.append(var)
+        return name
+
+    # Dominator tree walk without recursion; each frame remembers what it
+    # pushed so the stacks can be unwound on exit
+    work = [(fn.entry, False, None)]
+    while work:
+        b, done, frame = work.pop()
+        if done:
+            for var in frame:
+                stacks[var].pop()
+            continue
+        pushed = []
+        for phi in b.phis:
+            phi.dest = fresh(phi.var)
+        b.body = [rename_instr(instr, current, fresh) for instr in b.body]
+        if b.term:
+            b.term = rename_instr(b.term, current)
+        for s in b.succs:
+            for phi in s.phis:
+                phi.args[b.index] = current(phi.var)
+        work.append((b, True, pushed))
+        for c in reversed(b.children):
+            work.append((c, False, None))
+    return fn
+
+
+# -----------------------
+# Destruction
+# -----------------------
+def interference(fn):
+    # {name: set of names live at its definition}; a copy's destination does
+    # not interfere with its source
+    _, live_out = block_liveness(fn, phi_aware=True)
+    edges = {}
+
+    def add(x, y):
+        edges.setdefault(x, set()).add(y)
+        edges.setdefault(y, set()).add(x)
+
+    for b in fn.blocks:
+        live = set(live_out[b.index])
+        for instr in reversed(b.body + ([b.term] if b.term else [])):
+            reads, written = operands(instr)
+            if written is not None:
+                skip = instr[1] if instr[0] == '=' else None
+                for x in live:
+                    if x != written and x != skip:
+                        add(written, x)
+                live.discard(written)
+            live.update(reads)
+        dests = [p.dest for p in b.phis]
+        for d in dests:
+            for x in live | set(dests):
+                if x != d:
+                    add(d, x)
+    return edges
+
+
+class Classes:
+    # Union-find over SSA names with class-level interference
+    def __init__(self, edges, pinned):
+        self.parent = {}
+        self.edges = edges
+        self.pinned = {}        # root -> entry-value name in the class
+
+        for name in pinned:
+            self.pinned[name] = name
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(x, x) != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def try_union(self, x, y):
+        rx, ry = self.find(x), self.find(y)
+        if rx == ry:
+            return True
+        if rx in self.pinned and ry in self.pinned:
+            return False
+        if any(self.find(n) == ry for n in self.edges.get(rx, ())):
+            return False
+        self.parent[ry] = rx
+        self.edges.setdefault(rx, set()).update(self.edges.pop(ry, ()))
+        if ry in self.pinned:
+            self.pinned[rx] = self.pinned.pop(ry)
+        return True
+
+
+def class_names(fn, classes, names):
+    # Final variable name per SSA name: the entry value's name when the class
+    # has one, else the source variable most of its members came from
+    members = {}
+    for n in names:
+        members.setdefault(classes.find(n), []).append(n)
+    taken, chosen = set(), {}
+    roots = sorted(members, key=lambda r: (r not in classes.pinned, r))
+    for root in roots:
+        if root in classes.pinned:
+            name = classes.pinned[root]
+        else:
+            votes = {}
+            for n in members[root]:
+                v = fn.origin.get(n, n)
+                votes[v] = votes.get(v, 0) + 1
+            base = min(votes, key=lambda v: (-votes[v], v))
+            name, k = base, 0
+            while name in taken:
+                k += 1
+                name = f"{base}.{k}"
+        taken.add(name)
+        for n in members[root]:
+            chosen[n] = name
+    return chosen
+
+
+def from_ssa(fn):
+    # TAC for an SSA Function
+    names = set()
+    for b in fn.blocks:
+        for p in b.phis:
+            names.add(p.dest)
+            names.update(a for a in p.args.values() if isinstance(a, str))
+        for instr in b.body + ([b.term] if b.term else []):
+            reads, written = operands(instr)
+            names.update(reads)
+            if written is not None:
+                names.add(written)
+    pinned = [n for n in names if fn.origin.get(n, n) == n]
+    classes = Classes(interference(fn), pinned)
+    for b in fn.blocks:
+        for p in b.phis:
+            for a in p.args.values():
+                if isinstance(a, str):
+                    classes.try_union(p.dest, a)
+    for b in fn.blocks:
+        for instr in b.body:
+            if instr[0] == '=' and isinstance(instr[1], str):
+                classes.try_union(instr[3], instr[1])
+    name = class_names(fn, classes, names)
+
+    def final(x):
+        return name.get(x, x) if isinstance(x, str) else x
+
+    # Rename first: the copies added below are already in final names
+    for b in fn.blocks:
+        b.body = [instr for instr in (rename_instr(i, final, final) for i in b.body)
+                  if not (instr[0] == '=' and instr[1] == instr[3])]
+        if b.term:
+            b.term = rename_instr(b.term, final)
+
+    temp = f"{fn.prefix}swap"
+    layout = list(fn.blocks)
+    for b in list(fn.blocks):
+        for pred in list(b.preds):
+            copies = [(final(p.dest), final(p.args[pred.index])) for p in b.phis]
+            copies = sequentialize(copies, temp)
+            if not copies:
+                continue
+            code = [('=', s, None, d) for d, s in copies]
+            if len(pred.succs) == 1:
+                pred.body.extend(code)
+                continue
+            # Critical edge: route it through a new block holding the copies
+            if b.label is None:
+                b.label = fn.new_label()
+                b.head = [('label', b.label, None, None)] + b.head
+            label = fn.new_label()
+            edge = Block(fn.next_index, [('label', label, None, None)], code,
+                         ('goto', b.label, None, None))
+            fn.next_index += 1
+            edge.succs = [b]
+            if pred.term and jump_target(pred.term) == b.label:
+                op, a, _, r = pred.term
+                pred.term = (op, a, label, r)
+                layout.insert(layout.index(b), edge)
+            else:
+                layout.insert(layout.index(pred) + 1, edge)
+            pred.succs[pred.succs.index(b)] = edge
+    for b in layout:
+        b.phis = []
+    return emit(fn, layout)
+
+
+def emit(fn, layout):
+    # Flatten blocks in layout order. A goto to the next block is dropped,
+    # falling through to a block laid out elsewhere becomes a goto, labels
+    # nothing jumps to are dropped, and the function still ends in its exit.
+    terms, fall_to = [], []
+    for i, b in enumerate(layout):
+        nxt = layout[i + 1] if i + 1 < len(layout) else None
+        term = b.term
+        if term and term[0] == 'goto' and nxt is not None and nxt.label == term[1]:
+            term = None
+        fall = None
+        if term is None or term[0] in COND_OPS:
+            fall = next((s for s in b.succs if not (term and jump_target(term) == s.label)), None)
+            if fall is nxt:
+                fall = None
+            elif fall.label is None:
+                fall.label = fn.new_label()
+                fall.head = [('label', fall.label, None, None)] + fall.head
+        terms.append(term)
+        fall_to.append(fall)
+    targets = {jump_target(t) for t in terms if t} | {f.label for f in fall_to if f}
+
+    out = []
+    for i, b in enumerate(layout):
+        for instr in b.head:
+            if instr[0] != 'label' or instr[1] in targets or i == 0:
+                out.append(instr)
+        out.extend(b.body)
+        if terms[i]:
+            out.append(terms[i])
+        if fall_to[i]:
+            out.append(('goto', fall_to[i].label, None, None))
+    if fn.exit_instr and (not out or out[-1][0] not in EXIT_OPS):
+        op = fn.exit_instr[0]
+        out.append((op, 0 if op == 'return' else None, None, None))
+    return out
@@ -0,0 +1,197 @@
+# compiler/parallel.py
+# Method-granular compilation. The main process lexes the file and parses
+# only its outline (RDParser.parse_skeleton), then runs semantic passes 1-2
+# to build the class signature table. Main and every method body are then
+# independent units: each is parsed from its own source text, checked,
+# lowered to TAC and turned into asm in a process pool. Units travel as text,
+# which is far cheaper to ship than pickled ASTs. Temps and labels are
+# namespaced per unit (see IRBuilder.begin_unit), so merging the results in
+# program order gives exactly the output of a serial compile.
+#
+# With optimization on, inlining needs the bodies of other units, so units
+# are only lowered in the first round; the main process builds the program's
+# inline table and a second round inlines, optimizes and emits each unit.
+# optimize is the resolved pass list (compiler/passes.py); each result carries
+# the records of the passes run on it under 'passes'.
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from compiler.utils.errors import CompilerError, error_message
+
+
+def program_units(skeleton, source):
+    # [(key, class_name, rule, text, lineno)] in program order: main first,
+    # then every method of every class
+    units = []
+    main = skeleton.main
+    units.append(('main', main.name, 'main_class', source[main.span[0]:main.span[1]], main.lineno))
+    for cls in skeleton.classes:
+        for m in cls.method_decls:
+            units.append((f"{cls.name}.{m.name}", cls.name, 'method_decl',
+                          source[m.span[0]:m.span[1]], m.lineno))
+    return units
+
+
+def compile_unit(unit, signatures, target='x86', runtime='buffered', optimize=()):
+    # Parse, check, lower and emit one unit given the class table; with
+    # optimize, stop after lowering (finish_unit does the rest)
+    from compiler.driver import get_backend, get_parser
+    from compiler.passes import PassManager
+    from compiler.semantic.analyzer import SemanticAnalyzer
+    from compiler.codegen.intermediate import IRGenerator
+
+    key, class_name, rule, text, lineno = unit
+    # deps: class table entries the check looked up (compiler/incremental.py)
+    result = {'key': key, 'parse_errors': [], 'errors': [], 'deps': [],
+              'tac': None, 'asm': None, 'passes': []}
+    parser, lexer = get_parser('rd')
+    try:
+        node = parser.parse_fragment(text, rule, lexer=lexer, lineno=lineno)
+    except CompilerError as e:
+        result['parse_errors'].append(error_message(e))
+        return result
+
+    analyzer = SemanticAnalyzer()
+    analyzer.symtab.classes = signatures
+    if rule == 'main_class':
+        result['errors'] = analyzer.check_main(node)
+    else:
+        result['errors'] = analyzer.check_method(class_name, node)
+    result['deps'] = sorted(analyzer.symtab.used_classes)
+    if result['errors']:
+        return result
+    passes = PassManager(optimize)
+    result['tac'] = IRGenerator().lower_unit(class_name, passes.run_ast(node, key))
+    result['passes'] = passes.records
+    if not optimize:
+        result['asm'] = get_backend(target, runtime).generate_unit(result['tac'])
+    return result
+
+
+def finish_unit(tac, table, target='x86', runtime='buffered', optimize=()):
+    # Second round under optimization: (optimized TAC, asm, pass records) of
+    # a lowered unit given the inline table entries it calls
+    from compiler.driver import get_backend
+    from compiler.passes import PassManager
+
+    passes = PassManager(optimize)
+    tac = passes.run_tac(tac, table)
+    return tac, get_backend(target, runtime, passes).generate_unit(tac), passes.records
+
+
+def compile_batch(units, signatures, target, runtime, optimize=()):
+    # Worker entry point: one pickled copy of the class table per batch
+    return [compile_unit(unit, signatures, target, runtime, optimize) for unit in units]
+
+
+def finish_batch(jobs, target, runtime, optimize):
+    return [finish_unit(tac, table, target, runtime, optimize) for tac, table in jobs]
+
+
+def unit_inline_tables(tacs):
+    # Per lowered unit, the entries of the program's inline table it calls
+    from compiler.opt.inline import callees, inline_table
+
+    table = inline_table(tacs)
+    return [{c: table[c] for c in callees(tac) if c in table} for tac in tacs]
+
+
+def batches(items, n):
+    # n contiguous, nearly equal slices (keeps program order on concatenation)
+    size, extra = divmod(len(items), n)
+    out, start = [], 0
+    for i in range(n):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            out.append(items[start:end])
+        start = end
+    return out
+
+
+def make_executor(workers=None):
+    # Spawned workers: forking a process that already runs threads (the
+    # compile server) is not safe
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+def run_batched(fn, items, args, workers=None, executor=None):
+    # fn(batch, *args) over items, in order; in this process when workers == 1
+    if workers == 1 or len(items) <= 1:
+        return fn(items, *args)
+    own = executor is None
+    pool = make_executor(workers) if own else executor
+    try:
+        # A few batches per worker balances uneven method sizes
+        n = workers or os.cpu_count()
+        parts = batches(items, min(len(items), 4 * n))
+        futures = [pool.submit(fn, part, *args) for part in parts]
+        return [r for f in futures for r in f.result()]
+    finally:
+        if own:
+            pool.shutdown()
+
+
+def run_units(units, signatures, target, runtime, workers=None, executor=None,
+              optimize=()):
+    # compile_unit over units, in order
+    return run_batched(compile_batch, units, (signatures, target, runtime, optimize),
+                       workers, executor)
+
+
+def finish_units(results, target, runtime, workers=None, executor=None, optimize=()):
+    # Second round over first-round results without errors: new results
+    # with the optimized TAC and asm
+    tacs = [r['tac'] for r in results]
+    jobs = list(zip(tacs, unit_inline_tables(tacs)))
+    finished = run_batched(finish_batch, jobs, (target, runtime, optimize), workers, executor)
+    return [dict(r, tac=tac, asm=asm, passes=r['passes'] + records)
+            for r, (tac, asm, records) in zip(results, finished)]
+
+
+def declare(source):
+    # (skeleton, signatures, parse_errors, semantic errors) of passes 1-2
+    from compiler.driver import get_parser
+    from compiler.semantic.analyzer import SemanticAnalyzer
+
+    parser, lexer = get_parser('rd')
+    try:
+        skeleton = parser.parse_skeleton(source, lexer=lexer)
+    except CompilerError as e:
+        return None, None, [error_message(e)], None
+    analyzer = SemanticAnalyzer()
+    errors = analyzer.declare(skeleton)
+    return skeleton, analyzer.signatures(), [], errors
+
+
+def merge(results, target, runtime):
+    # Program-level result from per-unit results in program order
+    from compiler.driver import get_backend
+
+    built = {'parse_errors': [e for r in results for e in r['parse_errors']],
+             'errors': None, 'tac': None, 'asm': None, 'units': results,
+             'passes': [rec for r in results for rec in r['passes']]}
+    if built['parse_errors']:
+        return built
+    built['errors'] = [e for r in results for e in r['errors']]
+    if built['errors']:
+        return built
+    built['tac'] = [instr for r in results for instr in r['tac']]
+    built['asm'] = get_backend(target, runtime).assemble([r['asm'] for r in results])
+    return built
+
+
+def compile_parallel(source, workers=None, target='x86', runtime='buffered', executor=None,
+                     optimize=()):
+    # {'parse_errors', 'errors', 'tac', 'asm', 'units'} for source text.
+    # errors is None when parsing failed; tac and asm are None on any error.
+    skeleton, signatures, parse_errors, errors = declare(source)
+    if parse_errors or errors:
+        return {'parse_errors': parse_errors, 'errors': errors,
+                'tac': None, 'asm': None, 'units': [], 'passes': []}
+    units = program_units(skeleton, source)
+    results = run_units(units, signatures, target, runtime, workers, executor, optimize)
+    if optimize and not any(r['parse_errors'] or r['errors'] for r in results):
+        results = finish_units(results, target, runtime, workers, executor, optimize)
+    return merge(results, target, runtime)
@@ -3,10 +3,23 @@ import ply.yacc as yacc
 import sys
 from compiler.lexer import tokens
 from compiler.ast_nodes.nodes import (
-    ProgramNode, MainClassNode, ClassDeclNode, VarDeclNode, BlockNode,
-    AssignNode, PrintNode, IfNode, WhileNode,
+    ProgramNode, MainClassNode, ClassDeclNode, VarDeclNode, MethodDeclNode, BlockNode,
+    AssignNode, ArrayAssignNode, PrintNode, IfNode, WhileNode,
     IntLiteralNode, BoolLiteralNode, VarNode, BinaryOpNode, UnaryOpNode,
-    IntType, BooleanType
+    ArrayAccessNode, ArrayLengthNode, MethodCallNode, ThisNode, NewObjectNode, NewArrayNode,
+    IntType, BooleanType, ArrayType, ClassType
+)
+
+# -----------------------
+# Precedence (Java rules: '* / %' over '+ -' over '<' over '&&', unary '!' tightest)
+# -----------------------
+precedence = (
+    ('left', 'AND'),
+    ('left', 'LT'),
+    ('left', 'PLUS', 'MINUS'),
+    ('left', 'TIMES', 'DIVIDE', 'MOD'),
+    ('right', 'NOT'),
+    ('left', 'DOT'),
 )
 
 # -----------------------
@@ -26,9 +39,62 @@ def p_class_decl_list(p):
         p[0] = []
 
 def p_class_decl(p):
-    '''class_decl : CLASS ID LBRACE RBRACE'''
-    # Minimal class support (no fields/methods yet)
-    p[0] = ClassDeclNode(p[2], [], [])
+    '''class_decl : CLASS ID LBRACE class_member_list RBRACE'''
+    fields = [m for m in p[4] if isinstance(m, VarDeclNode)]
+    methods = [m for m in p[4] if isinstance(m, MethodDeclNode)]
+    p[0] = ClassDeclNode(p[2], fields, methods)
+
+def p_class_member_list(p):
+    '''class_member_list : class_member_list var_decl
+                         | class_member_list method_decl
+                         | empty'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = []
+
+def p_method_decl(p):
+    '''method_decl : PUBLIC type ID LPAREN params RPAREN LBRACE method_body RETURN expression SEMICOLON RBRACE'''
+    p[0] = MethodDeclNode(p[3], p[2], p[5], p[8], p[10])
+
+def p_type(p):
+    '''type : INT
+            | INT LBRACK RBRACK
+            | BOOLEAN
+            | ID'''
+    if len(p) == 4:
+        p[0] = ArrayType()
+    elif p[1] == 'int':
+        p[0] = IntType()
+    elif p[1] == 'boolean':
+        p[0] = BooleanType()
+    else:
+        p[0] = ClassType(p[1])
+
+def p_params(p):
+    '''params : param_list
+              | empty'''
+    p[0] = p[1]
+
+def p_param_list(p):
+    '''param_list : param_list COMMA param
+                  | param'''
+    if len(p) == 4:
+        p[0] = p[1] + [p[3]]
+    else:
+        p[0] = [p[1]]
+
+def p_param(p):
+    '''param : type ID'''
+    p[0] = (p[1], p[2])
+
+def p_method_body(p):
+    '''method_body : method_body decl_or_statement
+                   | empty'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = []
 
 def p_main_class(p):
     '''main_class : PUBLIC CLASS ID LBRACE PUBLIC STATIC VOID MAIN LPAREN STRING LBRACK RBRACK ID RPAREN LBRACE decl_or_statement_list RBRACE RBRACE'''
@@ -52,13 +118,8 @@ def p_decl_or_statement(p):
     p[0] = p[1]
 
 def p_var_decl(p):
-    '''var_decl : INT ID SEMICOLON
-                | BOOLEAN ID SEMICOLON'''
-    if p[1] == 'int':
-        vtype = IntType()
-    else:
-        vtype = BooleanType()
-    p[0] = VarDeclNode(vtype, p[2])
+    '''var_decl : type ID SEMICOLON'''
+    p[0] = VarDeclNode(p[1], p[2])
 
 def p_statement_list(p):
     '''statement_list : statement_list statement
@@ -76,6 +137,10 @@ def p_statement_assign(p):
     '''statement : ID ASSIGN expression SEMICOLON'''
     p[0] = AssignNode(p[1], p[3])
 
+def p_statement_array_assign(p):
+    '''statement : ID LBRACK expression RBRACK ASSIGN expression SEMICOLON'''
+    p[0] = ArrayAssignNode(p[1], p[3], p[6])
+
 def p_statement_print(p):
     '''statement : SYSTEM DOT OUT DOT PRINTLN LPAREN expression RPAREN SEMICOLON'''
     p[0] = PrintNode(p[7])
@@ -92,7 +157,10 @@ def p_expression_binop(p):
     '''expression : expression PLUS expression
                   | expression MINUS expression
                   | expression TIMES expression
-                  | expression LT expression'''
+                  | expression DIVIDE expression
+                  | expression MOD expression
+                  | expression LT expression
+                  | expression AND expression'''
     p[0] = BinaryOpNode(p[2], p[1], p[3])
 
 def p_expression_unary(p):
@@ -117,6 +185,47 @@ def p_expression_var(p):
     '''expression : ID'''
     p[0] = VarNode(p[1])
 
+def p_expression_array_access(p):
+    '''expression : ID LBRACK expression RBRACK'''
+    p[0] = ArrayAccessNode(p[1], p[3])
+
+def p_expression_length(p):
+    '''expression : expression DOT LENGTH'''
+    # Arrays are only reachable through variables (see ArrayLengthNode)
+    if not isinstance(p[1], VarNode):
+        print(f"Syntax error at '{p[3]}'")
+        raise SyntaxError
+    p[0] = ArrayLengthNode(p[1].name)
+
+def p_expression_call(p):
+    '''expression : expression DOT ID LPAREN args RPAREN'''
+    p[0] = MethodCallNode(p[1], p[3], p[5])
+
+def p_args(p):
+    '''args : arg_list
+            | empty'''
+    p[0] = p[1]
+
+def p_arg_list(p):
+    '''arg_list : arg_list COMMA expression
+                | expression'''
+    if len(p) == 4:
+        p[0] = p[1] + [p[3]]
+    else:
+        p[0] = [p[1]]
+
+def p_expression_this(p):
+    '''expression : THIS'''
+    p[0] = ThisNode()
+
+def p_expression_new(p):
+    '''expression : NEW ID LPAREN RPAREN'''
+    p[0] = NewObjectNode(p[2])
+
+def p_expression_new_array(p):
+    '''expression : NEW INT LBRACK expression RBRACK'''
+    p[0] = NewArrayNode(p[4])
+
 def p_empty(p):
     'empty :'
     p[0] = []
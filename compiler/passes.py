@@ -0,0 +1,274 @@
+# compiler/passes.py
+# Pass manager. A pass works on one IR level:
+#   'ast'  the checked AST of a program or unit, before lowering
+#   'tac'  the TAC of a whole program or unit (e.g. inlining)
+#   'ssa'  one function in SSA form (compiler.opt.ssa.Function)
+#   'asm'  the code of one X86StyleGenerator unit, before assembly
+# and rewrites it in place (a 'tac' pass returns the new TAC), returning the
+# number of changes it made. A pass lists the analyses it requires and the
+# ones its rewrite invalidates; the manager recomputes a required analysis
+# only when it is missing or stale. A run of consecutive 'ssa' passes is
+# applied per function between to_ssa and from_ssa.
+#
+# Optimization levels name pipelines (PIPELINES); -O is DEFAULT_LEVEL. Hooks
+# (PassHook) see every pass run with its time, IR size before and after and
+# change count. The 'asm' passes only apply to the 32-bit target, whose
+# generator keeps its code as instruction tuples.
+import time
+
+from compiler.codegen.cfg import split_functions
+
+
+class Pass:
+    def __init__(self, name, level, run, requires=(), invalidates=(), doc=''):
+        self.name = name
+        self.level = level
+        self.run = run                  # run(ir, analyses) -> changes (tac: (tac, changes))
+        self.requires = tuple(requires)
+        self.invalidates = tuple(invalidates)
+        self.doc = doc
+
+    def __repr__(self):
+        return f"<Pass {self.name} ({self.level})>"
+
+
+class Analysis:
+    def __init__(self, name, level, compute):
+        self.name = name
+        self.level = level
+        self.compute = compute          # compute(ir) -> result
+
+
+LEVELS = ('ast', 'tac', 'ssa', 'asm')
+PASSES = {}
+ANALYSES = {}
+
+
+def register(p):
+    # Make a Pass (or an Analysis) available to pipelines by name
+    table = ANALYSES if isinstance(p, Analysis) else PASSES
+    if p.level not in LEVELS:
+        raise ValueError(f"Unknown IR level '{p.level}'")
+    table[p.name] = p
+    return p
+
+
+# -----------------------
+# Built-in passes
+# -----------------------
+def _builtins():
+    from compiler.codegen.peephole import branch_over_jump, redundant_moves
+    from compiler.opt.bce import bce
+    from compiler.opt.copyprop import copyprop
+    from compiler.opt.inline import inline, inline_table
+    from compiler.opt.peval import peval
+    from compiler.opt.sccp import sccp
+    from compiler.opt.ssa import dominator_tree
+
+    def run_inline(tac, analyses):
+        out = inline(tac, analyses['inline_table'])
+        calls = sum(1 for instr in tac if instr and instr[0] == 'call')
+        return out, calls - sum(1 for instr in out if instr[0] == 'call')
+
+    register(Analysis('dominators', 'ssa', dominator_tree))
+    register(Analysis('inline_table', 'tac', lambda tac: inline_table(split_functions(tac))))
+    register(Pass('inline', 'tac', run_inline, requires=('inline_table',),
+                  invalidates=('inline_table',),
+                  doc="inline calls to small, non-recursive methods"))
+    register(Pass('peval', 'tac', lambda tac, _: peval(tac), invalidates=('inline_table',),
+                  doc="run the program at compile time within a step budget, keeping its output"))
+    register(Pass('sccp', 'ssa', lambda fn, _: sccp(fn), invalidates=('dominators',),
+                  doc="sparse conditional constant propagation, dead code removal"))
+    register(Pass('copyprop', 'ssa', lambda fn, _: copyprop(fn),
+                  doc="global copy propagation"))
+    register(Pass('bce', 'ssa', lambda fn, analyses: bce(fn, analyses['dominators']),
+                  requires=('dominators',),
+                  doc="bounds-check elimination"))
+    register(Pass('moves', 'asm', lambda code, _: redundant_moves(code),
+                  doc="drop a mov that copies a value straight back"))
+    register(Pass('branches', 'asm', lambda code, _: branch_over_jump(code),
+                  doc="invert a conditional jump over an unconditional one"))
+
+
+_builtins()
+
+PIPELINES = {
+    0: (),
+    1: ('sccp', 'copyprop', 'moves'),
+    2: ('inline', 'sccp', 'copyprop', 'bce', 'moves', 'branches'),
+    3: ('peval', 'inline', 'sccp', 'copyprop', 'bce', 'moves', 'branches'),
+}
+DEFAULT_LEVEL = 2
+
+
+def resolve(optimize):
+    # Pass names for an optimize setting: a bool (-O or not), a level, or
+    # the names of the passes themselves, as a list or a comma-separated
+    # string
+    if optimize is None or optimize is False:
+        return ()
+    if optimize is True:
+        return PIPELINES[DEFAULT_LEVEL]
+    if isinstance(optimize, int):
+        if optimize not in PIPELINES:
+            raise ValueError(f"Unknown optimization level {optimize}")
+        return PIPELINES[optimize]
+    if isinstance(optimize, str):
+        optimize = [name.strip() for name in optimize.split(',') if name.strip()]
+    names = tuple(optimize)
+    for name in names:
+        if name not in PASSES:
+            raise ValueError(f"Unknown pass '{name}'")
+    return names
+
+
+# -----------------------
+# IR sizes
+# -----------------------
+def ir_size(level, ir):
+    # Instructions (AST: nodes) in an IR value
+    if level == 'ast':
+        count, stack = 0, [ir]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            count += 1
+            stack.extend(getattr(node, 'children', None) or ())
+        return count
+    if level == 'tac':
+        return sum(1 for instr in ir if instr)
+    if level == 'ssa':
+        return sum(len(b.phis) + len(b.body) + (1 if b.term else 0) for b in ir.blocks)
+    return sum(1 for mnemonic, _ in ir if mnemonic is not None and not mnemonic.startswith(';'))
+
+
+# -----------------------
+# Hooks
+# -----------------------
+class PassHook:
+    # Observer of pass runs. record: {'pass', 'level', 'unit', 'before'} on
+    # entry, plus 'after', 'changes' and 'ms' on exit. Records of units built
+    # in worker processes reach after_pass later, without the IR (ir=None).
+    def before_pass(self, record, ir):
+        pass
+
+    def after_pass(self, record, ir):
+        pass
+
+
+class PassStats(PassHook):
+    # Totals per pass, in first-run order
+    def __init__(self):
+        self.totals = {}
+
+    def after_pass(self, record, ir):
+        t = self.totals.setdefault(record['pass'], {'runs': 0, 'ms': 0.0, 'before': 0,
+                                                     'after': 0, 'changes': 0})
+        t['runs'] += 1
+        for key in ('ms', 'before', 'after', 'changes'):
+            t[key] += record[key]
+
+    def format(self):
+        lines = [f"{'pass':<10} {'runs':>5} {'time ms':>9} {'size before':>11} "
+                 f"{'size after':>10} {'changes':>8}"]
+        for name, t in self.totals.items():
+            lines.append(f"{name:<10} {t['runs']:>5} {t['ms']:>9.2f} {t['before']:>11} "
+                         f"{t['after']:>10} {t['changes']:>8}")
+        return "\n".join(lines)
+
+
+class LoggingHook(PassHook):
+    # One log record per pass run, in the driver's 'compile' extra format
+    def __init__(self, logger, unit):
+        self.logger = logger
+        self.unit = unit
+
+    def after_pass(self, record, ir):
+        fields = dict(record, phase='pass', program=self.unit)
+        self.logger.info("%s pass %s on %s: %d changes in %.3f ms", self.unit, record['pass'],
+                         record['unit'], record['changes'], record['ms'],
+                         extra={'compile': fields})
+
+
+# -----------------------
+# Manager
+# -----------------------
+class PassManager:
+    def __init__(self, pipeline=(), hooks=()):
+        self.pipeline = [PASSES[name] for name in resolve(pipeline)]
+        self.hooks = list(hooks)
+        self.records = []
+
+    def passes(self, level):
+        return [p for p in self.pipeline if p.level == level]
+
+    def run_pass(self, p, ir, unit, analyses):
+        for name in p.requires:
+            if name not in analyses:
+                analyses[name] = ANALYSES[name].compute(ir)
+        record = {'pass': p.name, 'level': p.level, 'unit': unit,
+                  'before': ir_size(p.level, ir)}
+        for hook in self.hooks:
+            hook.before_pass(record, ir)
+        t0 = time.perf_counter()
+        if p.level == 'tac':
+            ir, changes = p.run(ir, analyses)
+        else:
+            changes = p.run(ir, analyses)
+        record.update(after=ir_size(p.level, ir), changes=changes,
+                      ms=round((time.perf_counter() - t0) * 1000, 3))
+        for name in p.invalidates:
+            analyses.pop(name, None)
+        self.records.append(record)
+        for hook in self.hooks:
+            hook.after_pass(record, ir)
+        return ir
+
+    def run_ast(self, ast, unit='program'):
+        analyses = {}
+        for p in self.passes('ast'):
+            ast = self.run_pass(p, ast, unit, analyses)
+        return ast
+
+    def run_tac(self, tac, inline_table=None):
+        # The 'tac' and 'ssa' passes of the pipeline over a program or unit.
+        # A unit compiled on its own gets the program's inline_table.
+        from compiler.opt.inline import function_label
+        from compiler.opt.ssa import from_ssa, immediate_dominators, to_ssa
+
+        passes = [p for p in self.pipeline if p.level in ('tac', 'ssa')]
+        analyses = {} if inline_table is None else {'inline_table': inline_table}
+        i = 0
+        while i < len(passes):
+            if passes[i].level == 'tac':
+                tac = self.run_pass(passes[i], tac, 'program', analyses)
+                i += 1
+                continue
+            j = i
+            while j < len(passes) and passes[j].level == 'ssa':
+                j += 1
+            out = []
+            for func in split_functions(tac):
+                fn = to_ssa(func)
+                # to_ssa built the dominator tree
+                local = {'dominators': immediate_dominators(fn)}
+                for p in passes[i:j]:
+                    self.run_pass(p, fn, function_label(func), local)
+                out.extend(from_ssa(fn))
+            tac = out
+            i = j
+        return tac
+
+    def run_asm(self, code, unit):
+        analyses = {}
+        for p in self.passes('asm'):
+            self.run_pass(p, code, unit, analyses)
+        return code
+
+    def replay(self, records):
+        # Records of passes run elsewhere (worker processes), to the hooks
+        self.records.extend(records)
+        for record in records:
+            for hook in self.hooks:
+                hook.after_pass(record, None)
@@ -0,0 +1,389 @@
+# compiler/rd_parser.py
+# Hand-written recursive-descent parser with Pratt-style expression parsing.
+# Builds exactly the same compiler.ast_nodes trees as the PLY grammar in
+# compiler/parser.py, but without the generic LR driver.
+from compiler.lexer import build_lexer
+from compiler.utils.errors import ParserError
+from compiler.ast_nodes.nodes import (
+    ProgramNode, MainClassNode, ClassDeclNode, VarDeclNode, MethodDeclNode, BlockNode,
+    AssignNode, ArrayAssignNode, PrintNode, IfNode, WhileNode,
+    IntLiteralNode, BoolLiteralNode, VarNode, BinaryOpNode, UnaryOpNode,
+    ArrayAccessNode, ArrayLengthNode, MethodCallNode, ThisNode, NewObjectNode, NewArrayNode,
+    IntType, BooleanType, ArrayType, ClassType
+)
+
+# Binary operator binding powers of the operators the lexer produces, as in
+# the PLY precedence table (higher binds tighter). All are left-associative.
+BINARY_PRECEDENCE = {
+    'AND': 20,
+    'LT': 40,
+    'PLUS': 50, 'MINUS': 50,
+    'TIMES': 60, 'DIVIDE': 60, 'MOD': 60,
+}
+
+# Prefix operators bind tighter than any binary operator
+UNARY_PRECEDENCE = 70
+
+
+class _EOF:
+    type = '$end'
+    value = None
+    lineno = None
+    lexpos = None
+
+
+class RDParser:
+    def __init__(self):
+        self.toks = []
+        self.types = ['$end']
+        self.pos = 0
+        # When set, main and method bodies are skipped (parse_skeleton)
+        self.skeleton = False
+
+    # -----------------------
+    # Token helpers
+    # -----------------------
+    def peek(self, offset=0):
+        i = self.pos + offset
+        if i < len(self.toks):
+            return self.toks[i]
+        return _EOF
+
+    def next(self):
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def at(self, *types):
+        return self.types[self.pos] in types
+
+    def expect(self, type_):
+        if self.types[self.pos] != type_:
+            self.error(self.peek(), f"expected {type_}")
+        tok = self.toks[self.pos]
+        self.pos += 1
+        return tok
+
+    def error(self, tok, detail=None):
+        if tok is _EOF:
+            msg = "Syntax error at EOF"
+        else:
+            msg = f"Syntax error at '{tok.value}' (line {tok.lineno})"
+        if detail:
+            msg += f": {detail}"
+        raise ParserError(msg)
+
+    # -----------------------
+    # Entry point
+    # -----------------------
+    def parse(self, source, lexer=None):
+        self.tokenize(source, lexer)
+        return self.parse_program()
+
+    def parse_skeleton(self, source, lexer=None):
+        # Program outline for method-granular builds (compiler/parallel.py):
+        # class names, fields and method signatures are parsed, while main and
+        # method bodies are only brace-matched. Their nodes have empty bodies
+        # and carry the source span to parse later with parse_fragment. The
+        # token list stays on the returned node (tokens) for fingerprinting.
+        self.tokenize(source, lexer)
+        self.skeleton = True
+        try:
+            program = self.parse_program()
+        finally:
+            self.skeleton = False
+        program.tokens = self.toks
+        return program
+
+    def parse_fragment(self, source, rule, lexer=None, lineno=1):
+        # One declaration on its own; rule is 'main_class' or 'method_decl'
+        self.tokenize(source, lexer, lineno)
+        node = getattr(self, 'parse_' + rule)()
+        if not self.at('$end'):
+            self.error(self.peek())
+        return node
+
+    def tokenize(self, source, lexer=None, lineno=1):
+        if lexer is None:
+            lexer = build_lexer()
+        lexer.lineno = lineno
+        lexer.input(source)
+        self.toks = list(lexer)
+        # Token types kept in a flat list (with an end sentinel) so lookahead
+        # is a single index operation
+        self.types = [t.type for t in self.toks] + ['$end']
+        self.pos = 0
+
+    def skip_braces(self):
+        # Past a balanced { ... } starting at the current token
+        types, i, depth = self.types, self.pos, 0
+        while True:
+            t = types[i]
+            if t == '$end':
+                self.pos = i
+                self.error(_EOF)
+            i += 1
+            if t == 'LBRACE':
+                depth += 1
+            elif t == 'RBRACE':
+                depth -= 1
+                if depth == 0:
+                    self.pos = i
+                    return
+
+    def set_span(self, node, first):
+        # Source span [start, end) from token index first to the last token consumed
+        start_tok, end_tok = self.toks[first], self.toks[self.pos - 1]
+        node.span = (start_tok.lexpos, end_tok.lexpos + len(str(end_tok.value)))
+        node.token_span = (first, self.pos)
+        node.lineno = start_tok.lineno
+        return node
+
+    # -----------------------
+    # Declarations
+    # -----------------------
+    def parse_program(self):
+        main = self.parse_main_class()
+        classes = []
+        while self.at('CLASS'):
+            classes.append(self.parse_class_decl())
+        if not self.at('$end'):
+            self.error(self.peek())
+        return ProgramNode(main, classes)
+
+    def parse_class_decl(self):
+        first = self.pos
+        self.expect('CLASS')
+        name = self.expect('ID').value
+        self.expect('LBRACE')
+        fields, methods = [], []
+        while not self.at('RBRACE'):
+            if self.at('PUBLIC'):
+                methods.append(self.parse_method_decl())
+            elif self.at('INT', 'BOOLEAN', 'ID'):
+                fields.append(self.parse_var_decl())
+            else:
+                self.error(self.peek())
+        self.expect('RBRACE')
+        return self.set_span(ClassDeclNode(name, fields, methods), first)
+
+    def parse_method_decl(self):
+        first = self.pos
+        self.expect('PUBLIC')
+        rtype = self.parse_type()
+        name = self.expect('ID').value
+        self.expect('LPAREN')
+        params = []
+        if not self.at('RPAREN'):
+            params.append(self.parse_param())
+            while self.at('COMMA'):
+                self.next()
+                params.append(self.parse_param())
+        self.expect('RPAREN')
+        if self.skeleton:
+            self.skip_braces()
+            return self.set_span(MethodDeclNode(name, rtype, params, [], None), first)
+        self.expect('LBRACE')
+        body = []
+        while not self.at('RETURN'):
+            body.append(self.parse_decl_or_statement())
+        self.expect('RETURN')
+        return_expr = self.parse_expression()
+        self.expect('SEMICOLON')
+        self.expect('RBRACE')
+        return self.set_span(MethodDeclNode(name, rtype, params, body, return_expr), first)
+
+    def parse_type(self):
+        tok = self.next()
+        if tok.type == 'INT':
+            if self.at('LBRACK'):
+                self.next()
+                self.expect('RBRACK')
+                return ArrayType()
+            return IntType()
+        if tok.type == 'BOOLEAN':
+            return BooleanType()
+        if tok.type == 'ID':
+            return ClassType(tok.value)
+        self.error(tok, "expected a type")
+
+    def parse_param(self):
+        ptype = self.parse_type()
+        return (ptype, self.expect('ID').value)
+
+    def parse_main_class(self):
+        first = self.pos
+        for t in ('PUBLIC', 'CLASS'):
+            self.expect(t)
+        class_name = self.expect('ID').value
+        for t in ('LBRACE', 'PUBLIC', 'STATIC', 'VOID', 'MAIN', 'LPAREN',
+                  'STRING', 'LBRACK', 'RBRACK'):
+            self.expect(t)
+        arg_name = self.expect('ID').value
+        self.expect('RPAREN')
+        if self.skeleton:
+            self.skip_braces()
+            self.expect('RBRACE')
+            return self.set_span(MainClassNode(class_name, arg_name, []), first)
+        self.expect('LBRACE')
+        body = [self.parse_decl_or_statement()]
+        while not self.at('RBRACE'):
+            body.append(self.parse_decl_or_statement())
+        self.expect('RBRACE')
+        self.expect('RBRACE')
+        return self.set_span(MainClassNode(class_name, arg_name, body), first)
+
+    def parse_decl_or_statement(self):
+        # 'ID ID' starts a declaration of a class-typed variable
+        if self.at('INT', 'BOOLEAN') or self.at('ID') and self.types[self.pos + 1] == 'ID':
+            return self.parse_var_decl()
+        return self.parse_statement()
+
+    def parse_var_decl(self):
+        vtype = self.parse_type()
+        name = self.expect('ID').value
+        self.expect('SEMICOLON')
+        return VarDeclNode(vtype, name)
+
+    # -----------------------
+    # Statements
+    # -----------------------
+    def parse_statement(self):
+        tok = self.peek()
+        if tok.type == 'LBRACE':
+            self.next()
+            stmts = [self.parse_statement()]
+            while not self.at('RBRACE'):
+                stmts.append(self.parse_statement())
+            self.expect('RBRACE')
+            return BlockNode(stmts)
+        if tok.type == 'ID':
+            name = self.next().value
+            if self.at('LBRACK'):
+                self.next()
+                index = self.parse_expression()
+                self.expect('RBRACK')
+                self.expect('ASSIGN')
+                expr = self.parse_expression()
+                self.expect('SEMICOLON')
+                return ArrayAssignNode(name, index, expr)
+            self.expect('ASSIGN')
+            expr = self.parse_expression()
+            self.expect('SEMICOLON')
+            return AssignNode(name, expr)
+        if tok.type == 'SYSTEM':
+            for t in ('SYSTEM', 'DOT', 'OUT', 'DOT', 'PRINTLN', 'LPAREN'):
+                self.expect(t)
+            expr = self.parse_expression()
+            self.expect('RPAREN')
+            self.expect('SEMICOLON')
+            return PrintNode(expr)
+        if tok.type == 'IF':
+            self.next()
+            self.expect('LPAREN')
+            cond = self.parse_expression()
+            self.expect('RPAREN')
+            then_stmt = self.parse_statement()
+            self.expect('ELSE')
+            else_stmt = self.parse_statement()
+            return IfNode(cond, then_stmt, else_stmt)
+        if tok.type == 'WHILE':
+            self.next()
+            self.expect('LPAREN')
+            cond = self.parse_expression()
+            self.expect('RPAREN')
+            body = self.parse_statement()
+            return WhileNode(cond, body)
+        self.error(tok)
+
+    # -----------------------
+    # Expressions (Pratt)
+    # -----------------------
+    def parse_expression(self, min_bp=0):
+        left = self.parse_postfix(self.parse_prefix())
+        while True:
+            bp = BINARY_PRECEDENCE.get(self.types[self.pos])
+            if bp is None or bp <= min_bp:
+                return left
+            tok = self.next()
+            right = self.parse_expression(bp)
+            left = BinaryOpNode(tok.value, left, right)
+
+    def parse_prefix(self):
+        tok = self.next()
+        if tok.type == 'NUMBER':
+            return IntLiteralNode(tok.value)
+        if tok.type in ('TRUE', 'FALSE'):
+            return BoolLiteralNode(tok.type == 'TRUE')
+        if tok.type == 'ID':
+            if self.at('LBRACK'):
+                self.next()
+                index = self.parse_expression()
+                self.expect('RBRACK')
+                return ArrayAccessNode(tok.value, index)
+            return VarNode(tok.value)
+        if tok.type == 'LPAREN':
+            expr = self.parse_expression()
+            self.expect('RPAREN')
+            return expr
+        if tok.type == 'NOT':
+            return UnaryOpNode(tok.value, self.parse_expression(UNARY_PRECEDENCE))
+        if tok.type == 'THIS':
+            return ThisNode()
+        if tok.type == 'NEW':
+            if self.at('INT'):
+                self.next()
+                self.expect('LBRACK')
+                size = self.parse_expression()
+                self.expect('RBRACK')
+                return NewArrayNode(size)
+            name = self.expect('ID').value
+            self.expect('LPAREN')
+            self.expect('RPAREN')
+            return NewObjectNode(name)
+        self.error(tok)
+
+    def parse_postfix(self, expr):
+        # Method calls and .length bind tighter than every operator:
+        # e.method(args)...
+        while self.at('DOT'):
+            self.next()
+            if self.at('LENGTH'):
+                tok = self.next()
+                # Arrays are only reachable through variables (see ArrayLengthNode)
+                if not isinstance(expr, VarNode):
+                    self.error(tok)
+                expr = ArrayLengthNode(expr.name)
+                continue
+            method = self.expect('ID').value
+            self.expect('LPAREN')
+            args = []
+            if not self.at('RPAREN'):
+                args.append(self.parse_expression())
+                while self.at('COMMA'):
+                    self.next()
+                    args.append(self.parse_expression())
+            self.expect('RPAREN')
+            expr = MethodCallNode(expr, method, args)
+        return expr
+
+
+def build_rd_parser():
+    # Same (parser, lexer) shape as compiler.parser.build_parser
+    return RDParser(), build_lexer()
+
+
+if __name__ == "__main__":
+    data = '''
+    public class Test3_Arith {
+        public static void main(String[] args) {
+            int a; int b; int c;
+            a = 2; b = 3;
+            c = a * a + b * b;
+            System.out.println(c);
+        }
+    }
+    '''
+    parser, lexer = build_rd_parser()
+    ast = parser.parse(data, lexer=lexer)
+    print(ast)
@@ -13,13 +13,33 @@ class SemanticAnalyzer:
         self.errors = []
         self.current_class = None
         self.current_method = None
+        # True while checking main, where there is no 'this'
+        self.static = False
+        # name -> slot of every local and parameter of the method being checked
+        self.slots = {}
         self.INT = IntType()
         self.BOOL = BooleanType()
 
     def error(self, msg):
-        self.errors.append(f"Error in class '{self.current_class}', method '{self.current_method}': {msg}")
+        class_name = self.current_class['name'] if self.current_class else None
+        method_name = self.current_method['name'] if self.current_method else None
+        self.errors.append(f"Error in class '{class_name}', method '{method_name}': {msg}")
 
     def analyze(self, program: ProgramNode):
+        if self.declare(program):
+            return self.errors
+
+        # Pass 3: Check method bodies and main statement
+        self.check_main(program.main)
+        for cls_node in program.classes:
+            for method_node in cls_node.method_decls:
+                self.check_method(cls_node.name, method_node)
+
+        return self.errors
+
+    def declare(self, program: ProgramNode):
+        # Passes 1-2 build the class table. After them every method body
+        # can be checked on its own (see compiler/parallel.py).
         # Pass 1: Register all class names first to allow forward references
         self._register_main(program.main)
         for cls in program.classes:
@@ -32,30 +52,49 @@ class SemanticAnalyzer:
             self.current_class = self.symtab.lookup_class(cls.name)
             self._process_class_members(cls)
             
-        if self.errors: return self.errors
-            
-        # Pass 3: Check method bodies and main statement
-        if isinstance(program.main, MainClassNode):
-            self.current_class = self.symtab.lookup_class(program.main.name)
-            self.current_method = self.current_class['methods']['main']
-            
-            # FIX: Properly check the main method's body like a regular method.
-            main_locals = {}
-            for var_decl in program.main.var_decls:
-                if var_decl.name in main_locals:
-                    self.error(f"Variable '{var_decl.name}' is already defined in main.")
-                else:
-                    main_locals[var_decl.name] = var_decl.type
-            
-            for stmt in program.main.statements:
-                self._check_statement(stmt, main_locals)
-                
-        for cls_node in program.classes:
-            self.current_class = self.symtab.lookup_class(cls_node.name)
-            for method_node in cls_node.method_decls:
-                self.current_method = self.current_class['methods'][method_node.name]
-                self._check_method_body(method_node)
+        return self.errors
 
+    def signatures(self):
+        # The class table without AST references, small enough to ship to
+        # worker processes
+        return {
+            name: {
+                'name': info['name'],
+                'fields': dict(info['fields']),
+                'methods': {m: {k: v for k, v in minfo.items() if k != 'node'}
+                            for m, minfo in info['methods'].items()},
+            }
+            for name, info in self.symtab.classes.items()
+        }
+
+    def check_main(self, main: MainClassNode):
+        if not isinstance(main, MainClassNode):
+            return self.errors
+        self.current_class = self.symtab.lookup_class(main.name)
+        self.current_method = self.current_class['methods']['main']
+        self.static = True
+        
+        # FIX: Properly check the main method's body like a regular method.
+        main_locals = {}
+        self.slots = {}
+        for var_decl in main.var_decls:
+            self._check_type(var_decl.type)
+            if var_decl.name in main_locals:
+                self.error(f"Variable '{var_decl.name}' is already defined in main.")
+            else:
+                main_locals[var_decl.name] = var_decl.type
+                self.slots[var_decl.name] = len(self.slots)
+        main.locals = list(self.slots)
+        
+        for stmt in main.statements:
+            self._check_statement(stmt, main_locals)
+        return self.errors
+
+    def check_method(self, class_name, method_node: MethodDeclNode):
+        self.current_class = self.symtab.lookup_class(class_name)
+        self.current_method = self.current_class['methods'][method_node.name]
+        self.static = False
+        self._check_method_body(method_node)
         return self.errors
 
     def _register_main(self, main: MainClassNode):
@@ -89,6 +128,7 @@ class SemanticAnalyzer:
         class_info = self.current_class
         # Fields
         for v in cls.var_decls:
+            self._check_type(v.type)
             if v.name in class_info['fields']:
                 self.error(f'Duplicate field {v.name}')
             else:
@@ -101,7 +141,9 @@ class SemanticAnalyzer:
             
             param_info = []
             param_names = set()
+            self._check_type(m.rtype)
             for p_type, p_name in m.params:
+                self._check_type(p_type)
                 if p_name in param_names:
                     self.error(f"Duplicate parameter name '{p_name}' in method '{m.name}'")
                 param_names.add(p_name)
@@ -117,16 +159,22 @@ class SemanticAnalyzer:
     # FIX: Added function to process method bodies correctly
     def _check_method_body(self, method_node: MethodDeclNode):
         local_vars = {}
+        # Slots: 'this', the parameters in order, then the locals
+        self.slots = {'this': 0}
         # Add parameters to local scope
         for p_type, p_name in method_node.params:
             local_vars[p_name] = p_type
+            self.slots.setdefault(p_name, len(self.slots))
             
         # Add local declarations to scope, checking for duplicates
         for var_decl in method_node.var_decls:
+            self._check_type(var_decl.type)
             if var_decl.name in local_vars:
                 self.error(f"Variable '{var_decl.name}' is already defined in this scope.")
             else:
                 local_vars[var_decl.name] = var_decl.type
+                self.slots[var_decl.name] = len(self.slots)
+        method_node.locals = list(self.slots)
 
         # Check all statements in the method
         for stmt in method_node.statements:
@@ -137,6 +185,23 @@ class SemanticAnalyzer:
         if not self._types_compatible(method_node.rtype, return_expr_type):
             self.error(f"Return type mismatch. Expected {method_node.rtype} but got {return_expr_type}")
     
+    def _check_type(self, t):
+        if isinstance(t, ClassType) and not self.symtab.lookup_class(t.name):
+            self.error(f"Unknown type '{t.name}'")
+
+    def _field_slot(self, name, local_vars):
+        # Slot of the field of 'this' a name refers to, or None for locals
+        if name in local_vars or not self.current_class:
+            return None
+        fields = list(self.current_class['fields'])
+        return fields.index(name) if name in fields else None
+
+    def _resolve(self, node, local_vars):
+        # Where the variable a name node refers to lives: node.slot for a
+        # local or parameter, node.field for a field of 'this'
+        node.field = self._field_slot(node.name, local_vars)
+        node.slot = self.slots.get(node.name) if node.name in local_vars else None
+
     def _lookup_variable_type(self, name, local_vars):
         # Look in local scope first
         if name in local_vars:
@@ -171,6 +236,7 @@ class SemanticAnalyzer:
         elif isinstance(stmt, AssignNode):
             expr_type = self._check_expression(stmt.expr, local_vars)
             var_type = self._lookup_variable_type(stmt.name, local_vars)
+            self._resolve(stmt, local_vars)
             if var_type is None:
                 self.error(f'Undeclared variable {stmt.name} for assignment')
             elif not self._types_compatible(var_type, expr_type):
@@ -178,6 +244,7 @@ class SemanticAnalyzer:
         elif isinstance(stmt, ArrayAssignNode):
             # FIX: Correctly check array assignment types
             var_type = self._lookup_variable_type(stmt.name, local_vars)
+            self._resolve(stmt, local_vars)
             if var_type is None:
                 self.error(f'Undeclared array {stmt.name}')
             elif not isinstance(var_type, ArrayType):
@@ -202,12 +269,29 @@ class SemanticAnalyzer:
             if var_type is None:
                 self.error(f'Undeclared variable {expr.name}')
                 return None
+            self._resolve(expr, local_vars)
             return var_type
+        if isinstance(expr, ThisNode):
+            if self.static:
+                self.error("'this' cannot be used in main")
+                return None
+            return ClassType(self.current_class['name'])
+        if isinstance(expr, NewObjectNode):
+            class_info = self.symtab.lookup_class(expr.class_name)
+            if not class_info:
+                self.error(f"Class '{expr.class_name}' not found.")
+                return None
+            expr.size = len(class_info['fields'])
+            return ClassType(expr.class_name)
+        if isinstance(expr, NewArrayNode):
+            if not self._is_int_type(self._check_expression(expr.size, local_vars)):
+                self.error('Array size must be int')
+            return ArrayType()
         if isinstance(expr, BinaryOpNode):
             left_t = self._check_expression(expr.left, local_vars)
             right_t = self._check_expression(expr.right, local_vars)
             op = expr.op
-            if op in ['+', '-', '*', '/']:
+            if op in ['+', '-', '*', '/', '%']:
                 if self._is_int_type(left_t) and self._is_int_type(right_t): return self.INT
                 self.error(f'Arithmetic operator "{op}" requires int operands')
             elif op == '<':
@@ -228,6 +312,7 @@ class SemanticAnalyzer:
             if not isinstance(arr_t, ArrayType):
                 self.error(f'{expr.name} is not an array')
                 return None
+            self._resolve(expr, local_vars)
             idx_t = self._check_expression(expr.index, local_vars)
             if not self._is_int_type(idx_t):
                 self.error('Array index must be int')
@@ -236,12 +321,13 @@ class SemanticAnalyzer:
             arr_t = self._lookup_variable_type(expr.name, local_vars)
             if not isinstance(arr_t, ArrayType):
                 self.error(f'{expr.name} is not an array for length')
+            self._resolve(expr, local_vars)
             return self.INT
         if isinstance(expr, MethodCallNode):
             # FIX: Correctly check method calls based on object type
             obj_type = self._check_expression(expr.obj, local_vars)
             if not isinstance(obj_type, ClassType):
-                self.error(f"Variable '{expr.obj.name}' is not a class instance.")
+                self.error(f"'{expr.obj.name}' is not a class instance.")
                 return None
             
             class_info = self.symtab.lookup_class(obj_type.name)
@@ -250,9 +336,10 @@ class SemanticAnalyzer:
                 return None
             
             method_info = class_info['methods'].get(expr.method)
-            if not method_info:
+            if not method_info or method_info['rtype'] == 'void':
                 self.error(f"Method '{expr.method}' not found in class '{class_info['name']}'.")
                 return None
+            expr.class_name = class_info['name']
             
             # Check arity
             expected_args = len(method_info['params'])
@@ -281,4 +368,4 @@ class SemanticAnalyzer:
         # Allow assigning subclass to superclass (not implemented here, but this is where it would go)
         if isinstance(dest_t, ClassType) and isinstance(src_t, ClassType):
              return dest_t.name == src_t.name
-        return type(dest_t) == type(src_t)
\ No newline at end of file
+        return type(dest_t) == type(src_t)
\ No newline at end of file
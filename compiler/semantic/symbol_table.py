@@ -2,6 +2,7 @@ class SymbolTable:
     def __init__(self, parent=None):
         self.symbols = {}      # for variables, methods etc.
         self.classes = {}      # top-level classes only
+        self.used_classes = set()  # every class name looked up (hit or miss)
         self.parent = parent
 
     # Insert symbol (variable, method, etc.)
@@ -27,6 +28,7 @@ class SymbolTable:
 
     # Lookup class info
     def lookup_class(self, class_name):
+        self.used_classes.add(class_name)
         return self.classes.get(class_name, None)
 
     def __repr__(self):
@@ -0,0 +1,315 @@
+# compiler/server.py
+# Long-running compile server. Keeps the lexer, parser tables and analyzers
+# warm in a pool of worker processes and accepts compile requests as JSON
+# lines, either on a local Unix socket or on stdin/stdout.
+#
+# Request (one JSON object per line):
+#   {"id": 1, "path": "Foo.java"}                      compile a file
+#   {"id": 2, "source": "...", "name": "Foo"}          compile source text
+#   optional: "parser": "ply" | "rd"                   (default ply; incremental builds
+#                                                      take only rd, the default there)
+#             "target": "x86" | "x86_64"
+#             "runtime": "buffered" | "printf"         (println on the x86 target)
+#             "emit": ["tokens", "ast", "tac", "asm"]  (default: tac, asm)
+#             "output_dir": "out/"  write artifacts there and return paths
+#             "incremental": true      reuse unchanged methods from the
+#                                      previous build of the program (all
+#                                      builds of one program go to one worker)
+#             "optimize": true         run the optimizer (-O); or a level 0-3,
+#                                      or pass names as a list or "a,b"
+#             "pass_stats": true       return one record per pass run
+#                                      under "passes" (compiler/passes.py)
+#   {"id": 3, "op": "ping"} / {"op": "shutdown"}
+#
+# Response (one JSON object per line, in completion order):
+#   {"id": 1, "ok": true, "diagnostics": [...], "artifacts": {"asm": {"content": "..."}}}
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_EMIT = ('tac', 'asm')
+ARTIFACT_SUFFIX = {
+    'tokens': '_tokens.txt',
+    'ast': '_ast.txt',
+    'tac': '_tac.txt',
+    'asm': '.asm',
+}
+
+# UnitCache per program for incremental requests, per worker, least
+# recently used first; at most UNIT_CACHE_ENTRIES programs are kept
+_UNIT_CACHES = collections.OrderedDict()
+UNIT_CACHE_ENTRIES = 32
+
+
+def program_key(req):
+    # The program a request builds, as incremental builds know it
+    return req.get('path') or req.get('name') or 'Main'
+
+
+def unit_cache(key):
+    # This worker's UnitCache for a program, evicting the least recently
+    # used one past UNIT_CACHE_ENTRIES
+    from compiler.incremental import UnitCache
+
+    cache = _UNIT_CACHES.pop(key, None) or UnitCache()
+    _UNIT_CACHES[key] = cache
+    while len(_UNIT_CACHES) > UNIT_CACHE_ENTRIES:
+        _UNIT_CACHES.popitem(last=False)
+    return cache
+
+
+def _init_worker():
+    # Build parser tables once per worker process
+    from compiler.driver import PARSER_BACKENDS, get_parser
+    for backend in PARSER_BACKENDS:
+        get_parser(backend)
+
+
+def _diag(phase, message, severity='error'):
+    from compiler.driver import diagnostic
+    return diagnostic(phase, message, severity)
+
+
+def _dump_ast(node, depth=0, out=None):
+    out = [] if out is None else out
+    out.append("  " * depth + f"{getattr(node, 'name', '?')}  ({node.__class__.__name__})")
+    for c in getattr(node, 'children', None) or []:
+        if c is not None:
+            _dump_ast(c, depth + 1, out)
+    return out
+
+
+def compile_request(req):
+    # Runs inside a worker process. Never raises: failures become diagnostics.
+    from compiler.driver import PARSER_BACKENDS, RUNTIMES, TARGETS, compile_source
+    from compiler.passes import resolve
+
+    resp = {'id': req.get('id'), 'ok': False, 'diagnostics': [], 'artifacts': {}}
+    emit = req.get('emit') or DEFAULT_EMIT
+    artifacts = {}
+    path = req.get('path')
+    name = req.get('name') or (os.path.splitext(os.path.basename(path))[0] if path else 'Main')
+    result = None
+
+    try:
+        source = req.get('source')
+        if source is None:
+            if not path or not os.path.isfile(path):
+                resp['diagnostics'].append(_diag('input', f"File '{path}' does not exist."))
+                return resp
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+
+        # Incremental builds parse method by method, with rd only
+        backend = req.get('parser', 'rd' if req.get('incremental') else 'ply')
+        if backend not in PARSER_BACKENDS:
+            resp['diagnostics'].append(_diag('input', f"Unknown parser backend '{backend}'"))
+            return resp
+        if req.get('incremental') and backend != 'rd':
+            resp['diagnostics'].append(_diag('input', "Incremental builds need parser 'rd'"))
+            return resp
+
+        target = req.get('target', 'x86')
+        if target not in TARGETS:
+            resp['diagnostics'].append(_diag('input', f"Unknown target '{target}'"))
+            return resp
+
+        runtime = req.get('runtime', 'buffered')
+        if runtime not in RUNTIMES:
+            resp['diagnostics'].append(_diag('input', f"Unknown print runtime '{runtime}'"))
+            return resp
+
+        try:
+            optimize = resolve(req.get('optimize'))
+        except (TypeError, ValueError) as e:
+            resp['diagnostics'].append(_diag('input', str(e)))
+            return resp
+
+        cache = unit_cache(program_key(req)) if req.get('incremental') else None
+        result = compile_source(source, name=name, parser=backend, target=target, runtime=runtime,
+                                unit_cache=cache, optimize=optimize)
+        if 'tokens' in emit:
+            artifacts['tokens'] = result.tokens_text()
+        if 'ast' in emit and result.ast is not None:
+            artifacts['ast'] = "\n".join(_dump_ast(result.ast))
+        if 'tac' in emit and result.tac is not None:
+            artifacts['tac'] = result.tac_text()
+        if 'asm' in emit and result.asm is not None:
+            artifacts['asm'] = result.asm
+        resp['ok'] = result.ok
+        if req.get('pass_stats'):
+            resp['passes'] = result.pass_records
+    except Exception as e:
+        resp['diagnostics'].append(_diag('internal', f"{e.__class__.__name__}: {e}"))
+    finally:
+        if result is not None:
+            resp['diagnostics'][:0] = result.diagnostics
+        resp['artifacts'] = _store_artifacts(artifacts, req, name)
+    return resp
+
+
+def _store_artifacts(artifacts, req, name):
+    output_dir = req.get('output_dir')
+    if not output_dir:
+        return {k: {'content': v} for k, v in artifacts.items()}
+    os.makedirs(output_dir, exist_ok=True)
+    out = {}
+    for kind, text in artifacts.items():
+        path = os.path.join(output_dir, name + ARTIFACT_SUFFIX[kind])
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        out[kind] = {'path': path}
+    return out
+
+
+class CompileServer:
+    # One single-process pool per worker, so a request can be sent to a
+    # given worker: incremental builds of a program always go to the worker
+    # that holds its UnitCache, other requests to the least busy one
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pools = []
+        self.busy = []
+        self.stopped = None
+
+    def start(self):
+        # 'spawn' rather than fork: the stdio reader thread may be blocked
+        # inside stdin when a worker starts, and a forked child would inherit
+        # that lock and deadlock closing its copy of stdin
+        context = multiprocessing.get_context('spawn')
+        self.pools = [ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                          initializer=_init_worker)
+                      for _ in range(self.workers)]
+        self.busy = [0] * self.workers
+        self.stopped = asyncio.Event()
+
+    def close(self):
+        for pool in self.pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self.pools = []
+
+    def worker_for(self, req):
+        # Index of the worker a compile request goes to
+        if req.get('incremental'):
+            return zlib.crc32(program_key(req).encode('utf-8')) % self.workers
+        return min(range(self.workers), key=self.busy.__getitem__)
+
+    async def handle_line(self, line):
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError('request must be a JSON object')
+        except ValueError as e:
+            return {'id': None, 'ok': False, 'diagnostics': [_diag('protocol', str(e))], 'artifacts': {}}
+        op = req.get('op', 'compile')
+        if op == 'ping':
+            return {'id': req.get('id'), 'ok': True, 'workers': self.workers}
+        if op == 'shutdown':
+            self.stopped.set()
+            return {'id': req.get('id'), 'ok': True}
+        if op != 'compile':
+            return {'id': req.get('id'), 'ok': False,
+                    'diagnostics': [_diag('protocol', f"Unknown op '{op}'")], 'artifacts': {}}
+        loop = asyncio.get_running_loop()
+        i = self.worker_for(req)
+        self.busy[i] += 1
+        try:
+            return await loop.run_in_executor(self.pools[i], compile_request, req)
+        finally:
+            self.busy[i] -= 1
+
+    async def serve_stream(self, reader, writer):
+        # Requests on one stream run concurrently; each response is written as
+        # soon as it is ready, so clients match them up by "id".
+        lock = asyncio.Lock()
+        pending = set()
+
+        async def run(line):
+            resp = await self.handle_line(line)
+            async with lock:
+                writer.write((json.dumps(resp) + "\n").encode('utf-8'))
+                await writer.drain()
+
+        while not self.stopped.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.ensure_future(run(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def serve_unix(self, socket_path):
+        self.start()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        async def on_client(reader, writer):
+            try:
+                await self.serve_stream(reader, writer)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(on_client, path=socket_path)
+        try:
+            async with server:
+                await self.stopped.wait()
+        finally:
+            self.close()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    async def serve_stdio(self):
+        self.start()
+        try:
+            await self.serve_stream(_StdinReader(), _StdoutWriter())
+        finally:
+            self.close()
+
+
+class _StdinReader:
+    # stdin may be a pipe, a tty or a plain file; read it from a thread so
+    # all three work the same way
+    async def readline(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+
+class _StdoutWriter:
+    def write(self, data):
+        sys.stdout.buffer.write(data)
+
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
+
+def serve(socket_path=None, workers=None):
+    server = CompileServer(workers)
+    if socket_path:
+        asyncio.run(server.serve_unix(socket_path))
+    else:
+        asyncio.run(server.serve_stdio())
+
+
+def request(socket_path, payloads):
+    # Minimal blocking client: send requests, return responses keyed by id
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socket_path)
+        f = s.makefile('rwb')
+        for p in payloads:
+            f.write((json.dumps(p) + "\n").encode('utf-8'))
+        f.flush()
+        out = {}
+        for _ in payloads:
+            resp = json.loads(f.readline())
+            out[resp.get('id')] = resp
+        return out
@@ -0,0 +1,68 @@
+public class Test10_Divide {
+    public static void main(String[] args) {
+        int a;
+        int b;
+        int min;
+        int i;
+        int n;
+        Num m;
+        // Truncation toward zero; the remainder has the dividend's sign
+        a = 0 - 17;
+        b = 5;
+        System.out.println(a / b);
+        System.out.println(a % b);
+        System.out.println(17 / (0 - b));
+        System.out.println(17 % (0 - b));
+        // Constant divisors: powers of two, their negations and others
+        System.out.println(a / 4 + a / 2 + a / (0 - 8));
+        System.out.println(a % 4 + a % 16);
+        System.out.println(a / 7 + a / 3 + a / (0 - 10));
+        System.out.println(a % 7 + a % (0 - 3) + 100 % 9);
+        // The 32-bit corner: MIN_INT / -1 wraps, MIN_INT % -1 is 0
+        min = 0 - 2147483647 - 1;
+        b = 0 - 1;
+        System.out.println(min / b);
+        System.out.println(min % b);
+        System.out.println(min / 3);
+        System.out.println(min / 1024);
+        System.out.println(min % 1000);
+        // In a loop: digit sum and digit count of 1234567 and -9081
+        m = new Num();
+        System.out.println(m.digits(1234567));
+        System.out.println(m.digits(0 - 9081));
+        System.out.println(m.gcd(1071, 462));
+        n = 0;
+        i = 0 - 50;
+        while (i < 50) {
+            n = n + i / 6 + i % 6 + i / 32 + i % 32;
+            i = i + 7;
+        }
+        System.out.println(n);
+    }
+}
+
+class Num {
+    int count;
+
+    public int digits(int x) {
+        int sum;
+        sum = 0;
+        count = 0;
+        while (!(x < 1 && 0 - 1 < x)) {
+            sum = sum + x % 10;
+            x = x / 10;
+            count = count + 1;
+        }
+        return sum * 100 + count;
+    }
+
+    public int gcd(int a, int b) {
+        int t;
+        while (0 < b) {
+            t = a % b;
+            a = b;
+            b = t;
+        }
+        return a;
+    }
+}
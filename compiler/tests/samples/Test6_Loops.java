@@ -0,0 +1,18 @@
+public class Test6_Loops {
+    public static void main(String[] args) {
+        int i;
+        int j;
+        int sum;
+        sum = 0;
+        i = 0;
+        while (i < 100) {
+            j = 0;
+            while (j < 50) {
+                sum = sum + i * j;
+                j = j + 1;
+            }
+            i = i + 1;
+        }
+        System.out.println(sum);
+    }
+}
@@ -0,0 +1,57 @@
+public class Test7_Methods {
+    public static void main(String[] args) {
+        Counter c;
+        Fib f;
+        int i;
+        int total;
+        c = new Counter();
+        f = new Fib();
+        total = c.start(10);
+        i = 0;
+        while (i < 20) {
+            total = total + c.step(i, 3);
+            i = i + 1;
+        }
+        System.out.println(total);
+        System.out.println(c.get());
+        System.out.println(f.fib(15));
+        System.out.println(f.weighted(1, 2, 3, 4));
+    }
+}
+
+class Counter {
+    int count;
+    int last;
+
+    public int start(int n) {
+        count = n;
+        last = 0;
+        return count;
+    }
+
+    public int step(int k, int scale) {
+        count = count + 1;
+        last = k * scale;
+        return last + this.get();
+    }
+
+    public int get() {
+        return count;
+    }
+}
+
+class Fib {
+    public int fib(int n) {
+        int r;
+        if (n < 2) {
+            r = n;
+        } else {
+            r = this.fib(n - 1) + this.fib(n - 2);
+        }
+        return r;
+    }
+
+    public int weighted(int a, int b, int c, int d) {
+        return a * 1000 + b * 100 + c * 10 + d;
+    }
+}
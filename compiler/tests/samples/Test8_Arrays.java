@@ -0,0 +1,69 @@
+public class Test8_Arrays {
+    public static void main(String[] args) {
+        int[] a;
+        int i;
+        int s;
+        Sorter t;
+        a = new int[10];
+        i = 0;
+        while (i < a.length) {
+            a[i] = (i * 7 + 3) * (10 - i);
+            i = i + 1;
+        }
+        s = 0;
+        i = 0;
+        while (i < a.length) {
+            s = s + a[i];
+            i = i + 1;
+        }
+        System.out.println(s);
+        t = new Sorter();
+        System.out.println(t.sort(a));
+        i = 0;
+        while (i < a.length) {
+            System.out.println(a[i]);
+            i = i + 2;
+        }
+        System.out.println(t.reversed(a, new int[a.length]));
+    }
+}
+
+class Sorter {
+    int[] last;
+
+    public int sort(int[] b) {
+        int i;
+        int j;
+        int x;
+        int swaps;
+        swaps = 0;
+        i = 1;
+        while (i < b.length) {
+            j = i;
+            while (0 < j) {
+                if (b[j] < b[j - 1]) {
+                    x = b[j];
+                    b[j] = b[j - 1];
+                    b[j - 1] = x;
+                    swaps = swaps + 1;
+                    j = j - 1;
+                } else {
+                    j = 0;
+                }
+            }
+            i = i + 1;
+        }
+        last = b;
+        return swaps;
+    }
+
+    public int reversed(int[] b, int[] dst) {
+        int i;
+        i = 0;
+        while (i < b.length) {
+            dst[dst.length - 1 - i] = b[i];
+            i = i + 1;
+        }
+        return dst[0] - last[0] + dst.length;
+    }
+}
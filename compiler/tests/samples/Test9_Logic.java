@@ -0,0 +1,85 @@
+public class Test9_Logic {
+    public static void main(String[] args) {
+        int[] a;
+        int i;
+        int n;
+        boolean found;
+        boolean odd;
+        Probe p;
+        a = new int[6];
+        i = 0;
+        while (i < a.length) {
+            a[i] = i * i - 3 * i;
+            i = i + 1;
+        }
+        // The bounds check of a[i] only runs while i < a.length
+        i = 0;
+        while (i < a.length && a[i] < 4) {
+            i = i + 1;
+        }
+        System.out.println(i);
+        n = 0;
+        i = 0;
+        while (i < a.length) {
+            if (0 < a[i] && !(a[i] < 4)) {
+                n = n + a[i];
+            } else {
+                n = n - 1;
+            }
+            i = i + 1;
+        }
+        System.out.println(n);
+        p = new Probe();
+        found = false;
+        odd = true;
+        i = 0;
+        while (!found && i < 10) {
+            // p.hit counts its calls: it must not run once found is set
+            found = i < 5 && !(i < 3) && p.hit(i);
+            odd = !odd;
+            i = i + 1;
+        }
+        System.out.println(i);
+        System.out.println(p.calls());
+        if (odd && !found) {
+            System.out.println(1);
+        } else {
+            System.out.println(0);
+        }
+        found = found && odd;
+        if (!found) {
+            System.out.println(p.both(3, 4) + p.both(4, 3));
+        } else {
+            System.out.println(99);
+        }
+    }
+}
+
+class Probe {
+    int count;
+
+    public boolean hit(int x) {
+        count = count + 1;
+        return 3 < x;
+    }
+
+    public int calls() {
+        return count;
+    }
+
+    public int both(int x, int y) {
+        boolean b;
+        b = x < y && !(y < x);
+        return 1 - (1 - x) * (1 - y) + this.flag(b);
+    }
+
+    public int flag(boolean b) {
+        int r;
+        if (b) {
+            r = 10;
+        } else {
+            r = 20;
+        }
+        return r;
+    }
+}
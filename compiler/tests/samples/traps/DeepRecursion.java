@@ -0,0 +1,18 @@
+public class DeepRecursion {
+    public static void main(String[] args) {
+        System.out.println(10);
+        System.out.println(3);
+        System.out.println(new Counter().down(10000000));
+    }
+}
+
+class Counter {
+    public int down(int n) {
+        int r;
+        if (n < 1)
+            r = 0;
+        else
+            r = 1 + this.down(n - 1);
+        return r;
+    }
+}
@@ -0,0 +1,14 @@
+public class HeapFull {
+    public static void main(String[] args) {
+        int[] a;
+        int i;
+        System.out.println(10);
+        System.out.println(3);
+        i = 0;
+        while (i < 100) {
+            a = new int[100000];
+            i = i + 1;
+        }
+        System.out.println(1);
+    }
+}
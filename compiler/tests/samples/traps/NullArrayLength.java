@@ -0,0 +1,29 @@
+public class NullArrayLength {
+    public static void main(String[] args) {
+        Holder h;
+        h = new Holder();
+        System.out.println(h.init(3));
+        System.out.println(h.size());
+        System.out.println(h.first());
+        System.out.println(1);
+    }
+}
+
+class Holder {
+    int[] a;
+    int[] b;
+
+    public int init(int n) {
+        a = new int[n];
+        a[0] = 7;
+        return a[0] + a.length;
+    }
+
+    public int size() {
+        return a.length;
+    }
+
+    public int first() {
+        return b.length;
+    }
+}
@@ -0,0 +1,77 @@
+# compiler/tests/test_arrays.py
+# An int[] that was never assigned is null: reading its length or one of its
+# elements ends the program with exit status 1 after the output so far, on
+# the TAC interpreter and on both native targets alike, as does running out
+# of heap, with either print runtime.
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from compiler.driver import RUNTIMES, compile_source
+from compiler.codegen import jit
+from compiler.codegen.tac_interp import run_tac
+from compiler.utils.errors import ExecutionError
+
+TRAPS_DIR = os.path.join(os.path.dirname(__file__), 'samples', 'traps')
+TRAP_SAMPLES = ('NullArrayIndex', 'NullArrayLength', 'HeapFull')
+# What the samples print before the trap
+PRINTED = "10\n3\n"
+LEVELS = (0, 1, 2, 3)
+
+
+def sample(name):
+    with open(os.path.join(TRAPS_DIR, name + '.java'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class TrapTest(unittest.TestCase):
+    def test_interpreter_traps(self):
+        for name in TRAP_SAMPLES:
+            tac = compile_source(sample(name), name=name).tac
+            with self.subTest(name=name):
+                with self.assertRaises(ExecutionError) as cm:
+                    run_tac(tac)
+                self.assertEqual(cm.exception.stdout, PRINTED)
+
+    def test_cli_run_tac_reports_trap(self):
+        from main import compile_file
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in TRAP_SAMPLES:
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    status = compile_file(os.path.join(TRAPS_DIR, name + '.java'),
+                                          output_dir=tmp, tree_format='none', run_tac=True)
+                with self.subTest(name=name):
+                    self.assertEqual(status, 1)
+                    self.assertIn(PRINTED + "Runtime error: ", out.getvalue())
+                    self.assertNotIn("Unexpected compiler error", out.getvalue())
+
+    @unittest.skipUnless(jit.supported(), "in-process execution needs Linux on x86-64")
+    def test_x86_64_traps(self):
+        for name in TRAP_SAMPLES:
+            for level in LEVELS:
+                result = compile_source(sample(name), name=name, target='x86_64', optimize=level)
+                with self.subTest(name=name, level=level):
+                    self.assertEqual(result.run(), (PRINTED, 1))
+
+    @unittest.skipUnless(shutil.which('nasm') and shutil.which('gcc'), "needs nasm and gcc")
+    def test_x86_traps(self):
+        from benchmarks.run_native import build
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in TRAP_SAMPLES:
+                for level in LEVELS:
+                    for runtime in RUNTIMES:
+                        result = compile_source(sample(name), name=name, optimize=level,
+                                                runtime=runtime)
+                        exe = build(result.asm, tmp, f"{name}{level}{runtime}", target='x86')
+                        proc = subprocess.run([exe], capture_output=True, text=True)
+                        with self.subTest(name=name, level=level, runtime=runtime):
+                            self.assertEqual((proc.stdout, proc.returncode), (PRINTED, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# compiler/tests/test_calls.py
+# Method calls print the same at every level and on every route: -O2 and
+# -O3 inline small non-recursive methods (-O2 keeps the calls to recursive
+# ones), arguments past the registers of each convention go on the stack,
+# and native code agrees with the TAC interpreter.
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from compiler.driver import RUNTIMES, compile_source
+from compiler.codegen import jit
+from compiler.codegen.tac_interp import run_tac
+from compiler.incremental import UnitCache
+from benchmarks.corpus import call_programs
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), 'samples')
+LEVELS = (0, 1, 2, 3)
+# Seven arguments: past ecx/edx on x86 and past the six registers on x86-64,
+# with calls nested in argument lists
+MANY_ARGS = """\
+public class Many {
+    public static void main(String[] args) {
+        Sum s;
+        s = new Sum();
+        System.out.println(s.seven(1, 2, 3, 4, 5, 6, 7));
+        System.out.println(s.seven(s.two(1, 2), 2, s.two(3, 4), 4, 5, s.two(5, 6), 7));
+        System.out.println(s.down(5));
+    }
+}
+
+class Sum {
+    public int seven(int a, int b, int c, int d, int e, int f, int g) {
+        return a * 1000000 + b * 100000 + c * 10000 + d * 1000 + e * 100 + f * 10 + g;
+    }
+
+    public int two(int a, int b) {
+        return a - b;
+    }
+
+    public int down(int n) {
+        int r;
+        if (n < 1) {
+            r = 0;
+        } else {
+            r = n + this.down(n - 1);
+        }
+        return r;
+    }
+}
+"""
+MANY_ARGS_OUTPUT = "1234567\n-805503\n15\n"
+
+
+def methods_sample():
+    with open(os.path.join(SAMPLES_DIR, 'Test7_Methods.java'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+PROGRAMS = [('Test7_Methods', methods_sample()), ('Many', MANY_ARGS)] + call_programs(3)
+
+
+def called(tac):
+    return {instr[1] for instr in tac if instr[0] == 'call'}
+
+
+class CallTest(unittest.TestCase):
+    def test_levels_agree(self):
+        for name, src in PROGRAMS:
+            expected = run_tac(compile_source(src, name=name).tac).stdout
+            for level in LEVELS:
+                for parser in ('ply', 'rd'):
+                    tac = compile_source(src, name=name, parser=parser, optimize=level).tac
+                    with self.subTest(name=name, level=level, parser=parser):
+                        self.assertEqual(run_tac(tac).stdout, expected)
+        self.assertEqual(run_tac(compile_source(MANY_ARGS, name='Many').tac).stdout,
+                         MANY_ARGS_OUTPUT)
+
+    def test_per_method_build(self):
+        for name, src in PROGRAMS:
+            expected = run_tac(compile_source(src, name=name).tac).stdout
+            for level in (0, 2):
+                result = compile_source(src, name=name, parser='rd', optimize=level,
+                                        unit_cache=UnitCache())
+                with self.subTest(name=name, level=level):
+                    self.assertEqual(run_tac(result.tac).stdout, expected)
+
+    def test_small_methods_are_inlined(self):
+        self.assertEqual(called(compile_source(MANY_ARGS, name='Many').tac),
+                         {'Sum.seven', 'Sum.two', 'Sum.down'})
+        # down calls itself, so it stays a call; -O3 then evaluates it away
+        tac = compile_source(MANY_ARGS, name='Many', optimize=2).tac
+        self.assertEqual(called(tac), {'Sum.down'})
+        self.assertEqual(called(compile_source(MANY_ARGS, name='Many', optimize=3).tac), set())
+
+    @unittest.skipUnless(jit.supported(), "in-process execution needs Linux on x86-64")
+    def test_x86_64_output(self):
+        for name, src in PROGRAMS:
+            expected = run_tac(compile_source(src, name=name).tac).stdout
+            for level in LEVELS:
+                result = compile_source(src, name=name, target='x86_64', optimize=level)
+                with self.subTest(name=name, level=level):
+                    self.assertEqual(result.run(), (expected, 0))
+
+    @unittest.skipUnless(shutil.which('nasm') and shutil.which('gcc'), "needs nasm and gcc")
+    def test_x86_output(self):
+        from benchmarks.run_native import build
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, src in PROGRAMS:
+                expected = run_tac(compile_source(src, name=name).tac).stdout
+                for level in LEVELS:
+                    for runtime in RUNTIMES:
+                        result = compile_source(src, name=name, optimize=level, runtime=runtime)
+                        exe = build(result.asm, tmp, f"{name}{level}{runtime}", target='x86')
+                        proc = subprocess.run([exe], capture_output=True, text=True)
+                        with self.subTest(name=name, level=level, runtime=runtime):
+                            self.assertEqual((proc.stdout, proc.returncode), (expected, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# compiler/tests/test_driver.py
+# compile_source runs each phase on first access: ok looks only as far as
+# the semantic checks, and errors surface as diagnostics of their phase.
+# Per-method builds (jobs, unit_cache) need the recursive-descent parser.
+import unittest
+from unittest import mock
+
+from compiler.driver import PARSER_BACKENDS, compile_source
+from compiler.incremental import UnitCache
+
+SOURCE = """\
+public class Hello {
+    public static void main(String[] args) {
+        System.out.println(new A().f(6));
+    }
+}
+
+class A {
+    public int f(int x) {
+        return x * 7;
+    }
+}
+"""
+SYNTAX_ERROR = SOURCE.replace('x * 7;', 'x * ;')
+SEMANTIC_ERROR = SOURCE.replace('x * 7', 'y * 7')
+
+
+class OkTest(unittest.TestCase):
+    def test_ok_does_not_build_tac(self):
+        # -O0 on x86 goes straight from the AST to assembly
+        with mock.patch('compiler.codegen.intermediate.IRGenerator.visit',
+                        side_effect=AssertionError("TAC built")):
+            result = compile_source(SOURCE, name='Hello')
+            self.assertTrue(result.ok)
+            self.assertIn('call A.f', result.asm)
+        self.assertEqual(result.diagnostics, [])
+
+    def test_errors(self):
+        for parser in PARSER_BACKENDS:
+            for src, phase in ((SYNTAX_ERROR, 'parse'), (SEMANTIC_ERROR, 'semantic')):
+                result = compile_source(src, name='Hello', parser=parser)
+                with self.subTest(parser=parser, phase=phase):
+                    self.assertFalse(result.ok)
+                    self.assertEqual({d['phase'] for d in result.diagnostics}, {phase})
+                    self.assertIsNone(result.tac)
+                    self.assertIsNone(result.asm)
+
+    def test_per_method_build(self):
+        for options in ({'jobs': 2}, {'unit_cache': UnitCache()}):
+            with self.subTest(**options):
+                self.assertTrue(compile_source(SOURCE, name='Hello', parser='rd', **options).ok)
+                result = compile_source(SEMANTIC_ERROR, name='Hello', parser='rd', **options)
+                self.assertFalse(result.ok)
+                self.assertEqual({d['phase'] for d in result.diagnostics}, {'semantic'})
+
+
+class OptionsTest(unittest.TestCase):
+    def test_per_method_build_needs_rd(self):
+        for options in ({'jobs': 2}, {'jobs': None}, {'unit_cache': UnitCache()}):
+            with self.subTest(**options):
+                with self.assertRaisesRegex(ValueError, "parser 'rd'"):
+                    compile_source(SOURCE, name='Hello', parser='ply', **options)
+
+    def test_unknown_options(self):
+        for options in ({'parser': 'lalr'}, {'target': 'arm'}, {'runtime': 'puts'}):
+            with self.subTest(**options):
+                with self.assertRaisesRegex(ValueError, "Unknown"):
+                    compile_source(SOURCE, name='Hello', **options)
+
+    def test_cli_jobs_implies_rd(self):
+        from main import parse_args
+        self.assertEqual(parse_args(['-j', '2', 'A.java']).parser, 'rd')
+        self.assertEqual(parse_args(['A.java']).parser, 'ply')
+        with mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+            parse_args(['-j', '2', '--parser=ply', 'A.java'])
+
+
+if __name__ == '__main__':
+    unittest.main()
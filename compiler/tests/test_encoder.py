@@ -0,0 +1,151 @@
+# compiler/tests/test_encoder.py
+# The in-process encoder: known encodings, branches that grow from rel8 to
+# rel32 only when they have to, 32-bit objects that objdump decodes back to
+# the instructions the encoder listed, and objects that link and print what
+# the TAC interpreter prints with either print runtime. Both back ends hand it (mnemonic, operands)
+# code, and each runtime is parsed once at import.
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from compiler.driver import RUNTIMES, compile_source, get_backend
+from compiler.codegen import jit, x86
+from compiler.codegen.encoder import REL, assemble
+from compiler.codegen.tac_interp import run_tac
+from benchmarks.corpus import array_programs, call_programs, sample_programs
+
+# The samples that compile (two of them show syntax errors)
+PROGRAMS = [(name, src) for name, src in sample_programs() + call_programs(2) + array_programs(2)
+            if compile_source(src, name=name).code_units is not None]
+ROUTES = ({'optimize': 0}, {'optimize': 0, 'direct': False}, {'optimize': 2})
+# Entry point for linking without libc: exit(main())
+START = """\
+.intel_syntax noprefix
+.globl _start
+_start:
+  call main
+  mov ebx, eax
+  mov eax, 1
+  int 0x80
+"""
+
+
+def links_32bit():
+    # gcc can build a 32-bit executable (needs the multilib runtime)
+    if shutil.which('gcc') is None:
+        return False
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'empty.c')
+        with open(src, 'w') as f:
+            f.write("int main(void) { return 0; }\n")
+        return subprocess.run(['gcc', '-m32', '-o', os.path.join(tmp, 'empty'), src],
+                              capture_output=True).returncode == 0
+
+
+class EncodingTest(unittest.TestCase):
+    def test_known_encodings(self):
+        code = [('mov', ('eax', '1')), ('add', ('esp', '4')), ('push', ('ebp',)),
+                ('mov', ('dword [ebp-4]', 'eax')), ('ret', ())]
+        self.assertEqual(assemble(code)['text'].hex(' '),
+                         "b8 01 00 00 00 83 c4 04 55 89 45 fc c3")
+        code = [('mov', ('rbp', 'rsp')), ('mov', ('r11d', 'eax')), ('lea', ('rdi', '[rel fmt_int]'))]
+        text = assemble(code, bits=64)
+        self.assertEqual(text['text'].hex(' '), "48 89 e5 41 89 c3 48 8d 3d fc ff ff ff")
+        self.assertEqual(text['relocs'], [(9, 'fmt_int', REL)])
+
+    def test_branches_grow_only_out_of_reach(self):
+        body = [('nop', ())] * 200
+        code = ([('jmp', ('near',)), ('jmp', ('far',)), (None, ('near',))] + body
+                + [(None, ('far',)), ('call', ('printf',)), ('; comment', ())])
+        text = assemble(code)
+        self.assertEqual(text['text'][:2], b'\xeb\x05')
+        self.assertEqual(text['text'][2:7], b'\xe9' + (200).to_bytes(4, 'little'))
+        self.assertEqual(text['labels'], {'near': 7, 'far': 207})
+        self.assertEqual(text['relocs'], [(208, 'printf', REL)])
+        self.assertEqual([entry[0] for entry in text['listing']][:3], [0, 2, 7])
+        self.assertEqual(len(text['listing']), len(body) + 3)
+
+    def test_duplicate_label(self):
+        with self.assertRaises(ValueError):
+            assemble([(None, ('L',)), ('nop', ()), (None, ('L',))])
+
+
+class CodeListTest(unittest.TestCase):
+    def test_sections_reuse_the_parsed_runtime(self):
+        name, src = PROGRAMS[0]
+        units = compile_source(src, name=name, runtime='buffered').code_units
+        text = get_backend('x86', 'buffered').sections(units)['text']
+        start = sum(len(unit['code']) for unit in units)
+        runtime = text[start:start + len(x86.RUNTIME_CODE)]
+        self.assertTrue(all(a is b for a, b in zip(runtime, x86.RUNTIME_CODE)))
+        self.assertEqual(len(runtime), len(x86.RUNTIME_CODE))
+
+    def test_x86_64_units_are_code_lists(self):
+        for name, src in PROGRAMS:
+            units = compile_source(src, name=name, target='x86_64').code_units
+            text = get_backend('x86_64', 'printf').sections(units)['text']
+            with self.subTest(name=name):
+                for mnemonic, operands in text:
+                    self.assertIsInstance(operands, tuple)
+                self.assertEqual(text[:len(units[0]['code'])], units[0]['code'])
+
+
+class ObjectTest(unittest.TestCase):
+    @unittest.skipUnless(shutil.which('objdump'), "needs objdump")
+    def test_listing_matches_objdump(self):
+        from benchmarks.check_encoder import check
+        with tempfile.TemporaryDirectory() as tmp:
+            for runtime in RUNTIMES:
+                backend = get_backend('x86', runtime)
+                for options in ROUTES:
+                    for name, src in PROGRAMS:
+                        units = compile_source(src, name=name, runtime=runtime,
+                                               **options).code_units
+                        with self.subTest(name=name, runtime=runtime, **options):
+                            self.assertEqual(check(units, backend, tmp), [])
+
+    @unittest.skipUnless(links_32bit(), "needs gcc with 32-bit support")
+    def test_objects_run(self):
+        from benchmarks.run_native import build
+        with tempfile.TemporaryDirectory() as tmp:
+            for runtime in RUNTIMES:
+                for options in ROUTES:
+                    for name, src in PROGRAMS:
+                        result = compile_source(src, name=name, runtime=runtime, **options)
+                        exe = build(None, tmp, name, target='x86', obj=result.obj)
+                        proc = subprocess.run([exe], capture_output=True, text=True, timeout=30)
+                        with self.subTest(name=name, runtime=runtime, **options):
+                            self.assertEqual(proc.stdout, run_tac(result.tac).stdout)
+
+    @unittest.skipUnless(shutil.which('as') and shutil.which('ld') and jit.supported(),
+                         "needs binutils on Linux x86-64")
+    def test_buffered_objects_run_without_libc(self):
+        # The buffered runtime makes its own system calls: a _start that
+        # exits with main's status is all it needs from the linker
+        with tempfile.TemporaryDirectory() as tmp:
+            start = os.path.join(tmp, 'start.o')
+            subprocess.run(['as', '--32', '-o', start], input=START, text=True, check=True)
+            for options in ROUTES:
+                for name, src in PROGRAMS:
+                    result = compile_source(src, name=name, runtime='buffered', **options)
+                    obj, exe = os.path.join(tmp, name + '.o'), os.path.join(tmp, name)
+                    with open(obj, 'wb') as f:
+                        f.write(result.obj)
+                    subprocess.run(['ld', '-m', 'elf_i386', '-o', exe, obj, start], check=True)
+                    proc = subprocess.run([exe], capture_output=True, text=True, timeout=30)
+                    with self.subTest(name=name, **options):
+                        self.assertEqual((proc.stdout, proc.returncode),
+                                         (run_tac(result.tac).stdout, 0))
+
+    @unittest.skipUnless(jit.supported(), "in-process execution needs Linux on x86-64")
+    def test_jit_matches_interpreter(self):
+        for name, src in PROGRAMS:
+            result = compile_source(src, name=name, target='x86_64', optimize=2)
+            with self.subTest(name=name):
+                self.assertEqual(result.run(), (run_tac(result.tac).stdout, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# compiler/tests/test_eval_order.py
+# Operands evaluated in Sethi-Ullman order (IRGenerator and DirectGenerator
+# reorder_operands) must not change what a program prints: the same output
+# as left-to-right evaluation, on the TAC interpreter and natively, with
+# calls whose effects the other operand sees still made first.
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from compiler.driver import compile_source
+from compiler.codegen import jit
+from compiler.codegen.direct import DirectGenerator
+from compiler.codegen.intermediate import IRGenerator
+from compiler.codegen.tac_interp import run_tac
+from compiler.codegen.x86 import X86StyleGenerator
+from compiler.opt import optimize
+from benchmarks.corpus import expression_programs, sample_programs
+
+# bump() changes the field the other operand reads, so evaluating the
+# operands right to left would print something else
+EFFECTS = """\
+public class Order {
+    public static void main(String[] args) {
+        System.out.println(new Counter().run());
+    }
+}
+
+class Counter {
+    int f;
+
+    public int bump() {
+        f = f + 10;
+        return f;
+    }
+
+    public int run() {
+        int x;
+        f = 1;
+        x = this.bump() + f * (f + f * 2);
+        System.out.println(x);
+        x = f * (f + f * 2) - this.bump();
+        System.out.println(x);
+        return f;
+    }
+}
+"""
+EFFECTS_OUTPUT = "374\n342\n21\n"
+
+
+def programs():
+    # Deep expressions and the samples that compile (some are parse tests)
+    return expression_programs(4) + [(name, src) for name, src in sample_programs()
+                                     if compile_source(src, name=name, parser='rd').tac]
+
+
+def checked(name, src, **kwargs):
+    result = compile_source(src, name=name, parser='rd', **kwargs)
+    assert result.tac is not None, result.diagnostics
+    return result
+
+
+class EvalOrderTest(unittest.TestCase):
+    def test_same_output_as_left_to_right(self):
+        for name, src in programs():
+            ast = checked(name, src).ast
+            expected = run_tac(IRGenerator(reorder_operands=False).visit(ast)).stdout
+            tac = IRGenerator().visit(ast)
+            for level in (0, 2):
+                with self.subTest(name=name, level=level):
+                    code = optimize(tac, pipeline=level) if level else tac
+                    self.assertEqual(run_tac(code).stdout, expected)
+
+    def test_effects_stay_in_order(self):
+        for level in (0, 2):
+            result = checked('Order', EFFECTS, optimize=level, direct=False)
+            with self.subTest(level=level):
+                self.assertEqual(run_tac(result.tac).stdout, EFFECTS_OUTPUT)
+
+    def test_deep_expressions_need_fewer_registers(self):
+        for name, src in expression_programs(4):
+            ast = checked(name, src).ast
+            spilled = {}
+            for reorder in (False, True):
+                gen = X86StyleGenerator()
+                units = gen.generate_units(IRGenerator(reorder_operands=reorder).visit(ast))
+                spilled[reorder] = sum(len(unit['spilled']) for unit in units)
+            with self.subTest(name=name):
+                self.assertLess(spilled[True], spilled[False])
+
+    def test_direct_route_pushes_less(self):
+        for name, src in expression_programs(4):
+            ast = checked(name, src).ast
+            pushes = {}
+            for reorder in (False, True):
+                units = DirectGenerator(reorder_operands=reorder).generate_units(ast)
+                pushes[reorder] = sum(1 for unit in units for m, _ in unit['code'] if m == 'push')
+            with self.subTest(name=name):
+                self.assertLess(pushes[True], pushes[False])
+
+    @unittest.skipUnless(jit.supported(), "in-process execution needs Linux on x86-64")
+    def test_x86_64_output(self):
+        for name, src in programs() + [('Order', EFFECTS)]:
+            for level in (0, 2):
+                result = checked(name, src, target='x86_64', optimize=level)
+                with self.subTest(name=name, level=level):
+                    self.assertEqual(result.run(), (run_tac(result.tac).stdout, 0))
+
+    @unittest.skipUnless(shutil.which('nasm') and shutil.which('gcc'), "needs nasm and gcc")
+    def test_x86_output(self):
+        from benchmarks.run_native import build
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, src in programs() + [('Order', EFFECTS)]:
+                expected = run_tac(checked(name, src).tac).stdout
+                # -O0 straight from the AST, -O0 through TAC, -O2
+                for k, kwargs in enumerate(({}, {'direct': False}, {'optimize': 2})):
+                    result = checked(name, src, **kwargs)
+                    exe = build(result.asm, tmp, f"{name}{k}", target='x86')
+                    proc = subprocess.run([exe], capture_output=True, text=True)
+                    with self.subTest(name=name, route=kwargs):
+                        self.assertEqual((proc.stdout, proc.returncode), (expected, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# compiler/tests/test_incremental.py
+# A rebuild through a warm UnitCache must reuse every unit whose tokens and
+# class table dependencies are unchanged, rebuild the others, and give the
+# same TAC and asm as a full build of the edited program.
+import unittest
+
+from compiler.incremental import UnitCache
+from compiler.parallel import compile_parallel
+from compiler.passes import resolve
+from benchmarks.corpus import multi_class_programs
+
+NAME, SOURCE = multi_class_programs(1, 3, 3, 10)[0]
+UNITS = ['main'] + [f"C{c}.m{m}" for c in range(3) for m in range(3)]
+
+
+def edited_body(src):
+    # A change to the body of the last method
+    head, _, tail = src.rpartition('return ')
+    return head + 'return 1 + ' + tail
+
+
+class IncrementalTest(unittest.TestCase):
+    def rebuild(self, edited, optimize=()):
+        cache = UnitCache()
+        first = cache.compile(SOURCE, optimize=optimize)
+        self.assertEqual(first['compiled'], UNITS)
+        built = cache.compile(edited, optimize=optimize)
+        full = compile_parallel(edited, workers=1, optimize=optimize)
+        self.assertEqual((built['tac'], built['asm']), (full['tac'], full['asm']))
+        return built
+
+    def test_unchanged_rebuild_reuses_every_unit(self):
+        for level in (0, 2):
+            with self.subTest(level=level):
+                built = self.rebuild(SOURCE, resolve(level))
+                self.assertEqual((built['compiled'], built['reused']), ([], UNITS))
+
+    def test_comment_reuses_every_unit(self):
+        built = self.rebuild(SOURCE.replace('class C0 {', '// edited\nclass C0 {', 1))
+        self.assertEqual(built['compiled'], [])
+
+    def test_method_body_rebuilds_that_unit(self):
+        for level in (0, 2):
+            with self.subTest(level=level):
+                built = self.rebuild(edited_body(SOURCE), resolve(level))
+                self.assertEqual(built['compiled'], ['C2.m2'])
+
+    def test_field_rebuilds_its_class(self):
+        built = self.rebuild(SOURCE.replace('class C1 {', 'class C1 {\n    int extra;', 1))
+        self.assertEqual(built['compiled'], ['C1.m0', 'C1.m1', 'C1.m2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# compiler/tests/test_jit.py
+# Programs run in process on x86-64 (compiler.codegen.jit) print what the
+# TAC interpreter prints. A run that recurses too deep or never ends stops
+# with an ExecutionError carrying its output so far, and the compiler
+# process carries on.
+import unittest
+
+from compiler.driver import compile_source
+from compiler.codegen import jit
+from compiler.codegen.tac_interp import run_tac
+from compiler.utils.errors import ExecutionError
+from benchmarks.corpus import call_programs, sample_programs
+from compiler.tests.test_arrays import PRINTED, sample
+
+LOOP = """\
+public class Loop {
+    public static void main(String[] args) {
+        int i;
+        i = 0;
+        while (0 < 1) {
+            i = i + 1;
+        }
+    }
+}
+"""
+
+
+@unittest.skipUnless(jit.supported(), "in-process execution needs Linux on x86-64")
+class JitTest(unittest.TestCase):
+    def test_same_output_as_interpreter(self):
+        for name, src in sample_programs() + call_programs(4):
+            for level in (0, 2):
+                result = compile_source(src, name=name, parser='rd', target='x86_64',
+                                        optimize=level)
+                if result.tac is None:
+                    continue
+                with self.subTest(name=name, level=level):
+                    self.assertEqual(result.run(), (run_tac(result.tac).stdout, 0))
+
+    def test_stack_overflow(self):
+        for level in (0, 2):
+            result = compile_source(sample('DeepRecursion'), name='DeepRecursion',
+                                    target='x86_64', optimize=level)
+            with self.subTest(level=level):
+                with self.assertRaisesRegex(ExecutionError, "Stack overflow") as cm:
+                    result.run()
+                self.assertEqual(cm.exception.stdout, PRINTED)
+
+    def test_time_limit(self):
+        result = compile_source(LOOP, name='Loop', target='x86_64')
+        with self.assertRaisesRegex(ExecutionError, "Time limit"):
+            result.run(timeout=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
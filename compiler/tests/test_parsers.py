@@ -0,0 +1,43 @@
+# compiler/tests/test_parsers.py
+# The PLY and recursive-descent parsers build the same AST for every sample
+# and corpus program, so everything after parsing is identical too, and
+# both reject the samples with syntax errors.
+import unittest
+
+from compiler.driver import compile_source
+from benchmarks.bench_parse import ast_key
+from benchmarks.corpus import array_programs, call_programs, corpus, division_programs
+
+PROGRAMS = (corpus(4, 60) + call_programs(3) + array_programs(3) + division_programs(3)
+            + division_programs(3, constant=False))
+# Samples that stop at a syntax error
+SYNTAX_ERRORS = ('Test4_Boolean', 'Test5_Blocks')
+
+
+class ParserTest(unittest.TestCase):
+    def test_same_ast(self):
+        for name, src in PROGRAMS:
+            ply = compile_source(src, name=name, parser='ply')
+            rd = compile_source(src, name=name, parser='rd')
+            with self.subTest(name=name):
+                if name in SYNTAX_ERRORS:
+                    self.assertIsNone(ply.ast)
+                    self.assertIsNone(rd.ast)
+                    continue
+                self.assertIsNotNone(rd.ast)
+                self.assertEqual(ast_key(ply.ast), ast_key(rd.ast))
+                self.assertEqual(ply.asm, rd.asm)
+
+    def test_syntax_errors(self):
+        for name, src in PROGRAMS:
+            if name not in SYNTAX_ERRORS:
+                continue
+            for parser in ('ply', 'rd'):
+                result = compile_source(src, name=name, parser=parser)
+                with self.subTest(name=name, parser=parser):
+                    self.assertFalse(result.ok)
+                    self.assertEqual([d['phase'] for d in result.diagnostics], ['parse'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# compiler/tests/test_passes.py
+# Optimize settings resolve to pass lists, and the pass manager hands each
+# pass the analyses it requires, recomputing one after a pass invalidates it.
+import unittest
+
+from compiler import passes
+from compiler.driver import compile_source
+from compiler.passes import PIPELINES, PassManager, resolve
+from compiler.opt.ssa import dominator_tree
+from benchmarks.corpus import array_programs
+
+
+class ResolveTest(unittest.TestCase):
+    def test_levels(self):
+        self.assertEqual(resolve(False), ())
+        self.assertEqual(resolve(True), PIPELINES[passes.DEFAULT_LEVEL])
+        for level, names in PIPELINES.items():
+            self.assertEqual(resolve(level), names)
+
+    def test_pass_names(self):
+        self.assertEqual(resolve(['sccp', 'bce']), ('sccp', 'bce'))
+        self.assertEqual(resolve('sccp, bce'), ('sccp', 'bce'))
+
+    def test_unknown(self):
+        for optimize in ('fast', 'O2', ['sccp', 'fast'], 7):
+            with self.subTest(optimize=optimize):
+                with self.assertRaisesRegex(ValueError, "Unknown"):
+                    resolve(optimize)
+
+
+class AnalysesTest(unittest.TestCase):
+    def setUp(self):
+        self.trees = []
+        analysis = passes.ANALYSES['dominators']
+        compute = analysis.compute
+
+        def counted(fn):
+            self.trees.append(fn)
+            return compute(fn)
+        analysis.compute = counted
+        self.addCleanup(setattr, analysis, 'compute', compute)
+
+        bce = passes.PASSES['bce']
+        run = bce.run
+
+        def checked(fn, analyses):
+            # bce must see the tree of the CFG it rewrites
+            self.assertEqual(analyses['dominators'], dominator_tree(fn))
+            return run(fn, analyses)
+        bce.run = checked
+        self.addCleanup(setattr, bce, 'run', run)
+
+    def tac(self):
+        name, src = array_programs(1)[0]
+        return compile_source(src, name=name, parser='rd').tac
+
+    def test_recomputed_after_invalidation(self):
+        PassManager(['sccp', 'bce']).run_tac(self.tac())
+        self.assertTrue(self.trees)
+
+    def test_reused_while_valid(self):
+        PassManager(['copyprop', 'bce']).run_tac(self.tac())
+        self.assertEqual(self.trees, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# compiler/tests/test_server.py
+# The compile server over stdin/stdout: ping, compile and shutdown requests
+# get one JSON response each, matched up by id. Incremental builds of one
+# program always reach the same worker, and each worker keeps a bounded
+# number of unit caches.
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from compiler import server
+from compiler.driver import compile_source
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+SOURCE = """\
+public class Hello {
+    public static void main(String[] args) {
+        System.out.println(6 * 7);
+    }
+}
+"""
+
+
+def serve(requests, workers=2):
+    # {id: response} of a server run over stdio on requests
+    proc = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--serve',
+                           '--workers', str(workers)],
+                          input="".join(json.dumps(r) + "\n" for r in requests),
+                          capture_output=True, text=True, timeout=120)
+    responses = [json.loads(line) for line in proc.stdout.splitlines()]
+    return {r['id']: r for r in responses}
+
+
+class StdioTest(unittest.TestCase):
+    def test_round_trip(self):
+        resps = serve([
+            {'id': 'ping', 'op': 'ping'},
+            {'id': 'ok', 'source': SOURCE, 'name': 'Hello', 'parser': 'rd'},
+            {'id': 'inc1', 'source': SOURCE, 'name': 'Hello', 'incremental': True},
+            {'id': 'inc2', 'source': SOURCE, 'name': 'Hello', 'incremental': True},
+            {'id': 'inc_ply', 'source': SOURCE, 'name': 'Hello', 'incremental': True,
+             'parser': 'ply'},
+            {'id': 'bad', 'source': SOURCE.replace('6 * 7', 'x'), 'name': 'Hello'},
+            {'id': 'level', 'source': SOURCE, 'name': 'Hello', 'optimize': 'fast'},
+            {'id': 'bye', 'op': 'shutdown'},
+        ])
+        self.assertEqual(set(resps), {'ping', 'ok', 'inc1', 'inc2', 'inc_ply', 'bad', 'level',
+                                      'bye'})
+        self.assertEqual(resps['ping']['workers'], 2)
+        self.assertTrue(resps['ok']['ok'])
+        self.assertEqual(resps['ok']['artifacts']['asm'],
+                         {'content': compile_source(SOURCE, name='Hello', parser='rd').asm})
+        # Incremental builds take the per-method route
+        self.assertTrue(resps['inc1']['ok'] and resps['inc2']['ok'])
+        self.assertEqual(resps['inc1']['artifacts'], resps['inc2']['artifacts'])
+        self.assertEqual([d['message'] for d in resps['inc_ply']['diagnostics']],
+                         ["Incremental builds need parser 'rd'"])
+        self.assertFalse(resps['bad']['ok'])
+        self.assertTrue(any(d['phase'] == 'semantic' for d in resps['bad']['diagnostics']))
+        self.assertEqual([d['message'] for d in resps['level']['diagnostics']],
+                         ["Unknown pass 'fast'"])
+
+
+class WorkerTest(unittest.TestCase):
+    def test_incremental_requests_stay_on_one_worker(self):
+        srv = server.CompileServer(workers=4)
+        srv.busy = [0, 0, 0, 0]
+        for key in ('A.java', 'B.java', 'C.java'):
+            req = {'path': key, 'incremental': True}
+            first = srv.worker_for(req)
+            srv.busy[first] += 3
+            with self.subTest(key=key):
+                self.assertEqual(srv.worker_for(dict(req, id=2)), first)
+
+    def test_other_requests_go_to_the_least_busy_worker(self):
+        srv = server.CompileServer(workers=3)
+        srv.busy = [2, 0, 1]
+        self.assertEqual(srv.worker_for({'path': 'A.java'}), 1)
+
+    def test_unit_caches_are_bounded(self):
+        with mock.patch.object(server, '_UNIT_CACHES', server.collections.OrderedDict()), \
+                mock.patch.object(server, 'UNIT_CACHE_ENTRIES', 3):
+            first = server.unit_cache('P0')
+            for i in range(1, 4):
+                server.unit_cache(f"P{i}")
+                # P0 stays the most recently used one
+                self.assertIs(server.unit_cache('P0'), first)
+            server.unit_cache('P4')
+            self.assertEqual(list(server._UNIT_CACHES), ['P3', 'P0', 'P4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
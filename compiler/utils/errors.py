@@ -12,5 +12,9 @@ class ParserError(CompilerError):
 class SemanticError(CompilerError):
     pass
 
+class ExecutionError(CompilerError):
+    # stdout: what the program printed before it stopped
+    stdout = ''
+
 def error_message(e):
     return f"[{e.__class__.__name__}] {str(e)}"
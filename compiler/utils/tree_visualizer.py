@@ -1,66 +1,112 @@
 # compiler/utils/tree_visualizer.py
+# Parse tree rendering through Graphviz. The drawing stays bounded for large
+# programs: subtrees below max_depth or past the max_nodes budget are drawn
+# as one summary node, a subtree of min_repeat or more nodes that repeats one
+# already drawn points back to it, and shard=True writes the program outline,
+# main and every method to files of their own.
+from collections import deque
 from graphviz import Digraph
 import os
 
-def visualize_parse_tree(root, filename="output/parse_tree"):
-    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+FORMATS = ('png', 'svg', 'dot')
+
+
+def label_of(n):
+    return str(getattr(n, 'name', n.__class__.__name__))
+
+
+def children_of(n):
+    return [c for c in getattr(n, 'children', None) or [] if c is not None]
 
+
+def measure(root):
+    # (size, shape) keyed by id(node): subtree node count and an interned id
+    # of the subtree's structure. Iterative, so deep trees are fine.
+    size, shape, shapes = {}, {}, {}
+    order, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(children_of(node))
+    # Children come after their parent in order, so reversed order is bottom-up
+    for node in reversed(order):
+        kids = [id(c) for c in children_of(node)]
+        key = (label_of(node), tuple([shape[k] for k in kids]))
+        shape[id(node)] = shapes.setdefault(key, len(shapes))
+        size[id(node)] = 1 + sum([size[k] for k in kids])
+    return size, shape
+
+
+def build_graph(root, max_depth=None, max_nodes=2000, min_repeat=8, measured=None,
+                collapse=()):
+    # Breadth-first, so the node budget is spent on the top of the tree; at
+    # most max_nodes nodes are drawn. Nodes whose id is in collapse are
+    # always summarized.
+    size, shape = measured or measure(root)
     dot = Digraph(comment="Parse Tree", node_attr={'shape': 'box', 'fontname': 'Courier'})
-    seen = set()
-
-    def label_of(n):
-        if n is None:
-            return "None"
-        return getattr(n, 'name', n.__class__.__name__)
-
-    def uid(obj):
-        return str(id(obj))
-
-    def add(node):
-        nid = uid(node)
-        if nid in seen:
-            return
-        seen.add(nid)
-        dot.node(nid, label_of(node))
-
-        # preferred children attribute
-        children = getattr(node, 'children', None)
-        if children is not None:
-            for c in children:
-                if c is None:
-                    continue
-                cid = uid(c)
-                dot.node(cid, label_of(c))
-                dot.edge(nid, cid)
-                add(c)
-            return
-
-        # fallback: inspect attributes that may hold AST nodes or lists
-        for attr in dir(node):
-            if attr.startswith('_') or attr in ('name', 'children'):
-                continue
-            try:
-                val = getattr(node, attr)
-            except Exception:
-                continue
-            if isinstance(val, list) and val:
-                for c in val:
-                    if c is None:
-                        continue
-                    cid = uid(c)
-                    dot.node(cid, label_of(c))
-                    dot.edge(nid, cid)
-                    add(c)
-            elif hasattr(val, 'name'):
-                cid = uid(val)
-                dot.node(cid, label_of(val))
-                dot.edge(nid, cid)
-                add(val)
-
-    add(root)
-    outpath = filename
-    if not outpath.lower().endswith('.png'):
-        outpath = filename + '.png'
-    base = os.path.splitext(outpath)[0]
-    dot.render(base, format='png', cleanup=True)
-    return outpath
+    first = {}
+    queue = deque([(root, None, 0)])
+    drawn = 0
+    while queue:
+        node, parent, depth = queue.popleft()
+        nid = f"n{drawn}"
+        drawn += 1
+        n, s = size[id(node)], shape[id(node)]
+        kids = children_of(node)
+        if n >= min_repeat and s in first:
+            dot.node(nid, f"{label_of(node)}\n= above ({n} nodes)", style='dashed')
+            dot.edge(nid, first[s], style='dotted', constraint='false')
+        elif kids and (id(node) in collapse or (max_depth is not None and depth >= max_depth)
+                       or drawn + len(queue) + len(kids) > max_nodes):
+            dot.node(nid, f"{label_of(node)}\n+{n - 1} nodes", style='dashed')
+        else:
+            dot.node(nid, label_of(node))
+            if n >= min_repeat:
+                first[s] = nid
+            queue.extend((c, nid, depth + 1) for c in kids)
+        if parent is not None:
+            dot.edge(parent, nid)
+    return dot
+
+
+def shards(root):
+    # (suffix, subtree, depth limit, collapsed ids) for the outline (classes
+    # and members only), main and every method
+    if not hasattr(root, 'classes'):
+        return [('', root, None, ())]
+    out = [('', root, 2, {id(root.main)}), ('_main', root.main, None, ())]
+    for cls in root.classes:
+        for m in cls.method_decls:
+            out.append((f"_{cls.name}.{m.name}", m, None, ()))
+    return out
+
+
+def render(dot, base, fmt):
+    if fmt == 'dot':
+        dot.save(base + '.dot')
+        return base + '.dot'
+    dot.render(base, format=fmt, cleanup=True)
+    return f"{base}.{fmt}"
+
+
+def visualize_parse_tree(root, filename="output/parse_tree", fmt='png', max_depth=None,
+                         max_nodes=2000, min_repeat=8, shard=False):
+    # Path of the written file; with shard, the list of paths (outline first)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown tree format '{fmt}'")
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    base, ext = os.path.splitext(filename)
+    if ext.lower().lstrip('.') not in FORMATS:
+        base = filename
+
+    if not shard:
+        return render(build_graph(root, max_depth, max_nodes, min_repeat), base, fmt)
+
+    measured = measure(root)
+    paths = []
+    for suffix, node, depth, collapse in shards(root):
+        if depth is None or (max_depth is not None and max_depth < depth):
+            depth = max_depth
+        dot = build_graph(node, depth, max_nodes, min_repeat, measured, collapse)
+        paths.append(render(dot, base + suffix, fmt))
+    return paths
@@ -1,15 +1,16 @@
 # main.py
+import argparse
+import json
 import os
 import sys
 import traceback
 
-from compiler.lexer import build_lexer
-from compiler.parser import build_parser
-from compiler.semantic.analyzer import SemanticAnalyzer
-from compiler.codegen.intermediate import IRGenerator
-from compiler.codegen.x86 import X86StyleGenerator
-from compiler.utils.tree_visualizer import visualize_parse_tree
-from compiler.utils.errors import CompilerError, error_message
+from compiler.driver import PARSER_BACKENDS, RUN_TIMEOUT, RUNTIMES, TARGETS, compile_source
+from compiler.passes import DEFAULT_LEVEL, PASSES, PIPELINES, PassStats
+from compiler.codegen.report import diff_reports, format_diff, format_report
+from compiler.codegen.tac_interp import run_tac as run_tac_program
+from compiler.utils.errors import ExecutionError
+from compiler.utils.tree_visualizer import FORMATS as TREE_FORMATS, visualize_parse_tree
 
 def print_ast(node, depth=0, max_depth=6):
     prefix = "  " * depth
@@ -47,72 +48,72 @@ def print_ast(node, depth=0, max_depth=6):
             print(prefix + f"  .{attr} ->")
             print_ast(val, depth+1, max_depth)
 
-def compile_file(java_file_path):
+def compile_file(java_file_path, parser_backend='ply', output_dir="output",
+                 run_tac=False, profile=False, target='x86', runtime='buffered', jobs=1,
+                 tree_format='png', tree_options=None, optimize=False, pass_stats=False,
+                 quality_report=False, via_tac=False, emit='asm', run=False,
+                 run_timeout=RUN_TIMEOUT):
+    # Thin CLI wrapper around compiler.driver.compile_source: prints the phase
+    # banners and writes every artifact to output_dir. Returns 1 when the
+    # program it runs stops with a runtime error.
     try:
         if not os.path.isfile(java_file_path):
             print(f"Error: File '{java_file_path}' does not exist.")
             return
 
         base_name = os.path.splitext(os.path.basename(java_file_path))[0]
-        output_dir = "output"
         os.makedirs(output_dir, exist_ok=True)
 
         print(f"--- Compiling {java_file_path} ---")
         with open(java_file_path, 'r', encoding='utf-8') as f:
             source_code = f.read()
 
-        parser, lexer = build_parser()
+        stats = PassStats()
+        result = compile_source(source_code, name=base_name, parser=parser_backend, target=target,
+                                runtime=runtime, jobs=jobs, optimize=optimize, hooks=[stats],
+                                direct=not via_tac)
 
-        # Tokens (fresh lexer)
-        
-        lexer.input(source_code)
-        tokens_out = []
+        def report(phase):
+            for d in result.diagnostics:
+                if d['phase'] == phase:
+                    print(d['message'])
+
+        # Tokens
         print("--- 1. Lexical Tokens ---")
-        for tok in lexer:
-            tokens_out.append(str(tok))
+        tokens_text = result.tokens_text()
+        report('lex')
         print("-------------------------")
-
-        # Save tokens to file (same basename as test file)
-        base_name = os.path.splitext(os.path.basename(java_file_path))[0]
-        output_dir = "output"
-        os.makedirs(output_dir, exist_ok=True)
-
-        # Write tokens to file
         tokens_path = os.path.join(output_dir, f"{base_name}_tokens.txt")
         with open(tokens_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(tokens_out))
+            f.write(tokens_text)
         print(f"Tokens saved to {tokens_path}")
         print("----------------------------\n")
 
         # Parsing
         print("--- 2. Parsing (Syntax Analysis) ---")
-        try:
-            ast = parser.parse(source_code, lexer=lexer)
-        except CompilerError as e:
-            print(error_message(e))
-            return
-        except Exception as e:
-            print("Parsing raised an unexpected exception:")
-            traceback.print_exc()
-            return
-
+        ast = result.ast
+        report('parse')
         if ast is None:
-            print("Parser returned None (no AST). Stopping.")
+            print("Stopping.")
             return
 
-        # Visualize parse tree -> saves to output/<base_name>.png
+        # Visualize parse tree -> saves to <output_dir>/<base_name>.<tree_format>
         tree_image_path = os.path.join(output_dir, f"{base_name}")
         try:
-            png_path = visualize_parse_tree(ast, tree_image_path)
-            print(f"Parse tree saved to {png_path}")
+            if tree_format != 'none':
+                paths = visualize_parse_tree(ast, tree_image_path, fmt=tree_format,
+                                             **(tree_options or {}))
+                if isinstance(paths, list):
+                    print(f"Parse tree saved to {len(paths)} files ({paths[0]}, ...)")
+                else:
+                    print(f"Parse tree saved to {paths}")
         except Exception:
             print("Warning: Could not generate parse tree image; stacktrace follows:")
             traceback.print_exc()
 
         # Semantic analysis
         print("\n--- 3. Semantic Analysis ---")
-        semantic = SemanticAnalyzer()
-        errors = semantic.analyze(ast)
+        errors = result.semantic_errors
         if errors:
             print("Semantic errors found:")
             for err in errors:
@@ -123,41 +124,215 @@ def compile_file(java_file_path):
 
         # IR / TAC generation
         print("--- 4. IR (TAC) Generation ---")
-        ir_gen = IRGenerator()
-        tac = ir_gen.visit(ast)
-        if tac is None:
-            print("IR generator returned None (expected list). Stopping.")
-            return
-
-        # Save TAC
-        tac_output_path = os.path.join(output_dir, f"{base_name}_tac.txt")
-        with open(tac_output_path, 'w', encoding='utf-8') as f:
-            for instr in tac:
-                f.write(str(instr) + "\n")
-        print(f"TAC saved to {tac_output_path}")
+        if result.direct and not (run_tac or profile):
+            # Unoptimized 32-bit code comes straight from the AST
+            print("Skipped: -O0 generates assembly from the AST (--via-tac writes the TAC)")
+        else:
+            tac_text = result.tac_text()
+            if tac_text is None:
+                print("IR generator returned None (expected list). Stopping.")
+                return
+            tac_output_path = os.path.join(output_dir, f"{base_name}_tac.txt")
+            with open(tac_output_path, 'w', encoding='utf-8') as f:
+                f.write(tac_text)
+            print(f"TAC saved to {tac_output_path}")
         print("-----------------------------\n")
 
         # x86 generation
-        print("--- 5. x86-Style Code Generation ---")
-        x86 = X86StyleGenerator()
-        asm = x86.generate(tac)
-        asm_output_path = os.path.join(output_dir, f"{base_name}.asm")
-        with open(asm_output_path, 'w', encoding='utf-8') as f:
-            f.write(asm)
-        print(f"x86-style assembly saved to {asm_output_path}")
+        if target == 'x86_64':
+            print("--- 5. x86-64 (System V) Code Generation ---")
+        else:
+            print("--- 5. x86-Style Code Generation ---")
+        if emit == 'obj':
+            # Encoded in process; no assembly text is produced
+            obj_output_path = os.path.join(output_dir, f"{base_name}.o")
+            with open(obj_output_path, 'wb') as f:
+                f.write(result.obj)
+            print(f"ELF32 object saved to {obj_output_path}")
+        else:
+            asm_output_path = os.path.join(output_dir, f"{base_name}.asm")
+            with open(asm_output_path, 'w', encoding='utf-8') as f:
+                f.write(result.asm)
+            print(f"{'x86-64' if target == 'x86_64' else 'x86-style'} assembly saved to {asm_output_path}")
         print("-------------------------------\n")
 
+        if quality_report and result.report is not None:
+            print("--- Code quality report ---")
+            print(format_report(result.report))
+            report_path = os.path.join(output_dir, f"{base_name}_report.json")
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(result.report, f, indent=1)
+            print(f"Report saved to {report_path}")
+            print("---------------------------\n")
+
+        if pass_stats:
+            print("--- Pass statistics ---")
+            print(stats.format())
+            print("-----------------------\n")
+
+        if run:
+            print("--- Running x86-64 code in process ---")
+            try:
+                res = result.run(timeout=run_timeout)
+            except ExecutionError as e:
+                sys.stdout.write(e.stdout)
+                print(f"Runtime error: {e}")
+                return 1
+            except RuntimeError as e:
+                print(f"Cannot run: {e}")
+            else:
+                sys.stdout.write(res.stdout)
+                if res.status:
+                    print(f"Exit status {res.status}")
+            print("--------------------------------------\n")
+
+        if run_tac or profile:
+            print("--- Running TAC ---")
+            try:
+                res = run_tac_program(result.tac)
+            except ExecutionError as e:
+                sys.stdout.write(e.stdout)
+                print(f"Runtime error: {e}")
+                return 1
+            sys.stdout.write(res.stdout)
+            if profile:
+                print("--- Block profile (hottest first) ---")
+                print(res.format_profile())
+            print("-------------------\n")
+
     except Exception:
         print("Unexpected compiler error:")
         traceback.print_exc()
 
+def bare_optimize(argv):
+    # A bare -O (or --optimize) means the default level: the level is only
+    # read as part of the flag (-O2, --optimize=2), so "-O Foo.java" still
+    # names the source file
+    out = list(argv)
+    for i, arg in enumerate(out):
+        if arg == '--':
+            break
+        if arg in ('-O', '--optimize'):
+            out[i] = f"-O{DEFAULT_LEVEL}"
+    return out
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="MiniJava Compiler (x86 backend)")
+    ap.add_argument("source", nargs="?", help="MiniJava (.java) source file")
+    ap.add_argument("--parser", choices=PARSER_BACKENDS, default=None,
+                    help="parser backend: PLY LALR tables or hand-written recursive descent "
+                         "(default: ply; rd with --jobs, which needs it)")
+    ap.add_argument("--target", choices=TARGETS, default=None,
+                    help="x86: 32-bit x86-style output (default); x86_64: NASM for the System V "
+                         "x86-64 ABI (default with --run)")
+    ap.add_argument("--print-runtime", choices=RUNTIMES, default="buffered",
+                    help="println on the x86 target: emitted buffered runtime or libc printf")
+    ap.add_argument("-j", "--jobs", type=int, default=1,
+                    help="check and lower methods in N worker processes (0: one per CPU)")
+    ap.add_argument("-O", "--optimize", type=int, default=0,
+                    choices=sorted(PIPELINES), metavar="LEVEL",
+                    help=f"optimization level: -O0 none, -O1 constant/copy propagation, "
+                         f"-O2 also inlining and bounds-check elimination, "
+                         f"-O3 also partial evaluation (-O: -O{DEFAULT_LEVEL})")
+    ap.add_argument("--emit", choices=("asm", "obj"), default="asm",
+                    help="asm: NASM source; obj: ELF32 object encoded in process, without "
+                         "an assembler (x86 target)")
+    ap.add_argument("--via-tac", action="store_true",
+                    help="at -O0, generate 32-bit code from TAC instead of straight from the AST")
+    ap.add_argument("--passes", default=None, metavar="NAMES",
+                    help="run these comma-separated passes in this order instead of a level")
+    ap.add_argument("--list-passes", action="store_true",
+                    help="list the available passes and the pipeline of each level")
+    ap.add_argument("--pass-stats", action="store_true",
+                    help="print time, IR size before/after and changes of every pass")
+    ap.add_argument("--report", action="store_true",
+                    help="analyze the 32-bit code (instruction classes, spills, loop branches, "
+                         "estimated cycles) and save the report as JSON")
+    ap.add_argument("--diff-report", nargs=2, metavar=("OLD", "NEW"),
+                    help="compare two saved reports; exit status 1 on a regression")
+    ap.add_argument("--threshold", type=float, default=0.0,
+                    help="relative rise a --diff-report metric may take before it counts "
+                         "as a regression (0.01: 1%%)")
+    ap.add_argument("-o", "--output-dir", default="output", help="directory for generated files")
+    ap.add_argument("--tree", choices=TREE_FORMATS + ('none',), default="png",
+                    help="parse tree output: Graphviz png/svg, plain .dot source, or none")
+    ap.add_argument("--tree-depth", type=int, default=None,
+                    help="draw the parse tree down to this depth; deeper subtrees are summarized")
+    ap.add_argument("--tree-max-nodes", type=int, default=2000,
+                    help="node budget per parse tree drawing")
+    ap.add_argument("--tree-shard", action="store_true",
+                    help="write the program outline, main and each method to separate files")
+    ap.add_argument("--run", action="store_true",
+                    help="encode the x86-64 code into executable memory and run it inside the "
+                         "compiler process, without an assembler or linker")
+    ap.add_argument("--run-timeout", type=float, default=RUN_TIMEOUT, metavar="SECONDS",
+                    help="stop a --run program after this many seconds (0: no limit)")
+    ap.add_argument("--run-tac", action="store_true",
+                    help="execute the generated TAC with the interpreter and show its output")
+    ap.add_argument("--profile", action="store_true",
+                    help="like --run-tac, and also print per-block execution counts")
+    ap.add_argument("--serve", action="store_true",
+                    help="run as a compile server speaking JSON lines (stdin/stdout unless --socket)")
+    ap.add_argument("--socket", metavar="PATH", help="Unix socket path for --serve")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="worker processes for --serve (default: CPU count)")
+    args = ap.parse_args(bare_optimize(sys.argv[1:] if argv is None else argv))
+    if args.target is None:
+        args.target = 'x86_64' if args.run else 'x86'
+    if args.run and args.target != 'x86_64':
+        ap.error("--run needs --target=x86_64")
+    if args.emit == 'obj' and args.target != 'x86':
+        ap.error("--emit=obj needs --target=x86")
+    # Method-by-method builds parse each method on its own, which only the
+    # recursive-descent parser can do
+    if args.parser is None:
+        args.parser = 'ply' if args.jobs == 1 else 'rd'
+    if args.jobs != 1 and args.parser != 'rd':
+        ap.error("--jobs needs --parser=rd")
+    return args
+
+def list_passes():
+    for p in PASSES.values():
+        deps = "".join([f"; requires {', '.join(p.requires)}" if p.requires else "",
+                        f"; invalidates {', '.join(p.invalidates)}" if p.invalidates else ""])
+        print(f"{p.name:<10} {p.level:<4} {p.doc}{deps}")
+    for level, names in PIPELINES.items():
+        print(f"-O{level}: {', '.join(names) or '(none)'}")
+
+def diff_report_files(old_path, new_path, threshold=0.0):
+    reports = []
+    for path in (old_path, new_path):
+        with open(path, 'r', encoding='utf-8') as f:
+            reports.append(json.load(f))
+    diff = diff_reports(*reports, threshold=threshold)
+    print(format_diff(diff))
+    return 1 if diff['regressions'] else 0
+
 def main():
+    args = parse_args()
+    if args.serve:
+        # stdout carries the protocol in stdio mode, so no banner here
+        from compiler.server import serve
+        serve(socket_path=args.socket, workers=args.workers)
+        return
+    if args.list_passes:
+        list_passes()
+        return
+    if args.diff_report:
+        sys.exit(diff_report_files(*args.diff_report, threshold=args.threshold))
     print("=== MiniJava Compiler (x86 backend) ===")
-    if len(sys.argv) > 1:
-        java_file_path = sys.argv[1]
-    else:
+    java_file_path = args.source
+    if not java_file_path:
         java_file_path = input("Enter the path to the MiniJava (.java) source file: ").strip()
-    compile_file(java_file_path)
+    status = compile_file(java_file_path, parser_backend=args.parser, output_dir=args.output_dir,
+                 run_tac=args.run_tac, profile=args.profile, target=args.target,
+                 runtime=args.print_runtime, jobs=args.jobs or None, tree_format=args.tree,
+                 tree_options={'max_depth': args.tree_depth, 'max_nodes': args.tree_max_nodes,
+                               'shard': args.tree_shard},
+                 optimize=args.passes.split(',') if args.passes else args.optimize,
+                 pass_stats=args.pass_stats, quality_report=args.report, via_tac=args.via_tac,
+                 emit=args.emit, run=args.run, run_timeout=args.run_timeout or None)
+    sys.exit(status)
 
 if __name__ == "__main__":
     main()